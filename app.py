@@ -12,206 +12,89 @@ CHANGELOG v9:
 """
 
 import streamlit as st
-import anthropic
 import re
 from pathlib import Path
 import sys
 import copy
+import functools
+import importlib.util
 import json
 import math
-import pandas as pd
-from io import BytesIO
-
-# Optional mapping dependencies
-try:
-    import folium
-    from streamlit_folium import st_folium
-    FOLIUM_AVAILABLE = True
-except ImportError:
-    FOLIUM_AVAILABLE = False
-
-try:
-    import mgrs as mgrs_lib
-    MGRS_AVAILABLE = True
-except ImportError:
-    MGRS_AVAILABLE = False
+import os
+import secrets
+import time
+import numpy as np
+
+# Heavy dependencies are imported where first used, so a cold start and a new
+# session's first paint don't pay for them: anthropic (first model call),
+# pandas (uploads and result tables), folium / streamlit_folium (a map with
+# units) and mgrs (first MGRS conversion). Optional ones are only probed here.
+FOLIUM_AVAILABLE = all(importlib.util.find_spec(name) for name in ("folium", "streamlit_folium"))
+MGRS_AVAILABLE = importlib.util.find_spec("mgrs") is not None
 
 sys.path.insert(0, str(Path(__file__).parent))
-from prompts.system_prompt import get_system_prompt_with_context
+from prompts.system_prompt import (REDUCED_BLOCKS, REDUCED_REFERENCES, REFERENCE_EXCERPT_CHARS,
+                                   get_reduced_system_prompt, get_system_prompt_with_context, prompt_blocks)
+from fires import geodesy
+from fires.catalog import WeaponsCatalog, load_catalog
+from fires import allocation, ammo_commands, bda, pairing, timeline, weaponeering
+from fires import red_ledger, salvo
+from fires.salvo import hughes_salvo_calc, nmesis_alpha
+from fires.presets import ADVERSARY_NAMES, ADVERSARY_PRESETS, LOADOUT_NAMES, LOADOUT_PRESETS
+from services.session_store import SessionStore, PERSISTED_KEYS
+from services import classroom
+from services.classroom import ClassroomHub, Scenario, TeamOverlay
+from services.api_scheduler import QueueTimeout, RequestScheduler
+from services.answer_cache import AnswerCache
+from services.references import ReferenceRegistry
+from services.metrics import MetricsLog, TurnMetrics, prompt_breakdown, prompt_template_sha
+from services import answer_cache, export, router
 
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
-MODEL = "claude-sonnet-4-20250514"
+MODEL = "claude-sonnet-4-20250514"             # large tier: calculations and fires plans
 MAX_TOKENS = 4096
+FAST_MODEL = "claude-3-5-haiku-20241022"        # fast tier: lookups and bookkeeping, reduced prompt
+FAST_MAX_TOKENS = 1024
+MODEL_TIERS = {
+    "fast": router.Tier("fast", FAST_MODEL, FAST_MAX_TOKENS, reduced_prompt=True),
+    "large": router.Tier("large", MODEL, MAX_TOKENS),
+}
 DEFAULT_MAP_CENTER = [15.0, 115.0]
 DEFAULT_MAP_ZOOM = 5
+CHAT_WINDOW_TURNS = 10          # Turns (user + assistant) rendered before "load earlier"
 
-# =============================================================================
-# LOADOUT PRESETS
-# Scaled to match Pacific Guard EDL and Blue Threat Guide
-# NOTE: LRASM is NOT included in ship loadouts — aircraft-launched only
-# =============================================================================
-LOADOUT_PRESETS = {
-    "Default (Planning)": {
-        "HIMARS Battery (6x)": {
-            "GMLRS": {"initial": 108, "expended": 0},
-            "ATACMS": {"initial": 12, "expended": 0},
-            "PrSM": {"initial": 24, "expended": 0},
-        },
-        "M777 Battery (6x)": {
-            "155mm HE": {"initial": 600, "expended": 0},
-            "Excalibur": {"initial": 36, "expended": 0},
-            "ILLUM": {"initial": 60, "expended": 0},
-            "Smoke": {"initial": 60, "expended": 0},
-        },
-        "DDG (NSFS)": {
-            "5\" Rounds": {"initial": 600, "expended": 0},
-            "TLAM": {"initial": 24, "expended": 0},
-            "SM-6": {"initial": 12, "expended": 0},
-        },
-        "Mortar Plt (4x)": {
-            "120mm HE": {"initial": 200, "expended": 0},
-        },
-    },
-    "Pacific Guard — EDL Scaled": {
-        # 2x HIMARS launchers per EDL
-        "HIMARS (2x Launchers)": {
-            "GMLRS": {"initial": 36, "expended": 0},
-            "ATACMS": {"initial": 4, "expended": 0},
-            "PrSM": {"initial": 8, "expended": 0},
-        },
-        # 4x M777 per FA section
-        "M777 FA Section (4x)": {
-            "155mm HE": {"initial": 400, "expended": 0},
-            "Excalibur": {"initial": 24, "expended": 0},
-            "ILLUM": {"initial": 40, "expended": 0},
-            "Smoke": {"initial": 40, "expended": 0},
-        },
-        "Mortar Plt (4x)": {
-            "120mm HE": {"initial": 200, "expended": 0},
-        },
-    },
-    "Pacific Guard — DESRON SAG": {
-        # Source: AY26 Blue Threat Guide / DESRON missile counts document
-        # CG (Ticonderoga-class) — DESRON Flagship
-        "Blue CG (DESRON Flag)": {
-            "Harpoon": {"initial": 8, "expended": 0},
-            "Mk 46/54 Torpedo": {"initial": 6, "expended": 0},
-            "Hellfire (MH-60)": {"initial": 16, "expended": 0},
-            "SM-2 Block IIIB": {"initial": 72, "expended": 0},   # Top 6 cells = 72
-            "SM-6 Block Ia": {"initial": 24, "expended": 0},      # Bottom 3 cells = 24
-            "TLAM Block E": {"initial": 16, "expended": 0},       # 16 (+8 reserve)
-            "TLAM Maritime Strike (MST)": {"initial": 8, "expended": 0},  # 8 (+4 reserve)
-        },
-        # DDG-53 (Arleigh Burke Flight II)
-        "Blue DDG-53": {
-            "Harpoon": {"initial": 8, "expended": 0},
-            "SM-2 Block IIIB": {"initial": 24, "expended": 0},
-            "SM-6 Block Ia": {"initial": 32, "expended": 0},
-            "TLAM Block E": {"initial": 24, "expended": 0},
-            "TLAM Maritime Strike (MST)": {"initial": 8, "expended": 0},
-            "Hellfire (MH-60)": {"initial": 16, "expended": 0},
-        },
-        # LCS-14 (Freedom-variant)
-        "Blue LCS-14": {
-            "NSM": {"initial": 8, "expended": 0},
-            "Hellfire (SUW)": {"initial": 24, "expended": 0},
-            "MH-60R Hellfire": {"initial": 8, "expended": 0},
-        },
-        # LCS-10 (Independence-variant)
-        "Blue LCS-10": {
-            "NSM": {"initial": 8, "expended": 0},
-            "Hellfire (SUW)": {"initial": 24, "expended": 0},
-            "MH-60R Hellfire": {"initial": 8, "expended": 0},
-        },
-        # 3D MLR NMESIS — 36 NSM primary + 36 RSS (Remotely Stationed System)
-        "3D MLR NMESIS (Primary)": {
-            "NSM": {"initial": 36, "expended": 0},
-        },
-        "3D MLR NMESIS (RSS)": {
-            "NSM": {"initial": 36, "expended": 0},
-        },
-    },
-    "RCT w/ Reinforcing Fires": {
-        "HIMARS Battery (6x)": {
-            "GMLRS": {"initial": 108, "expended": 0},
-            "ATACMS": {"initial": 12, "expended": 0},
-        },
-        "M777 Battery (6x)": {
-            "155mm HE": {"initial": 600, "expended": 0},
-            "Excalibur": {"initial": 36, "expended": 0},
-        },
-        "Mortar Plt (4x)": {
-            "120mm HE": {"initial": 200, "expended": 0},
-        },
-        "DDG (NSFS)": {
-            "5\" Rounds": {"initial": 600, "expended": 0},
-            "TLAM": {"initial": 24, "expended": 0},
-        },
-        "OPF-M (7x JLTVs)": {
-            "Hero-120": {"initial": 56, "expended": 0},
-        },
-    },
-}
+# Process-wide API limits shared by every session (classroom bursts)
+API_MAX_CONCURRENCY = 4
+API_REQUESTS_PER_MIN = 50
+API_INPUT_TOKENS_PER_MIN = 40000
+API_MAX_RETRIES = 4
+MAX_TOOL_ROUNDS = 4             # Local tool calls the model may chain per turn
 
-# =============================================================================
-# ADVERSARY PRESETS
-# =============================================================================
-ADVERSARY_PRESETS = {
-    "Olvana (Chinese-type)": {
-        "naval": {
-            "Type 055 (Renhai CG)": {"alpha": 6.0, "y": 8, "b": 3},
-            "Type 052D (Luyang III DDG)": {"alpha": 4.0, "y": 6, "b": 2},
-            "Type 054A (Jiangkai II FFG)": {"alpha": 3.0, "y": 4, "b": 2},
-            "Type 056 (Jiangdao Corvette)": {"alpha": 2.0, "y": 2, "b": 1},
-            "Type 022 (Houbei FAC)": {"alpha": 2.0, "y": 1, "b": 1},
-        },
-        "systems": {
-            "ADA": ["HQ-9 (200km)", "HQ-16 (40km)", "HQ-7 (15km)", "PGZ-07 35mm SPAAG",
-                    "LD-2000 CIWS", "HQ-17A (20km mobile)", "HQ-22 (170km)"],
-            "IDF": ["PLZ-05 155mm SPH", "PCL-181 155mm Truck", "PHL-03 300mm MLRS",
-                    "PHL-16 370mm MLRS"],
-            "Armor": ["Type 99A MBT", "Type 96A MBT", "ZBD-04A IFV", "ZBL-08 APC",
-                      "ZTD-05 Amphib Tank"],
-            "Coastal": ["YJ-62 (400km ASCM)", "YJ-18 (500km ASCM)", "CM-802AKG shore battery"],
-            "ISR/C2": ["MMRC-M (Radar)", "KJ-500 AEW", "WZ-8 Recon UAV", "CEC/CTN"],
-        }
-    },
-    "Ariana (Iranian-type)": {
-        "naval": {
-            "Frigate": {"alpha": 2.0, "y": 2, "b": 2},
-            "Corvette": {"alpha": 1.5, "y": 1, "b": 1},
-            "Fast Attack Craft": {"alpha": 2.0, "y": 0, "b": 1},
-        },
-        "systems": {
-            "ADA": ["SA-15 Tor (12km)", "SA-6 Gainful (24km)", "ZU-23-2 AAA", "Shahab SAM"],
-            "IDF": ["2S19 Msta 152mm SPH", "D-30 122mm Howitzer", "Fajr-5 333mm MRL"],
-            "Armor": ["T-90 MBT", "T-72 MBT", "BMP-2 IFV", "BTR-80 APC"],
-            "Coastal": ["Noor ASCM (120km)", "Qader ASCM (200km)"],
-            "ISR/C2": ["Radar sites", "C2 nodes"],
-        }
-    },
-}
+# Shared answer cache (per server process)
+ANSWER_CACHE_MAX_ENTRIES = 512
+ANSWER_CACHE_TTL_S = 3600
 
 # =============================================================================
 # REFERENCE DOCUMENT LOADING
 # =============================================================================
-@st.cache_data(show_spinner=False)
-def load_reference_docs():
-    """Load weapons reference and Hughes model from project files."""
-    weapons_ref = ""
-    hughes_model = ""
+@st.cache_resource(show_spinner=False)
+def get_references() -> ReferenceRegistry:
+    """Weapons, Hughes and doctrine references from data/, read and validated once per process."""
+    return ReferenceRegistry()
 
-    weapons_path = Path("/mnt/project/weapons_reference_v2.md")
-    if weapons_path.exists():
-        weapons_ref = weapons_path.read_text(encoding="utf-8", errors="replace")
 
-    hughes_path = Path("/mnt/project/hughes_salvo_model.md")
-    if hughes_path.exists():
-        hughes_model = hughes_path.read_text(encoding="utf-8", errors="replace")
-
-    return weapons_ref, hughes_model
+@st.cache_resource(show_spinner=False)
+def get_weapons_catalog() -> WeaponsCatalog | None:
+    """Structured catalog compiled from the weapons reference (cached by content hash)."""
+    path = get_references().path("weapons")
+    if path is None:
+        return None
+    try:
+        return load_catalog(path)
+    except OSError:
+        return None
 
 
 # =============================================================================
@@ -220,11 +103,11 @@ def load_reference_docs():
 def parse_ammo_updates(response_text: str) -> list[dict]:
     """
     Parse AMMO_UPDATE blocks from AI response.
-    Handles both EXPENDED and REMAINING formats.
+    Handles EXPENDED, REMAINING and RESUPPLY formats.
     Returns list of {asset, munition, expended} dicts.
     """
     updates = []
-    pattern = r"AMMO_UPDATE:\s*\nASSET:\s*(.+)\nMUNITION:\s*(.+)\n(EXPENDED|REMAINING):\s*(\d+)"
+    pattern = r"AMMO_UPDATE:\s*\nASSET:\s*(.+)\nMUNITION:\s*(.+)\n(EXPENDED|REMAINING|RESUPPLY):\s*(\d+)"
     matches = re.finditer(pattern, response_text, re.IGNORECASE)
 
     for m in matches:
@@ -279,6 +162,10 @@ def apply_ammo_updates(ammo_status: dict, updates: list[dict]) -> dict:
         elif update_type == "REMAINING":
             # value is what remains — back-calculate expended
             new_expended = max(0, initial - value)
+        elif update_type == "RESUPPLY":
+            # value is rounds received — refill expended first, any excess raises the load
+            new_expended = max(0, current_expended - value)
+            updated[matched_asset][matched_munition]["initial"] = initial + max(0, value - current_expended)
         else:
             continue
 
@@ -353,6 +240,7 @@ def parse_uploaded_document(uploaded_file) -> tuple[str, str]:
 
     if filename.endswith((".xlsx", ".xls")):
         try:
+            import pandas as pd
             df_dict = pd.read_excel(uploaded_file, sheet_name=None)
             parts = []
             for sheet_name, df in df_dict.items():
@@ -392,16 +280,38 @@ def parse_uploaded_document(uploaded_file) -> tuple[str, str]:
     return doc_type, content[:6000]  # Cap at 6000 chars to manage context
 
 
+def parse_target_list_upload(uploaded_file) -> list[dict]:
+    """
+    Structured target rows from a TLWS/HPTL workbook (first sheet with target
+    columns). Unlike the prompt text, this keeps every row for batch weaponeering.
+    """
+    if not uploaded_file.name.lower().endswith((".xlsx", ".xls")):
+        return []
+    try:
+        uploaded_file.seek(0)
+        targets = weaponeering.read_target_workbook(uploaded_file)
+    except Exception:
+        return []
+    finally:
+        uploaded_file.seek(0)
+    return [vars(t) for t in targets]
+
+
 # =============================================================================
 # MAPPING
 # =============================================================================
+@functools.lru_cache(maxsize=1)
+def _mgrs_converter():
+    import mgrs
+    return mgrs.MGRS()
+
+
 def mgrs_to_latlon(mgrs_str: str) -> tuple[float, float] | None:
     """Convert MGRS string to (lat, lon). Returns None if conversion fails."""
     if not MGRS_AVAILABLE:
         return None
     try:
-        m = mgrs_lib.MGRS()
-        lat, lon = m.toLatLon(mgrs_str.replace(" ", "").encode())
+        lat, lon = _mgrs_converter().toLatLon(mgrs_str.replace(" ", "").encode())
         return float(lat), float(lon)
     except Exception:
         return None
@@ -414,6 +324,7 @@ def build_tactical_map(units: list[dict], center: list = None, zoom: int = None)
     """
     if not FOLIUM_AVAILABLE:
         return None
+    import folium
 
     map_center = center or DEFAULT_MAP_CENTER
     map_zoom = zoom or DEFAULT_MAP_ZOOM
@@ -470,31 +381,445 @@ def build_tactical_map(units: list[dict], center: list = None, zoom: int = None)
 
 
 # =============================================================================
-# HUGHES SALVO CALCULATOR
+# SESSION PERSISTENCE
 # =============================================================================
-def hughes_salvo_calc(
-    alpha: float, A: int,
-    beta: float, B: int,
-    y: float, z: float,
-    a: float, b: float,
-) -> dict:
-    """Run one salvo exchange and return results dict."""
-    blue_missiles = alpha * A
-    red_missiles = beta * B
-    blue_missiles_through = max(0.0, blue_missiles - y * B)
-    red_missiles_through = max(0.0, red_missiles - z * A)
-    delta_B = blue_missiles_through / b
-    delta_A = red_missiles_through / a
-    return {
-        "blue_missiles_fired": blue_missiles,
-        "red_missiles_fired": red_missiles,
-        "blue_missiles_through_defense": blue_missiles_through,
-        "red_missiles_through_defense": red_missiles_through,
-        "delta_B": delta_B,
-        "delta_A": delta_A,
-        "B_remaining": max(0, B - delta_B),
-        "A_remaining": max(0, A - delta_A),
-    }
+@st.cache_resource(show_spinner=False)
+def get_session_store() -> SessionStore:
+    """One SQLite-backed store per server process, shared by all sessions."""
+    return SessionStore()
+
+
+def session_scope() -> str:
+    """Saved-session scope: the classroom code and team this session belongs to ('' when not joined)."""
+    membership = st.session_state.get("classroom")
+    return f"{membership['code']}/{membership['team']}" if membership else ""
+
+
+def owner_token() -> str:
+    """
+    Per-browser secret that owns this browser's saved sessions. Kept in the URL
+    next to sid, so a bookmark resumes the session and a bare sid does not.
+    """
+    token = st.session_state.get("owner_token") or st.query_params.get("owner") or secrets.token_urlsafe(16)
+    st.session_state.owner_token = token
+    if st.query_params.get("owner") != token:
+        st.query_params["owner"] = token
+    return token
+
+
+def start_persistent_session(store: SessionStore, session_id: str | None = None):
+    """
+    Bind this browser session to a stored session.
+    Restores saved state and the newest page of chat history if session_id exists
+    and belongs to this browser's owner token; otherwise starts a new stored session.
+    """
+    owner = owner_token()
+    if session_id and not store.session_exists(session_id, owner):
+        if store.session_exists(session_id):
+            st.session_state.resume_refused = session_id
+        session_id = None
+    st.session_state.persisted_digests = {}
+    if session_id:
+        saved = store.load_state(session_id, st.session_state.persisted_digests)
+        for key in PERSISTED_KEYS:
+            if key in saved:
+                st.session_state[key] = saved[key]
+        total = store.message_count(session_id)
+        st.session_state.messages = store.load_messages(session_id)
+        st.session_state.history_offset = total - len(st.session_state.messages)
+        st.session_state.persisted_count = total
+    else:
+        session_id = store.create_session(scope=session_scope(), owner=owner)
+        st.session_state.history_offset = 0
+        st.session_state.persisted_count = 0
+
+    st.session_state.session_id = session_id
+    st.query_params["sid"] = session_id
+
+
+def persist_session(store: SessionStore):
+    """Append new chat turns and upsert changed state keys for the current session."""
+    session_id = st.session_state.session_id
+    offset = st.session_state.history_offset
+    messages = st.session_state.messages
+    persisted = st.session_state.persisted_count
+    total = offset + len(messages)
+
+    if total > persisted:
+        if persisted == 0:
+            first_user = next((m["content"] for m in messages if m["role"] == "user"), "")
+            store.set_label(session_id, first_user[:60])
+        store.append_messages(session_id, messages[persisted - offset:], persisted)
+        st.session_state.persisted_count = total
+
+    # Content digests of what was last written live in this session's state and go with it on reset
+    store.save_state(
+        session_id,
+        {key: st.session_state[key] for key in PERSISTED_KEYS if key in st.session_state},
+        st.session_state.setdefault("persisted_digests", {}),
+    )
+    scope = session_scope()
+    if st.session_state.get("persisted_scope") != scope:
+        store.set_scope(session_id, scope)
+        st.session_state.persisted_scope = scope
+    log_ledger_changes(store)
+
+
+def log_ledger_changes(store: SessionStore):
+    """Append an event per ledger line changed since the last run, tagged with what changed it."""
+    source = st.session_state.pop("ledger_source", "manual")
+    logged = st.session_state.get("ledger_logged")
+    current = {"blue": st.session_state.get("ammo_status", {}), "red": st.session_state.get("red_ledger", {})}
+    if logged is not None:
+        events = [e for side in current for e in export.ledger_diff(logged[side], current[side], side, source)]
+        store.append_events(st.session_state.session_id, export.LEDGER_EVENT, events)
+    if logged != current:
+        st.session_state.ledger_logged = copy.deepcopy(current)
+
+
+def record_event(kind: str, payload: dict):
+    """Append a salvo run (or other analysis) to this session's event log for the after-action export."""
+    if "session_id" in st.session_state:
+        get_session_store().append_events(st.session_state.session_id, kind, [payload])
+
+
+def load_earlier_history(store: SessionStore):
+    """Prepend the previous page of stored chat history."""
+    offset = st.session_state.history_offset
+    page = store.load_messages(st.session_state.session_id, before_seq=offset)
+    st.session_state.messages = page + st.session_state.messages
+    st.session_state.history_offset = offset - len(page)
+
+
+def render_saved_sessions_sidebar(store: SessionStore):
+    """Render the saved-session picker in the sidebar."""
+    scope = session_scope()
+    sessions = [s for s in store.list_sessions(owner_token(), scope)
+                if s["session_id"] != st.session_state.session_id]
+    with st.sidebar.expander("💾 Saved Sessions"):
+        refused = st.session_state.pop("resume_refused", None)
+        if refused:
+            st.warning(f"Session `{refused}` belongs to another browser — started a new session instead.")
+        st.caption(f"Current session: `{st.session_state.session_id}` (bookmark this page URL — it carries "
+                   "this browser's session key)")
+        if not sessions:
+            st.caption(f"No other saved sessions for team {scope}." if scope else "No other saved sessions.")
+            return
+        labels = {
+            s["session_id"]: f"{s['label'] or s['session_id']} — {s['n_messages']} msgs"
+            for s in sessions
+        }
+        chosen = st.selectbox(
+            "Resume session", list(labels), format_func=labels.get, key="resume_session_select",
+        )
+        if st.button("Resume"):
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            start_persistent_session(store, chosen)
+            st.rerun()
+
+
+def render_export_sidebar(store: SessionStore):
+    """After-action export of the saved session, generated only when the download is clicked."""
+    with st.sidebar.expander("📤 After-Action Export"):
+        fmt = st.selectbox("Format", export.available_formats(), key="export_format",
+                           format_func={"xlsx": "Excel workbook (.xlsx)", "jsonl": "JSONL bundle (.zip)",
+                                        "parquet": "Parquet bundle (.zip)"}.get)
+        session_id = st.session_state.session_id
+        extension, mime = export.FORMATS[fmt]
+        st.caption(f"{store.message_count(session_id)} messages, "
+                   f"{store.event_count(session_id, export.LEDGER_EVENT)} ledger events")
+        # Deferred: the callable runs on its own thread when clicked, streaming from the session store
+        st.download_button(
+            "Download exercise record",
+            data=functools.partial(export.export_bytes, store, session_id, fmt),
+            file_name=f"fires_{session_id}_{time.strftime('%Y%m%d')}.{extension}",
+            mime=mime, key="export_download", on_click="ignore",
+        )
+
+
+# =============================================================================
+# API REQUEST SCHEDULING
+# =============================================================================
+@st.cache_resource(show_spinner=False)
+def get_api_scheduler() -> RequestScheduler:
+    """One scheduler per server process so limits apply across all sessions."""
+    return RequestScheduler(
+        max_concurrency=API_MAX_CONCURRENCY,
+        requests_per_min=API_REQUESTS_PER_MIN,
+        input_tokens_per_min=API_INPUT_TOKENS_PER_MIN,
+        max_retries=API_MAX_RETRIES,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def get_api_client() -> "anthropic.Anthropic":
+    """
+    Shared client; retries are handled by the scheduler, not the SDK.
+    FIRES_MOCK_LLM swaps in the offline stand-in (value: MockConfig spec or 1).
+    """
+    if os.environ.get("FIRES_MOCK_LLM"):
+        from services.mock_api import MockAnthropic, MockConfig
+        return MockAnthropic(MockConfig.from_spec(os.environ["FIRES_MOCK_LLM"]))
+    import anthropic
+    return anthropic.Anthropic(max_retries=0)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough input-token estimate (~4 characters per token)."""
+    return sum(len(t) for t in texts) // 4 + 1
+
+
+def call_model(system_prompt: str, messages: list[dict], on_wait=None, tools: list[dict] | None = None,
+               turn: TurnMetrics | None = None, tier: router.Tier | None = None):
+    """
+    Send one Messages API request through the process-wide scheduler.
+    Streams the response so time to first token can be measured; usage and
+    timings are folded into `turn` when given. `tier` picks the model and
+    token budget (default: the large tier).
+    """
+    client = get_api_client()
+    tier = tier or MODEL_TIERS["large"]
+    request = {"model": tier.model, "max_tokens": tier.max_tokens, "system": system_prompt, "messages": messages}
+    if tools:
+        request["tools"] = tools
+    timing = {}
+
+    def send():
+        sent = time.perf_counter()
+        timing["ttft"] = None
+        with client.messages.stream(**request) as stream:
+            for event in stream:
+                if timing["ttft"] is None and event.type == "content_block_delta":
+                    timing["ttft"] = time.perf_counter() - sent
+            response = stream.get_final_message()
+        timing["api"] = time.perf_counter() - sent
+        return response
+
+    submitted = time.perf_counter()
+    response = get_api_scheduler().submit(
+        st.session_state.session_id,
+        send,
+        est_tokens=estimate_tokens(system_prompt, *(str(m["content"]) for m in messages)),
+        on_wait=on_wait,
+    )
+    if turn is not None:
+        turn.record_call(response, timing["ttft"], timing["api"], time.perf_counter() - submitted)
+    return response
+
+
+def local_tools() -> dict:
+    """Tools the model may call, keyed by name: (schema, handler(params) -> str)."""
+    tools = {}
+    catalog = get_weapons_catalog()
+    if catalog is not None:
+        tools[pairing.PAIRING_TOOL["name"]] = (
+            pairing.PAIRING_TOOL,
+            lambda params: pairing.run_pairing_tool(params, st.session_state.ammo_status, catalog),
+        )
+    return tools
+
+
+def run_model_turn(system_prompt: str, messages: list[dict], on_wait=None,
+                   turn: TurnMetrics | None = None, tier: router.Tier | None = None) -> tuple[str, list[dict]]:
+    """
+    Call the model and execute any local tool calls it makes until it answers.
+    Returns the final text and a log of the tool calls made.
+    """
+    tools = local_tools()
+    schemas = [schema for schema, _ in tools.values()]
+    conversation = list(messages)
+    tool_log = []
+    for _ in range(MAX_TOOL_ROUNDS + 1):
+        response = call_model(system_prompt, conversation, on_wait, schemas, turn, tier)
+        if getattr(response, "stop_reason", None) != "tool_use":
+            break
+        results = []
+        for block in response.content:
+            if getattr(block, "type", "") != "tool_use":
+                continue
+            _, handler = tools.get(block.name, (None, None))
+            result = {"type": "tool_result", "tool_use_id": block.id}
+            if handler is None:
+                result.update(content=json.dumps({"error": f"unknown tool {block.name}"}), is_error=True)
+            else:
+                try:
+                    result["content"] = handler(block.input)
+                except Exception as e:      # a bad tool input must not end the chat turn
+                    result.update(content=json.dumps({"error": f"{type(e).__name__}: {e}"}), is_error=True)
+            tool_log.append({"name": block.name, "input": block.input})
+            results.append(result)
+        conversation += [
+            {"role": "assistant", "content": response.content},
+            {"role": "user", "content": results},
+        ]
+    text = "\n\n".join(b.text for b in response.content if getattr(b, "type", "text") == "text")
+    return text, tool_log
+
+
+@st.cache_resource(show_spinner=False)
+def get_answer_cache() -> AnswerCache:
+    """One answer cache per server process so the whole class shares it."""
+    return AnswerCache(max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl_s=ANSWER_CACHE_TTL_S)
+
+
+def answer_cache_key(query: str, reference_hash: str, documents: dict, model: str = MODEL,
+                     category: str = "planning") -> str | None:
+    """Cache key for a query in the current context, or None if the answer must not be shared."""
+    if not answer_cache.is_cacheable(query):
+        return None
+    # Recommendations and calculations draw on the whole force picture, not just what the query names
+    whole = category in answer_cache.WHOLE_CONTEXT_CATEGORIES
+    target_state = st.session_state.target_state
+    fingerprint = answer_cache.context_fingerprint(
+        model=model,
+        reference=reference_hash,
+        adversary=st.session_state.adversary,
+        loadout=st.session_state.current_loadout,
+        documents=documents,
+        coalition=st.session_state.coalition_ships,
+        ledger=answer_cache.ledger_slice(query, st.session_state.ammo_status, whole),
+        red_ledger=answer_cache.ledger_slice(query, st.session_state.get("red_ledger", {}), whole),
+        targets=target_state["targets"] if whole else bda.target_slice(query, target_state),
+    )
+    return AnswerCache.key(query, fingerprint)
+
+
+def render_answer_cache_sidebar(cache: AnswerCache):
+    with st.sidebar.expander("⚡ Answer Cache"):
+        stats = cache.stats
+        col1, col2 = st.columns(2)
+        col1.metric("Hit rate", f"{cache.hit_rate:.0%}")
+        col2.metric("Entries", len(cache))
+        st.caption(f"{stats['hits']} hits · {stats['misses']} misses · {stats['bypassed']} bypassed · "
+                   f"{stats['evictions']} evicted · {stats['expired']} expired")
+        st.caption(f"Start a message with `{answer_cache.OPT_OUT_PREFIX}` to skip the cache.")
+        if st.button("Clear Answer Cache"):
+            cache.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics_log() -> MetricsLog:
+    """Per-turn metrics for the whole server process (also appended to .metrics/turns.jsonl)."""
+    return MetricsLog()
+
+
+def render_metrics_panel(log: MetricsLog):
+    """Admin view of token budget, prompt size by block and latency."""
+    with st.sidebar.expander("📈 Prompt Budget"):
+        summary = log.summary()
+        if not summary["turns"]:
+            st.caption(f"No model turns yet ({summary['served_locally']} served locally).")
+            return
+        import pandas as pd
+
+        col1, col2 = st.columns(2)
+        col1.metric("Model turns", summary["turns"])
+        col2.metric("Served locally", summary["served_locally"])
+        col1.metric("Mean TTFT", f"{summary['mean_ttft_ms'] or 0:,.0f} ms")
+        col2.metric("Mean API time", f"{summary['mean_api_ms']:,.0f} ms")
+        st.caption(f"Tokens in {summary['input_tokens']:,} · out {summary['output_tokens']:,} · "
+                   f"cache read {summary['cache_read_input_tokens']:,}")
+        st.markdown("**Latency and cost by router tier**")
+        st.dataframe(pd.DataFrame(summary["tiers"]), hide_index=True, width="stretch")
+        st.markdown("**Mean input tokens per block**")
+        st.bar_chart(pd.Series(summary["mean_block_tokens"], name="tokens"))
+        recent = pd.DataFrame(list(log.recent)[-20:])
+        st.dataframe(
+            recent[["kind", "tier", "route", "rounds", "input_tokens", "output_tokens", "cache_read_input_tokens",
+                    "ttft_ms", "api_ms", "queue_ms", "local_ms", "cost_usd"]].iloc[::-1],
+            hide_index=True, width="stretch",
+        )
+        st.caption(f"Log: {log.path}")
+
+
+# =============================================================================
+# CLASSROOM MODE
+# =============================================================================
+@st.cache_resource(show_spinner=False)
+def get_classroom_hub() -> ClassroomHub:
+    """Published scenarios live once per server process, shared by all sessions."""
+    return ClassroomHub()
+
+
+def get_instructor_pin() -> str:
+    """Instructor PIN from secrets or INSTRUCTOR_PIN env var ('' = publishing unrestricted)."""
+    try:
+        pin = st.secrets.get("INSTRUCTOR_PIN", "")
+    except Exception:
+        pin = ""
+    return str(pin or os.environ.get("INSTRUCTOR_PIN", ""))
+
+
+def is_admin() -> bool:
+    """Admin views (metrics) are shown only with FIRES_ADMIN set in secrets or the environment."""
+    try:
+        flag = st.secrets.get("FIRES_ADMIN", "")
+    except Exception:
+        flag = ""
+    return str(flag or os.environ.get("FIRES_ADMIN", "")).strip().lower() in ("1", "true", "yes", "on")
+
+
+def active_classroom() -> tuple[Scenario | None, TeamOverlay | None]:
+    """Return the joined scenario and this team's overlay, or (None, None) when solo."""
+    membership = st.session_state.get("classroom")
+    if not membership:
+        return None, None
+    hub = get_classroom_hub()
+    scenario = hub.get(membership["code"])
+    overlay = hub.team(scenario.code, membership["team"]) if scenario else None
+    if overlay is None:
+        st.session_state.classroom = None
+        st.sidebar.warning("Classroom scenario is no longer published — continuing solo.")
+        return None, None
+    return scenario, overlay
+
+
+def render_classroom_sidebar(scenario: Scenario | None, overlay: TeamOverlay | None):
+    """Render classroom join / instructor publish controls in the sidebar."""
+    hub = get_classroom_hub()
+    with st.sidebar.expander("🏫 Classroom", expanded=scenario is not None):
+        if scenario:
+            st.markdown(f"**{scenario.title}** — code `{scenario.code}`")
+            st.caption(f"Team: {overlay.team} | Adversary and base loadout set by instructor")
+            if st.button("Leave Classroom"):
+                st.session_state.classroom = None
+                st.rerun()
+        else:
+            code = st.text_input("Scenario Code", key="cls_code")
+            team = st.text_input("Team Name", key="cls_team", placeholder="e.g. CG 13")
+            if st.button("Join Scenario"):
+                joined = hub.get(code)
+                if joined and team.strip():
+                    st.session_state.classroom = {"code": joined.code, "team": team.strip()}
+                    st.rerun()
+                else:
+                    st.error("Unknown scenario code or missing team name.")
+
+        st.markdown("---")
+        st.markdown("**Instructor**")
+        pin = get_instructor_pin()
+        if pin and st.text_input("Instructor PIN", type="password", key="cls_pin") != pin:
+            return
+        title = st.text_input("Scenario Title", key="cls_title", placeholder="e.g. Phase III SAG fight")
+        if st.button("Publish Current Setup"):
+            published = hub.publish(
+                title,
+                st.session_state.current_loadout,
+                st.session_state.adversary,
+                st.session_state.ammo_status,
+                st.session_state.map_units,
+                classroom.effective_documents(scenario, st.session_state.uploaded_docs),
+            )
+            st.success(f"Published — students join with code {published.code}")
+
+        for pub in hub.scenarios():
+            report = hub.memory_report(pub.code)
+            deltas = sum(report["overlay_bytes"].values())
+            st.caption(
+                f"`{pub.code}` {pub.title}: {len(report['overlay_bytes'])} teams | "
+                f"shared {report['scenario_bytes'] / 1024:.1f} KB, team deltas {deltas / 1024:.1f} KB"
+            )
 
 
 # =============================================================================
@@ -502,28 +827,8 @@ def hughes_salvo_calc(
 # =============================================================================
 def render_ammo_sidebar(ammo_status: dict):
     """Render FRIENDLY ONLY ammunition tracker in sidebar."""
-    # Keywords that identify Red/Olvana assets — exclude from sidebar tracking
-    RED_FORCE_KEYWORDS = [
-        # Generic red force labels
-        "olvana", "red", "enemy", "opfor",
-        # Olvana ship classes
-        "type 055", "type 052", "type 054", "type 056", "type 022",
-        "renhai", "luyang", "jiangkai", "jiangdao", "houbei",
-        # Olvana hull numbers from missile counts document
-        "cg-102", "ddg-173", "ddg-175", "ddg-153",
-        # Olvana ground/ADA systems
-        "hq-9", "hq-16", "hq-7", "pgz", "phl", "plz", "zbd", "ztq",
-        # Olvana weapons
-        "yj-83", "yj-18", "yj-100", "hhq-9", "yu-7", "akd-10", "hj-8",
-        "et52", "z-18f", "z-20", "z-9",
-        # Generic Olvana weapon prefixes
-        "yj-", "cm-8", "hj-",
-    ]
-
-    friendly_assets = {
-        asset: munitions for asset, munitions in ammo_status.items()
-        if not any(kw in asset.lower() for kw in RED_FORCE_KEYWORDS)
-    }
+    # Red/Olvana entries are tracked separately in the Red ledger
+    friendly_assets = red_ledger.friendly_assets(ammo_status)
 
     if not friendly_assets:
         st.sidebar.caption("No friendly assets loaded. Select a loadout preset above.")
@@ -540,13 +845,68 @@ def render_ammo_sidebar(ammo_status: dict):
                 st.progress(pct, text=f"{munition}: {remaining}/{initial}")
 
 
+def render_red_ledger_sidebar(catalog: WeaponsCatalog | None):
+    """Adversary magazines: anti-ship missiles remaining per hull and the projected Red α."""
+    ledger = st.session_state.red_ledger
+    with st.sidebar.expander("🔴 Red Magazines (SAG 12)"):
+        if st.button("Reseed from §7.1 loads", key="red_reseed", disabled=catalog is None):
+            st.session_state.red_ledger = ledger = red_ledger.seed(catalog)
+            st.session_state.ledger_source = "red reseed"
+        if not ledger:
+            st.caption("No Red loads — weapons reference not loaded.")
+            return
+        naval = ADVERSARY_PRESETS[st.session_state.adversary]["naval"]
+        alpha = red_ledger.projected_alpha(ledger, naval)
+        for hull, munitions in ledger.items():
+            initial = sum(c["initial"] for m, c in munitions.items() if red_ledger.ASCM_ROW.search(m))
+            remaining = red_ledger.ascms_remaining(munitions)
+            projected = f" · α {alpha[hull]:.1f}" if hull in alpha else ""
+            st.progress(remaining / initial if initial else 0.0,
+                        text=f"{hull.split(' (')[0]}: {remaining}/{initial} ASCM{projected}")
+
+
+AMMO_UPDATE_FENCED = re.compile(
+    r"```[^\n]*\n(?:\s*AMMO_UPDATE:\s*\nASSET:.+\nMUNITION:.+\n(?:EXPENDED|REMAINING|RESUPPLY):\s*\d+[ \t]*\n?)+\s*```",
+    re.IGNORECASE,
+)
+AMMO_UPDATE_BARE = re.compile(
+    r"AMMO_UPDATE:\s*\nASSET:.+\nMUNITION:.+\n(?:EXPENDED|REMAINING|RESUPPLY):\s*\d+[ \t]*\n?",
+    re.IGNORECASE,
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def format_chat_markdown(content: str) -> str:
+    """
+    Display form of a chat message, cached per message content.
+    Raw AMMO_UPDATE blocks collapse to a one-line ledger summary.
+    """
+    updates = parse_ammo_updates(content)
+    if not updates:
+        return content
+    body = AMMO_UPDATE_BARE.sub("", AMMO_UPDATE_FENCED.sub("", content)).rstrip()
+    summary = "; ".join(
+        f"{u['asset']} / {u['munition']} {u['update_type'].lower()} {u['value']}" for u in updates
+    )
+    return f"{body}\n\n> 📦 *Ledger updated:* {summary}"
+
+
 def render_chat():
-    """Render the chat interface."""
-    for msg in st.session_state.messages:
-        role = msg["role"]
-        content = msg["content"]
-        with st.chat_message(role):
-            st.markdown(content)
+    """Render the last CHAT_WINDOW_TURNS turns; older turns load on demand."""
+    page = CHAT_WINDOW_TURNS * 2
+    messages = st.session_state.messages
+    window = st.session_state.setdefault("chat_window", page)
+    hidden = max(0, len(messages) - window) + st.session_state.get("history_offset", 0)
+
+    if hidden > 0 and st.button(f"⬆️ Load earlier messages ({hidden} more)"):
+        st.session_state.chat_window = window + page
+        if st.session_state.chat_window > len(messages):
+            load_earlier_history(get_session_store())
+        st.rerun()
+
+    for msg in messages[-window:]:
+        with st.chat_message(msg["role"]):
+            st.markdown(format_chat_markdown(msg["content"]))
 
 
 def render_map_tab():
@@ -591,7 +951,7 @@ def render_map_tab():
             if unit_name and lat is not None and lon is not None:
                 if "map_units" not in st.session_state:
                     st.session_state.map_units = []
-                st.session_state.map_units.append({
+                st.session_state.map_units = [*st.session_state.map_units, {
                     "name": unit_name,
                     "type": unit_type,
                     "lat": lat,
@@ -599,7 +959,7 @@ def render_map_tab():
                     "range_km": range_km if range_km > 0 else None,
                     "color": unit_color,
                     "notes": unit_notes,
-                })
+                }]
                 st.success(f"Added {unit_name}")
             else:
                 st.error("Provide unit name and valid coordinates.")
@@ -609,18 +969,363 @@ def render_map_tab():
 
     with col2:
         units = st.session_state.get("map_units", [])
-        fmap = build_tactical_map(units)
+        fmap = build_tactical_map(units) if units else None
         if fmap:
+            from streamlit_folium import st_folium
             st_folium(fmap, width=650, height=500)
         else:
             st.info("Map will appear here after adding units.")
 
+    render_geometry_panel(st.session_state.get("map_units", []))
+
+
+def render_geometry_panel(units: list[dict]):
+    """Render distance/bearing, threat coverage and transit exposure for map units."""
+    placed = [u for u in units if u.get("lat") is not None and u.get("lon") is not None]
+    if len(placed) < 2:
+        return
+    import pandas as pd
+
+    geo = geodesy.units_geometry(placed, ellipsoidal=True)
+    names = geo["names"]
+
+    with st.expander("📐 Range & Bearing Matrix (km / °T, WGS-84)", expanded=False):
+        cells = [
+            [
+                "—" if i == j else f"{geo['distance_km'][i, j]:.1f} / {geo['bearing_deg'][i, j]:03.0f}"
+                for j in range(len(names))
+            ]
+            for i in range(len(names))
+        ]
+        st.dataframe(pd.DataFrame(cells, index=names, columns=names), width="stretch")
+
+        tof_munition = st.selectbox(
+            "Time of flight for", ["(none)"] + list(geodesy.MUNITION_SPEEDS), key="geo_tof_munition",
+        )
+        if tof_munition != "(none)":
+            tof_min = geodesy.time_of_flight_s(geo["distance_km"], tof_munition) / 60
+            st.dataframe(
+                pd.DataFrame(tof_min.round(1), index=names, columns=names),
+                width="stretch",
+            )
+            st.caption(f"{tof_munition} time of flight (minutes), shooter row → target column")
+
+    coverage = geodesy.threat_coverage(placed)
+    if coverage:
+        with st.expander("🎯 Threat Envelope Coverage", expanded=False):
+            for row in coverage:
+                if row["inside"]:
+                    st.warning(f"{row['unit']} is INSIDE: {', '.join(row['inside'])}")
+                else:
+                    st.caption(f"{row['unit']}: outside all Red rings "
+                               f"(nearest threat {row['nearest_threat_km']:.0f} km)")
+
+    threats = [u for u in placed if u.get("range_km") and geodesy.is_red_unit(u)]
+    if len(threats) >= 2:
+        overlap = geodesy.envelope_overlap_km2(
+            [t["lat"] for t in threats], [t["lon"] for t in threats], [t["range_km"] for t in threats],
+        )
+        pairs = [
+            (threats[i]["name"], threats[j]["name"], overlap[i, j], overlap[i, j] / min(overlap[i, i], overlap[j, j]))
+            for i in range(len(threats)) for j in range(i + 1, len(threats))
+            if overlap[i, j] > 0
+        ]
+        with st.expander("⭕ Red Envelope Overlap", expanded=False):
+            if pairs:
+                st.dataframe(
+                    pd.DataFrame(
+                        [{"Envelope A": a, "Envelope B": b, "Overlap (km²)": round(area),
+                          "% of smaller": round(frac * 100)} for a, b, area, frac in pairs]
+                    ),
+                    width="stretch", hide_index=True,
+                )
+                st.caption("Mutually supporting Red rings — a target inside both is covered twice.")
+            else:
+                st.caption("No Red envelopes overlap.")
+
+    if threats:
+        with st.expander("🚢 Transit Path Exposure", expanded=False):
+            default_path = [u["name"] for u in placed if u.get("type") == "friendly_ship"]
+            path_names = st.multiselect(
+                "Path waypoints (in order)", names, default=default_path, key="geo_path",
+            )
+            if len(path_names) >= 2:
+                by_name = {u["name"]: u for u in placed}
+                path = [by_name[n] for n in path_names]
+                exposure = geodesy.path_exposure(
+                    [u["lat"] for u in path], [u["lon"] for u in path],
+                    [t["lat"] for t in threats], [t["lon"] for t in threats],
+                    [t["range_km"] for t in threats],
+                )
+                st.metric(
+                    "Path inside Red envelopes",
+                    f"{exposure['exposed_km']:.0f} / {exposure['total_km']:.0f} km",
+                    f"{exposure['fraction'] * 100:.0f}% exposed",
+                    delta_color="inverse",
+                )
+                for t, km in zip(threats, exposure["per_threat_km"]):
+                    st.caption(f"• {t['name']} ({t['range_km']} km ring): {km:.0f} km of path")
+
+
+def render_pairing_tab():
+    """Render the deterministic weapons-target pairing panel."""
+    st.subheader("🎯 Weapon-Target Pairing")
+    st.caption("Ranks the current ammo ledger by range, role, HIMARS stationary-only rule, "
+               "§8.1 Pk and §8.2 rounds required vs. remaining magazine depth.")
+    catalog = get_weapons_catalog()
+    if catalog is None:
+        st.warning("Weapons reference not found — pairing engine unavailable.")
+        return
+    if not st.session_state.ammo_status:
+        st.info("No ammunition loaded. Apply a loadout preset in the sidebar.")
+        return
+    import pandas as pd
+
+    col1, col2 = st.columns(2)
+    with col1:
+        description = st.text_input("Target", value="HQ-9 battery", key="pair_target")
+        range_km = st.number_input("Range (km)", min_value=0.0, value=80.0, step=5.0, key="pair_range")
+        mobile = st.checkbox("Mobile / moving target", value=pairing.is_mobile(description), key="pair_mobile")
+    with col2:
+        classes = list(pairing.TARGET_CLASSES)
+        target_class = st.selectbox(
+            "Target class",
+            classes,
+            index=classes.index(pairing.classify_target(description)),
+            format_func=lambda k: pairing.TARGET_CLASSES[k]["label"],
+            key=f"pair_class_{description}",
+        )
+        desired_pk = st.slider("Desired cumulative Pk", 0.50, 0.99, pairing.DEFAULT_DESIRED_PK, 0.01, key="pair_pk")
+        rank_by = st.radio("Rank by", ["pk", "depth"], horizontal=True, key="pair_rank",
+                           format_func=lambda r: "Pk" if r == "pk" else "Magazine depth")
+
+    target = pairing.Target(description, range_km, target_class, mobile)
+    usable, excluded = pairing.recommend(st.session_state.ammo_status, target, catalog, desired_pk, rank_by)
+
+    if usable:
+        st.dataframe(
+            pd.DataFrame([{
+                "Asset": o.asset,
+                "Munition": o.munition,
+                "Pk": o.pk,
+                "Pk basis": o.pk_basis,
+                "Rounds req'd": o.rounds_required,
+                "Remaining": o.remaining,
+                "Magazine draw": f"{o.magazine_draw:.0%}" if o.magazine_draw is not None else "",
+                "Notes": "; ".join(o.notes),
+            } for o in usable]),
+            hide_index=True,
+            width="stretch",
+        )
+    else:
+        st.error("No munition in the current ledger can engage this target.")
+    if excluded:
+        with st.expander(f"Excluded ({len(excluded)})"):
+            st.dataframe(
+                pd.DataFrame([{"Asset": o.asset, "Munition": o.munition, "Reason": o.excluded} for o in excluded]),
+                hide_index=True,
+                width="stretch",
+            )
+
+
+def desired_pk_setting() -> float:
+    """The weaponeering tab's default desired Pk; chat BDA and re-attack answers use the same value."""
+    return st.session_state.get("weap_pk", pairing.DEFAULT_DESIRED_PK)
+
+
+def render_weaponeering_tab():
+    """Render batch weaponeering for the uploaded target list."""
+    st.subheader("📋 Batch Weaponeering")
+    st.caption("§8.2 rounds required and cumulative Pk for every target in the uploaded "
+               "TLWS/HPTL, with the total magazine draw against the ammo ledger.")
+    catalog = get_weapons_catalog()
+    if catalog is None:
+        st.warning("Weapons reference not found — weaponeering unavailable.")
+        return
+    if not st.session_state.target_list:
+        st.info("Upload a Target List Worksheet or HPTL (.xlsx) in the sidebar. Columns are "
+                "matched by header: target number, description/type, range (km or nm), "
+                "mobile/status, desired Pk, priority, munition.")
+        return
+    import pandas as pd
+
+    targets = [weaponeering.TargetRow(**t) for t in st.session_state.target_list]
+    desired_pk = st.slider("Default desired Pk (worksheet values take precedence)",
+                           0.50, 0.99, pairing.DEFAULT_DESIRED_PK, 0.01, key="weap_pk")
+    result = weaponeering.solve(targets, st.session_state.ammo_status, catalog, desired_pk)
+
+    plan = pd.DataFrame(result.plan)
+    engaged = plan[plan["rounds"] > 0]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Targets", len(plan))
+    col2.metric("Engageable", len(engaged))
+    col3.metric("Rounds required", int(engaged["rounds"].sum()))
+
+    st.dataframe(plan, hide_index=True, width="stretch")
+
+    st.markdown("**🧮 Magazine Draw**")
+    if result.draw:
+        draw = pd.DataFrame(result.draw)
+        st.dataframe(draw, hide_index=True, width="stretch")
+        short = draw[draw["shortfall"] > 0]
+        for _, row in short.iterrows():
+            st.error(f"⚠️ {row['asset']} — {row['munition']}: needs {row['required']}, "
+                     f"{row['remaining']} remaining (short {row['shortfall']})")
+    else:
+        st.caption("No rounds drawn — no target could be engaged from the current ledger.")
+
+    with st.expander("Rounds-required matrix (target × ledger munition)"):
+        matrix = pd.DataFrame(
+            np.where(np.isfinite(result.rounds), result.rounds, np.nan),
+            index=[t.target_id for t in targets],
+            columns=[f"{a} — {m}" for a, m in result.columns],
+        )
+        st.dataframe(matrix, width="stretch")
+
+    render_allocation_section(targets, catalog, desired_pk)
+    render_bda_section(catalog, desired_pk)
+
+
+def render_allocation_section(targets: list, catalog: WeaponsCatalog, desired_pk: float):
+    """Render the fire allocation solver across all shooters (ledger + coalition)."""
+    import pandas as pd
+
+    st.markdown("---")
+    st.markdown("**🎯 Fire Allocation — all shooters × all targets**")
+    st.caption("Maximizes expected target value destroyed (HPTL priority × Pk) within range, "
+               "role and magazine limits. Coalition ships allocated in the sidebar are included.")
+    col1, col2, col3 = st.columns(3)
+    sm6_reserve = col1.slider("SM-6 held for AAW", 0.0, 1.0, allocation.DEFAULT_RESERVES["sm-6"], 0.05,
+                              key="alloc_sm6")
+    shooter_cap = col2.number_input("Max rounds per shooter (0 = magazine)", min_value=0, value=0,
+                                    key="alloc_cap")
+    tlam_approved = col3.checkbox("TLAM Block E approved (SECWAR)", value=False, key="alloc_tlam")
+
+    ledger = allocation.merge_ledgers(
+        allocation.coalition_ledger(st.session_state.get("coalition_ships", []), catalog),
+        st.session_state.ammo_status,
+    )
+    plan = allocation.allocate(
+        targets, ledger, catalog, desired_pk,
+        reserves={"sm-6": sm6_reserve},
+        approved=["tlam block e"] if tlam_approved else [],
+        asset_caps={asset: shooter_cap for asset in ledger} if shooter_cap else None,
+    )
+
+    status = pd.DataFrame(plan.targets)
+    met = int((status["status"] == "met").sum()) if len(status) else 0
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Value destroyed", f"{plan.expected_value:.1f} / {plan.max_value:.0f}")
+    col2.metric("Targets met", f"{met} / {len(status)}")
+    col3.metric("Rounds", sum(m.rounds for m in plan.missions))
+    col4.metric("Solve time", f"{plan.solve_ms:.0f} ms")
+
+    if not plan.missions:
+        st.caption("No fire missions — no target can be engaged from the available shooters.")
+        return
+    st.dataframe(pd.DataFrame([vars(m) for m in plan.missions]), hide_index=True, width="stretch")
+    with st.expander("Target status"):
+        st.dataframe(status, hide_index=True, width="stretch")
+    with st.expander("Magazine draw"):
+        st.dataframe(pd.DataFrame(plan.draw), hide_index=True, width="stretch")
+        for note in plan.notes:
+            st.caption(note)
+
+    render_timeline(plan, targets)
+
+    if st.button("✅ Apply fire plan to ledger"):
+        st.session_state.ammo_status = allocation.apply_plan(st.session_state.ammo_status, plan, ledger)
+        st.session_state.ledger_source = "fire plan"
+        st.session_state.target_state, _ = bda.apply_events(st.session_state.target_state,
+                                                            bda.engagement_events(plan.missions), desired_pk)
+        st.rerun()
+
+
+def render_bda_section(catalog: WeaponsCatalog, desired_pk: float):
+    """Render the BDA tracker: target status, BDA entry and the re-attack plan."""
+    import pandas as pd
+
+    state = st.session_state.target_state
+    st.markdown("---")
+    st.markdown("**💥 BDA & Re-attack**")
+    st.caption("Engagements from applied fire plans and chat ledger commands, with reported BDA. "
+               "In chat: *BDA: TGT-0042 destroyed (confirmed)* or *Which HPTs need re-attack?*")
+    rows = list(state["targets"].values())
+    if not rows:
+        return
+    status = pd.DataFrame([{
+        "target_id": r["target_id"], "description": r["description"], "priority": r.get("priority"),
+        "rounds": sum(e.get("rounds", 0) for e in r["engagements"]), "expected_pk": r["expected_pk"],
+        "bda": r["bda"]["assessment"] if r["bda"] else None, "current_pk": r["current_pk"], "status": r["status"],
+    } for r in rows])
+    counts = status["status"].value_counts()
+    cols = st.columns(4)
+    for col, label in zip(cols, [bda.STATUS_NOT_ENGAGED, bda.STATUS_AWAITING, bda.STATUS_ACHIEVED, bda.STATUS_REATTACK]):
+        col.metric(label.capitalize(), int(counts.get(label, 0)))
+    st.dataframe(status, hide_index=True, width="stretch")
+
+    with st.form("bda_entry", clear_on_submit=True):
+        col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+        target_id = col1.selectbox("Target", [r["target_id"] for r in rows])
+        assessment = col2.selectbox("Assessment", list(bda.BDA_ASSESSMENTS))
+        phase = col3.selectbox("Phase", [1, 2, 3])
+        confirmed = col4.checkbox("Confirmed")
+        if st.form_submit_button("Record BDA"):
+            st.session_state.target_state, _ = bda.apply_events(state, [{
+                "type": "bda", "target_id": target_id, "assessment": assessment,
+                "phase": phase, "confirmed": confirmed, "remarks": "BDA form",
+            }], desired_pk)
+            st.rerun()
+
+    with st.expander("🔁 Re-attack plan"):
+        st.markdown(bda.format_reattack(bda.reattack_plan(state, st.session_state.ammo_status, catalog, desired_pk)))
+
+
+def render_timeline(plan: allocation.FirePlan, targets: list):
+    """Render the time-phased execution timeline for a fire plan."""
+    import pandas as pd
+
+    with st.expander("⏱️ Execution timeline"):
+        col1, col2, col3 = st.columns(3)
+        massed = col1.checkbox("Massed strike — all missions time-on-target", value=False, key="tl_tot")
+        hold_from = col2.number_input("Airspace hold from (min)", min_value=0.0, value=0.0, step=1.0,
+                                      key="tl_hold_from")
+        hold_to = col3.number_input("Airspace hold to (min)", min_value=0.0, value=0.0, step=1.0,
+                                    key="tl_hold_to")
+        windows = [timeline.Window(hold_from * 60, hold_to * 60, reason="airspace hold")] if hold_to > hold_from else []
+
+        result = timeline.schedule(timeline.missions_from_plan(plan.missions, targets, massed), windows)
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Strike complete", f"T+{result.completion_s / 60:.1f} min")
+        if result.tot_groups:
+            col2.metric("Time on target", f"T+{result.tot_groups['MASSED'] / 60:.1f} min")
+        col3.metric("Schedule time", f"{result.solve_ms:.0f} ms")
+
+        rows = pd.DataFrame([vars(m) for m in result.missions])
+        rows["notes"] = rows["notes"].str.join("; ")
+        st.dataframe(rows.drop(columns=["tof_basis"]), hide_index=True, width="stretch")
+        st.caption("Rates of fire and missile speeds from the weapons reference; tube and rocket "
+                   "times of flight and VLS cycle times are planning estimates.")
+
 
 def render_hughes_tab():
     """Render the Hughes Salvo Calculator tab."""
     st.subheader("⚓ Hughes Salvo Calculator")
     st.caption("ΔB = max(0, α×A − y×B) / b  |  ΔA = max(0, β×B − z×A) / a")
 
+    naval = ADVERSARY_PRESETS[st.session_state.get("adversary", ADVERSARY_NAMES[0])]["naval"]
+    red_ships, red_beta = red_ledger.hughes_inputs(st.session_state.get("red_ledger", {}), naval)
+    linked = st.checkbox("Red B and β from the Red ledger (debited after each salvo)", value=red_ships > 0,
+                         key="h_red_link", disabled=red_ships == 0,
+                         help="β = mean preset α scaled by the anti-ship missiles each hull has left")
+    if linked and red_ships:
+        # Set before the widgets are created so each run picks up the latest projection
+        st.session_state.h_B = red_ships
+        st.session_state.h_beta = round(red_beta, 2)
+    # Red B/β are driven through session state (ledger link above), so seed them there, not via value=
+    st.session_state.setdefault("h_B", 3)
+    st.session_state.setdefault("h_beta", 4.0)
+
     col1, col2 = st.columns(2)
 
     with col1:
@@ -632,8 +1337,8 @@ def render_hughes_tab():
 
     with col2:
         st.markdown("**🔴 Red Force**")
-        B = st.number_input("Ships (B)", min_value=1, value=3, key="h_B")
-        beta = st.number_input("Offensive Power β (missiles/ship/salvo)", min_value=0.0, value=4.0, step=0.5, key="h_beta")
+        B = st.number_input("Ships (B)", min_value=1, key="h_B")
+        beta = st.number_input("Offensive Power β (missiles/ship/salvo)", min_value=0.0, step=0.5, key="h_beta")
         y = st.number_input("Defensive Power y (intercepts/ship)", min_value=0.0, value=6.0, step=0.5, key="h_y")
         b = st.number_input("Staying Power b (hits to kill)", min_value=1.0, value=2.0, step=0.5, key="h_b")
 
@@ -642,8 +1347,15 @@ def render_hughes_tab():
     nmesis_missiles = st.number_input("NMESIS missiles added to Blue α", min_value=0, value=0, key="h_nmesis")
 
     if st.button("🔥 Calculate Salvo Exchange"):
-        total_blue_alpha = alpha + (nmesis_missiles / A if A > 0 else 0)
+        total_blue_alpha = nmesis_alpha(alpha, A, nmesis_missiles)
         result = hughes_salvo_calc(total_blue_alpha, A, beta, B, y, z, a, b)
+        record_event(export.HUGHES_EVENT, {
+            "inputs": {"alpha": alpha, "A": A, "beta": beta, "B": B, "y": y, "z": z, "a": a, "b": b,
+                       "nmesis_missiles": nmesis_missiles, "red_from_ledger": bool(linked and red_ships)},
+            "result": result,
+        })
+        if linked and red_ships:
+            debit_red_ledger(red_ledger.salvo_shooters(st.session_state.red_ledger, B))
 
         st.markdown("---")
         st.markdown("**📊 Results**")
@@ -674,6 +1386,142 @@ def render_hughes_tab():
         else:
             st.success("✅ Blue defenses held — no Red missiles penetrated")
 
+    st.markdown("---")
+    # Gated so pandas (for the editors) only loads when the section is open
+    if st.toggle("Mixed-force salvo exchange (per-class, multi-salvo)", key="mx_open"):
+        render_mixed_salvo()
+
+
+def debit_red_ledger(fired: dict[str, float]):
+    """Record adjudicated Red launches (missiles per hull) in the Red ledger."""
+    updates = red_ledger.expenditure_updates(st.session_state.red_ledger, fired)
+    if updates:
+        st.session_state.red_ledger = apply_ammo_updates(st.session_state.red_ledger, updates)
+        st.session_state.ledger_source = "salvo adjudication"
+        st.caption(f"🔴 Red ledger debited {sum(u['value'] for u in updates)} ASCMs across "
+                   f"{len({u['asset'] for u in updates})} hulls")
+
+
+SHIP_CLASS_COLUMNS = ["name", "count", "alpha", "sigma", "y", "b", "magazine", "priority"]
+
+
+def _ship_rows(classes: list[salvo.ShipClass]) -> list[dict]:
+    return [{col: getattr(c, col) for col in SHIP_CLASS_COLUMNS} for c in classes]
+
+
+def _ship_classes(table) -> list[salvo.ShipClass]:
+    """Edited rows back to ShipClass; blank magazine = unlimited, blank priority = threat (σ×α)."""
+    def blank(value) -> bool:
+        return value is None or (isinstance(value, float) and math.isnan(value))
+
+    classes = []
+    for row in table.to_dict("records"):
+        if not row.get("name") or not (row.get("count") or 0) > 0:
+            continue
+        classes.append(salvo.ShipClass(
+            name=str(row["name"]), count=float(row["count"]), alpha=float(row["alpha"] or 0),
+            y=float(row["y"] or 0), b=max(float(row["b"] or 1), 0.1),
+            sigma=1.0 if blank(row["sigma"]) else float(row["sigma"]),
+            magazine=None if blank(row["magazine"]) else float(row["magazine"]),
+            priority=None if blank(row["priority"]) else float(row["priority"]),
+        ))
+    return classes
+
+
+def render_mixed_salvo():
+    """Heterogeneous Hughes exchange: one row per ship class, run over successive salvos."""
+    import pandas as pd
+
+    st.caption("Blue is prefilled from the ammo ledger (§3 planning estimates, magazine = ASCMs remaining) "
+               "and coalition ships; Red from the Red ledger hulls (σ = preset α / 8-missile salvo), "
+               "or the adversary preset (α already includes Pk, so σ = 1). Red ledger hulls are debited. "
+               "Priority 0 = never targeted (e.g. shore-based NMESIS).")
+    blue_rows = _ship_rows(salvo.ledger_classes(st.session_state.get("ammo_status", {}))
+                           + salvo.coalition_classes(st.session_state.get("coalition_ships", [])))
+    naval = ADVERSARY_PRESETS.get(st.session_state.get("adversary"), {}).get("naval", {})
+    # SAG 12 hulls with their remaining magazines when the Red ledger matches the adversary
+    red_rows = _ship_rows(red_ledger.red_classes(st.session_state.get("red_ledger", {}), naval)
+                          or salvo.adversary_classes(naval))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🔵 Blue classes**")
+        blue_table = st.data_editor(pd.DataFrame(blue_rows, columns=SHIP_CLASS_COLUMNS), num_rows="dynamic",
+                                    key="mx_blue", width="stretch")
+        blue_policy = st.selectbox("Blue fire distribution", list(salvo.FIRE_POLICIES), index=1, key="mx_bpol",
+                                   help="; ".join(f"{k}: {v}" for k, v in salvo.FIRE_POLICIES.items()))
+        blue_tau = st.slider("Blue readiness τ", 0.0, 1.0, 1.0, 0.05, key="mx_btau")
+    with col2:
+        st.markdown("**🔴 Red classes**")
+        red_table = st.data_editor(pd.DataFrame(red_rows, columns=SHIP_CLASS_COLUMNS), num_rows="dynamic",
+                                   key="mx_red", width="stretch")
+        red_policy = st.selectbox("Red fire distribution", list(salvo.FIRE_POLICIES), index=1, key="mx_rpol")
+        red_tau = st.slider("Red readiness τ", 0.0, 1.0, 1.0, 0.05, key="mx_rtau")
+
+    ccol1, ccol2, ccol3 = st.columns(3)
+    defense = ccol1.selectbox("Defense", list(salvo.DEFENSE_MODES), key="mx_def",
+                              help="; ".join(f"{k}: {v}" for k, v in salvo.DEFENSE_MODES.items()))
+    first = ccol2.selectbox("Firing order", ["simultaneous", "blue", "red"], key="mx_first",
+                            help="blue / red: that side fires first and the other answers with survivors")
+    max_salvos = ccol3.number_input("Max salvos", min_value=1, max_value=200, value=10, key="mx_salvos")
+
+    if not st.button("🔥 Run Mixed Engagement"):
+        return
+    blue = salvo.Force("Blue", _ship_classes(blue_table), tau=blue_tau)
+    red = salvo.Force("Red", _ship_classes(red_table), tau=red_tau)
+    if not blue.classes or not red.classes:
+        st.warning("Both sides need at least one class with ships.")
+        return
+    result = salvo.engage(blue, red, max_salvos=int(max_salvos), blue_policy=blue_policy,
+                          red_policy=red_policy, defense=defense, first=first)
+
+    mcol1, mcol2, mcol3, mcol4 = st.columns(4)
+    mcol1.metric("Outcome", result.outcome)
+    mcol2.metric("Salvos", result.salvos)
+    mcol3.metric("🔵 Blue ships left", f"{result.blue_ships[-1].sum():.2f} / {result.blue_ships[0].sum():g}")
+    mcol4.metric("🔴 Red ships left", f"{result.red_ships[-1].sum():.2f} / {result.red_ships[0].sum():g}")
+    st.line_chart(pd.DataFrame({"Blue": result.blue_ships.sum(axis=1), "Red": result.red_ships.sum(axis=1)},
+                               index=pd.RangeIndex(result.salvos + 1, name="salvo")))
+    st.dataframe(pd.DataFrame({
+        "Blue fired": result.blue_fired, "Blue through": result.blue_hits,
+        "Red fired": result.red_fired, "Red through": result.red_hits,
+    }, index=pd.RangeIndex(1, result.salvos + 1, name="salvo")).round(1), width="stretch")
+    st.dataframe(pd.DataFrame(result.class_table()), width="stretch", hide_index=True)
+    st.caption(f"Solved in {result.solve_ms:.1f} ms")
+    record_event(export.MIXED_EVENT, {
+        "blue_policy": blue_policy, "red_policy": red_policy, "defense": defense, "first": first,
+        "salvos": result.salvos, "outcome": result.outcome,
+        "blue_start": float(result.blue_ships[0].sum()), "blue_remaining": float(result.blue_ships[-1].sum()),
+        "red_start": float(result.red_ships[0].sum()), "red_remaining": float(result.red_ships[-1].sum()),
+        "classes": result.class_table(),
+    })
+    debit_red_ledger({name: launched for name, launched in zip(result.red, result.red_launched)
+                      if name in st.session_state.get("red_ledger", {})})
+
+
+def render_catalog_sidebar(catalog: WeaponsCatalog | None):
+    """Quick lookup into the compiled weapons catalog."""
+    if catalog is None:
+        return
+    with st.sidebar.expander("📚 Weapons Catalog"):
+        names = [m.name for m in catalog.munitions]
+        choice = st.selectbox("Munition", names, key="catalog_munition")
+        munition = catalog.munition(choice)
+        if munition is None:
+            return
+        span = " – ".join(f"{r:,.1f}" for r in (munition.min_range_km, munition.max_range_km) if r is not None)
+        st.caption(f"§{munition.section} · {munition.side.upper()} · range {span or 'n/a'} km"
+                   + (f" · CEP {munition.cep_m:g} m" if munition.cep_m is not None else ""))
+        if munition.guidance:
+            st.caption(f"Guidance: {munition.guidance}")
+        if munition.platforms:
+            st.caption("Platforms: " + ", ".join(munition.platforms))
+        if munition.pk:
+            # Markdown rather than a dataframe: this renders on every first paint and keeps pandas unloaded
+            rows = [f"| {t} | {lo:.2f} |" if lo == hi else f"| {t} | {lo:.2f}-{hi:.2f} |"
+                    for t, (lo, hi) in munition.pk.items()]
+            st.markdown("| Target | Pk |\n|---|---|\n" + "\n".join(rows))
+
 
 def render_coalition_sidebar():
     """Render coalition ship session initialization in sidebar."""
@@ -694,7 +1542,7 @@ def render_coalition_sidebar():
 
         if st.button("Add Coalition Ship"):
             if c_name and c_nation:
-                st.session_state.coalition_ships.append({
+                st.session_state.coalition_ships = [*st.session_state.coalition_ships, {
                     "name": c_name,
                     "nation": c_nation,
                     "type": c_type,
@@ -702,7 +1550,7 @@ def render_coalition_sidebar():
                     "defensive_power": c_y,
                     "staying_power": c_b,
                     "missiles": c_missiles,
-                })
+                }]
                 st.success(f"Added {c_name} ({c_nation})")
 
     if st.session_state.coalition_ships:
@@ -725,7 +1573,12 @@ def main():
     )
 
     # Load reference documents
-    weapons_ref, hughes_model = load_reference_docs()
+    references = get_references()
+
+    # Restore a saved session (browser refresh / server restart) or start a new one
+    store = get_session_store()
+    if "session_id" not in st.session_state:
+        start_persistent_session(store, st.query_params.get("sid"))
 
     # Initialize session state
     if "messages" not in st.session_state:
@@ -751,27 +1604,55 @@ def main():
     if "coalition_ships" not in st.session_state:
         st.session_state.coalition_ships = []
 
+    if "target_list" not in st.session_state:
+        st.session_state.target_list = []
+
+    if "target_state" not in st.session_state:
+        st.session_state.target_state = bda.sync_targets(bda.new_state(), st.session_state.target_list)
+
+    if "red_ledger" not in st.session_state:
+        catalog = get_weapons_catalog()
+        st.session_state.red_ledger = red_ledger.seed(catalog) if catalog else {}
+
+    # Classroom mode — this team's view of the instructor's published scenario
+    scenario, overlay = active_classroom()
+    if scenario:
+        # Rebuild the team view only when the overlay changed (this member's or a teammate's edit)
+        view = (scenario.code, overlay.team, overlay.rev)
+        if st.session_state.get("classroom_view") != view:
+            for key, value in classroom.materialize(scenario, overlay).items():
+                st.session_state[key] = value
+            # What this member started from — record() writes back only their own edits
+            st.session_state.classroom_base = classroom.materialize(scenario, overlay)
+            st.session_state.classroom_view = view
+
     # ---- SIDEBAR ----
     with st.sidebar:
         st.title("🎯 Fires Coordinator")
         st.caption("v9 | EWS MAGTF Ops Afloat")
+        if not references.ok:
+            st.warning("⚠️ Reference check failed — affected answers fall back to planning estimates:\n"
+                       + "\n".join(f"- {p}" for p in references.problems))
 
         # Adversary selector
         st.markdown("### 🔴 Adversary")
-        adversary = st.selectbox(
-            "Select Adversary",
-            list(ADVERSARY_PRESETS.keys()),
-            index=list(ADVERSARY_PRESETS.keys()).index(st.session_state.adversary),
-            key="adversary_select",
-        )
-        st.session_state.adversary = adversary
+        if scenario:
+            st.caption(f"{st.session_state.adversary} (set by instructor)")
+        else:
+            adversary = st.selectbox(
+                "Select Adversary",
+                ADVERSARY_NAMES,
+                index=ADVERSARY_NAMES.index(st.session_state.adversary),
+                key="adversary_select",
+            )
+            st.session_state.adversary = adversary
 
         # Loadout selector
         st.markdown("### 📦 Loadout Preset")
         selected_loadout = st.selectbox(
             "Mission Loadout",
-            list(LOADOUT_PRESETS.keys()),
-            index=list(LOADOUT_PRESETS.keys()).index(st.session_state.current_loadout)
+            LOADOUT_NAMES,
+            index=LOADOUT_NAMES.index(st.session_state.current_loadout)
             if st.session_state.current_loadout in LOADOUT_PRESETS
             else 0,
             key="loadout_select",
@@ -779,14 +1660,17 @@ def main():
 
         if st.button("Apply Loadout"):
             st.session_state.ammo_status = copy.deepcopy(LOADOUT_PRESETS[selected_loadout])
+            st.session_state.ledger_source = "loadout preset"
             st.session_state.current_loadout = selected_loadout
             st.success(f"Loadout set: {selected_loadout}")
 
         # Ammo tracker
         render_ammo_sidebar(st.session_state.ammo_status)
+        render_red_ledger_sidebar(get_weapons_catalog())
 
         # Coalition ships
         render_coalition_sidebar()
+        render_catalog_sidebar(get_weapons_catalog())
 
         # Document upload
         st.markdown("---")
@@ -807,8 +1691,19 @@ def main():
                 dtype, dcontent = parse_uploaded_document(uploaded_file)
                 if doc_type_hint != "Auto-Detect":
                     dtype = doc_type_hint
-                st.session_state.uploaded_docs[dtype] = dcontent
+                st.session_state.uploaded_docs = {**st.session_state.uploaded_docs, dtype: dcontent}
                 st.success(f"Loaded: {dtype}")
+                targets = parse_target_list_upload(uploaded_file)
+                if targets:
+                    st.session_state.target_list = targets
+                    st.session_state.target_state = bda.sync_targets(st.session_state.target_state, targets,
+                                                                     desired_pk_setting())
+                    st.success(f"Target list: {len(targets)} targets → 📋 Weaponeering tab")
+
+        if scenario and scenario.documents:
+            st.markdown("**Scenario Documents:**")
+            for dt in scenario.documents:
+                st.caption(f"📌 {dt}")
 
         if st.session_state.uploaded_docs:
             st.markdown("**Loaded Documents:**")
@@ -817,16 +1712,30 @@ def main():
             if st.button("Clear Documents"):
                 st.session_state.uploaded_docs = {}
 
-        # Session reset
+        # Session reset — the previous session stays saved and can be resumed
         st.markdown("---")
         if st.button("🔄 Reset Session"):
-            for key in ["messages", "ammo_status", "uploaded_docs", "map_units", "coalition_ships"]:
+            for key in ["messages", "ammo_status", "uploaded_docs", "map_units", "coalition_ships",
+                        "target_list", "target_state", "bda_prompt_rev", "red_ledger", "classroom", "classroom_view", "classroom_base",
+                        "ledger_logged", "session_id", "history_offset", "persisted_count", "persisted_digests", "persisted_scope",
+                        "chat_window"]:
                 if key in st.session_state:
                     del st.session_state[key]
+            if "sid" in st.query_params:
+                del st.query_params["sid"]
             st.rerun()
 
+    render_classroom_sidebar(scenario, overlay)
+    render_saved_sessions_sidebar(store)
+    render_export_sidebar(store)
+    render_answer_cache_sidebar(get_answer_cache())
+    if is_admin():
+        render_metrics_panel(get_metrics_log())
+
     # ---- MAIN CONTENT ----
-    tab_chat, tab_map, tab_hughes = st.tabs(["💬 Fires Planning", "🗺️ Tactical Map", "⚓ Hughes Calculator"])
+    tab_chat, tab_pairing, tab_weaponeering, tab_map, tab_hughes = st.tabs(
+        ["💬 Fires Planning", "🎯 Weapon Pairing", "📋 Weaponeering", "🗺️ Tactical Map", "⚓ Hughes Calculator"]
+    )
 
     with tab_chat:
         st.markdown(f"""
@@ -863,60 +1772,197 @@ def main():
         render_chat()
 
         if prompt := st.chat_input("Enter your fires planning query..."):
+            fresh = prompt.lower().startswith(answer_cache.OPT_OUT_PREFIX)
+            if fresh:
+                prompt = prompt[len(answer_cache.OPT_OUT_PREFIX):].strip() or prompt
+            turn = TurnMetrics(session_id=st.session_state.session_id, model=MODEL)
+            turn_started = time.perf_counter()
             st.session_state.messages.append({"role": "user", "content": prompt})
+            command = ammo_commands.interpret(prompt, st.session_state.ammo_status, get_weapons_catalog())
+            bda_command = bda.interpret(prompt, st.session_state.target_state) if command is None else None
 
             # Check if user mentions force composition — auto-update ammo if parseable
-            if any(kw in prompt.lower() for kw in ["himars", "m777", "ddg", "cg ", "ffg"]):
+            if command is None and any(kw in prompt.lower() for kw in ["himars", "m777", "ddg", "cg ", "ffg"]):
                 st.session_state.ammo_status = parse_ammo_from_chat(
                     prompt, st.session_state.ammo_status
                 )
+                st.session_state.ledger_source = "chat force composition"
 
             with st.chat_message("user"):
                 st.markdown(prompt)
 
+            response_text = None
             with st.chat_message("assistant"):
-                with st.spinner("Analyzing..."):
-                    system_prompt = get_system_prompt_with_context(
-                        weapons_ref_text=weapons_ref,
-                        hughes_model_text=hughes_model,
-                        ammo_status=st.session_state.ammo_status,
-                        uploaded_docs=st.session_state.uploaded_docs,
-                        adversary_preset=st.session_state.adversary,
-                        current_loadout=st.session_state.current_loadout,
-                        coalition_ships=st.session_state.coalition_ships if st.session_state.coalition_ships else None,
-                    )
-
-                    client = anthropic.Anthropic()
-                    response = client.messages.create(
-                        model=MODEL,
-                        max_tokens=MAX_TOKENS,
-                        system=system_prompt,
-                        messages=[
-                            {"role": m["role"], "content": m["content"]}
-                            for m in st.session_state.messages
-                        ],
-                    )
-
-                    response_text = response.content[0].text
+                queue_status = st.empty()
+
+                def show_queue_position(position: int, reason: str):
+                    if position > 0:
+                        queue_status.info(f"⏳ Queued — {position} request(s) ahead of you")
+                    else:
+                        queue_status.info(f"⏳ Next in line ({reason})…")
+
+                documents = classroom.effective_documents(scenario, st.session_state.uploaded_docs)
+                cache = get_answer_cache()
+                cache_key = None
+                local = command is not None or bda_command is not None
+                route = router.route(prompt, MODEL_TIERS)
+                if not local:
+                    turn.model, turn.tier = route.tier.model, route.tier.name
+                    turn.route, turn.route_reason = route.category, route.reason
+                if not local and not fresh:
+                    cache_key = answer_cache_key(prompt, references.content_hash, documents, route.tier.model,
+                                                 route.category)
+                cached = cache.get(cache_key) if cache_key else None
+                if cache_key is None and not local:
+                    cache.bypass()
+
+                if command is not None:
+                    # Pure ledger edit — applied locally, no model call
+                    turn.kind = "local_command"
+                    before = st.session_state.ammo_status
+                    st.session_state.ammo_status = apply_ammo_updates(before, command.updates)
+                    st.session_state.ledger_source = "chat command"
+                    lines = ammo_commands.describe(command, before, st.session_state.ammo_status)
+                    response_text = "📦 **Ledger updated**\n" + "\n".join(f"- {line}" for line in lines)
+                    engaged = bda.target_engagements(prompt, command.updates, st.session_state.target_state,
+                                                     get_weapons_catalog())
+                    if engaged:
+                        st.session_state.target_state, _ = bda.apply_events(st.session_state.target_state, engaged,
+                                                                            desired_pk_setting())
+                        row = st.session_state.target_state["targets"][engaged[0]["target_id"]]
+                        response_text += (f"\n\n🎯 **{row['target_id']}** {row['description']}: expected Pk "
+                                          f"{row['expected_pk']:.2f} — {row['status']}")
+                    if command.warnings:
+                        response_text += "\n\n" + "\n".join(f"⚠️ {w}" for w in command.warnings)
                     st.markdown(response_text)
-
-                    # Parse and apply any ammo updates
-                    updates = parse_ammo_updates(response_text)
-                    if updates:
-                        st.session_state.ammo_status = apply_ammo_updates(
-                            st.session_state.ammo_status, updates
+                elif bda_command is not None:
+                    # BDA bookkeeping or re-attack query — answered from the target-state table
+                    turn.kind = "local_command"
+                    if bda_command.reattack_query:
+                        response_text = bda.format_reattack(bda.reattack_plan(
+                            st.session_state.target_state, st.session_state.ammo_status, get_weapons_catalog(),
+                            desired_pk_setting()))
+                    else:
+                        st.session_state.target_state, changed = bda.apply_events(
+                            st.session_state.target_state, bda_command.events, desired_pk_setting())
+                        targets = st.session_state.target_state["targets"]
+                        response_text = "🎯 **BDA recorded**\n" + "\n".join(
+                            f"- {tid} {targets[tid]['description']}: {targets[tid]['bda']['assessment']} "
+                            f"→ {targets[tid]['status']}" for tid in changed)
+                    if bda_command.warnings:
+                        response_text += "\n\n" + "\n".join(f"⚠️ {w}" for w in bda_command.warnings)
+                    st.markdown(response_text)
+                elif cached is not None:
+                    turn.kind = "cached"
+                    response_text = cached.text
+                    st.caption(f"⚡ Cached answer ({(time.time() - cached.created) / 60:.0f} min old) — "
+                               f"start with {answer_cache.OPT_OUT_PREFIX} for a new one")
+                    st.markdown(format_chat_markdown(response_text))
+                else:
+                    with st.spinner("Analyzing..."):
+                        context = dict(
+                            weapons_ref_text=references.text("weapons"),
+                            hughes_model_text=references.text("hughes"),
+                            doctrine_text=references.text("doctrine"),
+                            ammo_status=st.session_state.ammo_status,
+                            red_ammo=st.session_state.red_ledger,
+                            uploaded_docs=documents,
+                            coalition_ships=st.session_state.coalition_ships if st.session_state.coalition_ships else None,
+                            target_state=bda.prompt_view(st.session_state.target_state,
+                                                         st.session_state.get("bda_prompt_rev", 0)),
                         )
-
-            st.session_state.messages.append(
-                {"role": "assistant", "content": response_text}
-            )
+                        if route.tier.reduced_prompt:
+                            # Only the weapons/Hughes sections this question is about, not the first 8k chars
+                            context["weapons_ref_text"] = references.matching_sections(
+                                prompt, REDUCED_REFERENCES, REFERENCE_EXCERPT_CHARS["weapons_ref"])
+                        build_prompt = (get_reduced_system_prompt if route.tier.reduced_prompt
+                                        else get_system_prompt_with_context)
+                        system_prompt = build_prompt(
+                            adversary_preset=st.session_state.adversary,
+                            current_loadout=st.session_state.current_loadout,
+                            **context,
+                        )
+                        blocks = prompt_blocks(**context)
+                        if route.tier.reduced_prompt:
+                            blocks = {name: blocks[name] for name in REDUCED_BLOCKS}
+                        history = [{"role": m["role"], "content": m["content"]} for m in st.session_state.messages]
+                        turn.prompt_chars = prompt_breakdown(system_prompt, blocks, history)
+                        turn.prompt_sha = prompt_template_sha(build_prompt())     # the template, not this turn's data
+
+                        import anthropic        # loaded with the client on the first model call
+                        try:
+                            response_text, tool_log = run_model_turn(
+                                system_prompt, history, on_wait=show_queue_position, turn=turn, tier=route.tier,
+                            )
+                        except (anthropic.APIError, TimeoutError) as e:     # incl. QueueTimeout, SDK timeouts
+                            turn.kind = "error"
+                            queue_status.empty()
+                            # Drop the unanswered query so the history stays user/assistant alternating
+                            st.session_state.messages.pop()
+                            status = getattr(e, "status_code", None)
+                            if status in (429, 529) or isinstance(e, QueueTimeout):
+                                st.error("The API is saturated right now (class-wide burst). "
+                                         "Your query was not sent — please resubmit in a minute.")
+                            else:
+                                st.error(f"The API request failed ({status or type(e).__name__}). "
+                                         "Your query was not sent — please resubmit.")
+                        else:
+                            queue_status.empty()
+                            if route.tier.reduced_prompt:
+                                st.caption(f"⚡ Quick answer ({route.category}, {route.tier.name} tier) — "
+                                           "ask for a plan or calculation for the full PERCEIVE/DECIDE/ACT analysis")
+                            for call in tool_log:
+                                st.caption(f"🔧 {call['name']}: {call['input'].get('target', '')} "
+                                           f"@ {call['input'].get('range_km', '?')} km")
+                            st.markdown(format_chat_markdown(response_text))
+
+                            # Parse and apply any ammo updates
+                            updates = parse_ammo_updates(response_text)
+                            if updates:
+                                red = [u for u in updates if red_ledger.is_red(u["asset"])]
+                                st.session_state.ammo_status = apply_ammo_updates(
+                                    st.session_state.ammo_status, [u for u in updates if u not in red]
+                                )
+                                st.session_state.red_ledger = apply_ammo_updates(st.session_state.red_ledger, red)
+                                st.session_state.ledger_source = "chat (model)"
+                            if not route.tier.reduced_prompt:       # the reduced prompt carries no target rows
+                                st.session_state.bda_prompt_rev = st.session_state.target_state["rev"]
+                            reports = bda.parse_bda_reports(response_text, st.session_state.target_state)
+                            if reports:
+                                st.session_state.target_state, _ = bda.apply_events(
+                                    st.session_state.target_state, reports, desired_pk_setting())
+                            if cache_key and not tool_log and not updates and not reports:
+                                cache.put(cache_key, response_text)
+
+            if response_text is not None:
+                st.session_state.messages.append(
+                    {"role": "assistant", "content": response_text}
+                )
+            turn.local_ms = (time.perf_counter() - turn_started) * 1000 - turn.api_ms - turn.queue_ms
+            get_metrics_log().record(turn)
 
     with tab_map:
         render_map_tab()
 
+    with tab_pairing:
+        render_pairing_tab()
+
+    with tab_weaponeering:
+        render_weaponeering_tab()
+
     with tab_hughes:
         render_hughes_tab()
 
+    if scenario:
+        get_classroom_hub().record(
+            scenario, overlay, st.session_state.classroom_base,
+            st.session_state.ammo_status,
+            st.session_state.map_units,
+            st.session_state.uploaded_docs,
+            st.session_state.current_loadout,
+        )
+    persist_session(store)
+
 
 if __name__ == "__main__":
     main()
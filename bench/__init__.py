@@ -0,0 +1,6 @@
+"""
+Benchmarks
+Latency and memory benchmarks for the chat path and the local helpers it
+drives, run against the offline Messages API stand-in (services/mock_api.py).
+Run with `python -m bench.run`; see README "Benchmarks".
+"""
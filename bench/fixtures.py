@@ -0,0 +1,116 @@
+"""
+Benchmark fixtures
+Realistic session state at three sizes — ledger, chat history, uploaded
+planning documents, coalition ships and map units — built deterministically
+so runs on different versions measure the same workload.
+"""
+
+import copy
+import random
+from io import BytesIO
+
+import pandas as pd
+
+# small: one battery, short chat; typical: SAG + FA section mid-exercise; large: full MEU, long session
+PROFILES = {
+    "small": {"loadouts": ["Default (Planning)"], "history_turns": 4, "documents": 1, "doc_rows": 50,
+              "coalition_ships": 0, "map_units": 20, "ammo_updates": 4},
+    "typical": {"loadouts": ["Pacific Guard — DESRON SAG", "Pacific Guard — EDL Scaled"], "history_turns": 20,
+                "documents": 3, "doc_rows": 200, "coalition_ships": 3, "map_units": 60, "ammo_updates": 12},
+    "large": {"loadouts": None, "history_turns": 60, "documents": 6, "doc_rows": 1000,
+              "coalition_ships": 6, "map_units": 250, "ammo_updates": 40},
+}
+DOCUMENT_NAMES = ["HPTL_AGM_TSS.xlsx", "TLWS_phase2.xlsx", "EDL_equipment.xlsx",
+                  "OPORD_annex_c.txt", "fires_annex.md", "target_list.xlsx"]
+
+# Model-path queries are sent with the cache opt-out so every turn calls the (mock) API
+CHAT_QUERIES = [
+    "/fresh Engage TGT-0042 SA-20 battery at 38 km with the best available shooter",
+    "/fresh What is the max range of PrSM Increment 1 and its Pk against a hardened C2 node?",
+    "/fresh Fire a suppression mission on the coastal ASCM site, 22 km, then recommend follow-on fires",
+    "/fresh Run a Hughes salvo exchange for the SAG against a Type 052D pair",
+]
+LEDGER_COMMANDS = ["Update ammo: expended 2 GMLRS", "resupplied 2 GMLRS"]
+
+
+def ledger(profile: dict, presets: dict) -> dict:
+    """Merged loadout presets; 'large' merges every preset (asset names are unique across presets)."""
+    merged = {}
+    for name in profile["loadouts"] or list(presets):
+        for asset, munitions in presets[name].items():
+            merged.setdefault(asset, {}).update(copy.deepcopy(munitions))
+    return merged
+
+
+def chat_history(turns: int) -> list[dict]:
+    """Alternating user/assistant messages with answer-sized assistant turns."""
+    messages = []
+    for i in range(turns):
+        if i % 2 == 0:
+            messages.append({"role": "user", "content": CHAT_QUERIES[i // 2 % len(CHAT_QUERIES)].removeprefix("/fresh ")})
+        else:
+            messages.append({"role": "assistant", "content": ("**PHASE 2 — RECOMMENDATION** Primary shooter in range; "
+                                                               "clear through the FSCC. " * 40)})
+    return messages
+
+
+def target_table(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = random.Random(seed)
+    kinds = ["SA-20 battery", "ASCM launcher", "C2 node", "Radar site", "Type 052D", "Logistics node"]
+    return pd.DataFrame({
+        "Target ID": [f"TGT-{i:04d}" for i in range(rows)],
+        "Description": [rng.choice(kinds) for _ in range(rows)],
+        "Priority": [rng.randint(1, 5) for _ in range(rows)],
+        "MGRS": [f"51P XV {rng.randint(10000, 99999)} {rng.randint(10000, 99999)}" for _ in range(rows)],
+        "Range (km)": [round(rng.uniform(5, 300), 1) for _ in range(rows)],
+        "Effect": [rng.choice(["Destroy", "Neutralize", "Suppress"]) for _ in range(rows)],
+    })
+
+
+def upload(name: str, rows: int) -> BytesIO:
+    """In-memory file shaped like Streamlit's UploadedFile (a BytesIO with .name)."""
+    table = target_table(rows)
+    buffer = BytesIO()
+    if name.endswith(".xlsx"):
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            table.to_excel(writer, sheet_name="Targets", index=False)
+            table.describe().to_excel(writer, sheet_name="Summary")
+    else:
+        buffer.write(table.to_string(index=False).encode("utf-8"))
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+
+def uploads(profile: dict) -> list[BytesIO]:
+    return [upload(DOCUMENT_NAMES[i % len(DOCUMENT_NAMES)], profile["doc_rows"]) for i in range(profile["documents"])]
+
+
+def coalition_ships(count: int) -> list[dict]:
+    return [{"name": f"Coalition FFG {i + 1}", "nation": "Allied", "type": "Frigate",
+             "alpha_power": 8, "defensive_power": 4, "staying_power": 1.5} for i in range(count)]
+
+
+def map_units(count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    units = []
+    for i in range(count):
+        red = i % 3 == 0
+        units.append({
+            "name": f"{'RED' if red else 'BLUE'}-{i:03d}",
+            "type": rng.choice(["naval", "artillery", "air_defense", "hq"]),
+            "lat": 15.0 + rng.uniform(-5, 5),
+            "lon": 115.0 + rng.uniform(-5, 5),
+            "range_km": rng.choice([None, 30, 70, 150, 400]),
+            "color": "red" if red else "blue",
+            "notes": "",
+        })
+    return units
+
+
+def ammo_updates(ledger_status: dict, count: int) -> list[dict]:
+    """A mix of EXPENDED / REMAINING / RESUPPLY updates against existing ledger entries."""
+    entries = [(a, m) for a, munitions in ledger_status.items() for m in munitions]
+    kinds = ["EXPENDED", "EXPENDED", "REMAINING", "RESUPPLY"]
+    return [{"asset": entries[i % len(entries)][0], "munition": entries[i % len(entries)][1],
+             "update_type": kinds[i % len(kinds)], "value": 1 + i % 3} for i in range(count)]
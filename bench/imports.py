@@ -0,0 +1,70 @@
+"""
+Import-time budget
+Runs `python -X importtime -c "import app"` in a fresh interpreter and fails
+if app.py's own import cost (everything except streamlit itself) exceeds the
+budget, or if a dependency that should load on first use is imported eagerly:
+
+    python -m bench.imports
+    python -m bench.imports --budget-ms 300 --top 15
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Loaded where first used in app.py, never by `import app`
+DEFERRED_MODULES = ("anthropic", "pandas", "folium", "streamlit_folium", "mgrs", "pyarrow")
+APP_IMPORT_BUDGET_MS = 400.0
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def import_times(module: str = "app") -> list[tuple[str, int, float]]:
+    """(module, nesting depth, cumulative ms) for every import triggered by `import module`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append((match.group(4), (len(match.group(3)) - 1) // 2, int(match.group(2)) / 1000))
+    return rows
+
+
+def check(rows: list[tuple[str, int, float]], budget_ms: float) -> list[str]:
+    """Budget and deferred-import violations."""
+    cumulative = {name: ms for name, _, ms in rows}
+    own_ms = cumulative.get("app", 0.0) - cumulative.get("streamlit", 0.0)
+    problems = []
+    if own_ms > budget_ms:
+        problems.append(f"import app costs {own_ms:.0f} ms excluding streamlit (budget {budget_ms:.0f} ms)")
+    eager = sorted({name.split(".")[0] for name, _, _ in rows} & set(DEFERRED_MODULES))
+    if eager:
+        problems.append(f"imported eagerly: {', '.join(eager)}")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget for app.py")
+    parser.add_argument("--budget-ms", type=float, default=APP_IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="slowest direct imports to list")
+    args = parser.parse_args(argv)
+
+    rows = import_times()
+    cumulative = {name: ms for name, _, ms in rows}
+    print(f"import app: {cumulative.get('app', 0.0):.0f} ms "
+          f"(streamlit {cumulative.get('streamlit', 0.0):.0f} ms)")
+    direct = sorted((r for r in rows if r[1] == 1), key=lambda r: -r[2])[:args.top]
+    for name, _, ms in direct:
+        print(f"  {ms:>8.1f} ms  {name}")
+    problems = check(rows, args.budget_ms)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""
+Benchmark runner
+Times each stage at a session-size profile and reports p50/p95 latency and
+peak traced memory. Results are saved per version under .bench/ (or
+FIRES_BENCH_DIR) and can be compared against an earlier run to flag
+regressions:
+
+    python -m bench.run --profile typical
+    python -m bench.run --compare 2517ad9-typical --threshold 0.25
+"""
+
+import argparse
+import copy
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench import fixtures  # noqa: E402
+
+DEFAULT_RESULTS_DIR = ROOT / ".bench"
+# No latency from the stand-in by default, so chat timings measure the app's own work
+DEFAULT_LLM_SPEC = "ttft_s=0,tokens_per_s=0"
+NOISE_FLOOR_MS = 0.5            # smaller p50/p95 differences are never flagged
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[], object]
+    repeats: int = 30
+    number: int = 1             # calls per timed sample (for microsecond-scale functions)
+    setup: Callable[[], None] | None = None     # untimed, before each sample
+
+
+def percentile(samples: list[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def measure(stage: Stage) -> dict:
+    """Warm up once, time `repeats` samples, then one traced run for peak memory."""
+    if stage.setup:
+        stage.setup()
+    stage.run()
+    samples = []
+    for _ in range(stage.repeats):
+        if stage.setup:
+            stage.setup()
+        started = time.perf_counter()
+        for _ in range(stage.number):
+            stage.run()
+        samples.append((time.perf_counter() - started) * 1000 / stage.number)
+
+    if stage.setup:
+        stage.setup()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    stage.run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "samples": len(samples),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+def helper_stages(profile: dict, repeats: int) -> list[Stage]:
+    """Module-level functions from app.py and the prompt builder, called directly."""
+    import app
+    from prompts.system_prompt import get_system_prompt_with_context
+
+    references = app.get_references()
+    ledger = fixtures.ledger(profile, app.LOADOUT_PRESETS)
+    files = fixtures.uploads(profile)
+    documents = dict(app.parse_uploaded_document(f) for f in files)
+    context = dict(
+        weapons_ref_text=references.text("weapons"),
+        hughes_model_text=references.text("hughes"),
+        doctrine_text=references.text("doctrine"),
+        ammo_status=ledger,
+        uploaded_docs=documents,
+        coalition_ships=fixtures.coalition_ships(profile["coalition_ships"]) or None,
+    )
+    updates = fixtures.ammo_updates(ledger, profile["ammo_updates"])
+    units = fixtures.map_units(profile["map_units"])
+
+    def parse_documents():
+        for f in files:
+            f.seek(0)
+            app.parse_uploaded_document(f)
+
+    stages = [
+        Stage("get_system_prompt_with_context", lambda: get_system_prompt_with_context(**context),
+              repeats=repeats, number=10),
+        Stage("apply_ammo_updates", lambda: app.apply_ammo_updates(ledger, updates), repeats=repeats, number=10),
+        Stage("parse_uploaded_document", parse_documents, repeats=max(5, repeats // 3)),
+        Stage("hughes_salvo_calc", lambda: app.hughes_salvo_calc(2.0, 4, 1.5, 6, 3.0, 2.0, 1.5, 1.0),
+              repeats=repeats, number=1000),
+    ]
+    if app.FOLIUM_AVAILABLE:
+        # Build plus the HTML render st_folium sends to the browser
+        stages.append(Stage("build_tactical_map", lambda: app.build_tactical_map(units).get_root().render(),
+                            repeats=max(5, repeats // 3)))
+    else:
+        print("  skipping build_tactical_map: folium not installed", file=sys.stderr)
+    return stages
+
+
+def chat_stages(profile: dict, repeats: int) -> list[Stage]:
+    """The chat path in main(), driven through Streamlit's AppTest against the offline API stand-in."""
+    import app
+    from streamlit.testing.v1 import AppTest
+
+    history = fixtures.chat_history(profile["history_turns"])
+    ledger = fixtures.ledger(profile, app.LOADOUT_PRESETS)
+    documents = dict(app.parse_uploaded_document(f) for f in fixtures.uploads(profile))
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120)
+    at.session_state["ammo_status"] = ledger
+    at.session_state["uploaded_docs"] = documents
+    at.session_state["coalition_ships"] = fixtures.coalition_ships(profile["coalition_ships"])
+    at.session_state["map_units"] = fixtures.map_units(profile["map_units"])
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"app failed to start: {at.exception[0].value}")
+    turn = {"i": 0}
+
+    def reset():
+        # Same history and ledger for every sample; chat_input clears after each run
+        at.session_state["messages"] = copy.deepcopy(history)
+        at.session_state["ammo_status"] = copy.deepcopy(ledger)
+
+    def send(queries: list[str]):
+        def run():
+            query = queries[turn["i"] % len(queries)]
+            turn["i"] += 1
+            at.chat_input[0].set_value(query).run()
+            if at.exception:
+                raise RuntimeError(f"chat turn failed: {at.exception[0].value}")
+        return run
+
+    return [
+        Stage("chat_turn_model", send(fixtures.CHAT_QUERIES), repeats=max(5, repeats // 3), setup=reset),
+        Stage("chat_turn_local_command", send(fixtures.LEDGER_COMMANDS), repeats=max(5, repeats // 3), setup=reset),
+    ]
+
+
+# =============================================================================
+# RESULTS
+# =============================================================================
+def turn_breakdown(metrics_path: Path) -> dict[str, dict]:
+    """p50 split of chat turns (local work, scheduler queue, API) from the metrics log, by turn kind."""
+    if not metrics_path.exists():
+        return {}
+    records = [json.loads(line) for line in metrics_path.read_text(encoding="utf-8").splitlines() if line]
+    stage_for_kind = {"model": "chat_turn_model", "local_command": "chat_turn_local_command"}
+    breakdown = {}
+    for kind, stage in stage_for_kind.items():
+        turns = [r for r in records if r["kind"] == kind]
+        if turns:
+            breakdown[stage] = {f"{field}_p50": round(percentile([r[field] or 0.0 for r in turns], 50), 1)
+                                for field in ("local_ms", "queue_ms", "api_ms", "ttft_ms")}
+    return breakdown
+
+
+def git_revision() -> str:
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{rev}-dirty" if dirty else rev
+    except (OSError, subprocess.CalledProcessError):
+        return "unversioned"
+
+
+def results_dir() -> Path:
+    return Path(os.environ.get("FIRES_BENCH_DIR", DEFAULT_RESULTS_DIR))
+
+
+def load_results(ref: str) -> dict:
+    """A results file path, or a saved label such as '2517ad9-typical'."""
+    path = Path(ref) if Path(ref).suffix == ".json" else results_dir() / f"{ref}.json"
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Stages whose p50 or p95 grew by more than `threshold` (fraction) and the noise floor."""
+    regressions = []
+    for name, now in current["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            delta = now[metric] - before[metric]
+            if delta > NOISE_FLOOR_MS and delta > threshold * before[metric]:
+                regressions.append(f"{name} {metric}: {before[metric]:.2f} → {now[metric]:.2f} ms "
+                                   f"(+{delta / before[metric]:.0%})")
+    return regressions
+
+
+def print_table(current: dict, baseline: dict | None):
+    print(f"\n{current['label']}  (python {current['python']}, profile {current['profile']})")
+    header = f"{'stage':<34}{'p50 ms':>10}{'p95 ms':>10}{'peak KiB':>11}"
+    print(header + ("   vs " + baseline["label"] if baseline else ""))
+    for name, r in current["stages"].items():
+        line = f"{name:<34}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['peak_kib']:>11.1f}"
+        before = baseline["stages"].get(name) if baseline else None
+        if before and before["p50_ms"]:
+            line += f"   p50 {(r['p50_ms'] - before['p50_ms']) / before['p50_ms']:+.0%}"
+        if "local_ms_p50" in r:
+            line += (f"   [local {r['local_ms_p50']:.0f} / queue {r['queue_ms_p50']:.0f} / "
+                     f"api {r['api_ms_p50']:.0f} ms]")
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Fires Coordinator latency/memory benchmarks")
+    parser.add_argument("--profile", choices=sorted(fixtures.PROFILES), default="typical")
+    parser.add_argument("--repeats", type=int, default=30, help="timed samples per stage")
+    parser.add_argument("--only", choices=["helpers", "chat"], help="run one group of stages")
+    parser.add_argument("--llm", default=DEFAULT_LLM_SPEC,
+                        help="MockConfig spec for the API stand-in, e.g. 'ttft_s=0.6,tokens_per_s=80'")
+    parser.add_argument("--label", help="results name (default: <git rev>-<profile>)")
+    parser.add_argument("--compare", help="earlier results label or .json path to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="regression threshold (fraction)")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Isolate the run: offline API, throwaway session DB and metrics log
+    scratch = Path(tempfile.mkdtemp(prefix="fires-bench-"))
+    os.environ["FIRES_MOCK_LLM"] = args.llm
+    os.environ["FIRES_SESSION_DB"] = str(scratch / "sessions.db")
+    os.environ["FIRES_METRICS_PATH"] = str(scratch / "turns.jsonl")
+
+    profile = fixtures.PROFILES[args.profile]
+    stages = []
+    if args.only in (None, "helpers"):
+        stages += helper_stages(profile, args.repeats)
+    if args.only in (None, "chat"):
+        stages += chat_stages(profile, args.repeats)
+
+    current = {
+        "label": args.label or f"{git_revision()}-{args.profile}",
+        "revision": git_revision(),
+        "profile": args.profile,
+        "llm": args.llm,
+        "python": platform.python_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": {},
+    }
+    for stage in stages:
+        print(f"  {stage.name} ...", file=sys.stderr)
+        current["stages"][stage.name] = measure(stage)
+    for name, split in turn_breakdown(Path(os.environ["FIRES_METRICS_PATH"])).items():
+        current["stages"][name].update(split)
+
+    baseline = load_results(args.compare) if args.compare else None
+    print_table(current, baseline)
+    if not args.no_save:
+        path = results_dir() / f"{current['label']}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(f"\nsaved {path}")
+    if baseline:
+        regressions = compare(current, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
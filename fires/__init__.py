@@ -0,0 +1 @@
+# Fires calculation package
@@ -0,0 +1,269 @@
+"""
+Fire allocation
+Assigns rounds from every shooter in the ledger (plus allocated coalition ships)
+across a target list to maximize expected target value destroyed — HPTL
+priority weight × cumulative Pk — subject to range/role feasibility, magazine
+depth, munition reserves and per-platform round caps. NumPy greedy (best
+marginal value per round, sized to each target's desired Pk) with a repair
+pass that trims overkill and moves rounds from low- to high-priority targets.
+"""
+
+import copy
+import re
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from fires import pairing
+from fires.catalog import WeaponsCatalog
+from fires.weaponeering import TargetRow, engagement_matrix
+
+# Munition keyword -> fraction of remaining rounds withheld from allocation
+DEFAULT_RESERVES = {"sm-6": 0.5}        # dual-use: keep interceptors for AAW
+
+_MISSILE_COUNT = re.compile(r"^\s*(?:(\d+)\s*[x×]\s*(.+?)|(.+?)\s*[x×]\s*(\d+))\s*$", re.IGNORECASE)
+
+
+@dataclass
+class FireMission:
+    target_id: str
+    description: str
+    asset: str
+    munition: str
+    rounds: int
+    pk_single: float
+
+
+@dataclass
+class FirePlan:
+    missions: list[FireMission]
+    targets: list[dict]                 # per-target value, desired/achieved Pk, status
+    draw: list[dict]                    # per-shooter rounds allocated vs. available
+    expected_value: float               # Σ value × achieved Pk
+    max_value: float                    # Σ value (every target destroyed)
+    solve_ms: float
+    notes: list[str] = field(default_factory=list)
+
+
+# =============================================================================
+# SHOOTERS
+# =============================================================================
+def parse_missile_list(text: str) -> dict[str, int]:
+    """'Aster 30 x16, Exocet x8' or '16× Aster 30' -> {munition: count}."""
+    counts = {}
+    for part in re.split(r"[,;]", text or ""):
+        match = _MISSILE_COUNT.match(part)
+        if match:
+            count = match.group(1) or match.group(4)
+            name = (match.group(2) or match.group(3)).strip()
+            counts[name] = counts.get(name, 0) + int(count)
+    return counts
+
+
+def coalition_ledger(coalition_ships: list[dict], catalog: WeaponsCatalog) -> dict:
+    """
+    Ledger-shaped entries for allocated coalition ships: the missiles typed in the
+    sidebar, or the ship's §10.1 load from the catalog when none were given.
+    """
+    ledger = {}
+    for ship in coalition_ships or []:
+        counts = parse_missile_list(ship.get("missiles", ""))
+        if not counts:
+            counts = {l.munition: l.count for l in catalog.loads_for(ship.get("name", ""), side="coalition")
+                      if l.count}
+        if counts:
+            asset = f"{ship['name']} ({ship.get('nation', 'Coalition')})"
+            ledger[asset] = {m: {"initial": n, "expended": 0} for m, n in counts.items()}
+    return ledger
+
+
+def merge_ledgers(coalition: dict, ammo_status: dict) -> dict:
+    """
+    Shooter ledger for allocation, merged per munition: tracked counts in
+    ammo_status win, and a coalition ship keeps the munitions it has not fired yet.
+    """
+    merged = {asset: dict(munitions) for asset, munitions in coalition.items()}
+    for asset, munitions in ammo_status.items():
+        merged.setdefault(asset, {}).update(munitions)
+    return merged
+
+
+def target_values(targets: list[TargetRow]) -> np.ndarray:
+    """HPTL priority weight: priority 1 is worth the most; unprioritized targets weigh 1."""
+    priorities = [t.priority for t in targets if t.priority]
+    lowest = max(priorities, default=1)
+    return np.array([(lowest + 1 - t.priority) if t.priority else 1.0 for t in targets], dtype=float)
+
+
+# =============================================================================
+# SOLVER
+# =============================================================================
+def _greedy(X, log_q, feasible, value, goal_log, cur_log, avail, asset_avail, asset_of):
+    """Add salvos in order of best marginal value per round until nothing helps."""
+    T, M = X.shape
+    if T == 0 or M == 0:
+        return
+    with np.errstate(divide="ignore", invalid="ignore"):
+        while True:
+            need = goal_log - cur_log                                   # < 0 while under desired Pk
+            cap = np.minimum(avail, asset_avail[asset_of])
+            ok = feasible & (need < -1e-12)[:, None] & (cap > 0)[None, :]
+            if not ok.any():
+                return
+            n = np.ceil(need[:, None] / log_q - 1e-9)
+            n = np.clip(np.where(ok, n, 1), 1, np.maximum(cap, 1)[None, :])
+            gain = value[:, None] * np.exp(cur_log)[:, None] * (1 - np.exp(n * log_q))
+            eff = np.where(ok, gain / n, -np.inf)
+            t, s = np.unravel_index(np.argmax(eff), eff.shape)
+            if not np.isfinite(eff[t, s]) or eff[t, s] <= 0:
+                return
+            k = int(n[t, s])
+            X[t, s] += k
+            avail[s] -= k
+            asset_avail[asset_of[s]] -= k
+            cur_log[t] += k * log_q[t, s]
+
+
+def _trim(X, log_q, goal_log, cur_log, avail, asset_avail, asset_of):
+    """Return rounds that overshoot a target's desired Pk (integer rounding, stacked shooters)."""
+    for t, s in zip(*np.nonzero(X)):
+        while X[t, s] > 0 and cur_log[t] - log_q[t, s] <= goal_log[t] + 1e-12:
+            X[t, s] -= 1
+            cur_log[t] -= log_q[t, s]
+            avail[s] += 1
+            asset_avail[asset_of[s]] += 1
+
+
+def _repair(X, log_q, feasible, value, goal_log, cur_log):
+    """Move rounds of a depleted shooter from lower- to higher-value unmet targets when it pays."""
+    moved = 0
+    unmet = [t for t in np.argsort(-value) if cur_log[t] > goal_log[t] + 1e-12]
+    for t in unmet:
+        for s in np.argsort(log_q[t]):                                  # best Pk first
+            if not feasible[t, s] or cur_log[t] <= goal_log[t] + 1e-12:
+                continue
+            donors = [u for u in np.argsort(value) if X[u, s] > 0 and value[u] < value[t]]
+            for u in donors:
+                need = int(np.ceil((goal_log[t] - cur_log[t]) / log_q[t, s] - 1e-9))
+                k = min(int(X[u, s]), max(need, 1))
+                gain = value[t] * np.exp(cur_log[t]) * (1 - np.exp(k * log_q[t, s]))
+                loss = value[u] * (np.exp(cur_log[u] - k * log_q[u, s]) - np.exp(cur_log[u]))
+                if gain <= loss:
+                    continue
+                X[u, s] -= k
+                X[t, s] += k
+                cur_log[u] -= k * log_q[u, s]
+                cur_log[t] += k * log_q[t, s]
+                moved += k
+                if cur_log[t] <= goal_log[t] + 1e-12:
+                    break
+    return moved
+
+
+def allocate(targets: list[TargetRow], ledger: dict, catalog: WeaponsCatalog,
+             desired_pk: float = pairing.DEFAULT_DESIRED_PK,
+             reserves: dict[str, float] | None = None,
+             approved: list[str] | None = None,
+             asset_caps: dict[str, int] | None = None) -> FirePlan:
+    """
+    Allocate fires for a target list.
+    ledger: ammo_status-shaped dict (optionally merge_ledgers(coalition_ledger(...), ammo_status)).
+    reserves: munition keyword -> fraction withheld (default DEFAULT_RESERVES).
+    approved: pairing.APPROVAL_REQUIRED keys released for this plan; munitions needing
+    any other approval are excluded.
+    asset_caps: asset -> maximum rounds it may fire in this plan (all munitions).
+    """
+    started = time.perf_counter()
+    reserves = DEFAULT_RESERVES if reserves is None else reserves
+    approved = [a.lower() for a in (approved or [])]
+    matrix = engagement_matrix(targets, ledger, catalog)
+    columns = matrix.columns
+    notes = []
+
+    # Shooter availability after reserves, approvals and per-platform caps
+    avail = np.maximum(matrix.remaining, 0).astype(float)
+    for j, (asset, munition) in enumerate(columns):
+        name = munition.lower()
+        for keyword, fraction in reserves.items():
+            if keyword in name and avail[j] > 0:
+                held = int(np.ceil(avail[j] * fraction))
+                avail[j] -= held
+                notes.append(f"{asset} — {munition}: {held} held in reserve")
+        approval = pairing.approval_required(munition)
+        if approval and approval not in approved:
+            avail[j] = 0
+            notes.append(f"{asset} — {munition}: excluded pending approval")
+    assets = sorted({a for a, _ in columns})
+    asset_of = np.array([assets.index(a) for a, _ in columns], dtype=int)
+    caps = asset_caps or {}
+    asset_avail = np.array([caps.get(a, np.inf) or np.inf for a in assets], dtype=float)
+
+    value = target_values(targets)
+    desired = np.array([t.desired_pk or desired_pk for t in targets], dtype=float)
+    goal_log = np.log1p(-desired)
+    feasible = matrix.feasible & (avail > 0)[None, :]
+    with np.errstate(divide="ignore"):
+        log_q = np.where(feasible, np.log1p(-np.minimum(matrix.pk, 0.999999)), 0.0)
+    feasible &= log_q < 0
+
+    X = np.zeros(feasible.shape, dtype=int)
+    cur_log = np.zeros(len(targets))
+    _greedy(X, log_q, feasible, value, goal_log, cur_log, avail, asset_avail, asset_of)
+    _trim(X, log_q, goal_log, cur_log, avail, asset_avail, asset_of)
+    if _repair(X, log_q, feasible, value, goal_log, cur_log):
+        _trim(X, log_q, goal_log, cur_log, avail, asset_avail, asset_of)
+    _greedy(X, log_q, feasible, value, goal_log, cur_log, avail, asset_avail, asset_of)
+
+    achieved = 1 - np.exp(cur_log)
+    missions = [
+        FireMission(targets[t].target_id, targets[t].description, columns[s][0], columns[s][1],
+                    int(X[t, s]), round(float(matrix.pk[t, s]), 3))
+        for t, s in zip(*np.nonzero(X))
+    ]
+    target_rows = []
+    for i, t in enumerate(targets):
+        if achieved[i] >= desired[i] - 1e-9:
+            status = "met"
+        elif achieved[i] > 0:
+            status = "partial"
+        else:
+            status = "unengaged" if feasible[i].any() else "no feasible shooter"
+        target_rows.append({
+            "target_id": t.target_id, "description": t.description, "priority": t.priority,
+            "value": float(value[i]), "desired_pk": float(desired[i]),
+            "achieved_pk": round(float(achieved[i]), 3), "rounds": int(X[i].sum()), "status": status,
+        })
+    used = X.sum(axis=0)
+    draw = [
+        {"asset": columns[j][0], "munition": columns[j][1], "remaining": int(matrix.remaining[j]),
+         "allocated": int(used[j]), "after": int(matrix.remaining[j] - used[j])}
+        for j in np.flatnonzero(used)
+    ]
+    return FirePlan(
+        missions=missions,
+        targets=target_rows,
+        draw=draw,
+        expected_value=round(float((value * achieved).sum()), 3),
+        max_value=float(value.sum()),
+        solve_ms=round((time.perf_counter() - started) * 1000, 1),
+        notes=notes,
+    )
+
+
+def apply_plan(ammo_status: dict, plan: FirePlan, ledger: dict | None = None) -> dict:
+    """
+    Ledger after firing the plan. A coalition shooter is added to tracking on
+    first use with its whole load from `ledger`, not just the munition it fired.
+    """
+    updated = copy.deepcopy(ammo_status)
+    for mission in plan.missions:
+        source = (ledger or {}).get(mission.asset, {})
+        if mission.munition not in updated.get(mission.asset, {}):
+            if mission.munition not in source:
+                continue
+            tracked = updated.setdefault(mission.asset, {})
+            for munition, counts in source.items():
+                tracked.setdefault(munition, dict(counts))
+        updated[mission.asset][mission.munition]["expended"] += mission.rounds
+    return updated
@@ -0,0 +1,160 @@
+"""
+Ammo bookkeeping commands
+Local interpreter for pure ledger edits typed in chat — "Update ammo: expended
+18 GMLRS and 4 PrSM", "12 Excalibur remaining", "resupplied 36 GMLRS to HIMARS".
+Recognized commands are applied without a model call; anything that is not
+entirely bookkeeping — an order to fire, a munition the ledger does not hold,
+a munition held by several assets with none named — returns None and goes to
+the model as before.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from fires.catalog import WeaponsCatalog
+
+# Verb groups -> ledger update type (apply_ammo_updates in app.py)
+ACTION_WORDS = {
+    "EXPENDED": ["expended", "fired", "shot", "used", "spent", "consumed"],
+    "REMAINING": ["remaining", "remain", "left", "on hand"],
+    "RESUPPLY": ["resupplied", "resupply", "received", "reloaded", "reload", "rearmed", "rearm", "added"],
+}
+# Orders ("Fire 4 ATACMS at the HQ-9 battery") are requests for a plan, not completed expenditure
+IMPERATIVE = re.compile(r"^\s*(?:please\s+)?(?:fire|shoot|launch|engage|expend|use|send|strike|hit)\b",
+                        re.IGNORECASE)
+COMMAND_PREFIX = re.compile(r"^\s*(?:update\s+ammo|ammo\s+update|ammo)\s*[:\-]?\s*", re.IGNORECASE)
+FILLER_WORDS = {"we", "i", "have", "has", "had", "now", "just", "total", "a", "an", "the", "of", "with"}
+NOISE_WORDS = {"rockets", "rocket", "missiles", "missile", "rounds", "round", "rds", "rd", "shells", "x"}
+ASSET_MARKER = re.compile(r"\s+(from|by|on|off|to|for)\s+(?:the\s+)?", re.IGNORECASE)
+TARGET_MARKERS = {"on"}         # "fired 2 TLAM on TGT-0042": an "on" phrase naming no asset is the target
+REMARK_MARKER = re.compile(r"\s+(?:in support of|against|at|during|on target|vs\.?)\b.*$", re.IGNORECASE)
+CLAUSE_SPLIT = re.compile(r"\s*(?:,|;|\band\b|\bplus\b|\n)\s*", re.IGNORECASE)
+
+
+@dataclass
+class LedgerCommand:
+    updates: list[dict]                                 # apply_ammo_updates() format, exact ledger names
+    warnings: list[str] = field(default_factory=list)      # applied, but worth a second look
+
+
+def _tokens(text: str) -> set[str]:
+    """Comparable tokens: '5" Rounds' and '5-inch rounds' both -> {'5', 'in'}; plurals folded."""
+    text = text.lower().replace('"', " in ").replace("inch", " in ").replace("mm", " ")
+    text = re.sub(r"(\d)-(?=[a-z])", r"\1 ", text)
+    words = re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", text)
+    return {w[:-1] if len(w) > 3 and w.endswith("s") else w for w in words if w not in NOISE_WORDS}
+
+
+def _action(clause: str) -> tuple[str | None, str]:
+    """Update type named in a clause and the clause with the verb removed."""
+    for action, words in ACTION_WORDS.items():
+        for word in words:
+            pattern = rf"\b{re.escape(word)}\b"
+            if re.search(pattern, clause, re.IGNORECASE):
+                return action, re.sub(pattern, " ", clause, count=1, flags=re.IGNORECASE)
+    return None, clause
+
+
+def _holdings(munition_text: str, asset_text: str, ammo_status: dict,
+              catalog: WeaponsCatalog | None) -> list[tuple[str, str]]:
+    """(asset, munition) ledger entries matching the typed munition (and asset, if given)."""
+    wanted = _tokens(munition_text)
+    entry = catalog.munition(munition_text) if catalog is not None else None
+    asset_tokens = _tokens(asset_text)
+    matches = []
+    for asset, munitions in ammo_status.items():
+        if asset_tokens and not asset_tokens <= _tokens(asset):
+            continue
+        for munition in munitions:
+            if (wanted and wanted <= _tokens(munition)) or (
+                    entry is not None and catalog.munition(munition) is entry):
+                matches.append((asset, munition))
+    return matches
+
+
+def _asset_text(phrases: list[tuple[str, str]], ammo_status: dict) -> str | None:
+    """
+    The marker phrase naming the holding asset ("" if none), or None if a phrase names
+    an asset the ledger does not hold or several assets are named. An "on" phrase that
+    names no asset is a target clause and is skipped.
+    """
+    named = []
+    for marker, text in phrases:
+        wanted = _tokens(text)
+        if wanted and any(wanted <= _tokens(asset) for asset in ammo_status):
+            named.append(text)
+        elif marker.lower() not in TARGET_MARKERS:
+            return None
+    return named[0] if len(named) == 1 else ("" if not named else None)
+
+
+def _parse_clause(clause: str, action: str | None) -> tuple[str, int, str, list[tuple[str, str]]] | None:
+    """
+    (action, count, munition text, [(marker, phrase)]) for one clause, or None if it
+    isn't bookkeeping. Phrases are the "from/by/on/off/to/for ..." parts after the munition.
+    """
+    if IMPERATIVE.match(clause):
+        return None
+    clause_action, rest = _action(clause)
+    action = clause_action or action
+    rest = REMARK_MARKER.sub("", rest)
+    parts = ASSET_MARKER.split(rest)
+    rest, phrases = parts[0], [(m, t.strip()) for m, t in zip(parts[1::2], parts[2::2]) if t.strip()]
+    numbers = re.findall(r"(?<![\w.-])(\d+)(?![\w.-])", rest)
+    if action is None or len(numbers) != 1:
+        return None
+    rest = re.sub(rf"(?<![\w.-]){numbers[0]}(?![\w.-])\s*x?", " ", rest, count=1)
+    words = [w for w in re.split(r"[\s:]+", rest.strip()) if w and w.lower() not in FILLER_WORDS]
+    if not words:
+        return None
+    return action, int(numbers[0]), " ".join(words), phrases
+
+
+def interpret(text: str, ammo_status: dict, catalog: WeaponsCatalog | None = None) -> LedgerCommand | None:
+    """
+    Ledger updates for a bookkeeping message, or None if it is anything else
+    (a question, an order to fire, mixed content, no recognizable count/munition)
+    or names a munition the ledger cannot resolve to exactly one entry.
+    """
+    if "?" in text or not ammo_status:
+        return None
+    body = COMMAND_PREFIX.sub("", text.strip().rstrip("."))
+    clauses = [c for c in CLAUSE_SPLIT.split(body) if c.strip()]
+    parsed, action = [], None
+    for clause in clauses:
+        result = _parse_clause(clause, action)
+        if result is None:
+            return None
+        action = result[0]
+        parsed.append(result)
+    if not parsed:
+        return None
+
+    command = LedgerCommand(updates=[])
+    for action, count, munition_text, phrases in parsed:
+        asset_text = _asset_text(phrases, ammo_status)
+        holdings = _holdings(munition_text, asset_text, ammo_status, catalog) if asset_text is not None else []
+        if len(holdings) != 1:
+            # Unknown or ambiguous — let the model ask rather than debit a guessed holder
+            return None
+        (asset, munition), = holdings
+        counts = ammo_status[asset][munition]
+        remaining = counts["initial"] - counts["expended"]
+        if action == "EXPENDED" and count > remaining:
+            command.warnings.append(f"{asset} — {munition}: {count} expended but only {remaining} were left")
+        command.updates.append({"asset": asset, "munition": munition, "update_type": action, "value": count})
+    return command
+
+
+def describe(command: LedgerCommand, before: dict, after: dict) -> list[str]:
+    """One confirmation line per update: what changed and what is left."""
+    verbs = {"EXPENDED": "expended", "REMAINING": "set remaining to", "RESUPPLY": "resupplied"}
+    lines = []
+    for upd in command.updates:
+        old = before[upd["asset"]][upd["munition"]]
+        new = after[upd["asset"]][upd["munition"]]
+        remaining = new["initial"] - new["expended"]
+        change = remaining - (old["initial"] - old["expended"])
+        lines.append(f"{upd['asset']} — {upd['munition']}: {verbs[upd['update_type']]} {upd['value']} "
+                     f"→ {remaining}/{new['initial']} remaining ({change:+d})")
+    return lines
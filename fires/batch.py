@@ -0,0 +1,298 @@
+"""
+Headless batch scenario runner
+Evaluates every parameter variant of a scenario file — loadout, adversary,
+coalition ships, target list — through the Hughes salvo model, batch
+weaponeering, fire allocation and the execution timeline, in parallel across
+cores, and writes one summary row per variant (plus optional per-mission rows)
+to CSV or Parquet. No Streamlit; usable as a CLI or imported:
+
+    python -m fires.batch scenario.json -o results.csv --missions missions.parquet
+"""
+
+import argparse
+import copy
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fires import allocation, pairing, timeline, weaponeering
+from fires.catalog import WeaponsCatalog, load_catalog
+from fires.presets import ADVERSARY_PRESETS, LOADOUT_PRESETS
+from fires.salvo import hughes_salvo_calc, nmesis_alpha
+
+ANALYSES = ("hughes", "weaponeering", "allocation", "timeline")
+
+# Every parameter a variant may set; defaults match the app's controls
+DEFAULT_PARAMETERS = {
+    "loadout": "Default (Planning)",
+    "adversary": "Olvana (Chinese-type)",
+    # Weaponeering / allocation
+    "desired_pk": pairing.DEFAULT_DESIRED_PK,
+    "sm6_reserve": allocation.DEFAULT_RESERVES["sm-6"],
+    "shooter_cap": 0,                   # max rounds per shooter, 0 = magazine
+    "tlam_approved": False,
+    "massed_tot": False,
+    # Hughes salvo (blue from the tab defaults, red from the adversary preset)
+    "blue_ships": 2,
+    "blue_alpha": 4.0,
+    "blue_z": 6.0,
+    "blue_a": 2.0,
+    "nmesis_missiles": 0,
+    "red_ship": "",                     # adversary naval class; "" = first in the preset
+    "red_ships": 3,
+    "red_beta": None,                   # None = the preset's α / y / b for red_ship
+    "red_y": None,
+    "red_b": None,
+}
+
+
+@dataclass
+class Scenario:
+    name: str
+    parameters: dict                    # DEFAULT_PARAMETERS overridden by the scenario file
+    variants: list[dict]                # fully resolved parameters, each with a "variant" name
+    targets: list[weaponeering.TargetRow] = field(default_factory=list)
+    coalition_ships: list[dict] = field(default_factory=list)
+    analyses: tuple[str, ...] = ANALYSES
+
+
+@dataclass
+class BatchResult:
+    summary: list[dict]                 # one row per variant
+    missions: list[dict]                # allocated fire missions, tagged with their variant
+    workers: int
+    wall_s: float
+
+
+# =============================================================================
+# SCENARIO FILES
+# =============================================================================
+def load_targets(spec, base_dir: Path) -> list[weaponeering.TargetRow]:
+    """Inline worksheet rows, or a .xlsx/.xls/.csv path relative to the scenario file."""
+    if not spec:
+        return []
+    if isinstance(spec, list):
+        return weaponeering.parse_target_list(spec)
+    path = Path(spec) if Path(spec).is_absolute() else base_dir / spec
+    if path.suffix.lower() == ".csv":
+        import pandas as pd
+        return weaponeering.parse_target_list(pd.read_csv(path).to_dict("records"))
+    return weaponeering.read_target_workbook(path)
+
+
+def expand_variants(parameters: dict, variants: list[dict] | None, grid: dict | None) -> list[dict]:
+    """
+    Explicit variants × the Cartesian product of the grid, each resolved over the
+    scenario parameters. Names join the explicit name and the grid values.
+    """
+    grid = grid or {}
+    combos = [dict(zip(grid, values)) for values in itertools.product(*grid.values())] or [{}]
+    resolved = []
+    for variant in variants or [{}]:
+        overrides = {k: v for k, v in variant.items() if k != "name"}
+        for combo in combos:
+            params = {**parameters, **overrides, **combo}
+            unknown = set(params) - set(DEFAULT_PARAMETERS)
+            if unknown:
+                raise ValueError(f"unknown parameter(s): {', '.join(sorted(unknown))}")
+            label = [variant.get("name", "")] + [f"{k}={v}" for k, v in combo.items()]
+            params["variant"] = ", ".join(p for p in label if p) or "base"
+            resolved.append(params)
+    return resolved
+
+
+def load_scenario(path: str | Path) -> Scenario:
+    """
+    Read a JSON scenario file:
+    {"name", "loadout", "adversary", "coalition_ships": [...], "targets": path or rows,
+     "analyses": [...], "parameters": {...}, "variants": [{"name", ...}], "grid": {param: [values]}}
+    """
+    path = Path(path)
+    data = json.loads(path.read_text(encoding="utf-8"))
+    parameters = dict(DEFAULT_PARAMETERS)
+    parameters.update({k: data[k] for k in ("loadout", "adversary") if k in data})
+    parameters.update(data.get("parameters", {}))
+    analyses = tuple(data.get("analyses", ANALYSES))
+    unknown = set(analyses) - set(ANALYSES)
+    if unknown:
+        raise ValueError(f"unknown analyses: {', '.join(sorted(unknown))}")
+    return Scenario(
+        name=data.get("name", path.stem),
+        parameters=parameters,
+        variants=expand_variants(parameters, data.get("variants"), data.get("grid")),
+        targets=load_targets(data.get("targets"), path.parent),
+        coalition_ships=data.get("coalition_ships", []),
+        analyses=analyses,
+    )
+
+
+# =============================================================================
+# EVALUATION
+# =============================================================================
+def red_force(params: dict) -> dict:
+    """Red α / y / b for the variant: explicit values, else the adversary preset's naval class."""
+    naval = ADVERSARY_PRESETS[params["adversary"]]["naval"]
+    ship = params["red_ship"] or next(iter(naval))
+    preset = naval[ship]
+    return {
+        "ship": ship,
+        "beta": preset["alpha"] if params["red_beta"] is None else params["red_beta"],
+        "y": preset["y"] if params["red_y"] is None else params["red_y"],
+        "b": preset["b"] if params["red_b"] is None else params["red_b"],
+    }
+
+
+def evaluate(params: dict, targets: list[weaponeering.TargetRow], coalition_ships: list[dict],
+             catalog: WeaponsCatalog | None, analyses: tuple[str, ...] = ANALYSES) -> tuple[dict, list[dict]]:
+    """One variant -> (summary row, fire-mission rows)."""
+    row = dict(params)
+    missions = []
+
+    if "hughes" in analyses:
+        red = red_force(params)
+        result = hughes_salvo_calc(
+            nmesis_alpha(params["blue_alpha"], params["blue_ships"], params["nmesis_missiles"]),
+            params["blue_ships"], red["beta"], params["red_ships"], red["y"], params["blue_z"],
+            params["blue_a"], red["b"],
+        )
+        row.update({"red_ship": red["ship"], "red_beta": red["beta"], "red_y": red["y"], "red_b": red["b"]})
+        row.update({f"hughes_{k}": v for k, v in result.items()})
+        row["hughes_blue_breakthrough"] = result["delta_B"] >= params["red_ships"]
+        row["hughes_red_breakthrough"] = result["delta_A"] >= params["blue_ships"]
+
+    if not targets or catalog is None or not set(analyses) & {"weaponeering", "allocation", "timeline"}:
+        return row, missions
+    ammo_status = copy.deepcopy(LOADOUT_PRESETS[params["loadout"]])
+
+    if "weaponeering" in analyses:
+        result = weaponeering.solve(targets, ammo_status, catalog, params["desired_pk"])
+        engaged = [p for p in result.plan if p["rounds"] > 0]
+        row.update({
+            "wpn_targets": len(result.plan),
+            "wpn_engageable": len(engaged),
+            "wpn_rounds": sum(p["rounds"] for p in engaged),
+            "wpn_mean_achieved_pk": round(sum(p["achieved_pk"] for p in engaged) / len(engaged), 3) if engaged else 0.0,
+        })
+
+    if "allocation" in analyses or "timeline" in analyses:
+        ledger = allocation.merge_ledgers(allocation.coalition_ledger(coalition_ships, catalog), ammo_status)
+        plan = allocation.allocate(
+            targets, ledger, catalog, params["desired_pk"],
+            reserves={"sm-6": params["sm6_reserve"]},
+            approved=["tlam block e"] if params["tlam_approved"] else [],
+            asset_caps={asset: params["shooter_cap"] for asset in ledger} if params["shooter_cap"] else None,
+        )
+        row.update({
+            "alloc_expected_value": round(plan.expected_value, 3),
+            "alloc_max_value": plan.max_value,
+            "alloc_value_pct": round(100 * plan.expected_value / plan.max_value, 1) if plan.max_value else 0.0,
+            "alloc_targets_met": sum(1 for t in plan.targets if t["status"] == "met"),
+            "alloc_missions": len(plan.missions),
+            "alloc_rounds": sum(m.rounds for m in plan.missions),
+            "alloc_solve_ms": plan.solve_ms,
+        })
+        missions = [{"variant": params["variant"], **vars(m)} for m in plan.missions]
+
+        if "timeline" in analyses and plan.missions:
+            schedule = timeline.schedule(timeline.missions_from_plan(plan.missions, targets, params["massed_tot"]))
+            row.update({"tl_completion_s": schedule.completion_s, "tl_tot_passes": schedule.passes})
+            launch = {s.mission_id: s for s in schedule.missions}
+            for i, m in enumerate(missions, start=1):
+                s = launch.get(f"FM{i:04d}")
+                if s is not None:
+                    m.update(launch_start_s=s.launch_start_s, first_impact_s=s.first_impact_s,
+                             last_impact_s=s.last_impact_s)
+    return row, missions
+
+
+# Per-worker state, set once by _init_worker so tasks only carry their parameters
+_WORKER: dict = {}
+
+
+def _init_worker(reference_path: str | None, targets: list[dict], coalition_ships: list[dict],
+                 analyses: tuple[str, ...]):
+    _WORKER.update(
+        catalog=load_catalog(reference_path) if reference_path else None,
+        targets=[weaponeering.TargetRow(**t) for t in targets],
+        coalition_ships=coalition_ships,
+        analyses=analyses,
+    )
+
+
+def _evaluate_in_worker(params: dict) -> tuple[dict, list[dict]]:
+    try:
+        return evaluate(params, _WORKER["targets"], _WORKER["coalition_ships"], _WORKER["catalog"],
+                        _WORKER["analyses"])
+    except Exception as e:                          # one bad variant doesn't sink the batch
+        return {**params, "error": f"{type(e).__name__}: {e}"}, []
+
+
+def weapons_reference_path() -> str | None:
+    from services.references import ReferenceRegistry
+    path = ReferenceRegistry().path("weapons")
+    return str(path) if path else None
+
+
+def run(scenario: Scenario, workers: int | None = None, reference_path: str | None = None) -> BatchResult:
+    """Evaluate every variant; workers=1 runs in-process, otherwise a process pool (default: all cores)."""
+    started = time.perf_counter()
+    reference_path = reference_path or weapons_reference_path()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(scenario.variants)))
+    init_args = (reference_path, [vars(t) for t in scenario.targets], scenario.coalition_ships, scenario.analyses)
+    if workers == 1:
+        _init_worker(*init_args)
+        results = [_evaluate_in_worker(p) for p in scenario.variants]
+    else:
+        chunksize = max(1, len(scenario.variants) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_evaluate_in_worker, scenario.variants, chunksize=chunksize))
+    return BatchResult(
+        summary=[row for row, _ in results],
+        missions=[m for _, rows in results for m in rows],
+        workers=workers,
+        wall_s=round(time.perf_counter() - started, 3),
+    )
+
+
+def write_table(rows: list[dict], path: str | Path):
+    """CSV or Parquet by extension (Parquet needs pyarrow)."""
+    import pandas as pd
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = pd.DataFrame(rows)
+    if path.suffix.lower() == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run every variant of a fires scenario file headlessly")
+    parser.add_argument("scenario", help="scenario JSON file")
+    parser.add_argument("-o", "--output", default="batch_results.csv", help="summary table (.csv or .parquet)")
+    parser.add_argument("--missions", help="also write per-variant fire missions (.csv or .parquet)")
+    parser.add_argument("--workers", type=int, help="processes (default: all cores; 1 = in-process)")
+    parser.add_argument("--reference", help="weapons reference markdown (default: data/ registry)")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario)
+    result = run(scenario, args.workers, args.reference)
+    write_table(result.summary, args.output)
+    if args.missions:
+        write_table(result.missions, args.missions)
+    failed = [r for r in result.summary if r.get("error")]
+    print(f"{scenario.name}: {len(result.summary)} variants on {result.workers} worker(s) "
+          f"in {result.wall_s:.2f} s -> {args.output}")
+    for r in failed:
+        print(f"  {r['variant']}: {r['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+BDA and re-attack tracking
+Target-state table keyed by target number from the uploaded TLWS/HPTL: the
+engagements fired at each target, the expected damage from their Pk, and the
+reported BDA (doctrine §6). Each engagement or BDA event updates only its own
+row and bumps that row's revision, so the re-attack list is answered locally
+and the prompt carries only the rows that changed since the last model turn.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from fires import pairing, weaponeering
+from fires.catalog import WeaponsCatalog
+
+# Reported assessment -> credit toward the desired effect (probability the effect is achieved)
+BDA_ASSESSMENTS = {
+    "destroyed": 1.0,
+    "neutralized": 0.9,
+    "damaged": 0.5,             # partial damage requiring completion (§6 re-attack criteria)
+    "suppressed": 0.2,          # temporary — the target recovers its capability
+    "no effect": 0.0,
+}
+ASSESSMENT_WORDS = {
+    "destroyed": ["destroyed", "destroy", "catastrophic kill", "k-kill", "killed"],
+    "neutralized": ["neutralized", "neutralised", "neutralize", "mission kill", "m-kill", "f-kill"],
+    "damaged": ["damaged", "partial", "partially damaged", "light damage", "moderate damage"],
+    "suppressed": ["suppressed", "suppress"],
+    "no effect": ["no effect", "no damage", "missed", "intact", "no observed effect"],
+}
+HPT_PRIORITY_CUTOFF = 3         # HPTL priorities 1-3 count as high-payoff targets for re-attack
+MAX_PROMPT_ROWS = 25
+
+STATUS_NOT_ENGAGED = "not engaged"
+STATUS_AWAITING = "awaiting BDA"
+STATUS_ACHIEVED = "effects achieved"
+STATUS_REATTACK = "re-attack"
+
+BDA_COMMAND = re.compile(r"^\s*bda\s*[:\-]?\s*", re.IGNORECASE)
+REATTACK_QUERY = re.compile(
+    r"\b(?:which|what|list|show|any)\b.*\bre-?attack\b|\bre-?attack\s+(?:list|status|candidates|plan)\b",
+    re.IGNORECASE,
+)
+BDA_REPORT_BLOCK = re.compile(
+    r"BDA_REPORT:\s*\nTARGET:\s*(.+)\nASSESSMENT:\s*(.+)(?:\nPHASE:\s*(\d))?(?:\nCONFIRMED:\s*(\w+))?",
+    re.IGNORECASE,
+)
+TARGET_NUMBER = re.compile(r"\b(?:tgt|target)\s*(?:no\.?|number|#)?\s*-?\s*(\d+)\b", re.IGNORECASE)
+CLAUSE_SPLIT = re.compile(r"\s*(?:;|,|\band\b|\n)\s*", re.IGNORECASE)
+
+
+@dataclass
+class BdaCommand:
+    events: list[dict]                              # apply_events() input
+    reattack_query: bool = False
+    warnings: list[str] = field(default_factory=list)
+
+
+# =============================================================================
+# STATE
+# =============================================================================
+def new_state() -> dict:
+    return {"rev": 0, "targets": {}}
+
+
+def _refresh(row: dict, default_pk: float):
+    """Recompute expected Pk, current Pk (BDA overrides the estimate) and status for one row."""
+    survive = 1.0
+    for e in row["engagements"]:
+        survive *= (1 - (e.get("pk_single") or 0.0)) ** e.get("rounds", 0)
+    row["expected_pk"] = round(1 - survive, 3)
+    bda = row.get("bda")
+    row["current_pk"] = BDA_ASSESSMENTS[bda["assessment"]] if bda else row["expected_pk"]
+    desired = row.get("desired_pk") or default_pk
+    if not row["engagements"] and not bda:
+        row["status"] = STATUS_NOT_ENGAGED
+    elif row["current_pk"] >= desired:
+        row["status"] = STATUS_ACHIEVED if bda else STATUS_AWAITING
+    else:
+        row["status"] = STATUS_REATTACK
+
+
+def sync_targets(state: dict, targets: list[dict], default_pk: float = pairing.DEFAULT_DESIRED_PK) -> dict:
+    """
+    Merge an uploaded target list (TargetRow dicts). Existing rows keep their
+    engagements and BDA; only new or re-described targets are touched.
+    """
+    updated = {"rev": state["rev"], "targets": dict(state["targets"])}
+    for t in targets:
+        old = updated["targets"].get(t["target_id"])
+        meta = {k: t.get(k) for k in ("target_id", "description", "target_class", "priority",
+                                      "desired_pk", "range_km", "mobile")}
+        if old and all(old.get(k) == v for k, v in meta.items()):
+            continue
+        row = {**(old or {"engagements": [], "bda": None}), **meta}
+        row["engagements"] = list(row["engagements"])
+        _refresh(row, default_pk)
+        updated["rev"] += 1
+        row["rev"] = updated["rev"]
+        updated["targets"][t["target_id"]] = row
+    return updated
+
+
+def find_target(state: dict, text: str) -> str | None:
+    """Target number named in text ('TGT-0042', 'AB1001', or 'target 42' / 'tgt 42'), matched against the table."""
+    targets = state["targets"]
+    if text.strip() in targets:
+        return text.strip()
+    lowered = text.lower()
+    for tid in targets:
+        if re.search(rf"(?<![a-z0-9]){re.escape(tid.lower())}(?![a-z0-9])", lowered):
+            return tid
+    # "target 42" -> "TGT-0042"; bare numbers are never taken (they are usually round counts)
+    for number in TARGET_NUMBER.findall(text):
+        for tid in targets:
+            digits = re.findall(r"\d+", tid)
+            if digits and int(digits[-1]) == int(number):
+                return tid
+    return None
+
+
+def apply_events(state: dict, events: list[dict],
+                 default_pk: float = pairing.DEFAULT_DESIRED_PK) -> tuple[dict, list[str]]:
+    """
+    Apply engagement / BDA events; returns the new state and the target ids changed.
+      {"type": "engage", "target_id", "asset", "munition", "rounds", "pk_single", "source"}
+      {"type": "bda", "target_id", "assessment", "phase", "confirmed", "remarks"}
+    Only the touched rows are copied.
+    """
+    updated = {"rev": state["rev"], "targets": dict(state["targets"])}
+    changed = []
+    for event in events:
+        old = updated["targets"].get(event["target_id"])
+        if old is None:
+            continue
+        row = {**old, "engagements": list(old["engagements"])}
+        if event["type"] == "engage":
+            row["engagements"].append({k: event.get(k) for k in ("asset", "munition", "rounds", "pk_single", "source")})
+            row["bda"] = None                       # a new strike supersedes the previous assessment
+        elif event["type"] == "bda" and event.get("assessment") in BDA_ASSESSMENTS:
+            row["bda"] = {"assessment": event["assessment"], "phase": event.get("phase") or 1,
+                          "confirmed": bool(event.get("confirmed")), "remarks": event.get("remarks", "")}
+        else:
+            continue
+        _refresh(row, default_pk)
+        updated["rev"] += 1
+        row["rev"] = updated["rev"]
+        updated["targets"][row["target_id"]] = row
+        if row["target_id"] not in changed:
+            changed.append(row["target_id"])
+    return updated, changed
+
+
+def engagement_events(missions: list, source: str = "fire plan") -> list[dict]:
+    """Engage events from fire-plan missions (FireMission) or dicts with the same fields."""
+    events = []
+    for m in missions:
+        m = m if isinstance(m, dict) else vars(m)
+        events.append({"type": "engage", "target_id": m["target_id"], "asset": m["asset"],
+                       "munition": m["munition"], "rounds": int(m["rounds"]),
+                       "pk_single": m.get("pk_single"), "source": source})
+    return events
+
+
+def single_round_pk(catalog: WeaponsCatalog | None, munition: str, target_class: str) -> float | None:
+    if catalog is None or target_class not in pairing.TARGET_CLASSES:
+        return None
+    return pairing.class_pk(catalog.munition(munition), target_class)[0]
+
+
+# =============================================================================
+# CHAT
+# =============================================================================
+def _assessment(text: str) -> str | None:
+    lowered = text.lower()
+    # Longest phrases first so "no damage" is not read as "damaged"
+    words = sorted(((w, a) for a, ws in ASSESSMENT_WORDS.items() for w in ws), key=lambda p: -len(p[0]))
+    for word, assessment in words:
+        if re.search(rf"(?<![a-z]){re.escape(word)}(?![a-z])", lowered):
+            return assessment
+    return None
+
+
+def interpret(prompt: str, state: dict) -> BdaCommand | None:
+    """
+    Local BDA bookkeeping and re-attack queries typed in chat:
+      "BDA: TGT-0042 destroyed (confirmed); TGT-0043 damaged phase 2"
+      "Which HPTs need re-attack?"
+    Returns None for anything else, which goes to the model as before.
+    """
+    if not state["targets"]:
+        return None
+    if BDA_COMMAND.match(prompt):
+        events, warnings = [], []
+        for clause in CLAUSE_SPLIT.split(BDA_COMMAND.sub("", prompt)):
+            if not clause:
+                continue
+            tid, assessment = find_target(state, clause), _assessment(clause)
+            if tid is None or assessment is None:
+                warnings.append(f"could not read '{clause}' (need a target number and an assessment)")
+                continue
+            phase = re.search(r"phase\s*(\d)", clause, re.IGNORECASE)
+            events.append({"type": "bda", "target_id": tid, "assessment": assessment,
+                           "phase": int(phase.group(1)) if phase else 1,
+                           "confirmed": bool(re.search(r"\bconfirmed\b", clause, re.IGNORECASE)),
+                           "remarks": clause})
+        return BdaCommand(events, warnings=warnings) if events else None
+    if REATTACK_QUERY.search(prompt):
+        return BdaCommand([], reattack_query=True)
+    return None
+
+
+def parse_bda_reports(text: str, state: dict) -> list[dict]:
+    """BDA events from BDA_REPORT blocks in a model answer."""
+    events = []
+    for m in BDA_REPORT_BLOCK.finditer(text):
+        tid, assessment = find_target(state, m.group(1)), _assessment(m.group(2))
+        if tid and assessment:
+            events.append({"type": "bda", "target_id": tid, "assessment": assessment,
+                           "phase": int(m.group(3)) if m.group(3) else 1,
+                           "confirmed": (m.group(4) or "").lower() in ("yes", "true", "y"),
+                           "remarks": "model report"})
+    return events
+
+
+def target_engagements(prompt: str, updates: list[dict], state: dict,
+                       catalog: WeaponsCatalog | None) -> list[dict]:
+    """Engage events when a ledger command names one tracked target ('expended 4 GMLRS at TGT-0042')."""
+    tid = find_target(state, prompt) if state["targets"] else None
+    if tid is None:
+        return []
+    target_class = state["targets"][tid].get("target_class", "")
+    return [{"type": "engage", "target_id": tid, "asset": u["asset"], "munition": u["munition"],
+             "rounds": u["value"], "pk_single": single_round_pk(catalog, u["munition"], target_class),
+             "source": "chat command"}
+            for u in updates if u["update_type"] == "EXPENDED"]
+
+
+# =============================================================================
+# RE-ATTACK
+# =============================================================================
+def is_hpt(row: dict) -> bool:
+    return row.get("priority") is not None and row["priority"] <= HPT_PRIORITY_CUTOFF
+
+
+def reattack_candidates(state: dict) -> list[dict]:
+    """Rows below their desired effect after engagement or BDA, HPTs first, then by priority."""
+    rows = [r for r in state["targets"].values() if r["status"] == STATUS_REATTACK]
+    return sorted(rows, key=lambda r: (not is_hpt(r), r.get("priority") or 99, r["target_id"]))
+
+
+def reattack_plan(state: dict, ammo_status: dict, catalog: WeaponsCatalog,
+                  default_pk: float = pairing.DEFAULT_DESIRED_PK) -> list[dict]:
+    """
+    Best ledger munition and rounds to close each candidate's remaining Pk gap:
+    needed = 1 − (1 − desired) / (1 − current), solved as one weaponeering pass.
+    """
+    rows = reattack_candidates(state)
+    targets = []
+    for r in rows:
+        desired = r.get("desired_pk") or default_pk
+        needed = 1 - (1 - desired) / max(1e-6, 1 - r["current_pk"])
+        targets.append(weaponeering.TargetRow(
+            target_id=r["target_id"], description=r["description"], target_class=r["target_class"],
+            range_km=r.get("range_km"), mobile=bool(r.get("mobile")), priority=r.get("priority"),
+            desired_pk=min(0.99, max(0.05, needed)),
+        ))
+    solved = weaponeering.solve(targets, ammo_status, catalog, default_pk).plan if targets else []
+    plan = []
+    for r, s in zip(rows, solved):
+        plan.append({
+            "target_id": r["target_id"], "description": r["description"], "priority": r.get("priority"),
+            "hpt": is_hpt(r), "bda": r["bda"]["assessment"] if r["bda"] else "estimated",
+            "current_pk": r["current_pk"], "needed_pk": round(s["desired_pk"], 3),
+            "asset": s["asset"], "munition": s["munition"], "rounds": s["rounds"],
+            "achieved_pk": s["achieved_pk"], "note": s["note"],
+        })
+    return plan
+
+
+def format_reattack(plan: list[dict]) -> str:
+    """Chat answer for a re-attack query."""
+    if not plan:
+        return "No tracked target needs re-attack — every engaged target is at or above its desired effect."
+    hpts = [p for p in plan if p["hpt"]]
+    lines = [f"**Re-attack: {len(hpts)} HPT(s)** of {len(plan)} target(s) below desired effect "
+             f"(HPTL priority ≤ {HPT_PRIORITY_CUTOFF} counts as HPT).", "",
+             "| Target | Pri | BDA | Current Pk | Needed | Recommended | Rounds |",
+             "|---|---|---|---|---|---|---|"]
+    for p in plan:
+        shooter = f"{p['asset']} — {p['munition']}" if p["munition"] else f"none ({p['note']})"
+        lines.append(f"| {p['target_id']} {p['description']} | {p['priority'] or '—'} | {p['bda']} | "
+                     f"{p['current_pk']:.2f} | {p['needed_pk']:.2f} | {shooter} | {p['rounds'] or '—'} |")
+    return "\n".join(lines)
+
+
+# =============================================================================
+# PROMPT
+# =============================================================================
+def prompt_view(state: dict, since_rev: int) -> dict | None:
+    """Rows engaged or assessed that changed since `since_rev`, plus a one-line index of the rest."""
+    if not state["targets"]:
+        return None
+    rows = [r for r in state["targets"].values() if r["rev"] > since_rev and r["status"] != STATUS_NOT_ENGAGED]
+    by_status: dict[str, list[str]] = {}
+    for r in state["targets"].values():
+        by_status.setdefault(r["status"], []).append(r["target_id"])
+    summary = "; ".join(f"{status}: {len(ids)}" + (f" ({', '.join(ids[:15])})" if status == STATUS_REATTACK else "")
+                        for status, ids in by_status.items())
+    rows.sort(key=lambda r: -r["rev"])
+    return {"summary": summary, "rows": rows[:MAX_PROMPT_ROWS], "omitted": max(0, len(rows) - MAX_PROMPT_ROWS)}
+
+
+def target_slice(query: str, state: dict) -> dict:
+    """Revision of the tracked target a query names, for the answer-cache fingerprint."""
+    tid = find_target(state, query) if state["targets"] else None
+    return {tid: state["targets"][tid]["rev"]} if tid else {}
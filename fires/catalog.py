@@ -0,0 +1,645 @@
+"""
+Structured weapons catalog
+Compiles the markdown tables in data/weapons_reference_v3.md into typed, indexed
+records: munitions (platforms, min/max range, guidance, CEP, target types, Pk by
+target class), §8.2 salvo sizing, §7.1 Olvana SAG loads, §9.1 friendly loads and
+§10.2 coalition α. The compiled catalog is cached as JSON keyed by the markdown's
+SHA-256 and is rebuilt only when the reference changes.
+"""
+
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from fires.geodesy import KM_PER_NM
+
+COMPILER_VERSION = 5
+DEFAULT_REFERENCE_PATH = Path(__file__).parent.parent / "data" / "weapons_reference_v3.md"
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent / ".cache"
+
+# Launch platforms for row tables whose section title does not name one
+SECTION_PLATFORMS = {
+    "2.2": ["M142 HIMARS", "M270A2 MLRS"],
+    "2.3": ["M142 HIMARS", "M270A2 MLRS"],
+    "2.4": ["M142 HIMARS", "M270A2 MLRS"],
+    "3.1": ["M777A2"],
+    "5.2": ["ACE aircraft"],
+}
+
+# Reference shorthand the token matcher cannot resolve on its own
+MUNITION_ALIASES = {
+    "155mm HE": "M795 HE (standard)",
+    '5" Rounds': "Mk 45",
+    "MST": "TLAM",
+    "HHQ-9": "HQ-9",
+    "MH-60R Hellfire": "Hellfire",
+    "HF-III": "Hsiung Feng III",
+    "Harpoon Block II": "Harpoon",
+}
+
+# Row tables describing munitions: first-column header -> side is set by section
+MUNITION_ROW_HEADERS = {"Munition", "Variant", "Round Type", "System"}
+# Blue weapon sections. Row tables elsewhere only describe munitions when they carry a
+# Range column — §7.5 (Red ground targets) and §9.3 (resupply weights) do not
+MUNITION_SECTIONS = {"1", "2", "3", "4", "5", "6"}
+
+_HEADING = re.compile(r"^(#{2,3})\s+(.+?)\s*$")
+_BOLD_LINE = re.compile(r"^\*\*(.+?)\*\*")
+_SECTION_NO = re.compile(r"^(\d+(?:\.\d+)?)\s+(.*)$")
+_NUMBER = r"\d[\d,]*(?:\.\d+)?"
+_RANGE = re.compile(rf"({_NUMBER})\s*\+?\s*(?:-\s*({_NUMBER})\s*\+?\s*)?(km|nm|m)\b", re.IGNORECASE)
+_MIN_MAX = re.compile(rf"Min:\s*({_NUMBER})\s*(km|nm|m)\b.*?Max:\s*({_NUMBER})\s*(km|nm|m)\b", re.IGNORECASE)
+_PK = re.compile(r"(\d?\.\d+)(?:\s*-\s*(\d?\.\d+))?")
+_COUNT = re.compile(r"(\d[\d,]*)")
+_CEP = re.compile(rf"({_NUMBER})\s*m\b")
+_HULL_COUNT = re.compile(r"×\s*(\d+)")
+_HULL_NAMES = re.compile(r"×\s*\d+[^:)]*:\s*([^)]+)\)")
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Whole leading weapon designator: letters + number with any /-variants ("YJ-83", "Mk 46/54"),
+# an all-caps acronym ("TLAM", "HF-III") or a calibre ("120mm") — never a plain word ("Land", "Mk")
+_DESIGNATOR = re.compile(
+    r"^([A-Za-z]+[- ]?\d+[A-Za-z]?(?:/\d+[A-Za-z]?)*|[A-Z]{2,}(?:-[A-Z]+)?|\d+mm)(?![\w/-])"
+)
+LOOKUP_CACHE_SIZE = 1024        # name -> munition memo; cleared when full (ledger names are user-editable)
+_LOADED_MISSILE = re.compile(r"^(\d+)×\s*([^()]+?)\s*\((.*)\)")      # "8× Exocet MM40 Block 3 (200 km, ...)"
+TOKEN_SYNONYMS = {"blk": "block"}
+
+
+# =============================================================================
+# MARKDOWN TABLES
+# =============================================================================
+@dataclass
+class MarkdownTable:
+    section: str            # nearest ##/### heading, e.g. "7.1 SAG 12 Platform ..."
+    caption: str            # nearest bold line above the table (hull/ship name), if any
+    headers: list[str]
+    rows: list[list[str]]
+
+    @property
+    def section_no(self) -> str:
+        match = _SECTION_NO.match(self.section)
+        return match.group(1) if match else ""
+
+    @property
+    def title(self) -> str:
+        match = _SECTION_NO.match(self.section)
+        return match.group(2) if match else self.section
+
+    def records(self) -> list[dict]:
+        return [dict(zip(self.headers, row)) for row in self.rows]
+
+
+def _cells(line: str) -> list[str]:
+    return [c.strip().replace("**", "") for c in line.strip().strip("|").split("|")]
+
+
+def parse_tables(text: str) -> list[MarkdownTable]:
+    """Every pipe table in the document, tagged with its section and caption."""
+    tables, section, caption = [], "", ""
+    lines = text.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        heading = _HEADING.match(line)
+        if heading:
+            section, caption = heading.group(2), ""
+        elif _BOLD_LINE.match(line):
+            caption = _BOLD_LINE.match(line).group(1).strip().rstrip(":")
+        elif line.startswith("|") and i + 1 < len(lines) and set(lines[i + 1].strip()) <= set("|-: "):
+            headers = _cells(line)
+            rows = []
+            i += 2
+            while i < len(lines) and lines[i].strip().startswith("|"):
+                rows.append(_cells(lines[i]))
+                i += 1
+            tables.append(MarkdownTable(section, caption, headers, rows))
+            continue
+        i += 1
+    return tables
+
+
+# =============================================================================
+# VALUE PARSERS
+# =============================================================================
+def _to_km(value: str, unit: str) -> float:
+    number = float(value.replace(",", ""))
+    unit = unit.lower()
+    if unit == "nm":
+        number *= KM_PER_NM
+    elif unit == "m":
+        number /= 1000
+    return round(number, 3)
+
+
+def parse_range_km(text: str) -> tuple[float | None, float | None]:
+    """
+    (min_km, max_km) from reference range strings: "10-32 km", "900+ nm (1,600+ km)",
+    "Min: 200m / Max: 7,200m", "40 km". A single figure is a maximum only.
+    """
+    min_max = _MIN_MAX.search(text)
+    if min_max:
+        return _to_km(min_max.group(1), min_max.group(2)), _to_km(min_max.group(3), min_max.group(4))
+    match = _RANGE.search(text)
+    if not match:
+        return None, None
+    low, high, unit = match.groups()
+    if high:
+        return _to_km(low, unit), _to_km(high, unit)
+    return None, _to_km(low, unit)
+
+
+def parse_pk(text: str) -> tuple[float, float] | None:
+    """"0.85" -> (0.85, 0.85); "0.50-0.60" -> (0.5, 0.6)."""
+    match = _PK.search(text)
+    if not match:
+        return None
+    low = float(match.group(1))
+    return low, float(match.group(2) or low)
+
+
+def parse_span(text: str) -> tuple[float, float] | None:
+    """"4.0-4.8" -> (4.0, 4.8); "6" -> (6.0, 6.0)."""
+    numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", text)]
+    return (numbers[0], numbers[-1]) if numbers else None
+
+
+def parse_count(text: str) -> int | None:
+    """Leading integer of a load cell: "16 (+8 reserve)" -> 16, "200+" -> 200."""
+    match = _COUNT.search(text)
+    return int(match.group(1).replace(",", "")) if match else None
+
+
+def parse_cep_m(text: str) -> float | None:
+    match = _CEP.search(text)
+    return float(match.group(1).replace(",", "")) if match else None
+
+
+def _token_list(name: str) -> list[str]:
+    return [TOKEN_SYNONYMS.get(t, t) for t in _TOKEN.findall(name.lower())]
+
+
+def normalize(name: str) -> str:
+    return " ".join(_token_list(name))
+
+
+def _tokens(name: str) -> set[str]:
+    return set(_token_list(name))
+
+
+def _aliases(name: str) -> list[str]:
+    """Full name plus each parenthetical and slash-separated part."""
+    parts = [name, re.sub(r"\(.*?\)", "", name)]
+    parts += re.findall(r"\((.*?)\)", name)
+    parts += [p for p in re.split(r"\s+/\s+", name) if p != name]
+    seen = []
+    for part in parts:
+        key = normalize(part)
+        if key and key not in seen:
+            seen.append(key)
+    return seen
+
+
+# =============================================================================
+# RECORDS
+# =============================================================================
+@dataclass
+class Munition:
+    name: str
+    section: str
+    side: str                                   # "blue" | "red" | "coalition"
+    min_range_km: float | None = None
+    max_range_km: float | None = None
+    guidance: str = ""
+    cep_m: float | None = None
+    payload: str = ""
+    speed: str = ""
+    platforms: list[str] = field(default_factory=list)
+    target_types: list[str] = field(default_factory=list)
+    pk: dict[str, list[float]] = field(default_factory=dict)    # target class -> [low, high]
+
+    def reaches(self, distance_km: float) -> bool:
+        if self.max_range_km is None or distance_km > self.max_range_km:
+            return False
+        return self.min_range_km is None or distance_km >= self.min_range_km
+
+
+@dataclass
+class PkEntry:
+    weapon: str
+    target: str
+    pk_low: float
+    pk_high: float
+    confidence: str = ""
+    munition: str | None = None                 # catalog munition the weapon resolved to
+
+
+@dataclass
+class PlatformLoad:
+    platform: str
+    munition: str
+    count: int | None
+    side: str
+    hull_count: int = 1                         # ships of this class the load applies to
+    notes: str = ""
+    hull_names: list[str] = field(default_factory=list)    # "(×4 in SAG 12: Hengyang, Xuchang, ...)"
+
+
+@dataclass
+class CoalitionAlpha:
+    platform: str
+    ascm: str
+    count: int | None
+    pk_low: float
+    pk_high: float
+    alpha_low: float
+    alpha_high: float
+
+
+# =============================================================================
+# COMPILER
+# =============================================================================
+def _side(section_no: str) -> str:
+    if section_no.startswith("7"):
+        return "red"
+    if section_no.startswith("10"):
+        return "coalition"
+    return "blue"
+
+
+def _merge_range(munition: Munition, text: str):
+    low, high = parse_range_km(text)
+    if munition.side == "red":
+        low = None      # Olvana spans ("100-120 nm") are estimate bands, not min/max
+    if low is not None:
+        munition.min_range_km = low if munition.min_range_km is None else min(munition.min_range_km, low)
+    if high is not None:
+        munition.max_range_km = high if munition.max_range_km is None else max(munition.max_range_km, high)
+
+
+def _munition_from_parameters(table: MarkdownTable) -> Munition | None:
+    """Parameter | Value tables in §1-§6 — one munition per section."""
+    values = [(row[0], row[1]) for row in table.rows if len(row) >= 2]
+    if not any(p.lower().startswith(("range", "effective range")) for p, _ in values):
+        return None
+    munition = Munition(name=table.title, section=table.section_no, side=_side(table.section_no))
+    for param, value in values:
+        key = param.lower()
+        if key.startswith(("range", "effective range")):
+            _merge_range(munition, value)
+        elif key == "guidance":
+            munition.guidance = value
+        elif key == "cep":
+            munition.cep_m = parse_cep_m(value)
+        elif key in ("warhead", "payload"):
+            munition.payload = value
+        elif key.startswith("speed"):
+            munition.speed = value
+        elif key.startswith("platform"):
+            munition.platforms += [p.strip() for p in re.sub(r"\(.*?\)", "", value).split(",")
+                                   if p.strip() and not re.match(r"\d+ ", p.strip())]
+    return munition
+
+
+def _coalition_ship(table: MarkdownTable) -> tuple[list[Munition], list[PlatformLoad]]:
+    """§10.1 ship tables: "N× Missile (range, ...)" rows become munitions + loads."""
+    platform = re.sub(r"\s*\(.*?\)\s*$", "", table.caption)
+    munitions, loads = [], []
+    for row in table.rows:
+        match = _LOADED_MISSILE.match(row[1]) if len(row) >= 2 else None
+        if not match:
+            continue
+        count, name, detail = match.groups()
+        munition = Munition(name=name, section=table.section_no, side="coalition", platforms=[platform])
+        _merge_range(munition, detail)
+        munitions.append(munition)
+        loads.append(PlatformLoad(platform=platform, munition=name, count=int(count),
+                                  side="coalition", notes=row[0]))
+    return munitions, loads
+
+
+def _munitions_from_rows(table: MarkdownTable) -> list[Munition]:
+    """
+    Munition-per-row tables (§2.2-2.4 rockets, §3.1 rounds, §5.2, §7.3-7.4).
+    Tables without a Range column (§5.2 guided air-to-ground) leave the range None.
+    """
+    munitions = []
+    for record in table.records():
+        name = record.get(table.headers[0], "")
+        if not name:
+            continue
+        munition = Munition(name=name, section=table.section_no, side=_side(table.section_no),
+                            platforms=list(SECTION_PLATFORMS.get(table.section_no, [])))
+        _merge_range(munition, record.get("Range", ""))
+        accuracy = record.get("Accuracy") or record.get("CEP") or ""
+        munition.cep_m = parse_cep_m(accuracy)
+        munition.guidance = record.get("Guidance") or (accuracy.split(":")[0] if ":" in accuracy else "")
+        munition.payload = record.get("Payload", "")
+        munition.speed = record.get("Speed", "")
+        target_type = record.get("Target Type") or record.get("Type") or ""
+        if target_type:
+            munition.target_types.append(target_type)
+        munitions.append(munition)
+    return munitions
+
+
+def _munitions_from_title(table: MarkdownTable) -> list[Munition]:
+    """
+    §1 load tables with no parameter table of their own ("Torpedoes (MK-54 / MK-48)"):
+    each name in the title's parenthetical is a munition without a tabulated range,
+    carried by the platforms whose row names it and holds a count.
+    """
+    names = [n.strip() for part in re.findall(r"\((.*?)\)", table.title) for n in part.split("/")]
+    munitions = []
+    for name in filter(None, names):
+        munition = Munition(name=name, section=table.section_no, side=_side(table.section_no))
+        for row in table.rows:
+            if len(row) >= 2 and parse_count(row[1]) and _tokens(name) <= _tokens(" ".join(row[2:])):
+                munition.platforms.append(row[0])
+        munitions.append(munition)
+    return munitions
+
+
+def _add_munitions(munitions: list[Munition], new: list[Munition], by_tokens: bool = False):
+    """
+    Append `new`, folding a munition already compiled under the same name into the
+    existing record (platforms only). With by_tokens, a name whose tokens are a
+    subset of an earlier name also counts ("LRASM" in §5.2 is §1.8's LRASM).
+    """
+    for munition in new:
+        key, wanted = normalize(munition.name), _tokens(munition.name)
+        existing = next((m for m in munitions if normalize(m.name) == key
+                         or (by_tokens and wanted <= _tokens(m.name))), None)
+        if existing is None:
+            munitions.append(munition)
+        else:
+            existing.platforms += [p for p in munition.platforms if p not in existing.platforms]
+
+
+def compile_catalog(text: str, source_sha256: str = "") -> "WeaponsCatalog":
+    """Parse the reference markdown into a WeaponsCatalog."""
+    munitions: list[Munition] = []
+    pk_table: list[PkEntry] = []
+    loads: list[PlatformLoad] = []
+    coalition: list[CoalitionAlpha] = []
+    rounds_required: list[dict] = []
+
+    for table in parse_tables(text):
+        no, first = table.section_no, table.headers[0]
+        major = no.split(".")[0]
+
+        if first == "Parameter" and major in MUNITION_SECTIONS:
+            munition = _munition_from_parameters(table)
+            if munition:
+                munitions.append(munition)
+
+        elif first == "Parameter" and no == "10.1" and table.caption:
+            ship_munitions, ship_loads = _coalition_ship(table)
+            _add_munitions(munitions, ship_munitions)
+            loads += ship_loads
+
+        elif first in MUNITION_ROW_HEADERS and ("Range" in table.headers or major in MUNITION_SECTIONS):
+            _add_munitions(munitions, _munitions_from_rows(table), by_tokens=True)
+
+        elif first == "Platform" and major == "1" and not any(m.section == no for m in munitions):
+            munitions += _munitions_from_title(table)
+
+        elif no == "8.1" and first == "Weapon":
+            for record in table.records():
+                pk = parse_pk(record.get("Pk (Single Rd)", ""))
+                if pk:
+                    pk_table.append(PkEntry(record["Weapon"], record["Target Type"], pk[0], pk[1],
+                                            record.get("Confidence", "")))
+
+        elif no == "8.2" and first == "Pk_single":
+            for record in table.records():
+                rounds_required.append({
+                    "pk_single": float(record["Pk_single"]),
+                    "rounds": {h.split("%")[0]: parse_count(record[h]) for h in table.headers[1:]},
+                })
+
+        elif no == "7.1" and first == "Weapon System":
+            hull_count = _HULL_COUNT.search(table.caption)
+            hull_names = _HULL_NAMES.search(table.caption)
+            for record in table.records():
+                loads.append(PlatformLoad(
+                    platform=re.split(r"\s+—\s+", table.caption)[0],
+                    munition=record["Weapon System"],
+                    count=parse_count(record.get(table.headers[1], "")),
+                    side="red",
+                    hull_count=int(hull_count.group(1)) if hull_count else 1,
+                    notes=record.get("Notes", ""),
+                    hull_names=[n.strip() for n in hull_names.group(1).split(",")] if hull_names else [],
+                ))
+
+        elif no == "9.1" and first in ("Platform", "Asset") and "Munition" in table.headers:
+            for record in table.records():
+                loads.append(PlatformLoad(
+                    platform=record[first],
+                    munition=record["Munition"],
+                    count=parse_count(record.get("Count", "")),
+                    side="blue",
+                    notes=record.get("Notes", ""),
+                ))
+
+        elif no == "10.2":
+            for record in table.records():
+                pk = parse_pk(record.get("Est. Pk", "")) or (0.0, 0.0)
+                alpha = parse_span(record.get("α (Offensive Power)", "")) or (0.0, 0.0)
+                coalition.append(CoalitionAlpha(
+                    platform=record["Platform"], ascm=record["Primary ASCM"],
+                    count=parse_count(record.get("Count", "")),
+                    pk_low=pk[0], pk_high=pk[1], alpha_low=alpha[0], alpha_high=alpha[1],
+                ))
+
+    catalog = WeaponsCatalog(munitions, pk_table, loads, coalition, rounds_required, source_sha256)
+    catalog.link()
+    return catalog
+
+
+# =============================================================================
+# CATALOG
+# =============================================================================
+class WeaponsCatalog:
+    """Indexed, in-memory view of the compiled reference tables."""
+
+    def __init__(self, munitions: list[Munition], pk_table: list[PkEntry],
+                 loads: list[PlatformLoad], coalition_alpha: list[CoalitionAlpha],
+                 rounds_required: list[dict], source_sha256: str = ""):
+        self.munitions = munitions
+        self.pk_table = pk_table
+        self.loads = loads
+        self.coalition_alpha = coalition_alpha
+        self.rounds_required = rounds_required
+        self.source_sha256 = source_sha256
+        self._build_indexes()
+
+    def _build_indexes(self):
+        self._by_alias: dict[str, Munition] = {}
+        for munition in self.munitions:
+            for alias in _aliases(munition.name):
+                self._by_alias.setdefault(alias, munition)
+        self._by_name = {m.name: m for m in self.munitions}
+        self._name_tokens = [(_tokens(m.name), m) for m in self.munitions]
+        self._by_platform: dict[str, list[Munition]] = {}
+        for munition in self.munitions:
+            for platform in munition.platforms:
+                self._by_platform.setdefault(normalize(platform), []).append(munition)
+        self._lookup: dict[str, Munition | None] = {}
+
+    # ---- lookups ----
+    def munition(self, name: str) -> Munition | None:
+        """Resolve a munition by name, alias or token subset ("GMLRS", "SM-6 (anti-ship)")."""
+        if name in self._lookup:
+            return self._lookup[name]
+        query = MUNITION_ALIASES.get(name.strip(), name)
+        found = self._by_alias.get(normalize(query))
+        if found is None:
+            # Whole name, name without parentheticals, then the whole leading designator
+            # of each ("YJ-83 ASM" -> YJ-83, "Z-9 Helo (HJ-8 ASM)" -> HJ-8). A bare first
+            # word is never used: "Mk 46/54 Torpedo" must not become the Mk 45 gun.
+            stripped = re.sub(r"\(.*?\)", "", query).strip()
+            queries = [query, stripped]
+            for part in [stripped] + re.findall(r"\((.*?)\)", query):
+                designator = _DESIGNATOR.match(part.strip())
+                if designator:
+                    queries.append(designator.group(1))
+            for q in queries:
+                q = MUNITION_ALIASES.get(q, q)
+                wanted = _tokens(q)
+                match = next((m for toks, m in self._name_tokens if wanted and wanted <= toks), None)
+                if match is not None:
+                    found = match    # first in document order (e.g. GMLRS -> M31)
+                    break
+        if len(self._lookup) >= LOOKUP_CACHE_SIZE:
+            self._lookup.clear()
+        self._lookup[name] = found
+        return found
+
+    def pk(self, weapon: str, target: str) -> tuple[float, float] | None:
+        """(low, high) single-round Pk for a weapon against a target class, if tabulated."""
+        munition = self.munition(weapon)
+        if munition is None or not munition.pk:
+            return None
+        wanted = _tokens(target)
+        for target_class, (low, high) in munition.pk.items():
+            if normalize(target_class) == normalize(target) or (wanted and wanted <= _tokens(target_class)):
+                return low, high
+        return None
+
+    def rounds_for(self, pk_single: float, confidence: int = 90) -> int | None:
+        """§8.2 table lookup — rounds for the first tabulated Pk at or below pk_single."""
+        for row in sorted(self.rounds_required, key=lambda r: -r["pk_single"]):
+            if row["pk_single"] <= pk_single + 1e-9:
+                return row["rounds"].get(str(confidence))
+        return None
+
+    def for_platform(self, platform: str) -> list[Munition]:
+        key = normalize(platform)
+        return [m for p, ms in self._by_platform.items() if key in p for m in ms]
+
+    def in_range(self, distance_km: float, side: str | None = None) -> list[Munition]:
+        return [m for m in self.munitions
+                if m.reaches(distance_km) and (side is None or m.side == side)]
+
+    def red_loads(self) -> dict[str, dict[str, int]]:
+        """§7.1 Olvana SAG loads: hull -> {weapon system: count per ship}."""
+        table: dict[str, dict[str, int]] = {}
+        for load in self.loads:
+            if load.side == "red" and load.count is not None:
+                table.setdefault(load.platform, {})[load.munition] = load.count
+        return table
+
+    def loads_for(self, platform: str, side: str | None = None) -> list[PlatformLoad]:
+        """Loads whose platform name contains every token of `platform`."""
+        wanted = _tokens(platform)
+        return [l for l in self.loads
+                if wanted and wanted <= _tokens(l.platform) and (side is None or l.side == side)]
+
+    def alpha_for(self, platform: str) -> CoalitionAlpha | None:
+        wanted = _tokens(platform)
+        for entry in self.coalition_alpha:
+            if wanted and wanted <= _tokens(entry.platform):
+                return entry
+        return None
+
+    # ---- compile-time linking ----
+    def link(self):
+        """Attach §8.1/§10.2 Pk and §7.1/§9.1/§10.1 load platforms to their munitions."""
+        for entry in self.pk_table:
+            munition = self.munition(entry.weapon)
+            if munition is not None:
+                entry.munition = munition.name
+                munition.pk[entry.target] = [entry.pk_low, entry.pk_high]
+        for load in self.loads:
+            munition = self.munition(load.munition)
+            if munition is not None and load.platform not in munition.platforms:
+                munition.platforms.append(load.platform)
+        # §10.2 estimated ASCM Pk applies against surface combatants; rows whose ASCM
+        # column is not a catalog munition ("Land attack/anti-ship") are skipped
+        for entry in self.coalition_alpha:
+            munition = self.munition(entry.ascm)
+            if munition is not None and entry.pk_low > 0:
+                for target in ("DDG/FFG class", "DDG/CG class"):
+                    munition.pk.setdefault(target, [entry.pk_low, entry.pk_high])
+        self._build_indexes()
+
+    # ---- serialization ----
+    def to_dict(self) -> dict:
+        return {
+            "compiler_version": COMPILER_VERSION,
+            "source_sha256": self.source_sha256,
+            "munitions": [asdict(m) for m in self.munitions],
+            "pk_table": [asdict(p) for p in self.pk_table],
+            "loads": [asdict(l) for l in self.loads],
+            "coalition_alpha": [asdict(c) for c in self.coalition_alpha],
+            "rounds_required": self.rounds_required,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WeaponsCatalog":
+        return cls(
+            munitions=[Munition(**m) for m in data["munitions"]],
+            pk_table=[PkEntry(**p) for p in data["pk_table"]],
+            loads=[PlatformLoad(**l) for l in data["loads"]],
+            coalition_alpha=[CoalitionAlpha(**c) for c in data["coalition_alpha"]],
+            rounds_required=data["rounds_required"],
+            source_sha256=data["source_sha256"],
+        )
+
+
+# =============================================================================
+# CACHED LOAD
+# =============================================================================
+def load_catalog(path: str | Path = DEFAULT_REFERENCE_PATH,
+                 cache_dir: str | Path | None = DEFAULT_CACHE_DIR) -> WeaponsCatalog:
+    """
+    Load the compiled catalog for a reference file, recompiling only when the
+    file's SHA-256 (or the compiler version) differs from the cached artifact.
+    Pass cache_dir=None to compile without touching disk.
+    """
+    path = Path(path)
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    cache_path = Path(cache_dir) / f"{path.stem}.catalog.json" if cache_dir else None
+    if cache_path and cache_path.exists():
+        try:
+            data = json.loads(cache_path.read_text(encoding="utf-8"))
+            if data.get("source_sha256") == digest and data.get("compiler_version") == COMPILER_VERSION:
+                return WeaponsCatalog.from_dict(data)
+        except (ValueError, KeyError, TypeError):
+            pass        # corrupt or stale schema — recompile below
+
+    catalog = compile_catalog(raw.decode("utf-8", errors="replace"), digest)
+    if cache_path:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = cache_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(catalog.to_dict(), ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass        # read-only deployment — keep the in-memory catalog
+    return catalog
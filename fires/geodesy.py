@@ -0,0 +1,334 @@
+"""
+Vectorized geodesy for the tactical map
+Great-circle distance matrices (haversine + Vincenty), bearings,
+munition time-of-flight, and threat-envelope exposure/overlap.
+All inputs are degrees / km; all functions accept arrays of thousands of points.
+"""
+
+import numpy as np
+
+# =============================================================================
+# CONSTANTS
+# =============================================================================
+EARTH_RADIUS_KM = 6371.0088          # IUGG mean radius
+WGS84_A_KM = 6378.137
+WGS84_F = 1 / 298.257223563
+WGS84_B_KM = WGS84_A_KM * (1 - WGS84_F)
+
+KM_PER_NM = 1.852
+MACH_KTS = 666.7                      # Speed of sound at sea level (~343 m/s)
+
+# Munition speed profiles from data/weapons_reference_v3.md.
+# cruise_kts = transit speed; terminal_kts over the last terminal_km of flight.
+# Only munitions with a speed listed in the reference are included.
+MUNITION_SPEEDS = {
+    "TLAM": {"cruise_kts": 494.3},                          # §1.2 (494.3 KTS)
+    "NSM": {"cruise_kts": 0.9 * MACH_KTS},                  # §1.3 high subsonic
+    "SM-6": {"cruise_kts": 3.5 * MACH_KTS},                 # §1.4 Mach 3.5
+    "Harpoon": {"cruise_kts": 0.71 * MACH_KTS},             # §1.6 Mach 0.71
+    "LRASM": {"cruise_kts": 0.93 * MACH_KTS},               # §1.8 Mach 0.93
+    "Hero-120": {"cruise_kts": 62 / 1.15078},               # §6.1 62 mph cruise
+    "YJ-83": {"cruise_kts": 0.9 * MACH_KTS},                # §7.3 subsonic
+    "YJ-18": {"cruise_kts": 0.8 * MACH_KTS,                 # §7.3 subsonic transit /
+              "terminal_kts": 3.0 * MACH_KTS,               #      Mach 3 terminal
+              "terminal_km": 40.0},
+    "YJ-100": {"cruise_kts": 0.8 * MACH_KTS},               # §7.3 subsonic
+    "YJ-12": {"cruise_kts": 2.0 * MACH_KTS},                # §7.3 Mach 2+
+    "AKD-10": {"cruise_kts": 0.8 * MACH_KTS},               # §7.3 subsonic
+}
+
+
+def _as_points(lat, lon) -> tuple[np.ndarray, np.ndarray]:
+    return (np.radians(np.asarray(lat, dtype=float).ravel()),
+            np.radians(np.asarray(lon, dtype=float).ravel()))
+
+
+def _pairwise(lat1, lon1, lat2=None, lon2=None):
+    """Return (phi1, lam1, phi2, lam2) broadcast to an (N, M) grid."""
+    p1, l1 = _as_points(lat1, lon1)
+    if lat2 is None or lon2 is None:
+        p2, l2 = p1, l1
+    else:
+        p2, l2 = _as_points(lat2, lon2)
+    return p1[:, None], l1[:, None], p2[None, :], l2[None, :]
+
+
+# =============================================================================
+# DISTANCE / BEARING MATRICES
+# =============================================================================
+def _unit_vectors(lat, lon) -> np.ndarray:
+    phi, lam = _as_points(lat, lon)
+    cos_phi = np.cos(phi)
+    return np.stack([cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)], axis=1)
+
+
+def haversine_matrix(lat1, lon1, lat2=None, lon2=None) -> np.ndarray:
+    """
+    Great-circle distance (km) on a spherical earth.
+    Returns an (N, M) matrix; omit lat2/lon2 for the N x N self-distance matrix.
+    Computed from the chord length between unit vectors (the haversine
+    identity), so the N x M work is a single matrix product.
+    """
+    v1 = _unit_vectors(lat1, lon1)
+    self_matrix = lat2 is None or lon2 is None
+    v2 = v1 if self_matrix else _unit_vectors(lat2, lon2)
+    chord_sq = np.clip(2.0 - 2.0 * (v1 @ v2.T), 0.0, 4.0)
+    if self_matrix:
+        np.fill_diagonal(chord_sq, 0.0)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(chord_sq) / 2)
+
+
+VINCENTY_CHUNK = 1 << 15              # pairs solved together; keeps the working set in cache
+
+
+def _vincenty_pairs(U1, U2, L, max_iter: int, tol: float) -> tuple[np.ndarray, np.ndarray]:
+    """Vincenty inverse for 1-D arrays of pairs: (distance km, unconverged mask)."""
+    f = WGS84_F
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+    su1su2, cu1cu2 = sinU1 * sinU2, cosU1 * cosU2
+    cu1su2, su1cu2 = cosU1 * sinU2, sinU1 * cosU2
+
+    lam = L.copy()
+    sin_sigma, cos_sigma, sigma = np.zeros_like(L), np.ones_like(L), np.zeros_like(L)
+    cos2_alpha, cos_2sm = np.ones_like(L), np.zeros_like(L)
+    active = np.arange(L.size)
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        a = slice(None) if active.size == L.size else active       # skip the gather while all are active
+        sin_lam, cos_lam = np.sin(lam[a]), np.cos(lam[a])
+        ss = np.hypot(cosU2[a] * sin_lam, cu1su2[a] - su1cu2[a] * cos_lam)
+        cs = su1su2[a] + cu1cu2[a] * cos_lam
+        sg = np.arctan2(ss, cs)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sin_alpha = np.where(ss > 0, cu1cu2[a] * sin_lam / ss, 0.0)
+            c2a = 1 - sin_alpha ** 2
+            c2sm = np.where(c2a > 0, cs - 2 * su1su2[a] / c2a, 0.0)
+        C = f / 16 * c2a * (4 + f * (4 - 3 * c2a))
+        lam_new = L[a] + (1 - C) * f * sin_alpha * (sg + C * ss * (c2sm + C * cs * (-1 + 2 * c2sm ** 2)))
+        done = np.abs(lam_new - lam[a]) < tol
+        lam[a] = lam_new
+        sin_sigma[a], cos_sigma[a], sigma[a] = ss, cs, sg
+        cos2_alpha[a], cos_2sm[a] = c2a, c2sm
+        active = active[~done]
+
+    u2 = cos2_alpha * (WGS84_A_KM ** 2 - WGS84_B_KM ** 2) / WGS84_B_KM ** 2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = B * sin_sigma * (cos_2sm + B / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sm ** 2)
+        - B / 6 * cos_2sm * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sm ** 2)
+    ))
+    unconverged = np.zeros(L.size, dtype=bool)
+    unconverged[active] = True
+    return WGS84_B_KM * A * (sigma - delta_sigma), unconverged
+
+
+def vincenty_matrix(lat1, lon1, lat2=None, lon2=None,
+                    max_iter: int = 50, tol: float = 1e-12) -> np.ndarray:
+    """
+    Ellipsoidal (WGS-84) distance (km) via Vincenty's inverse formula.
+    Pairs are solved in cache-sized chunks, each iteration updating only the
+    pairs still unconverged (most settle in 4-5); a self-matrix solves the
+    upper triangle only. Pairs that fail to converge within max_iter
+    (near-antipodal) fall back to the haversine distance.
+    """
+    p1, l1 = _as_points(lat1, lon1)
+    self_matrix = lat2 is None or lon2 is None
+    p2, l2 = (p1, l1) if self_matrix else _as_points(lat2, lon2)
+    if self_matrix:
+        rows, cols = np.triu_indices(p1.size, k=1)
+    else:
+        rows, cols = (a.ravel() for a in np.indices((p1.size, p2.size)))
+
+    U1 = np.arctan((1 - WGS84_F) * np.tan(p1))
+    U2 = np.arctan((1 - WGS84_F) * np.tan(p2))
+    pair_km = np.empty(rows.size)
+    unconverged = np.zeros(rows.size, dtype=bool)
+    for start in range(0, rows.size, VINCENTY_CHUNK):
+        r, c = rows[start:start + VINCENTY_CHUNK], cols[start:start + VINCENTY_CHUNK]
+        pair_km[start:start + r.size], unconverged[start:start + r.size] = _vincenty_pairs(
+            U1[r], U2[c], l2[c] - l1[r], max_iter, tol)
+    if unconverged.any():
+        r, c = rows[unconverged], cols[unconverged]
+        chord = np.linalg.norm(_unit_vectors(np.degrees(p1[r]), np.degrees(l1[r]))
+                               - _unit_vectors(np.degrees(p2[c]), np.degrees(l2[c])), axis=1)
+        pair_km[unconverged] = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+
+    dist = np.zeros((p1.size, p2.size))
+    dist[rows, cols] = pair_km
+    if self_matrix:
+        dist[cols, rows] = pair_km
+    return dist
+
+
+def bearing_matrix(lat1, lon1, lat2=None, lon2=None) -> np.ndarray:
+    """Initial great-circle bearing (degrees true, 0-360) from each point 1 to each point 2."""
+    phi1, lam1, phi2, lam2 = _pairwise(lat1, lon1, lat2, lon2)
+    dlam = lam2 - lam1
+    x = np.sin(dlam) * np.cos(phi2)
+    y = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlam)
+    return (np.degrees(np.arctan2(x, y)) + 360.0) % 360.0
+
+
+# =============================================================================
+# TIME OF FLIGHT
+# =============================================================================
+def resolve_munition_speed(munition: str) -> dict | None:
+    """Fuzzy-match a munition name (e.g. 'TLAM Block E', 'YJ-18 ASM') to a speed profile."""
+    name = munition.lower()
+    for key in sorted(MUNITION_SPEEDS, key=len, reverse=True):
+        if key.lower() in name:
+            return MUNITION_SPEEDS[key]
+    return None
+
+
+def time_of_flight_s(distance_km, munition: str) -> np.ndarray | None:
+    """
+    Time of flight (seconds) for an array of distances.
+    Applies the terminal sprint profile where the reference gives one.
+    Returns None if the reference lists no speed for the munition.
+    """
+    profile = resolve_munition_speed(munition)
+    if profile is None:
+        return None
+    d = np.asarray(distance_km, dtype=float)
+    cruise_kms = profile["cruise_kts"] * KM_PER_NM / 3600
+    terminal_km = profile.get("terminal_km", 0.0)
+    terminal_kms = profile.get("terminal_kts", profile["cruise_kts"]) * KM_PER_NM / 3600
+    term = np.minimum(d, terminal_km)
+    return (d - term) / cruise_kms + term / terminal_kms
+
+
+# =============================================================================
+# THREAT ENVELOPES
+# =============================================================================
+def interpolate_path(lats, lons, step_km: float = 5.0) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Densify a waypoint path along great circles at roughly step_km spacing.
+    Returns (lats, lons, segment_lengths_km) where segment_lengths_km[i] is the
+    length represented by sample i (used to weight exposure).
+    """
+    xyz = _unit_vectors(lats, lons)
+    if xyz.shape[0] < 2:
+        lat = np.asarray(lats, dtype=float).ravel()
+        return lat, np.asarray(lons, dtype=float).ravel(), np.zeros(lat.size)
+
+    # Slerp between consecutive waypoints
+    p0, p1 = xyz[:-1], xyz[1:]
+    omega = np.arccos(np.clip(np.einsum("ij,ij->i", p0, p1), -1.0, 1.0))
+    seg_km = omega * EARTH_RADIUS_KM
+    n_steps = np.maximum(1, np.ceil(seg_km / step_km).astype(int))
+
+    seg_idx = np.repeat(np.arange(omega.size), n_steps)
+    offsets = np.arange(seg_idx.size) - np.repeat(np.cumsum(n_steps) - n_steps, n_steps)
+    t = (offsets + 0.5) / n_steps[seg_idx]            # midpoints of each sub-step
+    w = omega[seg_idx]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sin_w = np.sin(w)
+        a = np.where(sin_w > 0, np.sin((1 - t) * w) / sin_w, 1 - t)
+        b = np.where(sin_w > 0, np.sin(t * w) / sin_w, t)
+    pts = a[:, None] * p0[seg_idx] + b[:, None] * p1[seg_idx]
+    pts /= np.linalg.norm(pts, axis=1, keepdims=True)
+
+    out_lat = np.degrees(np.arcsin(np.clip(pts[:, 2], -1.0, 1.0)))
+    out_lon = np.degrees(np.arctan2(pts[:, 1], pts[:, 0]))
+    return out_lat, out_lon, (seg_km / n_steps)[seg_idx]
+
+
+def path_exposure(path_lats, path_lons, threat_lats, threat_lons, threat_ranges_km,
+                  step_km: float = 5.0) -> dict:
+    """
+    How much of a transit path lies inside one or more threat envelopes.
+    Returns total/exposed km, exposed fraction, and exposed km per threat.
+    """
+    s_lat, s_lon, weights = interpolate_path(path_lats, path_lons, step_km)
+    ranges = np.asarray(threat_ranges_km, dtype=float).ravel()
+    total_km = float(weights.sum())
+    if s_lat.size == 0 or ranges.size == 0:
+        return {"total_km": total_km, "exposed_km": 0.0, "fraction": 0.0,
+                "per_threat_km": np.zeros(ranges.size)}
+
+    inside = haversine_matrix(s_lat, s_lon, threat_lats, threat_lons) <= ranges[None, :]
+    exposed_km = float(weights[inside.any(axis=1)].sum())
+    return {
+        "total_km": total_km,
+        "exposed_km": exposed_km,
+        "fraction": exposed_km / total_km if total_km > 0 else 0.0,
+        "per_threat_km": weights @ inside,
+    }
+
+
+def envelope_overlap_km2(lats, lons, ranges_km) -> np.ndarray:
+    """
+    Pairwise overlap area (km²) between circular envelopes.
+    Uses the planar circle-lens formula on the great-circle separation —
+    accurate to a few percent for envelopes up to ~500 km radius.
+    The diagonal holds each envelope's own area.
+    """
+    r = np.asarray(ranges_km, dtype=float).ravel()
+    d = haversine_matrix(lats, lons)
+    r1, r2 = r[:, None], r[None, :]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        c1 = np.clip((d ** 2 + r1 ** 2 - r2 ** 2) / (2 * d * r1), -1.0, 1.0)
+        c2 = np.clip((d ** 2 + r2 ** 2 - r1 ** 2) / (2 * d * r2), -1.0, 1.0)
+        k = (-d + r1 + r2) * (d + r1 - r2) * (d - r1 + r2) * (d + r1 + r2)
+        lens = (r1 ** 2 * np.arccos(c1) + r2 ** 2 * np.arccos(c2)
+                - 0.5 * np.sqrt(np.clip(k, 0.0, None)))
+
+    contained = d <= np.abs(r1 - r2)
+    area = np.where(d >= r1 + r2, 0.0, lens)
+    area = np.where(contained, np.pi * np.minimum(r1, r2) ** 2, area)
+    return np.nan_to_num(area)
+
+
+# =============================================================================
+# MAP UNIT HELPERS
+# =============================================================================
+def units_geometry(units: list[dict], ellipsoidal: bool = False) -> dict:
+    """
+    Distance (km) and bearing (deg) matrices between all positioned map units.
+    Returns {names, lat, lon, distance_km, bearing_deg}.
+    """
+    placed = [u for u in units if u.get("lat") is not None and u.get("lon") is not None]
+    lat = np.array([u["lat"] for u in placed], dtype=float)
+    lon = np.array([u["lon"] for u in placed], dtype=float)
+    dist_fn = vincenty_matrix if ellipsoidal else haversine_matrix
+    return {
+        "names": [u["name"] for u in placed],
+        "lat": lat,
+        "lon": lon,
+        "distance_km": dist_fn(lat, lon),
+        "bearing_deg": bearing_matrix(lat, lon),
+    }
+
+
+def is_red_unit(unit: dict) -> bool:
+    """Red = color 'red' or an enemy_* unit type."""
+    return unit.get("color") == "red" or str(unit.get("type", "")).startswith("enemy")
+
+
+def threat_coverage(units: list[dict]) -> list[dict]:
+    """For each friendly unit, list the Red envelopes (range rings) it sits inside."""
+    placed = [u for u in units if u.get("lat") is not None and u.get("lon") is not None]
+    threats = [u for u in placed if u.get("range_km") and is_red_unit(u)]
+    friendlies = [u for u in placed if not is_red_unit(u)]
+    if not threats or not friendlies:
+        return []
+
+    dist = haversine_matrix(
+        [u["lat"] for u in friendlies], [u["lon"] for u in friendlies],
+        [u["lat"] for u in threats], [u["lon"] for u in threats],
+    )
+    ranges = np.array([t["range_km"] for t in threats], dtype=float)
+    inside = dist <= ranges[None, :]
+    return [
+        {
+            "unit": f["name"],
+            "inside": [threats[j]["name"] for j in np.flatnonzero(inside[i])],
+            "nearest_threat_km": float(dist[i].min()),
+        }
+        for i, f in enumerate(friendlies)
+    ]
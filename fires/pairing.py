@@ -0,0 +1,326 @@
+"""
+Weapons-target pairing
+Deterministic ranking of the munitions in the current ammo ledger against one
+target: range window and role from the weapons catalog, the HIMARS
+stationary-only constraint, §8.1 Pk by target class, and the §8.2 rounds
+needed priced against remaining magazine depth. Exposed to the model as a tool.
+"""
+
+import json
+import math
+import re
+from dataclasses import asdict, dataclass, field
+
+from fires.catalog import Munition, WeaponsCatalog
+
+DEFAULT_DESIRED_PK = 0.90
+MAX_DESIRED_PK = 0.99           # a desired Pk of 1 needs infinitely many rounds
+MIN_DESIRED_PK = 0.01
+
+# Target classes: description keywords -> §8.1 Pk target rows, most specific first
+# Keywords match as whole words (_has), so list plurals and designator variants explicitly.
+# Checked in order: more specific classes ("light armor") ahead of the ones they contain ("armor").
+TARGET_CLASSES = {
+    "ship": {
+        "label": "Surface combatant",
+        "keywords": ["ddg", "ffg", "cg", "cruiser", "cruisers", "destroyer", "destroyers", "frigate", "frigates",
+                     "corvette", "corvettes", "ship", "ships", "vessel", "vessels", "sag",
+                     "type 052c", "type 052d", "type 054a", "type 055", "type 056", "type 056a",
+                     "renhai", "luyang", "jiangkai", "lpd", "lhd"],
+        "pk_targets": ["DDG/FFG class", "DDG/CG class"],
+    },
+    "sam_radar": {
+        "label": "SAM / radar site",
+        "keywords": ["hq-9", "hq-9b", "hq-16", "hq-7", "hhq-9", "hhq-16", "sam", "sams", "radar", "radars",
+                     "air defense", "ada", "pgz"],
+        "pk_targets": ["SAM radar", "Point target (vehicle)", "Vehicle", "Soft vehicle"],
+    },
+    "light_armor": {
+        "label": "APC / IFV / light armor",
+        "keywords": ["apc", "apcs", "ifv", "ifvs", "zbd", "zbl", "light armor", "light armored"],
+        "pk_targets": ["APC/light armor", "Point target (vehicle)", "Vehicle"],
+    },
+    "armor": {
+        "label": "MBT / heavy armor",
+        "keywords": ["mbt", "mbts", "tank", "tanks", "ztz", "armor", "armored"],
+        "pk_targets": ["MBT", "Point target (vehicle)", "Vehicle"],
+    },
+    "artillery": {
+        "label": "Artillery / rocket launcher",
+        "keywords": ["artillery", "howitzer", "howitzers", "sph", "pcl", "phl", "mlrs", "launcher", "launchers",
+                     "battery", "batteries"],
+        "pk_targets": ["Soft vehicle", "Point target (vehicle)", "Vehicle"],
+    },
+    "bunker": {
+        "label": "Hardened bunker",
+        "keywords": ["bunker", "bunkers", "hardened", "fortification", "fortifications"],
+        "pk_targets": ["Hardened bunker", "Bunker aperture"],
+    },
+    "structure": {
+        "label": "Structure / C2 node",
+        "keywords": ["structure", "structures", "building", "buildings", "c2", "command post", "node", "depot",
+                     "warehouse"],
+        "pk_targets": ["Structure", "Light structure"],
+    },
+    "troops": {
+        "label": "Troops in open",
+        "keywords": ["troops", "infantry", "personnel", "assembly area", "dismount", "dismounts"],
+        "pk_targets": ["Troops in open (50m)", "Troops in open"],
+    },
+    "soft_vehicle": {
+        "label": "Soft vehicle",
+        "keywords": ["truck", "trucks", "vehicle", "vehicles", "convoy", "logistics", "fuel", "tanker"],
+        "pk_targets": ["Soft vehicle", "Vehicle", "Point target (vehicle)"],
+    },
+}
+
+MOBILE_KEYWORDS = ["moving", "mobile", "convoy", "underway", "maneuvering"]
+
+# Ledger munition keywords -> role. Anything unlisted is a land-attack munition.
+NON_SURFACE_FIRES = ["sm-2", "sm-2mr", "illum", "smoke", "torpedo", "mk 46", "mk 54",
+                     "aster", "essm", "mica", "vl mica-m", "milas"]
+ANTI_SHIP_ONLY = ["harpoon", "mst", "maritime strike", "exocet", "teseo", "haeseong", "ssm-700k",
+                  "hsiung feng", "type 12"]
+ANTI_SHIP_CAPABLE = ANTI_SHIP_ONLY + ["nsm", "sm-6", "prsm", "scalp"]
+HIMARS_MUNITIONS = ["gmlrs", "atacms", "prsm", "m26", "m30", "m31"]
+# Release authority: approval key -> (munition keywords, exempt keywords). §1.2: every
+# land-attack TLAM is SECWAR-approved (Block E); the anti-ship MST variant is not
+APPROVAL_REQUIRED = {
+    "tlam block e": (["tlam", "tomahawk"], ["mst", "maritime strike"]),
+}
+
+
+@dataclass
+class Target:
+    description: str
+    range_km: float
+    target_class: str
+    mobile: bool = False
+
+
+@dataclass
+class PairingOption:
+    asset: str
+    munition: str
+    catalog_name: str | None
+    remaining: int
+    min_range_km: float | None
+    max_range_km: float | None
+    pk: float | None = None
+    pk_basis: str = ""                      # §8.1 row the Pk came from
+    rounds_required: int | None = None
+    magazine_draw: float | None = None      # rounds_required / remaining
+    excluded: str = ""                      # reason, empty when the option is usable
+    notes: list[str] = field(default_factory=list)
+
+    @property
+    def usable(self) -> bool:
+        return not self.excluded
+
+
+def classify_target(description: str) -> str:
+    """Best-matching TARGET_CLASSES key for a free-text target description."""
+    for key, spec in TARGET_CLASSES.items():
+        if _has(description, spec["keywords"]):
+            return key
+    return "soft_vehicle"
+
+
+def is_mobile(description: str) -> bool:
+    text = description.lower()
+    return any(kw in text for kw in MOBILE_KEYWORDS)
+
+
+def desired_pk_from(value, default: float = DEFAULT_DESIRED_PK) -> float:
+    """Desired Pk from a fraction or a percentage (0.9, "90", "90%"), clamped to [0.01, 0.99]."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+    pk = float(value)
+    if pk > 1:
+        pk /= 100
+    if not 0 < pk <= 1:         # also rejects NaN
+        raise ValueError(f"desired Pk must be a fraction or a percentage, got {value!r}")
+    return min(MAX_DESIRED_PK, max(MIN_DESIRED_PK, pk))
+
+
+def rounds_required(pk_single: float, desired_pk: float = DEFAULT_DESIRED_PK) -> int:
+    """§8.2: n = ⌈log(1 − Pk_desired) / log(1 − Pk_single)⌉."""
+    if pk_single >= 1.0:
+        return 1
+    if pk_single <= 0.0:
+        raise ValueError("single-round Pk must be positive")
+    return max(1, math.ceil(math.log(1 - desired_pk) / math.log(1 - pk_single) - 1e-9))
+
+
+def _has(name: str, keywords: list[str]) -> bool:
+    text = name.lower()
+    return any(re.search(rf"(?<![a-z0-9]){re.escape(kw)}(?![a-z0-9])", text) for kw in keywords)
+
+
+def approval_required(munition: str) -> str | None:
+    """APPROVAL_REQUIRED key a ledger munition needs before it may be fired, if any."""
+    for key, (keywords, exempt) in APPROVAL_REQUIRED.items():
+        if _has(munition, keywords) and not _has(munition, exempt):
+            return key
+    return None
+
+
+def role_exclusion(asset: str, munition: str, target_class: str, mobile: bool) -> str:
+    """Why a ledger munition cannot engage this kind of target ("" if it can)."""
+    if _has(munition, NON_SURFACE_FIRES):
+        return "not a surface-attack munition"
+    if target_class == "ship" and not _has(munition, ANTI_SHIP_CAPABLE):
+        return "not anti-ship capable"
+    if target_class != "ship" and _has(munition, ANTI_SHIP_ONLY):
+        return "anti-ship only"
+    if mobile and (_has(asset, ["himars"]) or _has(munition, HIMARS_MUNITIONS)):
+        return "HIMARS restricted to stationary targets"
+    return ""
+
+
+def class_pk(entry: Munition | None, target_class: str) -> tuple[float | None, str]:
+    """Midpoint §8.1 Pk for a target class and the table row it came from."""
+    if entry is None:
+        return None, ""
+    for pk_target in TARGET_CLASSES[target_class]["pk_targets"]:
+        pk = entry.pk.get(pk_target)
+        if pk:
+            basis = f"{pk_target} ({pk[0]:g}" + (f"–{pk[1]:g})" if pk[1] != pk[0] else ")")
+            return round((pk[0] + pk[1]) / 2, 3), basis
+    return None, ""
+
+
+def _evaluate(asset: str, munition: str, remaining: int, target: Target,
+              catalog: WeaponsCatalog, desired_pk: float) -> PairingOption:
+    entry = catalog.munition(munition)
+    option = PairingOption(
+        asset=asset, munition=munition, catalog_name=entry.name if entry else None,
+        remaining=remaining,
+        min_range_km=entry.min_range_km if entry else None,
+        max_range_km=entry.max_range_km if entry else None,
+    )
+
+    if remaining <= 0:
+        option.excluded = "magazine empty"
+    else:
+        option.excluded = role_exclusion(asset, munition, target.target_class, target.mobile)
+    if option.excluded:
+        return option
+    if entry is None or entry.max_range_km is None:
+        option.excluded = "no range data in reference"
+    elif not entry.reaches(target.range_km):
+        option.excluded = (f"out of range ({entry.min_range_km or 0:g}–{entry.max_range_km:g} km)")
+    if option.excluded:
+        return option
+
+    option.pk, option.pk_basis = class_pk(entry, target.target_class)
+    if option.pk is None:
+        option.notes.append("no §8.1 Pk for this target class — model/planner estimate required")
+    else:
+        option.rounds_required = rounds_required(option.pk, desired_pk)
+        option.magazine_draw = round(option.rounds_required / remaining, 3)
+        if option.rounds_required > remaining:
+            option.notes.append(f"needs {option.rounds_required}, only {remaining} remaining")
+    if target.target_class == "ship" and _has(munition, ["sm-6"]):
+        option.notes.append("SM-6 dual-use — each round fired offensively is an interceptor lost")
+    if approval_required(munition) == "tlam block e":
+        option.notes.append("TLAM Block E requires SECWAR approval")
+    return option
+
+
+def _rank_key(option: PairingOption, rank_by: str):
+    has_pk = option.pk is not None
+    enough = option.rounds_required is None or option.rounds_required <= option.remaining
+    draw = option.magazine_draw if option.magazine_draw is not None else 1.0
+    pk = option.pk or 0.0
+    if rank_by == "depth":
+        return (not enough, not has_pk, draw, -pk)
+    return (not enough, not has_pk, -pk, draw)
+
+
+def recommend(ammo_status: dict, target: Target, catalog: WeaponsCatalog,
+              desired_pk: float = DEFAULT_DESIRED_PK, rank_by: str = "pk"
+              ) -> tuple[list[PairingOption], list[PairingOption]]:
+    """
+    Rank every ledger munition against the target.
+    Returns (usable options ranked, excluded options with reasons).
+    rank_by="pk" orders by Pk then magazine draw; "depth" by magazine draw then Pk.
+    """
+    options = [
+        _evaluate(asset, munition, counts.get("initial", 0) - counts.get("expended", 0),
+                  target, catalog, desired_pk)
+        for asset, munitions in ammo_status.items()
+        for munition, counts in munitions.items()
+    ]
+    usable = sorted((o for o in options if o.usable), key=lambda o: _rank_key(o, rank_by))
+    excluded = [o for o in options if not o.usable]
+    return usable, excluded
+
+
+# =============================================================================
+# MODEL TOOL
+# =============================================================================
+PAIRING_TOOL = {
+    "name": "recommend_weapon_pairing",
+    "description": (
+        "Deterministic weapons-target pairing against the CURRENT ammo ledger. "
+        "Filters munitions by range window, role (anti-ship vs land attack) and the "
+        "HIMARS stationary-only rule, then ranks by single-round Pk from the weapons "
+        "reference §8.1 and by rounds required (§8.2) as a share of remaining magazine. "
+        "Call this before recommending a weapon for a specific target; use its numbers "
+        "in the SALVO/FIRES CALCULATION rather than re-deriving them."
+    ),
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "target": {"type": "string", "description": "Target description, e.g. 'HQ-9 battery'"},
+            "range_km": {"type": "number", "description": "Range from friendly firing units to the target (km)"},
+            "target_class": {"type": "string", "enum": list(TARGET_CLASSES),
+                             "description": "Optional; inferred from the description if omitted"},
+            "mobile": {"type": "boolean", "description": "True if the target is moving/mobile"},
+            "desired_pk": {"type": "number",
+                           "description": "Desired cumulative Pk as a fraction below 1 (default 0.9)"},
+            "rank_by": {"type": "string", "enum": ["pk", "depth"]},
+            "max_results": {"type": "integer", "description": "Options to return (default 5)"},
+        },
+        "required": ["target", "range_km"],
+    },
+}
+
+
+def target_from_input(params: dict) -> Target:
+    description = params.get("target", "")
+    target_class = params.get("target_class")
+    if target_class not in TARGET_CLASSES:
+        target_class = classify_target(description)
+    mobile = params.get("mobile")
+    range_km = float(params["range_km"])
+    if not range_km >= 0:
+        raise ValueError(f"range_km must be a non-negative number, got {params['range_km']!r}")
+    return Target(
+        description=description,
+        range_km=range_km,
+        target_class=target_class,
+        mobile=is_mobile(description) if mobile is None else bool(mobile),
+    )
+
+
+def run_pairing_tool(params: dict, ammo_status: dict, catalog: WeaponsCatalog) -> str:
+    """Execute a recommend_weapon_pairing tool call; returns the JSON tool result."""
+    try:
+        target = target_from_input(params)
+        desired_pk = desired_pk_from(params.get("desired_pk"))
+        limit = max(1, int(params.get("max_results") or 5))
+    except (KeyError, TypeError, ValueError) as e:
+        return json.dumps({"error": f"invalid input: {e}"})
+    rank_by = params.get("rank_by") if params.get("rank_by") in ("pk", "depth") else "pk"
+    usable, excluded = recommend(ammo_status, target, catalog, desired_pk, rank_by)
+    return json.dumps({
+        "target": asdict(target),
+        "target_class_label": TARGET_CLASSES[target.target_class]["label"],
+        "desired_pk": desired_pk,
+        "options": [asdict(o) for o in usable[:limit]],
+        "excluded": [{"asset": o.asset, "munition": o.munition, "reason": o.excluded} for o in excluded],
+    })
@@ -0,0 +1,157 @@
+"""
+Loadout and adversary presets
+Ammunition loadouts scaled to the Pacific Guard EDL and the adversary
+force presets. Built once per process when first imported (app.py is
+re-executed on every Streamlit rerun); sessions take deep copies.
+"""
+
+# =============================================================================
+# LOADOUT PRESETS
+# Scaled to match Pacific Guard EDL and Blue Threat Guide
+# NOTE: LRASM is NOT included in ship loadouts — aircraft-launched only
+# =============================================================================
+LOADOUT_PRESETS = {
+    "Default (Planning)": {
+        "HIMARS Battery (6x)": {
+            "GMLRS": {"initial": 108, "expended": 0},
+            "ATACMS": {"initial": 12, "expended": 0},
+            "PrSM": {"initial": 24, "expended": 0},
+        },
+        "M777 Battery (6x)": {
+            "155mm HE": {"initial": 600, "expended": 0},
+            "Excalibur": {"initial": 36, "expended": 0},
+            "ILLUM": {"initial": 60, "expended": 0},
+            "Smoke": {"initial": 60, "expended": 0},
+        },
+        "DDG (NSFS)": {
+            "5\" Rounds": {"initial": 600, "expended": 0},
+            "TLAM": {"initial": 24, "expended": 0},
+            "SM-6": {"initial": 12, "expended": 0},
+        },
+        "Mortar Plt (4x)": {
+            "120mm HE": {"initial": 200, "expended": 0},
+        },
+    },
+    "Pacific Guard — EDL Scaled": {
+        # 2x HIMARS launchers per EDL
+        "HIMARS (2x Launchers)": {
+            "GMLRS": {"initial": 36, "expended": 0},
+            "ATACMS": {"initial": 4, "expended": 0},
+            "PrSM": {"initial": 8, "expended": 0},
+        },
+        # 4x M777 per FA section
+        "M777 FA Section (4x)": {
+            "155mm HE": {"initial": 400, "expended": 0},
+            "Excalibur": {"initial": 24, "expended": 0},
+            "ILLUM": {"initial": 40, "expended": 0},
+            "Smoke": {"initial": 40, "expended": 0},
+        },
+        "Mortar Plt (4x)": {
+            "120mm HE": {"initial": 200, "expended": 0},
+        },
+    },
+    "Pacific Guard — DESRON SAG": {
+        # Source: AY26 Blue Threat Guide / DESRON missile counts document
+        # CG (Ticonderoga-class) — DESRON Flagship
+        "Blue CG (DESRON Flag)": {
+            "Harpoon": {"initial": 8, "expended": 0},
+            "Mk 46/54 Torpedo": {"initial": 6, "expended": 0},
+            "Hellfire (MH-60)": {"initial": 16, "expended": 0},
+            "SM-2 Block IIIB": {"initial": 72, "expended": 0},   # Top 6 cells = 72
+            "SM-6 Block Ia": {"initial": 24, "expended": 0},      # Bottom 3 cells = 24
+            "TLAM Block E": {"initial": 16, "expended": 0},       # 16 (+8 reserve)
+            "TLAM Maritime Strike (MST)": {"initial": 8, "expended": 0},  # 8 (+4 reserve)
+        },
+        # DDG-53 (Arleigh Burke Flight II)
+        "Blue DDG-53": {
+            "Harpoon": {"initial": 8, "expended": 0},
+            "SM-2 Block IIIB": {"initial": 24, "expended": 0},
+            "SM-6 Block Ia": {"initial": 32, "expended": 0},
+            "TLAM Block E": {"initial": 24, "expended": 0},
+            "TLAM Maritime Strike (MST)": {"initial": 8, "expended": 0},
+            "Hellfire (MH-60)": {"initial": 16, "expended": 0},
+        },
+        # LCS-14 (Freedom-variant)
+        "Blue LCS-14": {
+            "NSM": {"initial": 8, "expended": 0},
+            "Hellfire (SUW)": {"initial": 24, "expended": 0},
+            "MH-60R Hellfire": {"initial": 8, "expended": 0},
+        },
+        # LCS-10 (Independence-variant)
+        "Blue LCS-10": {
+            "NSM": {"initial": 8, "expended": 0},
+            "Hellfire (SUW)": {"initial": 24, "expended": 0},
+            "MH-60R Hellfire": {"initial": 8, "expended": 0},
+        },
+        # 3D MLR NMESIS — 36 NSM primary + 36 RSS (Remotely Stationed System)
+        "3D MLR NMESIS (Primary)": {
+            "NSM": {"initial": 36, "expended": 0},
+        },
+        "3D MLR NMESIS (RSS)": {
+            "NSM": {"initial": 36, "expended": 0},
+        },
+    },
+    "RCT w/ Reinforcing Fires": {
+        "HIMARS Battery (6x)": {
+            "GMLRS": {"initial": 108, "expended": 0},
+            "ATACMS": {"initial": 12, "expended": 0},
+        },
+        "M777 Battery (6x)": {
+            "155mm HE": {"initial": 600, "expended": 0},
+            "Excalibur": {"initial": 36, "expended": 0},
+        },
+        "Mortar Plt (4x)": {
+            "120mm HE": {"initial": 200, "expended": 0},
+        },
+        "DDG (NSFS)": {
+            "5\" Rounds": {"initial": 600, "expended": 0},
+            "TLAM": {"initial": 24, "expended": 0},
+        },
+        "OPF-M (7x JLTVs)": {
+            "Hero-120": {"initial": 56, "expended": 0},
+        },
+    },
+}
+
+# =============================================================================
+# ADVERSARY PRESETS
+# =============================================================================
+ADVERSARY_PRESETS = {
+    "Olvana (Chinese-type)": {
+        "naval": {
+            "Type 055 (Renhai CG)": {"alpha": 6.0, "y": 8, "b": 3},
+            "Type 052D (Luyang III DDG)": {"alpha": 4.0, "y": 6, "b": 2},
+            "Type 054A (Jiangkai II FFG)": {"alpha": 3.0, "y": 4, "b": 2},
+            "Type 056 (Jiangdao Corvette)": {"alpha": 2.0, "y": 2, "b": 1},
+            "Type 022 (Houbei FAC)": {"alpha": 2.0, "y": 1, "b": 1},
+        },
+        "systems": {
+            "ADA": ["HQ-9 (200km)", "HQ-16 (40km)", "HQ-7 (15km)", "PGZ-07 35mm SPAAG",
+                    "LD-2000 CIWS", "HQ-17A (20km mobile)", "HQ-22 (170km)"],
+            "IDF": ["PLZ-05 155mm SPH", "PCL-181 155mm Truck", "PHL-03 300mm MLRS",
+                    "PHL-16 370mm MLRS"],
+            "Armor": ["Type 99A MBT", "Type 96A MBT", "ZBD-04A IFV", "ZBL-08 APC",
+                      "ZTD-05 Amphib Tank"],
+            "Coastal": ["YJ-62 (400km ASCM)", "YJ-18 (500km ASCM)", "CM-802AKG shore battery"],
+            "ISR/C2": ["MMRC-M (Radar)", "KJ-500 AEW", "WZ-8 Recon UAV", "CEC/CTN"],
+        }
+    },
+    "Ariana (Iranian-type)": {
+        "naval": {
+            "Frigate": {"alpha": 2.0, "y": 2, "b": 2},
+            "Corvette": {"alpha": 1.5, "y": 1, "b": 1},
+            "Fast Attack Craft": {"alpha": 2.0, "y": 0, "b": 1},
+        },
+        "systems": {
+            "ADA": ["SA-15 Tor (12km)", "SA-6 Gainful (24km)", "ZU-23-2 AAA", "Shahab SAM"],
+            "IDF": ["2S19 Msta 152mm SPH", "D-30 122mm Howitzer", "Fajr-5 333mm MRL"],
+            "Armor": ["T-90 MBT", "T-72 MBT", "BMP-2 IFV", "BTR-80 APC"],
+            "Coastal": ["Noor ASCM (120km)", "Qader ASCM (200km)"],
+            "ISR/C2": ["Radar sites", "C2 nodes"],
+        }
+    },
+}
+
+
+LOADOUT_NAMES = tuple(LOADOUT_PRESETS)
+ADVERSARY_NAMES = tuple(ADVERSARY_PRESETS)
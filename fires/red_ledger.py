@@ -0,0 +1,165 @@
+"""
+Red (adversary) magazine ledger
+Per-hull Red missile loads seeded from the §7.1 Olvana SAG tables, in the same
+{asset: {munition: {"initial", "expended"}}} shape as the Blue ledger so the
+same update path applies. Decremented as Red salvos are adjudicated by the
+salvo calculators or reported in chat; its remaining anti-ship missiles give
+the Red α for the next salvo. Also owns the Red/Blue asset classifier.
+"""
+
+import functools
+import math
+import re
+
+from fires.catalog import WeaponsCatalog
+from fires.salvo import ShipClass
+
+# Keywords that identify Red/Olvana assets
+RED_FORCE_KEYWORDS = (
+    # Generic red force labels
+    "olvana", "red", "enemy", "opfor",
+    # Olvana ship classes
+    "type 055", "type 052", "type 054", "type 056", "type 022",
+    "renhai", "luyang", "jiangkai", "jiangdao", "houbei",
+    # Olvana hull numbers and SAG 12 frigate names from the missile counts document
+    "cg-102", "ddg-173", "ddg-175", "ddg-153", "hengyang", "xuchang", "yulin", "weifang",
+    # Olvana ground/ADA systems
+    "hq-9", "hq-16", "hq-7", "pgz", "phl", "plz", "zbd", "ztq",
+    # Olvana weapons
+    "yj-83", "yj-18", "yj-100", "hhq-9", "yu-7", "akd-10", "hj-8",
+    "et52", "z-18f", "z-20", "z-9",
+    # Generic Olvana weapon prefixes
+    "yj-", "cm-8", "hj-",
+)
+
+
+def _keyword_pattern(keyword: str) -> str:
+    """
+    Whole-word match ("red" must not hit "Fredericksburg" or "Reduced"). A designator
+    ending in a digit also takes a one-letter variant ("type 052" -> "Type 052D",
+    "hq-9" -> "HQ-9B"); a prefix ending in "-" ("yj-") takes any number.
+    """
+    if keyword.endswith("-"):
+        tail = ""
+    elif keyword[-1].isdigit():
+        tail = r"[a-z]?(?![a-z0-9])"
+    else:
+        tail = r"(?![a-z0-9])"
+    return rf"(?<![a-z0-9]){re.escape(keyword)}{tail}"
+
+
+RED_PATTERN = re.compile("|".join(_keyword_pattern(kw) for kw in RED_FORCE_KEYWORDS))
+
+SALVO_SIZE = 8                                          # §7.1 planning note: 1 salvo = 8× missiles
+MAGAZINE_ROW = re.compile(r"^[A-Z]+-\d+\w*\s+(?:ASM|LACM|SAM)$")    # ship-launched missiles, not helo/gun rows
+ASCM_ROW = re.compile(r"\bASM$")
+_HULL_TYPE = re.compile(r"type\s*(\d{3}[a-z]?)", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=4096)
+def is_red(name: str) -> bool:
+    """True for Red/Olvana assets, hulls and weapons."""
+    return RED_PATTERN.search(name.lower()) is not None
+
+
+def friendly_assets(ammo_status: dict) -> dict:
+    return {asset: munitions for asset, munitions in ammo_status.items() if not is_red(asset)}
+
+
+# =============================================================================
+# LEDGER
+# =============================================================================
+def hull_label(platform: str, name: str) -> str:
+    """'FFG (Type 054A Jiangkai II-class Frigate)' + 'Hengyang' -> 'FFG Hengyang (Type 054A ...)'."""
+    designator, _, rest = platform.partition(" ")
+    return f"{designator} {name} {rest}".strip()
+
+
+def seed(catalog: WeaponsCatalog) -> dict:
+    """One ledger entry per hull, missile rows only, expanded for per-ship tables (×4)."""
+    ledger: dict[str, dict] = {}
+    for load in catalog.loads:
+        if load.side != "red" or load.count is None or not MAGAZINE_ROW.match(load.munition):
+            continue
+        if load.hull_count > 1:
+            names = load.hull_names or [str(i + 1) for i in range(load.hull_count)]
+            hulls = [hull_label(load.platform, n) for n in names]
+        else:
+            hulls = [load.platform]
+        for hull in hulls:
+            ledger.setdefault(hull, {})[load.munition] = {"initial": load.count, "expended": 0}
+    return ledger
+
+
+def ascms_remaining(munitions: dict) -> int:
+    return sum(max(0, c.get("initial", 0) - c.get("expended", 0)) for m, c in munitions.items() if ASCM_ROW.search(m))
+
+
+def hull_class(hull: str, naval: dict) -> str | None:
+    """Adversary preset class for a hull, matched on its Type number ('Type 052D')."""
+    match = _HULL_TYPE.search(hull)
+    if not match:
+        return None
+    wanted = f"type {match.group(1).lower()}"
+    return next((name for name in naval if name.lower().startswith(wanted)), None)
+
+
+# =============================================================================
+# PROJECTION
+# =============================================================================
+def projected_alpha(red_ledger: dict, naval: dict) -> dict[str, float]:
+    """
+    Red α per hull for the next salvo: the preset α (already Pk-weighted) scaled
+    by the fraction of a full salvo its remaining anti-ship missiles can fill.
+    """
+    alpha = {}
+    for hull, munitions in red_ledger.items():
+        cls = hull_class(hull, naval)
+        if cls is not None:
+            alpha[hull] = naval[cls]["alpha"] * min(1.0, ascms_remaining(munitions) / SALVO_SIZE)
+    return alpha
+
+
+def hughes_inputs(red_ledger: dict, naval: dict) -> tuple[int, float]:
+    """(B, β) for the single-class Hughes calculator: every tracked hull, mean projected α."""
+    alpha = projected_alpha(red_ledger, naval)
+    return len(alpha), (sum(alpha.values()) / len(alpha) if alpha else 0.0)
+
+
+def red_classes(red_ledger: dict, naval: dict) -> list[ShipClass]:
+    """One class per hull for the mixed-force engine; the magazine is the ASCMs remaining."""
+    classes = []
+    for hull, munitions in red_ledger.items():
+        cls = hull_class(hull, naval)
+        if cls is None:
+            continue
+        p = naval[cls]
+        classes.append(ShipClass(name=hull, count=1, alpha=SALVO_SIZE, y=p["y"], b=p["b"],
+                                 sigma=p["alpha"] / SALVO_SIZE, magazine=ascms_remaining(munitions)))
+    return classes
+
+
+# =============================================================================
+# EXPENDITURE
+# =============================================================================
+def salvo_shooters(red_ledger: dict, ships: float, per_hull: int = SALVO_SIZE) -> dict[str, int]:
+    """Missiles fired per hull when `ships` Red ships each fire one salvo, fullest magazines first."""
+    loaded = sorted(((ascms_remaining(m), hull) for hull, m in red_ledger.items()), reverse=True)
+    return {hull: min(left, per_hull) for left, hull in loaded[:math.ceil(ships)] if left > 0}
+
+
+def expenditure_updates(red_ledger: dict, fired: dict[str, float]) -> list[dict]:
+    """EXPENDED updates (apply_ammo_updates format) drawing each hull's launches from its ASCM rows in order."""
+    updates = []
+    for hull, count in fired.items():
+        left = int(round(count))
+        for munition, counts in red_ledger.get(hull, {}).items():
+            if left <= 0:
+                break
+            if not ASCM_ROW.search(munition):
+                continue
+            take = min(left, counts.get("initial", 0) - counts.get("expended", 0))
+            if take > 0:
+                updates.append({"asset": hull, "munition": munition, "update_type": "EXPENDED", "value": take})
+                left -= take
+    return updates
@@ -0,0 +1,285 @@
+"""
+Hughes salvo model
+One salvo exchange between two naval forces (Hughes 1995):
+ΔB = max(0, α×A − y×B) / b and ΔA = max(0, β×B − z×A) / a.
+Shared by the Hughes tab and the headless batch runner. engage() extends it
+to mixed forces: per-class α / σ / y / b vectors, fire-distribution and
+targeting-priority policies, magazines and per-class attrition over salvos.
+"""
+
+import re
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+def hughes_salvo_calc(
+    alpha: float, A: int,
+    beta: float, B: int,
+    y: float, z: float,
+    a: float, b: float,
+) -> dict:
+    """Run one salvo exchange and return results dict."""
+    blue_missiles = alpha * A
+    red_missiles = beta * B
+    blue_missiles_through = max(0.0, blue_missiles - y * B)
+    red_missiles_through = max(0.0, red_missiles - z * A)
+    delta_B = blue_missiles_through / b
+    delta_A = red_missiles_through / a
+    return {
+        "blue_missiles_fired": blue_missiles,
+        "red_missiles_fired": red_missiles,
+        "blue_missiles_through_defense": blue_missiles_through,
+        "red_missiles_through_defense": red_missiles_through,
+        "delta_B": delta_B,
+        "delta_A": delta_A,
+        "B_remaining": max(0, B - delta_B),
+        "A_remaining": max(0, A - delta_A),
+    }
+
+
+def nmesis_alpha(alpha: float, A: int, nmesis_missiles: int = 0) -> float:
+    """Blue α per ship with shore-based NMESIS missiles spread across the A ships."""
+    return alpha + (nmesis_missiles / A if A > 0 else 0)
+
+
+# =============================================================================
+# HETEROGENEOUS (MULTI-CLASS) ENGAGEMENT
+# =============================================================================
+FIRE_POLICIES = {
+    "uniform": "Spread evenly over every surviving targetable ship",
+    "priority": "Weighted by class targeting priority × ships",
+    "focus": "Fill classes in priority order with enough to kill them, overflow to the next",
+}
+DEFENSE_MODES = {
+    "pooled": "Area defense: the force's intercepts cover every ship (Hughes y×B)",
+    "local": "Point defense: each class intercepts only missiles aimed at it",
+}
+
+# §3.1–3.3 planning estimates (midpoints) for blue platforms matched in ledger asset names.
+# salvo = ASCMs per ship per salvo (raw, σ applied separately); NMESIS is shore-based and not targetable.
+BLUE_PLATFORMS = {
+    "CG-47": {"pattern": r"\bcg\b|cruiser", "salvo": 8, "sigma": 0.45, "defense": 8.0, "staying": 3.0},
+    "DDG-51": {"pattern": r"\bddg", "salvo": 8, "sigma": 0.6, "defense": 8.0, "staying": 1.5},
+    "FFG-62": {"pattern": r"\bffg", "salvo": 16, "sigma": 0.55, "defense": 5.0, "staying": 1.5},
+    "LCS": {"pattern": r"\blcs", "salvo": 8, "sigma": 0.55, "defense": 1.5, "staying": 1.0},
+    "NMESIS": {"pattern": r"nmesis", "salvo": 2, "sigma": 0.55, "defense": 0.0, "staying": 1.0, "targetable": False},
+}
+ASCM_KEYWORDS = ["harpoon", "nsm", "lrasm", "maritime strike", "exocet", "yj-", "type 17"]
+
+
+@dataclass
+class ShipClass:
+    name: str
+    count: float
+    alpha: float                        # missiles per ship per salvo
+    y: float                            # intercepts per ship per salvo
+    b: float                            # hits to mission-kill one ship
+    sigma: float = 1.0                  # targeting effectiveness (1.0 when α already includes Pk)
+    priority: float | None = None       # targeting weight; None = threat (σ×α); 0 = never targeted
+    magazine: float | None = None       # offensive missiles per ship; None = unlimited
+
+
+@dataclass
+class Force:
+    name: str
+    classes: list[ShipClass]
+    tau: float = 1.0                    # alertness / defensive readiness
+
+
+@dataclass
+class Engagement:
+    blue: list[str]                     # class names
+    red: list[str]
+    blue_ships: np.ndarray              # (salvos + 1, n_blue) ships remaining, row 0 = start
+    red_ships: np.ndarray               # (salvos + 1, n_red)
+    blue_fired: np.ndarray              # (salvos,) missiles launched
+    red_fired: np.ndarray
+    blue_hits: np.ndarray               # (salvos,) missiles through red's defense
+    red_hits: np.ndarray
+    blue_launched: np.ndarray           # (n_blue,) missiles launched per class over the engagement
+    red_launched: np.ndarray            # (n_red,)
+    salvos: int
+    outcome: str
+    solve_ms: float
+
+    def class_table(self) -> list[dict]:
+        """Per-class start / remaining / lost, both sides."""
+        rows = []
+        for side, names, ships in (("Blue", self.blue, self.blue_ships), ("Red", self.red, self.red_ships)):
+            for j, name in enumerate(names):
+                start, end = float(ships[0, j]), float(ships[-1, j])
+                rows.append({"side": side, "class": name, "start": start, "remaining": round(end, 2),
+                             "lost": round(start - end, 2)})
+        return rows
+
+
+def _priority(force: Force) -> np.ndarray:
+    return np.array([c.sigma * c.alpha if c.priority is None else c.priority for c in force.classes], dtype=float)
+
+
+def _distribution(policy: str, ships: np.ndarray, weight: np.ndarray, need: np.ndarray, missiles: float) -> np.ndarray:
+    """Fraction of a side's salvo aimed at each target class."""
+    alive = ships * (weight > 0)
+    if alive.sum() <= 1e-9:
+        return np.zeros_like(ships)
+    if policy == "uniform":
+        share = alive
+    elif policy == "priority":
+        share = alive * weight
+    elif policy == "focus":
+        share = np.zeros_like(ships)
+        left = missiles
+        for j in np.argsort(-weight, kind="stable"):
+            if alive[j] <= 1e-9 or left <= 0:
+                continue
+            share[j] = min(left, need[j])
+            left -= share[j]
+        if left > 0:                                    # more than enough — spread the excess by priority
+            share += left * alive * weight / (alive * weight).sum()
+    else:
+        raise ValueError(f"unknown fire policy '{policy}' (use {', '.join(FIRE_POLICIES)})")
+    total = share.sum()
+    return share / total if total > 0 else share
+
+
+def _salvo(shooters: Force, n_s: np.ndarray, mag_s: np.ndarray, sigma: np.ndarray,
+           targets: Force, n_t: np.ndarray, policy: str, defense: str) -> tuple[np.ndarray, np.ndarray, float]:
+    """One salvo: target-class losses, missiles launched per shooter class, missiles through the defense."""
+    alpha = np.array([c.alpha for c in shooters.classes], dtype=float)
+    y = np.array([c.y for c in targets.classes], dtype=float)
+    b = np.array([c.b for c in targets.classes], dtype=float)
+    weight = _priority(targets)
+
+    per_ship = np.minimum(alpha, mag_s)                 # magazine-limited salvo size
+    launched = per_ship * n_s                           # (S,)
+    mag_s -= per_ship
+    intercepts = targets.tau * y * n_t                  # (T,)
+    need = n_t * b + (intercepts if defense == "local" else 0.0)
+    # Σ_i σ_ij × launched_i at each target class, given this side's fire distribution
+    good = float((sigma.mean(axis=1) * launched).sum()) if launched.any() else 0.0
+    dist = _distribution(policy, n_t, weight, need, good)
+    arriving = (launched[:, None] * dist[None, :] * sigma).sum(axis=0)     # (T,)
+
+    if defense == "pooled":
+        through = max(0.0, arriving.sum() - intercepts.sum())
+        leak = through * arriving / arriving.sum() if arriving.sum() > 0 else arriving
+    elif defense == "local":
+        leak = np.maximum(0.0, arriving - intercepts)
+    else:
+        raise ValueError(f"unknown defense mode '{defense}' (use {', '.join(DEFENSE_MODES)})")
+    losses = np.minimum(n_t, leak / np.maximum(b, 1e-9))
+    return losses, launched, float(leak.sum())
+
+
+def engage(blue: Force, red: Force, max_salvos: int = 10, blue_policy: str = "priority",
+           red_policy: str = "priority", defense: str = "pooled", first: str = "simultaneous",
+           sigma_blue: np.ndarray | None = None, sigma_red: np.ndarray | None = None) -> Engagement:
+    """
+    Multi-salvo exchange between mixed forces, one row of parameters per ship class.
+    Each salvo: launched missiles are split over target classes by the fire policy,
+    scaled by targeting effectiveness (σ per shooter class, or a shooter × target
+    matrix), reduced by the defense, and divided by staying power per class.
+    first = "simultaneous" (both fire on pre-salvo forces) | "blue" | "red" (fires,
+    then the other side answers with survivors). Stops when a side has no targetable
+    ships left, neither side has missiles, or after max_salvos.
+    With one class per side, σ = τ = 1 and pooled defense, one salvo equals hughes_salvo_calc.
+    """
+    started = time.perf_counter()
+    n_b = np.array([c.count for c in blue.classes], dtype=float)
+    n_r = np.array([c.count for c in red.classes], dtype=float)
+    mag_b = np.array([np.inf if c.magazine is None else c.magazine for c in blue.classes], dtype=float)
+    mag_r = np.array([np.inf if c.magazine is None else c.magazine for c in red.classes], dtype=float)
+    if sigma_blue is None:
+        sigma_blue = np.repeat([[c.sigma] for c in blue.classes], len(red.classes), axis=1) if blue.classes else np.zeros((0, len(red.classes)))
+    if sigma_red is None:
+        sigma_red = np.repeat([[c.sigma] for c in red.classes], len(blue.classes), axis=1) if red.classes else np.zeros((0, len(blue.classes)))
+    targetable_b, targetable_r = _priority(blue) > 0, _priority(red) > 0
+    armed_b = np.array([c.alpha > 0 for c in blue.classes], dtype=float)
+    armed_r = np.array([c.alpha > 0 for c in red.classes], dtype=float)
+
+    blue_hist, red_hist = [n_b.copy()], [n_r.copy()]
+    launched_b, launched_r = np.zeros(len(n_b)), np.zeros(len(n_r))
+    fired_b, fired_r, hits_b, hits_r = [], [], [], []
+    outcome = f"no decision after {max_salvos} salvos"
+    for _ in range(max_salvos):
+        if first == "red":
+            loss_b, fr, hr = _salvo(red, n_r, mag_r, sigma_red, blue, n_b, red_policy, defense)
+            n_b = n_b - loss_b
+            loss_r, fb, hb = _salvo(blue, n_b, mag_b, sigma_blue, red, n_r, blue_policy, defense)
+            n_r = n_r - loss_r
+        elif first == "blue":
+            loss_r, fb, hb = _salvo(blue, n_b, mag_b, sigma_blue, red, n_r, blue_policy, defense)
+            n_r = n_r - loss_r
+            loss_b, fr, hr = _salvo(red, n_r, mag_r, sigma_red, blue, n_b, red_policy, defense)
+            n_b = n_b - loss_b
+        else:
+            loss_r, fb, hb = _salvo(blue, n_b, mag_b, sigma_blue, red, n_r, blue_policy, defense)
+            loss_b, fr, hr = _salvo(red, n_r, mag_r, sigma_red, blue, n_b, red_policy, defense)
+            n_b, n_r = n_b - loss_b, n_r - loss_r
+        blue_hist.append(n_b.copy())
+        red_hist.append(n_r.copy())
+        launched_b += fb
+        launched_r += fr
+        fired_b.append(float(fb.sum()))
+        fired_r.append(float(fr.sum()))
+        hits_b.append(hb)
+        hits_r.append(hr)
+
+        blue_out = (n_b * targetable_b).sum() <= 1e-6 if targetable_b.any() else False
+        red_out = (n_r * targetable_r).sum() <= 1e-6 if targetable_r.any() else False
+        if blue_out or red_out:
+            outcome = ("mutual destruction" if blue_out and red_out
+                       else "Blue force eliminated" if blue_out else "Red force eliminated")
+            break
+        if not ((np.minimum(mag_b, 1) * armed_b * n_b).sum() > 1e-9
+                or (np.minimum(mag_r, 1) * armed_r * n_r).sum() > 1e-9):
+            outcome = "both sides out of missiles"
+            break
+
+    return Engagement(
+        blue=[c.name for c in blue.classes], red=[c.name for c in red.classes],
+        blue_ships=np.array(blue_hist), red_ships=np.array(red_hist),
+        blue_fired=np.array(fired_b), red_fired=np.array(fired_r),
+        blue_hits=np.array(hits_b), red_hits=np.array(hits_r),
+        blue_launched=launched_b, red_launched=launched_r, salvos=len(fired_b), outcome=outcome,
+        solve_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
+
+# =============================================================================
+# FORCE BUILDERS
+# =============================================================================
+def adversary_classes(naval: dict, counts: dict[str, float] | None = None) -> list[ShipClass]:
+    """ADVERSARY_PRESETS[...]["naval"] entries (α already includes Pk, so σ = 1); counts default 1 each."""
+    counts = counts if counts is not None else dict.fromkeys(naval, 1)
+    return [ShipClass(name=name, count=counts.get(name, 0), alpha=p["alpha"], y=p["y"], b=p["b"])
+            for name, p in naval.items() if counts.get(name, 0) > 0]
+
+
+def coalition_classes(coalition_ships: list[dict]) -> list[ShipClass]:
+    """Coalition ships from the sidebar, one class each, with their own α / y / b."""
+    return [ShipClass(name=ship["name"], count=1, alpha=float(ship.get("alpha_power", 0) or 0),
+                      y=float(ship.get("defensive_power", 0) or 0), b=float(ship.get("staying_power", 1) or 1))
+            for ship in coalition_ships or []]
+
+
+def ledger_classes(ammo_status: dict) -> list[ShipClass]:
+    """
+    Blue ships and NMESIS in the ammo ledger, matched to §3 platform estimates;
+    the magazine is the anti-ship missiles remaining in the ledger.
+    """
+    classes = []
+    for asset, munitions in (ammo_status or {}).items():
+        platform = next((p for p in BLUE_PLATFORMS.values() if re.search(p["pattern"], asset.lower())), None)
+        if platform is None:
+            continue
+        magazine = sum(max(0, c.get("initial", 0) - c.get("expended", 0)) for m, c in munitions.items()
+                       if any(k in m.lower() for k in ASCM_KEYWORDS))
+        classes.append(ShipClass(
+            name=asset, count=1, alpha=platform["salvo"], y=platform["defense"], b=platform["staying"],
+            sigma=platform["sigma"], priority=None if platform.get("targetable", True) else 0.0,
+            magazine=magazine,
+        ))
+    return classes
@@ -0,0 +1,339 @@
+"""
+Fire-mission timeline
+Time-phases approved fire missions: per-shooter rate of fire (burst/sustained,
+launchers firing in parallel, pod capacity and reload), time of flight, airspace deconfliction windows,
+time-on-target (TOT) synchronization and massed-strike completion time.
+Event-driven: a heap of shooter-ready events, each shooter serving its own
+priority queue of missions, so thousands of missions schedule in milliseconds.
+"""
+
+import functools
+import heapq
+import re
+import time
+from dataclasses import dataclass, field
+
+from fires import geodesy
+
+# Rates of fire per launcher/tube from data/weapons_reference_v3.md.
+# burst_rounds at burst_rpm, then sustained_rpm. pod_rounds per launcher load, then
+# reload_s before the next (absent = fed from a magazine). Matched on the munition
+# first; the asset name is only used when the munition matches nothing.
+HIMARS_RPM = 6 / 25 * 60                # §2.1 6-round pod in 25 s
+HIMARS_RELOAD_S = 300.0                 # 📋 Planning estimate: crew pod reload; not in the reference
+RATES_OF_FIRE = {
+    "GMLRS": {"keywords": ["gmlrs", "m31", "m30", "m26"],               # §2.3 6 per pod, 1 pod per launcher
+              "burst_rpm": HIMARS_RPM, "burst_rounds": 6, "sustained_rpm": HIMARS_RPM,
+              "pod_rounds": 6, "reload_s": HIMARS_RELOAD_S},
+    "ATACMS": {"keywords": ["atacms"],                                  # §2.4 1 per pod
+               "burst_rpm": HIMARS_RPM, "burst_rounds": 1, "sustained_rpm": HIMARS_RPM,
+               "pod_rounds": 1, "reload_s": HIMARS_RELOAD_S},
+    "PrSM": {"keywords": ["prsm"],                                      # §2.5 2 per pod
+             "burst_rpm": HIMARS_RPM, "burst_rounds": 2, "sustained_rpm": HIMARS_RPM,
+             "pod_rounds": 2, "reload_s": HIMARS_RELOAD_S},
+    "Mk 45": {"keywords": ['5"', "mk 45", "5-inch"],                    # §1.1 20 rds/min for 1 min, <10 sustained
+              "burst_rpm": 20, "burst_rounds": 20, "sustained_rpm": 10},
+    "M777": {"keywords": ["155mm", "m777", "excalibur", "m795", "m549", "pgk"],   # §3.1 4 burst / 2 sustained
+             "burst_rpm": 4, "burst_rounds": 4, "sustained_rpm": 2},
+    "M120": {"keywords": ["120mm", "m120"],                             # §4.1 16 max / 4 sustained
+             "burst_rpm": 16, "burst_rounds": 16, "sustained_rpm": 4},
+    "M252": {"keywords": ["81mm", "m252"],                              # §4.2 30 max / 15 sustained
+             "burst_rpm": 30, "burst_rounds": 30, "sustained_rpm": 15},
+    # 📋 Planning estimate: the reference gives no VLS / coalition launcher cycle
+    "Missile": {"keywords": ["tlam", "tomahawk", "mst", "sm-", "harpoon", "nsm", "hellfire", "exocet", "scalp",
+                             "aster", "teseo", "haeseong", "hsiung feng", "torpedo", "hero", "mica", "milas"],
+                "burst_rpm": 2, "burst_rounds": 1, "sustained_rpm": 2},
+    "HIMARS": {"keywords": ["himars", "m270", "mlrs"],                  # unknown HIMARS munition: GMLRS cadence
+               "burst_rpm": HIMARS_RPM, "burst_rounds": 6, "sustained_rpm": HIMARS_RPM,
+               "pod_rounds": 6, "reload_s": HIMARS_RELOAD_S},
+    "Mk 45 (asset)": {"keywords": ["nsfs"], "burst_rpm": 20, "burst_rounds": 20, "sustained_rpm": 10},
+}
+DEFAULT_RATE = RATES_OF_FIRE["Missile"]
+BURST_RECOVERY_S = 60.0                 # idle time after which a shooter may burst again
+# 📋 Planning estimate: mean speed for tube/rocket fires with no speed in the reference
+BALLISTIC_AVG_KMS = 0.5
+
+_LAUNCHER_COUNT = re.compile(r"\([^)]*?\b(\d+)\s*x\b[^)]*\)", re.IGNORECASE)     # "(6x)", "(2x Launchers)"
+
+
+@dataclass
+class Mission:
+    mission_id: str
+    asset: str
+    munition: str
+    rounds: int
+    target_id: str = ""
+    range_km: float | None = None
+    priority: int = 99                  # lower fires first
+    not_before_s: float = 0.0           # earliest launch
+    tot_group: str = ""                 # missions sharing a group impact together
+
+
+@dataclass
+class Window:
+    """No-fire interval for munitions in flight (e.g. an ACA open for aircraft transit)."""
+    start_s: float
+    end_s: float
+    applies_to: list[str] = field(default_factory=list)     # asset/munition keywords; empty = all
+    reason: str = ""
+
+    def applies(self, asset: str, munition: str) -> bool:
+        text = f"{asset} {munition}".lower()
+        return not self.applies_to or any(k.lower() in text for k in self.applies_to)
+
+
+@dataclass
+class ScheduledMission:
+    mission_id: str
+    asset: str
+    munition: str
+    target_id: str
+    rounds: int
+    launch_start_s: float
+    launch_end_s: float
+    tof_s: float
+    first_impact_s: float
+    last_impact_s: float
+    tot_group: str = ""
+    tof_basis: str = ""
+    notes: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Timeline:
+    missions: list[ScheduledMission]
+    completion_s: float                         # last impact of the whole strike
+    tot_groups: dict[str, float]                # group -> synchronized first impact
+    shooter_busy_s: dict[str, float]            # asset -> time spent firing
+    passes: int                                 # TOT fixed-point iterations
+    solve_ms: float
+
+
+# =============================================================================
+# SHOOTER MODEL
+# =============================================================================
+def _match_rate(text: str) -> dict | None:
+    return next((spec for spec in RATES_OF_FIRE.values() if any(kw in text for kw in spec["keywords"])), None)
+
+
+@functools.lru_cache(maxsize=4096)
+def rate_of_fire(asset: str, munition: str) -> dict:
+    """Munition first ('TLAM' from 'DDG (NSFS)' is a missile, not a 5" round), then the asset."""
+    return _match_rate(munition.lower()) or _match_rate(asset.lower()) or DEFAULT_RATE
+
+
+@functools.lru_cache(maxsize=4096)
+def launcher_count(asset: str) -> int:
+    """'HIMARS Battery (6x)' / 'HIMARS (2x Launchers)' -> launchers firing in parallel."""
+    match = _LAUNCHER_COUNT.search(asset)
+    return max(1, int(match.group(1))) if match else 1
+
+
+def time_of_flight(range_km: float | None, munition: str) -> tuple[float, str]:
+    """Seconds of flight and where the figure came from."""
+    if range_km is None:
+        return 0.0, "range not given"
+    tof = geodesy.time_of_flight_s(range_km, munition)
+    if tof is not None:
+        return float(tof), "reference speed"
+    return range_km / BALLISTIC_AVG_KMS, "ballistic planning estimate"
+
+
+def _reloads_before(salvo: int, rate: dict, pod_left: int) -> int:
+    """Pod reloads a launcher needs before firing its `salvo`-th round of the mission."""
+    pod = rate.get("pod_rounds")
+    if not pod or salvo < pod_left:
+        return 0
+    return 1 + (salvo - pod_left) // pod
+
+
+def _round_offsets(rounds: int, launchers: int, rate: dict, burst_left: int, pod_left: int = 0) -> list[float]:
+    """Launch offsets (s) for each round, spread across launchers firing in parallel, with pod reloads."""
+    burst_gap = 60.0 / rate["burst_rpm"]
+    sustained_gap = 60.0 / rate["sustained_rpm"]
+    offsets = []
+    for k in range(rounds):
+        salvo = k // launchers                      # rounds already fired per launcher
+        if salvo < burst_left:
+            offset = salvo * burst_gap
+        else:
+            offset = burst_left * burst_gap + (salvo - burst_left) * sustained_gap
+        offsets.append(offset + _reloads_before(salvo, rate, pod_left) * rate.get("reload_s", 0.0))
+    return offsets
+
+
+def _pod_after(salvos: int, rate: dict, pod_left: int) -> int:
+    """Rounds left in each launcher's pod after firing `salvos` rounds per launcher."""
+    pod = rate.get("pod_rounds")
+    if not pod:
+        return 0
+    if salvos <= pod_left:
+        return pod_left - salvos
+    return pod - ((salvos - pod_left - 1) % pod + 1)
+
+
+def _clear_windows(start: float, duration: float, windows: list[Window]) -> tuple[float, list[str]]:
+    """Earliest start >= start whose flight interval [start, start+duration] misses every window."""
+    notes = []
+    moved = True
+    while moved:
+        moved = False
+        for w in windows:
+            if start < w.end_s and start + duration > w.start_s:
+                notes.append(f"held for {w.reason or 'deconfliction window'} until T+{w.end_s:.0f}s")
+                start = w.end_s
+                moved = True
+    return start, notes
+
+
+# =============================================================================
+# SCHEDULER
+# =============================================================================
+def _simulate(missions: list[Mission], flights: dict[str, tuple[float, str]],
+              not_before: dict[str, float], windows: list[Window]) -> list[ScheduledMission]:
+    """
+    One event-driven pass: every shooter serves its queue in priority order.
+    TOT missions queue at their group's best priority, so all shooters serve
+    the groups in the same order and one group's holds never delay an earlier one.
+    """
+    group_priority: dict[str, int] = {}
+    for m in missions:
+        if m.tot_group:
+            group_priority[m.tot_group] = min(group_priority.get(m.tot_group, m.priority), m.priority)
+    queues: dict[str, list] = {}
+    for order, m in enumerate(missions):
+        key = (group_priority[m.tot_group], m.tot_group) if m.tot_group else (m.priority, "")
+        heapq.heappush(queues.setdefault(m.asset, []), (*key, order, m))
+
+    events = [(0.0, asset) for asset in queues]            # (ready time, shooter)
+    heapq.heapify(events)
+    loaded: dict[str, tuple[dict, str]] = {}               # asset -> (rate spec, munition) last fired
+    burst_left: dict[str, int] = {}
+    pod_left: dict[str, int] = {}
+    last_fire = dict.fromkeys(queues, -BURST_RECOVERY_S)
+    scheduled = []
+
+    while events:
+        ready, asset = heapq.heappop(events)
+        queue = queues[asset]
+        if not queue:
+            continue
+        m = heapq.heappop(queue)[-1]
+        rate = rate_of_fire(asset, m.munition)
+        launchers = launcher_count(asset)
+        tof, basis = flights[m.mission_id]
+
+        previous = loaded.get(asset)
+        if previous is None or previous[0] is not rate:
+            burst_left[asset] = rate["burst_rounds"]
+        elif ready - last_fire[asset] >= BURST_RECOVERY_S:
+            burst_left[asset] = rate["burst_rounds"]
+        if previous is None:
+            pod_left[asset] = rate.get("pod_rounds") or 0            # launchers start loaded
+        elif previous[1] != m.munition:
+            pod_left[asset] = 0                                     # a different munition needs a pod change
+        offsets = _round_offsets(m.rounds, launchers, rate, burst_left[asset], pod_left[asset])
+        if offsets and offsets[0]:                                  # reload before the first round
+            ready += offsets[0]
+            offsets = [o - offsets[0] for o in offsets]
+        flight = offsets[-1] + tof if offsets else tof
+        start = max(ready, m.not_before_s, not_before.get(m.mission_id, 0.0))
+        mission_windows = [w for w in windows if w.applies(asset, m.munition)]
+        start, notes = _clear_windows(start, flight, mission_windows)
+        if basis != "reference speed":
+            notes.append(f"ToF: {basis}")
+        salvos = -(-m.rounds // launchers)
+        reloads = _reloads_before(salvos - 1, rate, pod_left[asset]) if salvos else 0
+        if reloads:
+            notes.append(f"{reloads} reload(s) of {rate['pod_rounds']}-round pods")
+
+        end = start + (offsets[-1] if offsets else 0.0)
+        scheduled.append(ScheduledMission(
+            mission_id=m.mission_id, asset=asset, munition=m.munition, target_id=m.target_id,
+            rounds=m.rounds, launch_start_s=round(float(start), 1), launch_end_s=round(end, 1),
+            tof_s=round(tof, 1), first_impact_s=round(start + tof, 1), last_impact_s=round(end + tof, 1),
+            tot_group=m.tot_group, tof_basis=basis, notes=notes,
+        ))
+        burst_left[asset] = max(0, burst_left[asset] - salvos)
+        pod_left[asset] = _pod_after(salvos, rate, pod_left[asset])
+        loaded[asset] = (rate, m.munition)
+        last_fire[asset] = end
+        gap = 60.0 / (rate["burst_rpm"] if burst_left[asset] else rate["sustained_rpm"])
+        heapq.heappush(events, (end + gap, asset))
+    return scheduled
+
+
+def schedule(missions: list[Mission], windows: list[Window] | None = None,
+             max_passes: int = 10) -> Timeline:
+    """
+    Time-phase missions. TOT groups are solved by fixed point: schedule, set each
+    group's impact time to the latest first impact among its lead missions (the
+    first of the group on each shooter), hold the other leads' launches back to
+    match, and reschedule until nothing moves. A shooter's later missions in the
+    same group fire straight after its lead as follow-on fires.
+    """
+    started = time.perf_counter()
+    windows = sorted(windows or [], key=lambda w: w.start_s)
+    flights = {m.mission_id: time_of_flight(m.range_km, m.munition) for m in missions}
+    not_before: dict[str, float] = {}
+    tot_times: dict[str, float] = {}
+
+    for passes in range(1, max_passes + 1):
+        scheduled = _simulate(missions, flights, not_before, windows)
+        leads: dict[tuple[str, str], ScheduledMission] = {}
+        for s in scheduled:                                 # scheduled in launch order per shooter
+            if s.tot_group:
+                leads.setdefault((s.tot_group, s.asset), s)
+        tot_times = {}
+        for (group, _), s in leads.items():
+            tot_times[group] = max(tot_times.get(group, 0.0), s.first_impact_s)
+        moved = False
+        for (group, _), s in leads.items():
+            hold = tot_times[group] - s.tof_s
+            if hold > s.launch_start_s + 0.05:
+                not_before[s.mission_id] = hold
+                moved = True
+        if not moved:
+            break
+
+    lead_ids = {s.mission_id for s in leads.values()}
+    for s in scheduled:
+        if not s.tot_group:
+            continue
+        if s.mission_id not in lead_ids:
+            s.notes.append(f"follow-on to TOT {s.tot_group}")
+        elif abs(s.first_impact_s - tot_times[s.tot_group]) > 0.5:
+            s.notes.append(f"misses TOT {s.tot_group} by {s.first_impact_s - tot_times[s.tot_group]:+.0f}s")
+
+    busy: dict[str, float] = {}
+    for s in scheduled:
+        busy[s.asset] = busy.get(s.asset, 0.0) + (s.launch_end_s - s.launch_start_s)
+    scheduled.sort(key=lambda s: (s.launch_start_s, s.asset))
+    return Timeline(
+        missions=scheduled,
+        completion_s=max((s.last_impact_s for s in scheduled), default=0.0),
+        tot_groups=tot_times,
+        shooter_busy_s={a: round(b, 1) for a, b in busy.items()},
+        passes=passes,
+        solve_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+
+
+def missions_from_plan(fire_missions: list, targets: list, massed_tot: bool = False) -> list[Mission]:
+    """
+    Timeline missions from allocation FireMissions and the target list they were
+    planned against; target priority orders each shooter's queue.
+    massed_tot puts every mission in one TOT group.
+    """
+    by_id = {t.target_id: t for t in targets}
+    missions = []
+    for i, fm in enumerate(fire_missions, start=1):
+        target = by_id.get(fm.target_id)
+        missions.append(Mission(
+            mission_id=f"FM{i:04d}", asset=fm.asset, munition=fm.munition, rounds=fm.rounds,
+            target_id=fm.target_id,
+            range_km=target.range_km if target else None,
+            priority=(target.priority or 99) if target else 99,
+            tot_group="MASSED" if massed_tot else "",
+        ))
+    return missions
@@ -0,0 +1,257 @@
+"""
+Batch weaponeering
+Vectorized §8.2 salvo sizing for whole target lists: single-round Pk, rounds
+required and cumulative Pk for every target × ledger munition in one pass,
+the munition chosen per target, and the total magazine draw on the ledger.
+Target lists come from uploaded TLWS / HPTL worksheets.
+"""
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from fires import pairing
+from fires.catalog import KM_PER_NM, WeaponsCatalog
+
+# Worksheet header keywords per field, matched as whole words in field order
+# (description last so "Target Type" / "Target Number" are claimed first)
+TARGET_LIST_COLUMNS = {
+    "target_id": ["target number", "target no", "tgt no", "tgt #", "target #", "target id", "tn", "serial"],
+    "target_class": ["target type", "target class", "category", "class", "type"],
+    "range_km": ["range", "distance"],
+    "mobile": ["mobile", "mobility", "status"],
+    "desired_pk": ["desired pk", "pk"],
+    "priority": ["priority", "hpt", "precedence"],
+    "munition": ["munition", "weapon", "attack system"],
+    "description": ["description", "target name", "target", "name"],
+}
+
+TRUE_STRINGS = {"y", "yes", "true", "1", "mobile", "moving", "underway"}
+
+
+@dataclass
+class TargetRow:
+    target_id: str
+    description: str
+    target_class: str
+    range_km: float | None = None
+    mobile: bool = False
+    desired_pk: float | None = None
+    priority: int | None = None
+    munition: str = ""              # attack system directed by the worksheet, if any
+
+
+@dataclass
+class WeaponeeringResult:
+    targets: list[TargetRow]
+    columns: list[tuple[str, str]]  # (asset, munition) per ledger entry
+    remaining: np.ndarray           # (M,)
+    pk: np.ndarray                  # (T, M) single-round Pk, 0 where the pairing is infeasible
+    rounds: np.ndarray              # (T, M) rounds required, inf where infeasible
+    plan: list[dict]                # one row per target
+    draw: list[dict]                # one row per ledger munition with a draw
+
+
+# =============================================================================
+# TARGET LIST PARSING
+# =============================================================================
+def map_columns(headers: list[str]) -> dict[str, str]:
+    """Worksheet header -> TargetRow field."""
+    mapping, claimed = {}, set()
+    for field_name, keywords in TARGET_LIST_COLUMNS.items():
+        for header in headers:
+            text = str(header).strip().lower()
+            if header in mapping or field_name in claimed:
+                continue
+            if any(re.search(rf"(?<![a-z0-9]){re.escape(kw)}(?![a-z0-9])", text) for kw in keywords):
+                mapping[header] = field_name
+                claimed.add(field_name)
+    return mapping
+
+
+def _number(value) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if value != value else float(value)     # NaN from blank cells
+    match = re.search(r"-?\d+(?:\.\d+)?", str(value).replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def _text(value) -> str:
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value).strip()
+
+
+def parse_target_list(rows: list[dict]) -> list[TargetRow]:
+    """TargetRows from worksheet records (e.g. DataFrame.to_dict("records"))."""
+    if not rows:
+        return []
+    mapping = map_columns(list(rows[0].keys()))
+    if "description" not in mapping.values() and "target_class" not in mapping.values():
+        return []
+    range_header = next((h for h, f in mapping.items() if f == "range_km"), "")
+    range_scale = KM_PER_NM if re.search(r"\bnm\b", str(range_header).lower()) else 1.0
+
+    targets = []
+    for i, record in enumerate(rows, start=1):
+        values = {f: record.get(h) for h, f in mapping.items()}
+        description = _text(values.get("description"))
+        type_text = _text(values.get("target_class"))
+        if not description and not type_text:
+            continue
+        range_km = _number(values.get("range_km"))
+        desired = _number(values.get("desired_pk"))
+        if desired is not None and desired > 1:
+            desired /= 100                                  # "90" / "90%"
+        priority = _number(values.get("priority"))
+        mobile_text = _text(values.get("mobile")).lower()
+        targets.append(TargetRow(
+            target_id=_text(values.get("target_id")) or str(i),
+            description=description or type_text,
+            target_class=pairing.classify_target(f"{type_text} {description}"),
+            range_km=range_km * range_scale if range_km is not None else None,
+            mobile=mobile_text in TRUE_STRINGS or pairing.is_mobile(f"{mobile_text} {description}"),
+            desired_pk=desired if desired and 0 < desired < 1 else None,
+            priority=int(priority) if priority is not None else None,
+            munition=_text(values.get("munition")),
+        ))
+    return targets
+
+
+def read_target_workbook(source) -> list[TargetRow]:
+    """TargetRows from the first sheet with target columns in a TLWS/HPTL workbook (path or file)."""
+    import pandas as pd
+
+    for df in pd.read_excel(source, sheet_name=None).values():
+        targets = parse_target_list(df.to_dict("records"))
+        if targets:
+            return targets
+    return []
+
+
+# =============================================================================
+# SOLVER
+# =============================================================================
+@dataclass
+class EngagementMatrix:
+    """Target × ledger-munition feasibility and single-round Pk."""
+    columns: list[tuple[str, str]]  # (asset, munition) per ledger entry
+    remaining: np.ndarray           # (M,)
+    entries: list                   # catalog Munition (or None) per column
+    in_range: np.ndarray            # (T, M) bool; unknown target range counts as in range
+    role: np.ndarray                # (T, M) bool; role / HIMARS stationary-only rules
+    pk: np.ndarray                  # (T, M) §8.1 midpoint Pk for the target class (0 = none)
+
+    @property
+    def feasible(self) -> np.ndarray:
+        return self.in_range & self.role & (self.pk > 0) & (self.remaining > 0)
+
+
+def engagement_matrix(targets: list[TargetRow], ammo_status: dict,
+                      catalog: WeaponsCatalog) -> EngagementMatrix:
+    """Build the (T, M) engagement tables for a target list against a ledger."""
+    columns, remaining, entries = [], [], []
+    for asset, munitions in ammo_status.items():
+        for munition, counts in munitions.items():
+            columns.append((asset, munition))
+            remaining.append(counts.get("initial", 0) - counts.get("expended", 0))
+            entries.append(catalog.munition(munition))
+    remaining = np.asarray(remaining, dtype=float)
+    classes = list(pairing.TARGET_CLASSES)
+    n_targets, n_munitions = len(targets), len(columns)
+
+    # Per-munition tables: range window, Pk by class, role by (class, mobile)
+    min_r = np.array([(e.min_range_km or 0.0) if e else 0.0 for e in entries])
+    max_r = np.array([e.max_range_km if e and e.max_range_km is not None else -np.inf for e in entries])
+    pk_by_class = np.array([[pairing.class_pk(e, c)[0] or 0.0 for e in entries] for c in classes]).reshape(
+        len(classes), n_munitions)
+    role_ok = np.array([[[not pairing.role_exclusion(a, m, c, mobile) for mobile in (False, True)]
+                         for a, m in columns] for c in classes], dtype=bool).reshape(len(classes), n_munitions, 2)
+
+    # Per-target vectors
+    cls = np.array([classes.index(t.target_class) for t in targets], dtype=int)
+    rng = np.array([np.nan if t.range_km is None else t.range_km for t in targets], dtype=float)
+    mobile = np.array([t.mobile for t in targets], dtype=int)
+
+    in_range = np.isnan(rng)[:, None] | ((rng[:, None] >= min_r) & (rng[:, None] <= max_r))
+    role = role_ok[cls, :, mobile] if n_targets else np.zeros((0, n_munitions), dtype=bool)
+    pk = pk_by_class[cls] if n_targets else np.zeros((0, n_munitions))
+    return EngagementMatrix(columns, remaining, entries, in_range, role, pk)
+
+
+def solve(targets: list[TargetRow], ammo_status: dict, catalog: WeaponsCatalog,
+          desired_pk: float = pairing.DEFAULT_DESIRED_PK) -> WeaponeeringResult:
+    """
+    Rounds required / cumulative Pk for every target against every ledger munition,
+    then pick per target the highest-Pk feasible munition (ties broken by the
+    smaller share of remaining magazine). A worksheet-directed munition is honoured
+    when it is feasible. Magazine draw is the sum over the chosen pairings.
+    """
+    matrix = engagement_matrix(targets, ammo_status, catalog)
+    columns, remaining, entries = matrix.columns, matrix.remaining, matrix.entries
+    in_range, role, feasible = matrix.in_range, matrix.role, matrix.feasible
+    n_targets, n_munitions = len(targets), len(columns)
+    pd_ = np.array([t.desired_pk or desired_pk for t in targets], dtype=float)
+    pk = matrix.pk
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = np.ceil(np.log1p(-pd_)[:, None] / np.log1p(-np.minimum(pk, 0.999999)) - 1e-9)
+    rounds = np.where(feasible, np.maximum(n, 1), np.inf)
+    pk = np.where(feasible, pk, 0.0)
+
+    # Worksheet-directed munitions restrict the choice to matching ledger columns
+    directed = np.ones_like(feasible)
+    for i, t in enumerate(targets):
+        if t.munition:
+            wanted = catalog.munition(t.munition)
+            match = np.array([m.lower() == t.munition.lower() or (wanted is not None and e is wanted)
+                              for (_, m), e in zip(columns, entries)], dtype=bool)
+            if (match & feasible[i]).any():
+                directed[i] = match
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(feasible, rounds / np.maximum(remaining, 1), np.inf)
+    score = np.where(feasible & directed, pk - 1e-3 * np.minimum(share, 1e3), -np.inf)
+    choice = score.argmax(axis=1) if n_munitions else np.zeros(n_targets, dtype=int)
+    has_choice = np.isfinite(score.max(axis=1)) if n_munitions else np.zeros(n_targets, dtype=bool)
+
+    rows = np.arange(n_targets)
+    chosen_rounds = np.where(has_choice, rounds[rows, choice] if n_munitions else 0, 0).astype(int)
+    chosen_pk = np.where(has_choice, pk[rows, choice] if n_munitions else 0, 0.0)
+    achieved = 1 - (1 - chosen_pk) ** chosen_rounds
+    draw = np.bincount(choice[has_choice], weights=chosen_rounds[has_choice], minlength=n_munitions)
+
+    plan = []
+    for i, t in enumerate(targets):
+        row = {
+            "target_id": t.target_id, "description": t.description,
+            "target_class": t.target_class, "range_km": t.range_km, "mobile": t.mobile,
+            "desired_pk": float(pd_[i]), "priority": t.priority,
+            "asset": "", "munition": "", "pk_single": None, "rounds": 0, "achieved_pk": 0.0, "note": "",
+        }
+        if has_choice[i]:
+            asset, munition = columns[choice[i]]
+            row.update(asset=asset, munition=munition, pk_single=float(chosen_pk[i]),
+                       rounds=int(chosen_rounds[i]), achieved_pk=round(float(achieved[i]), 3))
+            if t.munition and directed[i].all():
+                row["note"] = f"directed {t.munition} not feasible — best alternative shown"
+            if t.range_km is None:
+                row["note"] = "range not given — range check skipped"
+        elif not role[i].any():
+            row["note"] = "no ledger munition suited to this target"
+        elif not (role[i] & in_range[i]).any():
+            row["note"] = "no suitable munition in range"
+        else:
+            row["note"] = "no §8.1 Pk for this target class — planner estimate required"
+        plan.append(row)
+
+    draw_rows = [
+        {"asset": columns[j][0], "munition": columns[j][1], "remaining": int(remaining[j]),
+         "required": int(draw[j]), "after": int(remaining[j] - draw[j]),
+         "shortfall": int(max(0, draw[j] - remaining[j]))}
+        for j in np.flatnonzero(draw)
+    ]
+    return WeaponeeringResult(targets, columns, remaining, pk, rounds, plan, draw_rows)
@@ -6,18 +6,56 @@ scaled EDL loadouts, DESRON-specific missile counts, ISR/C2 additions (Section 1
 
 import json
 
+from fires.red_ledger import ASCM_ROW
+
+
+REFERENCE_EXCERPT_CHARS = {"weapons_ref": 8000, "hughes_ref": 3000, "doctrine_ref": 4000}
+NOT_LOADED = {
+    "weapons_ref": "[Weapons reference not loaded — use planning estimates from memory]",
+    "hughes_ref": "[Hughes model reference not loaded]",
+    "doctrine_ref": "[Doctrine reference not loaded]",
+}
+
+# Shared by the full and reduced prompts
+EMPLOYMENT_RULES = """### HIMARS RESTRICTIONS
+- **HIMARS (GMLRS/ATACMS/PrSM) are STATIONARY TARGET SYSTEMS ONLY**
+- HIMARS CANNOT prosecute moving/mobile targets
+- If a target is described as "moving," "mobile," or "convoy," DO NOT recommend HIMARS
+- Recommend aviation (Hellfire, JAGM, SDB-II), attack helo, or other mobile-capable systems
+
+### LRASM — AIRCRAFT-LAUNCHED ONLY
+- **LRASM (AGM-158C) is an AIR-LAUNCHED missile ONLY**
+- LRASM is carried and launched by F/A-18E/F Super Hornets and F-35C
+- LRASM is **NOT ship-launched** — do NOT suggest ships launch LRASM from VLS
+- Ships use: Tomahawk Block Va (maritime strike), Harpoon (Block II), or NSM
+- When user asks about ship anti-ship capabilities, reference TLAM Block Va or Harpoon — NOT LRASM
+
+### KILL TYPE DISTINCTION
+- **K-Kill (Catastrophic Kill):** Vehicle destroyed, crew casualties. Affects follow-on operations.
+- **M-Kill (Mobility Kill):** Vehicle immobilized, crew may survive and fight on. Requires re-attack or exploitation.
+- Apply the correct kill type in Pk calculations and tactical recommendations.
+
+### RANGE VERIFICATION
+- ALWAYS verify weapon is within range before recommending
+- If target is beyond maximum effective range, state this explicitly and recommend alternatives
+- Do not assume in-range; check against reference data
+"""
+AMMO_UPDATE_FORMAT = """When ammunition is expended, output the EXACT format:
+```
+AMMO_UPDATE:
+ASSET: [asset name exactly as in tracker]
+MUNITION: [munition name exactly as in tracker]  
+EXPENDED: [number]
+```
+"""
+
+# Variable blocks the reduced (fast-tier) prompt carries; its weapons_ref block holds the
+# sections of these references that match the question (ReferenceRegistry.matching_sections)
+REDUCED_BLOCKS = ("ammo", "red_ammo", "weapons_ref")
+REDUCED_REFERENCES = ("weapons", "hughes")
 
-def get_system_prompt_with_context(
-    weapons_ref_text: str = "",
-    hughes_model_text: str = "",
-    ammo_status: dict = None,
-    uploaded_docs: dict = None,
-    adversary_preset: str = "Olvana (Chinese-type)",
-    current_loadout: str = "Default",
-    coalition_ships: list = None,
-) -> str:
-    """Build the full system prompt with dynamic context."""
 
+def _ammo_block(ammo_status: dict | None) -> str:
     ammo_block = ""
     if ammo_status:
         rows = []
@@ -42,13 +80,74 @@ def get_system_prompt_with_context(
 | Asset | Munition | Initial | Expended | Remaining | Status |
 |-------|----------|---------|----------|-----------|--------|
 """ + "\n".join(rows) + "\n"
+    return ammo_block
 
+
+def _red_ammo_block(red_ammo: dict | None) -> str:
+    red_block = ""
+    if red_ammo:
+        rows = []
+        for hull, munitions in red_ammo.items():
+            for munition, counts in munitions.items():
+                if ASCM_ROW.search(munition):
+                    initial = counts.get("initial", 0)
+                    rows.append(f"| {hull} | {munition} | {initial} | {initial - counts.get('expended', 0)} |")
+        if rows:
+            red_block = """
+## RED MAGAZINES (Adjudicated, SAG 12 ASCMs)
+| Hull | Munition | Initial | Remaining |
+|------|----------|---------|-----------|
+""" + "\n".join(rows) + """
+Report Red expenditure with the same AMMO_UPDATE format, using the hull and munition names above.
+"""
+    return red_block
+
+
+def _targets_block(target_state: dict | None) -> str:
+    targets_block = ""
+    if target_state:
+        rows = []
+        for r in target_state["rows"]:
+            bda = r["bda"]
+            assessed = f"{bda['assessment']} (phase {bda['phase']}{', confirmed' if bda['confirmed'] else ''})" if bda else "—"
+            fired = ", ".join(f"{e['rounds']}× {e['munition']}" for e in r["engagements"]) or "—"
+            rows.append(f"| {r['target_id']} | {r['description']} | {r.get('priority') or '—'} | {fired} | "
+                        f"{r['expected_pk']:.2f} | {assessed} | {r['status']} |")
+        targets_block = f"""
+## TARGET STATE (BDA Tracker)
+{target_state['summary']}
+"""
+        if rows:
+            targets_block += """
+Changed since your last answer:
+| Target | Description | Pri | Fired | Expected Pk | BDA | Status |
+|--------|-------------|-----|-------|-------------|-----|--------|
+""" + "\n".join(rows) + "\n"
+            if target_state["omitted"]:
+                targets_block += f"({target_state['omitted']} older changes omitted)\n"
+        targets_block += """
+When the student reports BDA for a tracked target, output the EXACT format:
+```
+BDA_REPORT:
+TARGET: [target number exactly as in the tracker]
+ASSESSMENT: [destroyed | neutralized | damaged | suppressed | no effect]
+PHASE: [1 | 2 | 3]
+CONFIRMED: [yes | no]
+```
+"""
+    return targets_block
+
+
+def _docs_block(uploaded_docs: dict | None) -> str:
     docs_block = ""
     if uploaded_docs:
         docs_block = "## UPLOADED PLANNING DOCUMENTS\n"
         for doc_type, content in uploaded_docs.items():
             docs_block += f"### {doc_type}\n{content}\n\n"
+    return docs_block
 
+
+def _coalition_block(coalition_ships: list | None) -> str:
     coalition_block = ""
     if coalition_ships:
         coalition_block = "## COALITION SHIPS IN THIS SESSION\n"
@@ -60,6 +159,48 @@ def get_system_prompt_with_context(
                 f"b={ship.get('staying_power', 'unknown')}\n"
             )
         coalition_block += "\n"
+    return coalition_block
+
+
+def prompt_blocks(
+    weapons_ref_text: str = "",
+    hughes_model_text: str = "",
+    doctrine_text: str = "",
+    ammo_status: dict = None,
+    uploaded_docs: dict = None,
+    coalition_ships: list = None,
+    red_ammo: dict = None,
+    target_state: dict = None,
+) -> dict[str, str]:
+    """The variable blocks of the system prompt by name; everything else is fixed protocol."""
+    references = {"weapons_ref": weapons_ref_text, "hughes_ref": hughes_model_text, "doctrine_ref": doctrine_text}
+    blocks = {
+        "ammo": _ammo_block(ammo_status),
+        "red_ammo": _red_ammo_block(red_ammo),
+        "targets": _targets_block(target_state),
+        "docs": _docs_block(uploaded_docs),
+        "coalition": _coalition_block(coalition_ships),
+    }
+    for key, text in references.items():
+        blocks[key] = text[:REFERENCE_EXCERPT_CHARS[key]] if text else NOT_LOADED[key]
+    return blocks
+
+
+def get_system_prompt_with_context(
+    weapons_ref_text: str = "",
+    hughes_model_text: str = "",
+    doctrine_text: str = "",
+    ammo_status: dict = None,
+    uploaded_docs: dict = None,
+    adversary_preset: str = "Olvana (Chinese-type)",
+    current_loadout: str = "Default",
+    coalition_ships: list = None,
+    red_ammo: dict = None,
+    target_state: dict = None,
+) -> str:
+    """Build the full system prompt with dynamic context."""
+    blocks = prompt_blocks(weapons_ref_text, hughes_model_text, doctrine_text,
+                           ammo_status, uploaded_docs, coalition_ships, red_ammo, target_state)
 
     return f"""# FIRES COORDINATOR AGENT v9 — SYSTEM PROMPT
 Classification: UNCLASSIFIED // TRAINING USE ONLY
@@ -147,47 +288,20 @@ Doctrinal Reference: [JP/MCWP/FM citation if applicable]
 
 ## CRITICAL WEAPONS EMPLOYMENT RULES
 
-### HIMARS RESTRICTIONS
-- **HIMARS (GMLRS/ATACMS/PrSM) are STATIONARY TARGET SYSTEMS ONLY**
-- HIMARS CANNOT prosecute moving/mobile targets
-- If a target is described as "moving," "mobile," or "convoy," DO NOT recommend HIMARS
-- Recommend aviation (Hellfire, JAGM, SDB-II), attack helo, or other mobile-capable systems
-
-### LRASM — AIRCRAFT-LAUNCHED ONLY
-- **LRASM (AGM-158C) is an AIR-LAUNCHED missile ONLY**
-- LRASM is carried and launched by F/A-18E/F Super Hornets and F-35C
-- LRASM is **NOT ship-launched** — do NOT suggest ships launch LRASM from VLS
-- Ships use: Tomahawk Block Va (maritime strike), Harpoon (Block II), or NSM
-- When user asks about ship anti-ship capabilities, reference TLAM Block Va or Harpoon — NOT LRASM
-
-### KILL TYPE DISTINCTION
-- **K-Kill (Catastrophic Kill):** Vehicle destroyed, crew casualties. Affects follow-on operations.
-- **M-Kill (Mobility Kill):** Vehicle immobilized, crew may survive and fight on. Requires re-attack or exploitation.
-- Apply the correct kill type in Pk calculations and tactical recommendations.
-
-### RANGE VERIFICATION
-- ALWAYS verify weapon is within range before recommending
-- If target is beyond maximum effective range, state this explicitly and recommend alternatives
-- Do not assume in-range; check against reference data
-
+{EMPLOYMENT_RULES}
 ---
 
 ## AMMUNITION TRACKING
 
-When ammunition is expended, output the EXACT format:
-```
-AMMO_UPDATE:
-ASSET: [asset name exactly as in tracker]
-MUNITION: [munition name exactly as in tracker]  
-EXPENDED: [number]
-```
-
+{AMMO_UPDATE_FORMAT}
 Alert thresholds:
 - 🟢 GREEN: >50% remaining
 - 🟡 AMBER: 25-50% — flag for resupply planning
 - 🔴 RED: <25% — recommend limiting fires
 
-{ammo_block}
+{blocks['ammo']}
+{blocks['red_ammo']}
+{blocks['targets']}
 
 ---
 
@@ -229,7 +343,7 @@ Where:
 
 ## COALITION SHIPS
 
-{coalition_block if coalition_block else "No coalition ships added to this session yet. Use the sidebar to add coalition platforms."}
+{blocks['coalition'] if blocks['coalition'] else "No coalition ships added to this session yet. Use the sidebar to add coalition platforms."}
 
 **How to add coalition ships:** In the sidebar, select "Coalition Ship Entry" and specify:
 - Ship name and type
@@ -246,17 +360,20 @@ The agent will then include them in salvo calculations.
 
 ---
 
-{docs_block}
+{blocks['docs']}
 
 ---
 
 ## REFERENCE DATA
 
 ### WEAPONS REFERENCE (Excerpt)
-{weapons_ref_text[:8000] if weapons_ref_text else "[Weapons reference not loaded — use planning estimates from memory]"}
+{blocks['weapons_ref']}
 
 ### HUGHES SALVO MODEL REFERENCE
-{hughes_model_text[:3000] if hughes_model_text else "[Hughes model reference not loaded]"}
+{blocks['hughes_ref']}
+
+### FIRES DOCTRINE REFERENCE
+{blocks['doctrine_ref']}
 
 ---
 
@@ -268,3 +385,38 @@ The agent will then include them in salvo calculations.
 
 **TRAINING AID REMINDER:** All outputs require human validation by qualified fires personnel before use in any real planning context. This tool is for educational purposes only.
 """
+
+
+def get_reduced_system_prompt(
+    adversary_preset: str = "Olvana (Chinese-type)",
+    current_loadout: str = "Default",
+    **context,
+) -> str:
+    """
+    Short prompt for the fast tier (lookups, bookkeeping): identity, employment
+    rules, ammo reporting and the reference sections matching the question
+    (passed as weapons_ref_text) — no reasoning protocol, doctrine, documents or
+    coalition ships. Takes the same context as get_system_prompt_with_context.
+    """
+    blocks = prompt_blocks(**context)
+
+    return f"""# FIRES COORDINATOR AGENT v9 — QUICK REFERENCE
+Classification: UNCLASSIFIED // TRAINING USE ONLY
+
+You are the Fires Coordinator Agent, a training tool for MAGTF fires planning in the **Pacific Guard** scenario (notional data; assume legitimate training use).
+Answer reference and bookkeeping questions directly and briefly from the reference data below — no PERCEIVE/DECIDE/ACT phases. If the question needs a fires plan, weaponeering or salvo analysis, say so in one line and ask the student to send it as a planning request.
+
+**Adversary:** {adversary_preset} | **Loadout:** {current_loadout}
+
+## WEAPONS EMPLOYMENT RULES
+{EMPLOYMENT_RULES}
+## AMMUNITION TRACKING
+{AMMO_UPDATE_FORMAT}
+{blocks['ammo']}
+{blocks['red_ammo']}
+
+## REFERENCE SECTIONS (matched to the question)
+{blocks['weapons_ref']}
+
+⚠️ TRAINING AID ONLY — REQUIRES HUMAN VALIDATION
+"""
@@ -0,0 +1,136 @@
+"""
+Shared answer cache
+Process-wide TTL + LRU cache of model answers, keyed on a normalized query and
+a fingerprint of the context the answer depends on (adversary, loadout,
+reference hash, documents, and the ledger entries the query names — or the
+whole ledger for calculation and planning answers). Reference and calculation
+questions repeated across a class are answered without a call.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# Words dropped from queries before keying ("What's the range of PrSM?" == "range prsm")
+STOP_WORDS = {
+    "a", "an", "the", "of", "for", "on", "in", "to", "is", "are", "was", "what", "whats", "what's",
+    "please", "pls", "can", "could", "would", "you", "me", "tell", "give", "show", "i", "we",
+    "need", "want", "know", "about", "do", "does", "there", "s",
+}
+GREEK = {"α": "alpha", "β": "beta", "γ": "gamma", "δ": "delta"}
+
+# Queries that change or depend on the session's state / earlier turns are never cached
+STATEFUL_KEYWORDS = [
+    "expend", "fired", "shot", "update", "remaining", "left", "i have", "we have", "my ", "our ",
+    "resupply", "reload", "status", "ledger", "reset",
+]
+CONTEXT_REFERENCES = ["that", "it", "those", "these", "this", "above", "previous", "again", "same",
+                      "instead", "also", "then", "them"]
+
+# Route categories whose answers draw on the whole ledger and target list, not only what the query names
+WHOLE_CONTEXT_CATEGORIES = ("calculation", "planning")
+
+OPT_OUT_PREFIX = "/fresh"
+
+
+@dataclass
+class CachedAnswer:
+    text: str
+    created: float
+    hits: int = 0
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip punctuation and filler words; keeps numbers and designators (PrSM, HQ-9)."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    for letter, name in GREEK.items():
+        text = text.replace(letter, f" {name} ")
+    words = re.findall(r"[a-z0-9]+(?:[-.][a-z0-9]+)*", text)
+    return " ".join(w for w in words if w not in STOP_WORDS)
+
+
+def is_cacheable(query: str) -> bool:
+    """False for ammo updates, ledger/status questions and follow-ups that lean on earlier turns."""
+    text = f" {query.lower()} "
+    if any(kw in text for kw in STATEFUL_KEYWORDS):
+        return False
+    return not any(re.search(rf"\b{kw}\b", text) for kw in CONTEXT_REFERENCES)
+
+
+def ledger_slice(query: str, ammo_status: dict, whole: bool = False) -> dict:
+    """Remaining counts for the ledger munitions/assets the query names (every entry if whole)."""
+    words = set(normalize_query(query).split())
+    relevant = {}
+    for asset, munitions in (ammo_status or {}).items():
+        asset_named = whole or bool(words & set(normalize_query(asset).split()))
+        for munition, counts in munitions.items():
+            if asset_named or words & set(normalize_query(munition).split()):
+                relevant[f"{asset}|{munition}"] = counts.get("initial", 0) - counts.get("expended", 0)
+    return relevant
+
+
+def context_fingerprint(**context) -> str:
+    """Stable digest of the context an answer depends on (any JSON-serializable values)."""
+    blob = json.dumps(context, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+class AnswerCache:
+    """Thread-safe LRU of answers with a time-to-live; one instance per server process."""
+
+    def __init__(self, max_entries: int = 512, ttl_s: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0, "bypassed": 0}
+
+    @staticmethod
+    def key(query: str, fingerprint: str) -> str:
+        return hashlib.sha256(f"{normalize_query(query)}\x00{fingerprint}".encode()).hexdigest()
+
+    def get(self, key: str) -> CachedAnswer | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry.created > self.ttl_s:
+                del self._entries[key]
+                self.stats["expired"] += 1
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, key: str, text: str):
+        with self._lock:
+            self._entries[key] = CachedAnswer(text=text, created=time.time())
+            self._entries.move_to_end(key)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def bypass(self):
+        """Record a query that skipped the cache (opt-out or uncacheable)."""
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
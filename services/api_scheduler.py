@@ -0,0 +1,225 @@
+"""
+Process-wide Messages API scheduler
+Bounded concurrency, a fair round-robin queue across sessions, token-bucket
+limits on requests and input tokens per minute, and jittered exponential
+retry on 429 (rate limited) / 529 (overloaded) responses. A request backing
+off gives up its concurrency slot and queues again when the backoff ends.
+"""
+
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+RETRYABLE_STATUS = {429, 529}
+
+
+class QueueTimeout(TimeoutError):
+    """A request waited longer than max_queue_wait_s for its turn and was not sent."""
+
+
+class TokenBucket:
+    """Continuous-refill token bucket (rate given per minute)."""
+
+    def __init__(self, per_minute: float, capacity: float | None = None, now: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) tokens after the real usage is known."""
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+@dataclass(eq=False)
+class Ticket:
+    session_id: str
+    est_tokens: int
+    seq: int
+    enqueued: float
+
+
+class RequestScheduler:
+    """
+    Gate for every Messages API call in the process.
+    Each session's requests wait in their own queue; queues are served
+    round-robin so one busy session cannot starve the rest of the class.
+    """
+
+    def __init__(self, max_concurrency: int = 4, requests_per_min: int = 50,
+                 input_tokens_per_min: int = 40000, max_retries: int = 4,
+                 base_backoff_s: float = 1.0, max_backoff_s: float = 30.0,
+                 max_queue_wait_s: float = 300.0, clock=time.monotonic, sleep=time.sleep):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.max_queue_wait_s = max_queue_wait_s
+        self.clock = clock                  # injectable for tests (fake clock)
+        self.sleep = sleep
+        self.requests = TokenBucket(requests_per_min, now=clock())
+        self.input_tokens = TokenBucket(input_tokens_per_min, now=clock())
+
+        self._cond = threading.Condition()
+        self._queues: dict[str, deque[Ticket]] = {}
+        self._rotation: deque[str] = deque()
+        self._active = 0
+        self._seq = itertools.count()
+        self.stats = {"completed": 0, "retries": 0, "failed": 0, "max_queue": 0, "total_wait_s": 0.0}
+
+    # ---- queue ----
+    def _order(self) -> list[Ticket]:
+        """Fair dispatch order: one ticket per session per round, in rotation order."""
+        queues = [self._queues[s] for s in self._rotation]
+        order = []
+        for depth in range(max((len(q) for q in queues), default=0)):
+            order.extend(q[depth] for q in queues if len(q) > depth)
+        return order
+
+    def queue_length(self) -> int:
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def _enqueue(self, ticket: Ticket, front: bool = False):
+        """Add to the session's queue; front=True for a retry, which stays that session's next request."""
+        if ticket.session_id not in self._queues:
+            self._queues[ticket.session_id] = deque()
+            self._rotation.append(ticket.session_id)
+        if front:
+            self._queues[ticket.session_id].appendleft(ticket)
+        else:
+            self._queues[ticket.session_id].append(ticket)
+        self.stats["max_queue"] = max(
+            self.stats["max_queue"], sum(len(q) for q in self._queues.values())
+        )
+
+    def _dequeue(self, ticket: Ticket):
+        queue = self._queues[ticket.session_id]
+        queue.remove(ticket)
+        self._rotation.remove(ticket.session_id)
+        if queue:
+            self._rotation.append(ticket.session_id)     # back of the line
+        else:
+            del self._queues[ticket.session_id]
+
+    def _acquire(self, ticket: Ticket, on_wait=None):
+        """
+        Block until the ticket is at the head, a slot is free and the buckets allow it.
+        Raises QueueTimeout (ticket withdrawn) after max_queue_wait_s.
+        """
+        while True:
+            with self._cond:
+                now = self.clock()
+                if now - ticket.enqueued > self.max_queue_wait_s:
+                    raise QueueTimeout(f"not sent after {self.max_queue_wait_s:.0f} s in the queue")
+                position = self._order().index(ticket)
+                wait = 0.5
+                reason = "queued"
+                if position == 0 and self._active < self.max_concurrency:
+                    wait = max(self.requests.wait_time(1, now),
+                               self.input_tokens.wait_time(ticket.est_tokens, now))
+                    reason = "rate limit"
+                    if wait <= 0:
+                        self.requests.consume(1, now)
+                        self.input_tokens.consume(ticket.est_tokens, now)
+                        self._dequeue(ticket)
+                        self._active += 1
+                        self.stats["total_wait_s"] += now - ticket.enqueued
+                        self._cond.notify_all()
+                        return
+                elif position == 0:
+                    reason = "all slots busy"
+            if on_wait:
+                on_wait(position, reason)
+            self._wait(min(max(wait, 0.05), 1.0))
+
+    def _wait(self, timeout: float):
+        """Sleep until notified or `timeout`; with an injected sleep, just advance it."""
+        if self.sleep is time.sleep:
+            with self._cond:
+                self._cond.wait(timeout=timeout)
+        else:
+            self.sleep(timeout)
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    # ---- calls ----
+    def _backoff_s(self, attempt: int, exc: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than a retry-after header."""
+        delay = random.uniform(0, min(self.max_backoff_s, self.base_backoff_s * 2 ** attempt))
+        response = getattr(exc, "response", None)
+        retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+        try:
+            return max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            return delay
+
+    def _queue_and_acquire(self, ticket: Ticket, on_wait=None, front: bool = False):
+        with self._cond:
+            self._enqueue(ticket, front)
+        try:
+            self._acquire(ticket, on_wait)
+        except BaseException:
+            with self._cond:
+                if ticket in self._queues.get(ticket.session_id, ()):
+                    self._dequeue(ticket)
+                self._cond.notify_all()
+            raise
+
+    def submit(self, session_id: str, call, est_tokens: int = 1000, on_wait=None):
+        """
+        Run call() when this session's turn comes and return its result.
+        on_wait(position, reason) is invoked while queued or backing off
+        (position 0 = next to run). A retryable failure releases the slot for
+        the backoff and queues again at the head of this session's queue.
+        Non-retryable errors, the final retry failure and QueueTimeout are
+        re-raised to the caller.
+        """
+        ticket = Ticket(session_id, est_tokens, next(self._seq), self.clock())
+        self._queue_and_acquire(ticket, on_wait)
+        for attempt in range(self.max_retries + 1):
+            try:
+                result = call()
+                break
+            except Exception as exc:
+                status = getattr(exc, "status_code", None)
+                if status not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    self.stats["failed"] += 1
+                    raise
+                self.stats["retries"] += 1
+                backoff = self._backoff_s(attempt, exc)
+                if on_wait:
+                    on_wait(0, f"API busy ({status}) — retry {attempt + 1}/{self.max_retries}")
+            finally:
+                self._release()
+            # Back off without holding a slot, then wait for a slot (and the buckets) again
+            self.sleep(backoff)
+            ticket = Ticket(session_id, est_tokens, next(self._seq), self.clock())
+            self._queue_and_acquire(ticket, on_wait, front=True)
+
+        usage = getattr(result, "usage", None)
+        if usage is not None and getattr(usage, "input_tokens", None) is not None:
+            with self._cond:
+                self.input_tokens.adjust(usage.input_tokens - est_tokens)
+        self.stats["completed"] += 1
+        return result
@@ -0,0 +1,241 @@
+"""
+Classroom mode
+An instructor publishes one scenario (loadout, adversary, map units, documents)
+that is held once per server process in read-only form. Each student team works
+on a copy-on-write overlay that stores only its changes against the scenario,
+so memory grows with the teams' deltas rather than teams x scenario size.
+"""
+
+import copy
+import secrets
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+
+def _freeze(value):
+    """Recursively convert dicts/lists to read-only mappings/tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    """Inverse of _freeze — returns plain, mutable dicts/lists."""
+    if isinstance(value, MappingProxyType):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _approx_bytes(value) -> int:
+    """Rough deep size of plain containers, for the instructor memory readout."""
+    size = sys.getsizeof(value)
+    if isinstance(value, (dict, MappingProxyType)):
+        size += sum(_approx_bytes(k) + _approx_bytes(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(_approx_bytes(v) for v in value)
+    return size
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """A published, read-only scenario shared by every team."""
+    code: str
+    title: str
+    loadout_name: str
+    adversary: str
+    ammo: MappingProxyType
+    map_units: tuple
+    documents: MappingProxyType
+    published: float
+
+
+@dataclass
+class TeamOverlay:
+    """Copy-on-write changes one team has made to a scenario."""
+    team: str
+    ammo_changed: dict = field(default_factory=dict)     # (asset, munition) -> counts
+    ammo_removed: set = field(default_factory=set)       # (asset, munition)
+    loadout_name: str | None = None
+    units_replaced: bool = False                         # True once base units were edited/cleared
+    units: list = field(default_factory=list)            # added (or replacement) units
+    documents: dict = field(default_factory=dict)        # team uploads only
+    updated: float = field(default_factory=time.time)
+    rev: int = 0                                         # bumped on every recorded change
+
+
+class ClassroomHub:
+    """Process-wide registry of published scenarios and their team overlays."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._scenarios: dict[str, Scenario] = {}
+        self._teams: dict[str, dict[str, TeamOverlay]] = {}
+
+    def publish(self, title: str, loadout_name: str, adversary: str,
+                ammo: dict, map_units: list, documents: dict) -> Scenario:
+        scenario = Scenario(
+            code=secrets.token_hex(3).upper(),
+            title=title or loadout_name,
+            loadout_name=loadout_name,
+            adversary=adversary,
+            ammo=_freeze(ammo),
+            map_units=_freeze(map_units),
+            documents=_freeze(documents),
+            published=time.time(),
+        )
+        with self._lock:
+            self._scenarios[scenario.code] = scenario
+            self._teams[scenario.code] = {}
+        return scenario
+
+    def get(self, code: str) -> Scenario | None:
+        return self._scenarios.get((code or "").strip().upper())
+
+    def scenarios(self) -> list[Scenario]:
+        return sorted(self._scenarios.values(), key=lambda s: s.published, reverse=True)
+
+    def team(self, code: str, team: str) -> TeamOverlay | None:
+        """Get (or create) a team's overlay; None if the scenario has been withdrawn."""
+        code = (code or "").strip().upper()
+        with self._lock:
+            teams = self._teams.get(code)
+            if teams is None:
+                return None
+            if team not in teams:
+                teams[team] = TeamOverlay(team=team)
+            return teams[team]
+
+    def teams(self, code: str) -> list[TeamOverlay]:
+        return list(self._teams.get(code, {}).values())
+
+    def record(self, scenario: Scenario, overlay: TeamOverlay, base: dict, ammo_status: dict,
+               map_units: list[dict], uploaded_docs: dict, current_loadout: str) -> bool:
+        """
+        Merge one member's edits into the team overlay. `base` is the view that member
+        last materialized; only what they changed since then is written, against the
+        overlay as it stands now, so teammates editing other entries are not overwritten.
+        Returns True if the overlay changed.
+        """
+        edits = _member_edits(base, ammo_status, map_units, uploaded_docs, current_loadout)
+        if not any(edits.values()):
+            return False
+        with self._lock:
+            return _apply(scenario, overlay, edits)
+
+    def withdraw(self, code: str):
+        with self._lock:
+            self._scenarios.pop(code, None)
+            self._teams.pop(code, None)
+
+    def memory_report(self, code: str) -> dict:
+        """Approximate bytes held for the shared scenario vs. all team deltas."""
+        scenario = self._scenarios[code]
+        base = _approx_bytes(scenario.ammo) + _approx_bytes(scenario.map_units) + \
+            _approx_bytes(scenario.documents)
+        overlays = {
+            t.team: _approx_bytes(t.ammo_changed) + _approx_bytes(t.ammo_removed)
+            + _approx_bytes(t.units) + _approx_bytes(t.documents)
+            for t in self.teams(code)
+        }
+        return {"scenario_bytes": base, "overlay_bytes": overlays}
+
+
+# =============================================================================
+# OVERLAY MATERIALIZE / RECORD
+# =============================================================================
+def materialize_ammo(scenario: Scenario, overlay: TeamOverlay) -> dict:
+    """Team view of the ammo ledger: scenario ledger with the team's changes applied."""
+    ledger: dict = {}
+    for asset, munitions in scenario.ammo.items():
+        for munition, counts in munitions.items():
+            if (asset, munition) in overlay.ammo_removed:
+                continue
+            changed = overlay.ammo_changed.get((asset, munition))
+            ledger.setdefault(asset, {})[munition] = dict(changed or counts)
+    for (asset, munition), counts in overlay.ammo_changed.items():
+        if munition not in ledger.get(asset, {}):
+            ledger.setdefault(asset, {})[munition] = dict(counts)
+    return ledger
+
+
+def materialize_units(scenario: Scenario, overlay: TeamOverlay) -> list[dict]:
+    base = [] if overlay.units_replaced else _thaw(scenario.map_units)
+    return base + copy.deepcopy(overlay.units)
+
+
+def materialize(scenario: Scenario, overlay: TeamOverlay) -> dict:
+    """Session-state view for one team member."""
+    return {
+        "ammo_status": materialize_ammo(scenario, overlay),
+        "map_units": materialize_units(scenario, overlay),
+        "uploaded_docs": dict(overlay.documents),
+        "current_loadout": overlay.loadout_name or scenario.loadout_name,
+        "adversary": scenario.adversary,
+    }
+
+
+def _member_edits(base: dict, ammo_status: dict, map_units: list[dict],
+                  uploaded_docs: dict, current_loadout: str) -> dict:
+    """Per-key differences between a member's session state and the view it started from."""
+    before = {(a, m): c for a, ms in base["ammo_status"].items() for m, c in ms.items()}
+    after = {(a, m): c for a, ms in ammo_status.items() for m, c in ms.items()}
+    return {
+        "ammo": {k: dict(c) for k, c in after.items() if before.get(k) != c},
+        "ammo_removed": before.keys() - after.keys(),
+        "units": copy.deepcopy(map_units) if map_units != base["map_units"] else None,
+        "docs": {n: d for n, d in uploaded_docs.items() if base["uploaded_docs"].get(n) != d},
+        "docs_removed": base["uploaded_docs"].keys() - uploaded_docs.keys(),
+        "loadout": current_loadout if current_loadout != base["current_loadout"] else None,
+    }
+
+
+def _apply(scenario: Scenario, overlay: TeamOverlay, edits: dict) -> bool:
+    """Write member edits into the overlay, storing only what differs from the scenario."""
+    before = (dict(overlay.ammo_changed), set(overlay.ammo_removed), overlay.units_replaced,
+              list(overlay.units), dict(overlay.documents), overlay.loadout_name)
+    for key, counts in edits["ammo"].items():
+        overlay.ammo_removed.discard(key)
+        base = scenario.ammo.get(key[0], {}).get(key[1])
+        if base is not None and dict(base) == counts:
+            overlay.ammo_changed.pop(key, None)
+        else:
+            overlay.ammo_changed[key] = counts
+    for key in edits["ammo_removed"]:
+        overlay.ammo_changed.pop(key, None)
+        if key[1] in scenario.ammo.get(key[0], {}):
+            overlay.ammo_removed.add(key)
+
+    if edits["units"] is not None:
+        base_units = _thaw(scenario.map_units)
+        units = edits["units"]
+        if units[:len(base_units)] == base_units:
+            overlay.units_replaced, overlay.units = False, units[len(base_units):]
+        else:
+            overlay.units_replaced, overlay.units = True, units
+
+    overlay.documents.update(edits["docs"])
+    for name in edits["docs_removed"]:
+        overlay.documents.pop(name, None)
+    if edits["loadout"] is not None:
+        overlay.loadout_name = edits["loadout"] if edits["loadout"] != scenario.loadout_name else None
+
+    if before == (overlay.ammo_changed, overlay.ammo_removed, overlay.units_replaced,
+                  overlay.units, overlay.documents, overlay.loadout_name):
+        return False
+    overlay.updated = time.time()
+    overlay.rev += 1
+    return True
+
+
+def effective_documents(scenario: Scenario | None, uploaded_docs: dict) -> dict:
+    """Shared scenario documents plus the team's own uploads (team wins on name clash)."""
+    if scenario is None:
+        return uploaded_docs
+    return {**scenario.documents, **uploaded_docs}
@@ -0,0 +1,294 @@
+"""
+After-action export
+Streams a stored session — chat transcript, ledger events, final Blue/Red
+ledgers, Hughes and mixed-force salvo runs, map units and uploaded-document
+metadata — out of the session store into a multi-sheet Excel workbook
+(openpyxl write-only mode) or a zip of JSONL / Parquet tables. Rows are read
+from SQLite a page at a time and written as they arrive, so memory stays
+bounded however long the session ran:
+
+    python -m services.export <session_id> exercise.xlsx
+    python -m services.export <session_id> exercise.zip --format parquet
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import IO, Callable, Iterator
+
+from services.session_store import SessionStore
+
+FORMATS = {
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "jsonl": ("zip", "application/zip"),
+    "parquet": ("zip", "application/zip"),
+}
+EXCEL_CELL_CHARS = 32_767           # Excel's per-cell limit; longer chat turns are truncated in the workbook only
+PARQUET_BATCH_ROWS = 1_000
+
+# Event kinds written by the app (SessionStore.append_events)
+LEDGER_EVENT = "ledger"
+HUGHES_EVENT = "hughes"
+MIXED_EVENT = "mixed_salvo"
+
+HUGHES_INPUTS = ["alpha", "A", "beta", "B", "y", "z", "a", "b", "nmesis_missiles", "red_from_ledger"]
+HUGHES_OUTPUTS = ["blue_missiles_fired", "red_missiles_fired", "blue_missiles_through_defense",
+                  "red_missiles_through_defense", "delta_B", "delta_A", "B_remaining", "A_remaining"]
+
+
+@dataclass
+class Table:
+    name: str                                   # sheet / bundle member name
+    columns: list[tuple[str, str]]              # (column, "int" | "float" | "str" | "bool")
+    rows: Callable[[], Iterator[tuple]]         # fresh row iterator per call
+
+
+def available_formats() -> list[str]:
+    """Parquet needs the optional pyarrow package."""
+    return [f for f in FORMATS if f != "parquet" or importlib.util.find_spec("pyarrow") is not None]
+
+
+def _iso(ts: float | None) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts)) if ts else ""
+
+
+def ledger_diff(before: dict, after: dict, side: str, source: str) -> list[dict]:
+    """One LEDGER_EVENT payload per (asset, munition) whose initial or expended count changed."""
+    events = []
+    for asset in {**before, **after}:
+        old_munitions, new_munitions = before.get(asset, {}), after.get(asset, {})
+        for munition in {**old_munitions, **new_munitions}:
+            old = old_munitions.get(munition, {"initial": 0, "expended": 0})
+            new = new_munitions.get(munition, {"initial": 0, "expended": 0})
+            if old == new:
+                continue
+            remaining_before = old.get("initial", 0) - old.get("expended", 0)
+            remaining = new.get("initial", 0) - new.get("expended", 0)
+            events.append({
+                "source": source, "side": side, "asset": asset, "munition": munition,
+                "initial": new.get("initial", 0), "expended": new.get("expended", 0),
+                "remaining": remaining, "delta": remaining - remaining_before,
+            })
+    return events
+
+
+# =============================================================================
+# TABLES
+# =============================================================================
+def session_tables(store: SessionStore, session_id: str) -> list[Table]:
+    """Every exported table for one session; rows are generated lazily from the store."""
+    state = store.load_state(session_id)
+
+    def transcript():
+        for m in store.iter_messages(session_id):
+            yield m["seq"], m["role"], m["content"], len(m["content"])
+
+    def ledger_events():
+        for created, e in store.iter_events(session_id, LEDGER_EVENT):
+            yield (_iso(created), e["source"], e["side"], e["asset"], e["munition"],
+                   e["initial"], e["expended"], e["remaining"], e["delta"])
+
+    def final_ledger():
+        for side, key in (("blue", "ammo_status"), ("red", "red_ledger")):
+            for asset, munitions in (state.get(key) or {}).items():
+                for munition, c in munitions.items():
+                    initial, expended = c.get("initial", 0), c.get("expended", 0)
+                    yield side, asset, munition, initial, expended, initial - expended
+
+    def hughes_runs():
+        for created, e in store.iter_events(session_id, HUGHES_EVENT):
+            yield (_iso(created), *(e["inputs"].get(k) for k in HUGHES_INPUTS),
+                   *(e["result"].get(k) for k in HUGHES_OUTPUTS))
+
+    def mixed_runs():
+        for created, e in store.iter_events(session_id, MIXED_EVENT):
+            yield (_iso(created), e["blue_policy"], e["red_policy"], e["defense"], e["first"], e["salvos"],
+                   e["outcome"], e["blue_start"], e["blue_remaining"], e["red_start"], e["red_remaining"],
+                   json.dumps(e["classes"]))
+
+    def targets():
+        for r in (state.get("target_state") or {}).get("targets", {}).values():
+            assessed = r.get("bda") or {}
+            yield (r["target_id"], r.get("description"), r.get("target_class"), r.get("priority"),
+                   sum(e.get("rounds", 0) for e in r.get("engagements", [])), r.get("expected_pk"),
+                   assessed.get("assessment"), assessed.get("phase"), assessed.get("confirmed"),
+                   r.get("current_pk"), r.get("status"))
+
+    def map_units():
+        for u in state.get("map_units") or []:
+            yield (u.get("name"), u.get("type"), u.get("lat"), u.get("lon"), u.get("range_km"),
+                   u.get("color"), u.get("notes", ""))
+
+    def documents():
+        for name, content in (state.get("uploaded_docs") or {}).items():
+            text = content if isinstance(content, str) else json.dumps(content, default=str)
+            data = text.encode("utf-8")
+            yield name, len(text), text.count("\n") + 1, len(data), hashlib.sha256(data).hexdigest()
+
+    return [
+        Table("transcript", [("seq", "int"), ("role", "str"), ("content", "str"), ("chars", "int")], transcript),
+        Table("ledger_events", [("time", "str"), ("source", "str"), ("side", "str"), ("asset", "str"),
+                                ("munition", "str"), ("initial", "int"), ("expended", "int"),
+                                ("remaining", "int"), ("delta", "int")], ledger_events),
+        Table("ledger_final", [("side", "str"), ("asset", "str"), ("munition", "str"), ("initial", "int"),
+                               ("expended", "int"), ("remaining", "int")], final_ledger),
+        Table("hughes_runs", [("time", "str")] + [(k, "float") for k in HUGHES_INPUTS[:-1]]
+              + [("red_from_ledger", "bool")] + [(k, "float") for k in HUGHES_OUTPUTS], hughes_runs),
+        Table("mixed_salvo_runs", [("time", "str"), ("blue_policy", "str"), ("red_policy", "str"),
+                                   ("defense", "str"), ("first", "str"), ("salvos", "int"), ("outcome", "str"),
+                                   ("blue_start", "float"), ("blue_remaining", "float"), ("red_start", "float"),
+                                   ("red_remaining", "float"), ("classes_json", "str")], mixed_runs),
+        Table("targets", [("target_id", "str"), ("description", "str"), ("target_class", "str"),
+                          ("priority", "int"), ("rounds", "int"), ("expected_pk", "float"), ("bda", "str"),
+                          ("bda_phase", "int"), ("bda_confirmed", "bool"), ("current_pk", "float"),
+                          ("status", "str")], targets),
+        Table("map_units", [("name", "str"), ("type", "str"), ("lat", "float"), ("lon", "float"),
+                            ("range_km", "float"), ("color", "str"), ("notes", "str")], map_units),
+        Table("documents", [("name", "str"), ("chars", "int"), ("lines", "int"), ("bytes", "int"),
+                            ("sha256", "str")], documents),
+    ]
+
+
+def summary(store: SessionStore, session_id: str, counts: dict[str, int]) -> list[tuple[str, object]]:
+    info = store.session_info(session_id) or {}
+    state = store.load_state(session_id)
+    return [
+        ("session_id", session_id),
+        ("label", info.get("label", "")),
+        ("created", _iso(info.get("created"))),
+        ("last_activity", _iso(info.get("updated"))),
+        ("exported", _iso(time.time())),
+        ("adversary", state.get("adversary", "")),
+        ("loadout", state.get("current_loadout", "")),
+    ] + [(f"rows: {name}", n) for name, n in counts.items()]
+
+
+# =============================================================================
+# WRITERS
+# =============================================================================
+def write_workbook(store: SessionStore, session_id: str, out: IO[bytes]) -> dict[str, int]:
+    """Multi-sheet .xlsx in openpyxl write-only mode (rows go straight to the sheet's temp file)."""
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    def clean(value):
+        if isinstance(value, str):
+            value = ILLEGAL_CHARACTERS_RE.sub("", value)
+            if len(value) > EXCEL_CELL_CHARS:
+                value = value[:EXCEL_CELL_CHARS - 20] + " …[truncated]"
+        return value
+
+    wb = Workbook(write_only=True)
+    summary_ws = wb.create_sheet("summary")        # first tab, filled once the row counts are known
+    counts = {}
+    for table in session_tables(store, session_id):
+        ws = wb.create_sheet(table.name)
+        ws.append([name for name, _ in table.columns])
+        n = 0
+        for row in table.rows():
+            ws.append([clean(v) for v in row])
+            n += 1
+        counts[table.name] = n
+    summary_ws.append(["field", "value"])
+    for row in summary(store, session_id, counts):
+        summary_ws.append(list(row))
+    wb.save(out)
+    return counts
+
+
+def _jsonl_member(zf: zipfile.ZipFile, table: Table) -> int:
+    names = [name for name, _ in table.columns]
+    n = 0
+    with zf.open(f"{table.name}.jsonl", "w") as member:
+        for row in table.rows():
+            member.write((json.dumps(dict(zip(names, row)), default=str) + "\n").encode("utf-8"))
+            n += 1
+    return n
+
+
+def _parquet_member(zf: zipfile.ZipFile, table: Table, scratch: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "bool": pa.bool_()}
+    schema = pa.schema([(name, types[kind]) for name, kind in table.columns])
+    path = os.path.join(scratch, f"{table.name}.parquet")
+    n = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch: list[tuple] = []
+        for row in table.rows():
+            batch.append(row)
+            if len(batch) >= PARQUET_BATCH_ROWS:
+                writer.write_table(pa.Table.from_arrays([list(c) for c in zip(*batch)], schema=schema))
+                n += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_arrays([list(c) for c in zip(*batch)], schema=schema))
+            n += len(batch)
+        if n == 0:
+            writer.write_table(schema.empty_table())
+    zf.write(path, f"{table.name}.parquet")
+    os.remove(path)
+    return n
+
+
+def write_bundle(store: SessionStore, session_id: str, out: IO[bytes], fmt: str = "jsonl") -> dict[str, int]:
+    """Zip with one JSONL or Parquet member per table plus a manifest.json summary."""
+    counts = {}
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf, \
+            tempfile.TemporaryDirectory(prefix="fires-export-") as scratch:
+        for table in session_tables(store, session_id):
+            counts[table.name] = (_parquet_member(zf, table, scratch) if fmt == "parquet"
+                                  else _jsonl_member(zf, table))
+        zf.writestr("manifest.json", json.dumps(dict(summary(store, session_id, counts)), indent=2))
+    return counts
+
+
+def export_session(store: SessionStore, session_id: str, out: IO[bytes], fmt: str = "xlsx") -> dict[str, int]:
+    """Write one session in `fmt` (xlsx | jsonl | parquet); returns rows written per table."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format '{fmt}' (use {', '.join(FORMATS)})")
+    if fmt == "xlsx":
+        return write_workbook(store, session_id, out)
+    return write_bundle(store, session_id, out, fmt)
+
+
+def export_bytes(store: SessionStore, session_id: str, fmt: str = "xlsx") -> bytes:
+    """Export spooled through a temp file (in memory up to 8 MB, then on disk) for a download response."""
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buffer:
+        export_session(store, session_id, buffer, fmt)
+        buffer.seek(0)
+        return buffer.read()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Export a saved Fires Coordinator session")
+    parser.add_argument("session_id")
+    parser.add_argument("output", help="output file (.xlsx or .zip)")
+    parser.add_argument("--format", choices=list(FORMATS), help="default: from the output extension")
+    parser.add_argument("--db", help="session database (default: FIRES_SESSION_DB or .sessions/)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("xlsx" if args.output.endswith(".xlsx") else "jsonl")
+    store = SessionStore(args.db)
+    if not store.session_exists(args.session_id):
+        print(f"no saved session '{args.session_id}'", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    with open(args.output, "wb") as out:
+        counts = export_session(store, args.session_id, out, fmt)
+    for name, n in counts.items():
+        print(f"  {name:<18}{n:>8} rows")
+    print(f"wrote {args.output} in {time.perf_counter() - started:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Per-turn metrics
+Token usage (input / output / prompt-cache), prompt size by block, API
+latency (time to first token, total, queue wait) and local processing time
+for every chat turn, with the router's tier and category and the turn's
+cost. Kept in memory for the admin panel and appended to a local JSONL file
+for offline analysis (`python -m services.metrics` summarizes it by tier).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+DEFAULT_METRICS_PATH = Path(__file__).parent.parent / ".metrics" / "turns.jsonl"
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+# USD per million tokens (input, output); cache writes bill at 1.25× input, cache reads at 0.1×
+PRICES_USD_PER_MTOK = {
+    "claude-sonnet-4-20250514": (3.00, 15.00),
+    "claude-3-5-haiku-20241022": (0.80, 4.00),
+}
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+
+
+def turn_cost(model: str, input_tokens: int, output_tokens: int,
+              cache_creation_input_tokens: int = 0, cache_read_input_tokens: int = 0) -> float | None:
+    """API cost of a turn in USD, or None for a model without a price entry."""
+    if model not in PRICES_USD_PER_MTOK:
+        return None
+    per_in, per_out = PRICES_USD_PER_MTOK[model]
+    billed_in = (input_tokens + cache_creation_input_tokens * CACHE_WRITE_MULTIPLIER
+                 + cache_read_input_tokens * CACHE_READ_MULTIPLIER)
+    return (billed_in * per_in + output_tokens * per_out) / 1_000_000
+
+
+@dataclass
+class TurnMetrics:
+    session_id: str
+    kind: str = "model"                     # model | cached | local_command
+    model: str = ""
+    tier: str = ""                          # router tier (fast | large)
+    route: str = ""                         # router category (lookup | bookkeeping | calculation | planning)
+    route_reason: str = ""
+    truncated: bool = False                 # an API call stopped on max_tokens
+    started: float = field(default_factory=time.time)
+    rounds: int = 0                         # API calls (1 + tool rounds)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    prompt_chars: dict[str, int] = field(default_factory=dict)     # block -> characters
+    prompt_sha: str = ""                    # prompt template version (prompt_template_sha)
+    ttft_ms: float | None = None            # first API call, request sent -> first text delta
+    api_ms: float = 0.0                     # sum over API calls
+    queue_ms: float = 0.0                   # scheduler wait (queue, rate limit, backoff)
+    local_ms: float = 0.0                   # prompt build, tools, parsing, rendering
+
+    def record_call(self, response, ttft_s: float | None, api_s: float, wall_s: float):
+        """Fold one Messages API response and its timings into the turn."""
+        self.rounds += 1
+        self.truncated = self.truncated or getattr(response, "stop_reason", None) == "max_tokens"
+        usage = getattr(response, "usage", None)
+        for name in USAGE_FIELDS:
+            setattr(self, name, getattr(self, name) + (getattr(usage, name, None) or 0))
+        if self.ttft_ms is None and ttft_s is not None:
+            self.ttft_ms = round(ttft_s * 1000, 1)
+        self.api_ms += api_s * 1000
+        self.queue_ms += max(0.0, wall_s - api_s) * 1000
+
+    @property
+    def prompt_tokens(self) -> dict[str, int]:
+        """Input tokens attributed to each block in proportion to its characters."""
+        total_chars = sum(self.prompt_chars.values())
+        billed = self.input_tokens + self.cache_creation_input_tokens + self.cache_read_input_tokens
+        if not total_chars:
+            return {}
+        if not billed:
+            return {k: v // 4 for k, v in self.prompt_chars.items()}      # ~4 chars/token estimate
+        per_round = billed / max(self.rounds, 1)
+        return {k: round(per_round * v / total_chars) for k, v in self.prompt_chars.items()}
+
+    @property
+    def cost_usd(self) -> float | None:
+        return turn_cost(self.model, *(getattr(self, name) for name in USAGE_FIELDS))
+
+    def to_record(self) -> dict:
+        record = asdict(self)
+        record["api_ms"] = round(self.api_ms, 1)
+        record["queue_ms"] = round(self.queue_ms, 1)
+        record["local_ms"] = round(self.local_ms, 1)
+        record["prompt_tokens"] = self.prompt_tokens
+        cost = self.cost_usd
+        record["cost_usd"] = round(cost, 6) if cost is not None else None
+        return record
+
+
+def prompt_breakdown(system_prompt: str, blocks: dict[str, str], messages: list[dict]) -> dict[str, int]:
+    """Characters per block; 'protocol' is the fixed template, 'history' the message list."""
+    sizes = {name: len(text) for name, text in blocks.items()}
+    sizes["protocol"] = max(0, len(system_prompt) - sum(sizes.values()))
+    sizes["history"] = sum(len(str(m.get("content", ""))) for m in messages)
+    return sizes
+
+
+def prompt_template_sha(template: str) -> str:
+    """Short hash naming a prompt version; pass the builder's output for an empty context."""
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:12]
+
+
+class MetricsLog:
+    """Recent turns in memory plus an append-only JSONL file (one line per turn)."""
+
+    def __init__(self, path: str | Path | None = None, keep: int = 500):
+        self.path = Path(path or os.environ.get("FIRES_METRICS_PATH", DEFAULT_METRICS_PATH))
+        self.recent: deque[dict] = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def record(self, turn: TurnMetrics) -> dict:
+        record = turn.to_record()
+        with self._lock:
+            self.recent.append(record)
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError:
+                pass        # read-only deployment — keep the in-memory record
+        return record
+
+    def summary(self) -> dict:
+        """Totals and per-block averages over the recent model turns."""
+        with self._lock:
+            turns = [r for r in self.recent if r["kind"] == "model"]
+            served = sum(1 for r in self.recent if r["kind"] in ("cached", "local_command"))
+        if not turns:
+            return {"turns": 0, "served_locally": served}
+        blocks: dict[str, float] = {}
+        for r in turns:
+            for name, tokens in r["prompt_tokens"].items():
+                blocks[name] = blocks.get(name, 0) + tokens / len(turns)
+        ttfts = [r["ttft_ms"] for r in turns if r["ttft_ms"] is not None]
+        return {
+            "turns": len(turns),
+            "served_locally": served,
+            "input_tokens": sum(r["input_tokens"] for r in turns),
+            "output_tokens": sum(r["output_tokens"] for r in turns),
+            "cache_read_input_tokens": sum(r["cache_read_input_tokens"] for r in turns),
+            "mean_ttft_ms": round(sum(ttfts) / len(ttfts), 1) if ttfts else None,
+            "mean_api_ms": round(sum(r["api_ms"] for r in turns) / len(turns), 1),
+            "mean_block_tokens": {k: round(v) for k, v in sorted(blocks.items(), key=lambda kv: -kv[1])},
+            "tiers": tier_summary(turns),
+        }
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def tier_summary(records: list[dict]) -> list[dict]:
+    """Latency, tokens and cost per (tier, category) over model-turn records."""
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for r in records:
+        if r.get("kind") == "model":
+            groups.setdefault((r.get("tier") or "—", r.get("route") or "—"), []).append(r)
+    rows = []
+    for (tier, route), turns in sorted(groups.items()):
+        ttfts = [r["ttft_ms"] for r in turns if r.get("ttft_ms") is not None]
+        costs = [r["cost_usd"] for r in turns if r.get("cost_usd") is not None]
+        rows.append({
+            "tier": tier,
+            "route": route,
+            "turns": len(turns),
+            "mean_ttft_ms": round(sum(ttfts) / len(ttfts), 1) if ttfts else None,
+            "p50_api_ms": _percentile([r["api_ms"] for r in turns], 0.50),
+            "p95_api_ms": _percentile([r["api_ms"] for r in turns], 0.95),
+            "mean_input_tokens": round(sum(r["input_tokens"] for r in turns) / len(turns)),
+            "mean_output_tokens": round(sum(r["output_tokens"] for r in turns) / len(turns)),
+            "truncated": sum(1 for r in turns if r.get("truncated")),
+            "cost_usd": round(sum(costs), 4),
+            "mean_cost_usd": round(sum(costs) / len(costs), 5) if costs else None,
+        })
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-tier latency and cost from the turn metrics log")
+    parser.add_argument("path", nargs="?", help="turns.jsonl (default: FIRES_METRICS_PATH or .metrics/)")
+    parser.add_argument("--prompt", help="only turns with this prompt_sha")
+    args = parser.parse_args(argv)
+
+    path = Path(args.path or os.environ.get("FIRES_METRICS_PATH", DEFAULT_METRICS_PATH))
+    if not path.exists():
+        print(f"no metrics log at {path}", file=sys.stderr)
+        return 1
+    with path.open(encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if args.prompt:
+        records = [r for r in records if r.get("prompt_sha") == args.prompt]
+    rows = tier_summary(records)
+    print(f"{'tier':<8}{'route':<13}{'turns':>6}{'ttft ms':>9}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'in tok':>8}{'out tok':>8}{'trunc':>6}{'cost $':>10}{'$/turn':>10}")
+    for r in rows:
+        print(f"{r['tier']:<8}{r['route']:<13}{r['turns']:>6}{r['mean_ttft_ms'] or 0:>9.0f}"
+              f"{r['p50_api_ms']:>9.0f}{r['p95_api_ms']:>9.0f}{r['mean_input_tokens']:>8}"
+              f"{r['mean_output_tokens']:>8}{r['truncated']:>6}{r['cost_usd']:>10.4f}{r['mean_cost_usd'] or 0:>10.5f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Offline Messages API stand-in
+Drop-in replacement for the parts of anthropic.Anthropic the app uses
+(messages.create / messages.stream) with configurable time to first token,
+streaming cadence, injected 429/529 errors and canned answers that carry
+AMMO_UPDATE blocks for the ledger, cut at max_tokens. Used for load tests and
+benchmarks.
+"""
+
+import random
+import re
+import threading
+import time
+import types
+from dataclasses import dataclass, fields
+
+import anthropic
+
+# Queries that should come back with an AMMO_UPDATE block (fire missions, expenditures)
+FIRE_INTENT = re.compile(r"\b(fire|fired|engage|engaged|strike|shoot|shot|expend|expended|salvo)\b", re.IGNORECASE)
+LEDGER_ROW = re.compile(r"^\|\s*([^|]+?)\s*\|\s*([^|]+?)\s*\|\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(-?\d+)\s*\|", re.MULTILINE)
+
+CANNED_ANSWER = """**PHASE 1 — SITUATION**
+Target: {query}
+Reference data checked against the weapons reference and current ledger.
+
+**PHASE 2 — RECOMMENDATION**
+1. Primary: {munition} from {asset} — in range, {remaining} remaining.
+2. Alternate: next available shooter with a suitable munition.
+
+**PHASE 3 — COORDINATION**
+- Clear fires through the FSCC; confirm FSCMs and airspace before execution.
+- Request BDA on completion and re-attack if the effect is not achieved.
+"""
+
+
+@dataclass
+class MockConfig:
+    ttft_s: float = 0.6                 # request sent -> first text delta
+    tokens_per_s: float = 80.0          # streaming rate after the first token; 0 = instant
+    chunk_tokens: int = 8               # tokens per content_block_delta event
+    reply_tokens: int = 350             # padding target for canned answers
+    ammo_update_rate: float = 1.0       # share of fire-intent queries answered with AMMO_UPDATE
+    error_rate: float = 0.0             # share of requests failing with 429/529
+    seed: int = 0
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "MockConfig":
+        """'ttft_s=0.2,tokens_per_s=0,error_rate=0.05' -> MockConfig; '1' or '' -> defaults."""
+        config = cls()
+        types_by_name = {f.name: f.type for f in fields(cls)}
+        for item in filter(None, (s.strip() for s in spec.split(","))):
+            if "=" not in item:
+                continue
+            name, value = (s.strip() for s in item.split("=", 1))
+            if name in types_by_name:
+                setattr(config, name, int(value) if types_by_name[name] is int else float(value))
+        return config
+
+
+class MockAPIError(anthropic.APIStatusError):
+    """Injected overload / rate-limit error; caught like the SDK's own status errors."""
+
+    def __init__(self, status_code: int, message: str):
+        Exception.__init__(self, message)
+        self.message = message
+        self.status_code = status_code
+        self.body = None
+        self.request = None
+        self.request_id = None
+        self.type = "rate_limit_error" if status_code == 429 else "overloaded_error"
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _last_user_text(messages: list[dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content")
+        if isinstance(content, str):
+            return content
+        return " ".join(b.get("text", "") for b in content if isinstance(b, dict))
+    return ""
+
+
+class _Messages:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _roll(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _answer(self, system: str, messages: list[dict]) -> str:
+        query = _last_user_text(messages).strip()
+        rows = [r for r in LEDGER_ROW.findall(system or "") if r[0] != "Asset" and int(r[4]) > 0]
+        asset, munition, remaining = (rows[0][0], rows[0][1], int(rows[0][4])) if rows else ("available shooter", "best munition", 0)
+        text = CANNED_ANSWER.format(query=query[:200] or "(none)", asset=asset, munition=munition, remaining=remaining)
+        padding = "Planning note: verify range, Pk and collateral estimate before execution. "
+        while _tokens(text) < self.config.reply_tokens:
+            text += padding
+        if rows and FIRE_INTENT.search(query) and self._roll() < self.config.ammo_update_rate:
+            expended = max(1, min(remaining, 4))
+            text += f"\n\nAMMO_UPDATE:\nASSET: {asset}\nMUNITION: {munition}\nEXPENDED: {expended}\n"
+        return text
+
+    def _message(self, request: dict) -> types.SimpleNamespace:
+        with self._lock:
+            self.calls += 1
+        if self.config.error_rate and self._roll() < self.config.error_rate:
+            status = 429 if self._roll() < 0.5 else 529
+            raise MockAPIError(status, f"mock {'rate limit' if status == 429 else 'overloaded'} ({status})")
+        system = request.get("system", "")
+        if isinstance(system, list):
+            system = "".join(b.get("text", "") for b in system)
+        messages = request.get("messages", [])
+        text = self._answer(system, messages)
+        max_tokens = request.get("max_tokens")
+        truncated = bool(max_tokens) and _tokens(text) > max_tokens
+        if truncated:
+            text = text[:max_tokens * 4]
+        return types.SimpleNamespace(
+            id=f"msg_mock_{self.calls:06d}", type="message", role="assistant", model=request.get("model", ""),
+            content=[types.SimpleNamespace(type="text", text=text)],
+            stop_reason="max_tokens" if truncated else "end_turn",
+            usage=types.SimpleNamespace(
+                input_tokens=_tokens(system) + sum(_tokens(str(m.get("content", ""))) for m in messages),
+                output_tokens=_tokens(text),
+                cache_creation_input_tokens=0,
+                cache_read_input_tokens=0,
+            ),
+        )
+
+    def _stream_duration(self, message) -> float:
+        if not self.config.tokens_per_s:
+            return 0.0
+        return message.usage.output_tokens / self.config.tokens_per_s
+
+    def create(self, **request) -> types.SimpleNamespace:
+        message = self._message(request)
+        time.sleep(self.config.ttft_s + self._stream_duration(message))
+        return message
+
+    def stream(self, **request) -> "_Stream":
+        return _Stream(self._message(request), self.config)
+
+
+class _Stream:
+    """Context manager yielding SDK-shaped stream events at the configured cadence."""
+
+    def __init__(self, message, config: MockConfig):
+        self.message = message
+        self.config = config
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __iter__(self):
+        event = types.SimpleNamespace
+        yield event(type="message_start", message=self.message)
+        time.sleep(self.config.ttft_s)
+        text = self.message.content[0].text
+        chunk_chars = max(1, self.config.chunk_tokens * 4)
+        gap = self.config.chunk_tokens / self.config.tokens_per_s if self.config.tokens_per_s else 0.0
+        yield event(type="content_block_start", index=0, content_block=event(type="text", text=""))
+        for start in range(0, len(text), chunk_chars):
+            if start and gap:
+                time.sleep(gap)
+            yield event(type="content_block_delta", index=0,
+                        delta=event(type="text_delta", text=text[start:start + chunk_chars]))
+        yield event(type="content_block_stop", index=0)
+        yield event(type="message_delta", delta=event(stop_reason=self.message.stop_reason), usage=self.message.usage)
+        yield event(type="message_stop")
+
+    def get_final_message(self):
+        return self.message
+
+
+class MockAnthropic:
+    """Stand-in for anthropic.Anthropic — only the Messages API surface the app calls."""
+
+    def __init__(self, config: MockConfig | None = None, **_client_kwargs):
+        self.config = config or MockConfig()
+        self.messages = _Messages(self.config)
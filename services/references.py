@@ -0,0 +1,174 @@
+"""
+Reference document registry
+Discovers the reference markdown shipped in data/ (or FIRES_DATA_DIR), reads
+each file once per process, validates it at startup — present, non-empty,
+UTF-8, expected sections — and exposes per-document and combined content
+hashes for cache keys and the compiled catalog. Also picks the sections that
+match a query, for prompts that cannot carry a whole document.
+"""
+
+import hashlib
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+LEGACY_DIR = Path("/mnt/project")       # original deployment mount, searched last
+
+# key -> title, accepted file names (first found wins), headings that must be present
+REFERENCE_SPECS = {
+    "weapons": {
+        "title": "Weapons reference",
+        "files": ["weapons_reference_v3.md", "weapons_reference_v2.md", "weapons_reference.md"],
+        "required": ["NAVAL SURFACE FIRE SUPPORT", "PLANNING FACTORS & PROBABILITY OF KILL",
+                     "ADVERSARY SYSTEMS", "COALITION NAVAL ASSETS"],
+    },
+    "hughes": {
+        "title": "Hughes salvo model",
+        "files": ["hughes_salvo_model.md", "hughes_salvo_model.md.md"],
+        "required": ["FULL SALVO EQUATIONS", "PARAMETER DEFINITIONS"],
+    },
+    "doctrine": {
+        "title": "Fires doctrine reference",
+        "files": ["fires_doctrine_reference.md"],
+        "required": ["D3A Targeting Methodology", "Fire Support Coordination Measures"],
+    },
+}
+
+
+@dataclass
+class ReferenceDoc:
+    key: str
+    title: str
+    path: Path | None = None
+    text: str = ""
+    sha256: str = ""
+    problems: list[str] = field(default_factory=list)
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self.text)
+
+
+def search_dirs() -> list[Path]:
+    """FIRES_DATA_DIR (if set), the repo's data/ directory, then the legacy mount."""
+    dirs = [Path(os.environ["FIRES_DATA_DIR"])] if os.environ.get("FIRES_DATA_DIR") else []
+    return dirs + [DATA_DIR, LEGACY_DIR]
+
+
+# Query words that say nothing about which section answers it
+STOPWORDS = {"a", "an", "and", "are", "can", "do", "does", "for", "from", "how", "in", "is", "it", "its", "me",
+             "of", "on", "or", "the", "to", "what", "whats", "which", "who", "with"}
+
+_HEADING_LINE = re.compile(r"^#{1,4}\s+(.+)$", re.MULTILINE)
+_TERM = re.compile(r"[a-z0-9αβγστ]+(?:-[a-z0-9]+)*")
+
+
+def _headings(text: str) -> list[str]:
+    return [h.strip() for h in _HEADING_LINE.findall(text)]
+
+
+def _terms(text: str) -> set[str]:
+    """Lower-case words and designators ("yj-18", "055", "α"); single Latin letters dropped."""
+    return {t for t in _TERM.findall(text.lower()) if t not in STOPWORDS and (len(t) > 1 or not t.isascii())}
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    """(heading, section text) for every heading; text before the first heading is dropped."""
+    starts = [m.start() for m in _HEADING_LINE.finditer(text)]
+    return [(_HEADING_LINE.match(text, a).group(1).strip(), text[a:b].strip())
+            for a, b in zip(starts, starts[1:] + [len(text)])]
+
+
+def load_reference(key: str, dirs: list[Path] | None = None) -> ReferenceDoc:
+    """Find, read and validate one reference document."""
+    spec = REFERENCE_SPECS[key]
+    doc = ReferenceDoc(key=key, title=spec["title"])
+    for directory in dirs or search_dirs():
+        for name in spec["files"]:
+            if (directory / name).is_file():
+                doc.path = directory / name
+                break
+        if doc.path:
+            break
+    if doc.path is None:
+        doc.problems.append(f"not found (looked for {', '.join(spec['files'])})")
+        return doc
+
+    try:
+        raw = doc.path.read_bytes()
+    except OSError as e:
+        doc.problems.append(f"unreadable: {e}")
+        return doc
+    if not raw.strip():
+        doc.problems.append("file is empty")
+        return doc
+    try:
+        doc.text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        doc.text = raw.decode("utf-8", errors="replace")
+        doc.problems.append("not valid UTF-8 — undecodable bytes replaced")
+    doc.sha256 = hashlib.sha256(raw).hexdigest()
+
+    headings = " | ".join(_headings(doc.text)).lower()
+    missing = [h for h in spec["required"] if h.lower() not in headings]
+    if missing:
+        doc.problems.append(f"missing expected section(s): {', '.join(missing)}")
+    return doc
+
+
+class ReferenceRegistry:
+    """All reference documents, loaded and validated once."""
+
+    def __init__(self, dirs: list[Path] | None = None):
+        self.docs = {key: load_reference(key, dirs) for key in REFERENCE_SPECS}
+
+    def text(self, key: str) -> str:
+        return self.docs[key].text
+
+    def path(self, key: str) -> Path | None:
+        return self.docs[key].path
+
+    def matching_sections(self, query: str, keys: tuple[str, ...] = ("weapons",),
+                          max_chars: int = 8000) -> str:
+        """
+        The sections of the given references that best match a query, best first, up
+        to max_chars. Each query term scores its inverse section frequency ("prsm"
+        outweighs "range"), tripled when it is in the heading. Falls back to the
+        start of the first loaded document when nothing matches.
+        """
+        wanted = _terms(query)
+        sections = [(_terms(heading), _terms(section), section)
+                    for key in keys for heading, section in split_sections(self.text(key))]
+        weight = {t: math.log((1 + len(sections)) / (1 + sum(t in body for _, body, _ in sections)))
+                  for t in wanted}
+        scored = []
+        for order, (head, body, section) in enumerate(sections):
+            score = sum(weight[t] * (3 if t in head else 1) for t in wanted if t in body)
+            if score > 0:
+                scored.append((-score, order, section))
+        picked, used = [], 0
+        for _, _, section in sorted(scored):
+            if used + len(section) <= max_chars:
+                picked.append(section)
+                used += len(section) + 2
+        if picked:
+            return "\n\n".join(picked)
+        if scored:
+            return min(scored)[2][:max_chars]
+        return next((self.text(k)[:max_chars] for k in keys if self.text(k)), "")
+
+    @property
+    def content_hash(self) -> str:
+        """Combined digest of every loaded document (changes when any reference changes)."""
+        return hashlib.sha256("|".join(f"{k}:{d.sha256}" for k, d in self.docs.items()).encode()).hexdigest()
+
+    @property
+    def problems(self) -> list[str]:
+        return [f"{d.title}: {p}" for d in self.docs.values() for p in d.problems]
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
@@ -0,0 +1,92 @@
+"""
+Query router
+Classifies each chat query locally — lookup, bookkeeping, calculation or
+planning — from keyword signals and length, and picks the model tier that
+answers it. Lookups and bookkeeping go to a fast tier with a reduced system
+prompt and a small token budget; calculations and fires plans keep the large
+model and the full PERCEIVE/DECIDE/ACT protocol.
+"""
+
+import re
+from dataclasses import dataclass
+
+CATEGORIES = ("lookup", "bookkeeping", "calculation", "planning")
+
+# Category -> tier name; the tiers themselves (model, budget) are configured in app.py
+CATEGORY_TIERS = {
+    "lookup": "fast",
+    "bookkeeping": "fast",
+    "calculation": "large",
+    "planning": "large",
+}
+
+# Thresholds (tune against the per-tier latency / cost in the metrics log)
+LOOKUP_MAX_WORDS = 25           # longer "what is" questions are usually scenario questions
+PLANNING_MIN_WORDS = 60         # anything this long gets the full protocol whatever it asks
+
+# Signals, strongest first; the first category that matches wins
+PLANNING_SIGNALS = re.compile(
+    r"\b(?:fires? plan|scheme of fires|concept of fires|plan (?:the|a|an|our|my|for)|develop|coa|"
+    r"courses? of action|recommend\w*|analy[sz]\w*|assess\w*|compare|versus|vs\.?|how should|what should|"
+    r"synchroni[sz]\w*|sequenc\w*|prioriti[sz]\w*|hptl|tlws|attack guidance|agm|d3a|targeting|"
+    r"opord|annex|scenario|document|engage|strike|defeat|counter-?fire|suppress\w*|seadd?)\b",
+    re.IGNORECASE,
+)
+# Salvo parameter names alone ("Type 055 α/y/b") ask for tabulated values — a lookup; they
+# only mean a calculation when given values ("α=8", "beta: 4")
+CALCULATION_SIGNALS = re.compile(
+    r"\b(?:calculat\w*|compute|how many (?:rounds|missiles|salvos|shots|volleys|tubes)|rounds required|"
+    r"required rounds|desired pk|pk|p\(k\)|probability|hughes|salvo|time of flight|tof|how long)\b|"
+    r"(?:\b(?:alpha|beta)\b|[αβ])\s*[=:]\s*\d|%",
+    re.IGNORECASE,
+)
+BOOKKEEPING_SIGNALS = re.compile(
+    r"\b(?:expend\w*|fired|shot|remaining|left|resuppl\w*|reload\w*|ammo|ammunition|magazines?|"
+    r"ledger|inventory|i have|we have|update)\b",
+    re.IGNORECASE,
+)
+LOOKUP_SIGNALS = re.compile(
+    r"\b(?:what(?:'s| is| are)|whats|range|max(?:imum)? range|cep|warhead|guidance|speed|weight|payload|"
+    r"define|definition|meaning|stand for|acronym|how far|capabilit\w*|specs?|which (?:platforms?|systems?|"
+    r"ships?|aircraft)|who|alpha|beta|[αβ]|offensive power|defensive power|staying power)\b",
+    re.IGNORECASE,
+)
+_WORD = re.compile(r"\S+")
+
+
+@dataclass(frozen=True)
+class Tier:
+    name: str
+    model: str
+    max_tokens: int
+    reduced_prompt: bool = False        # identity, employment rules, ledger and matched reference sections only
+
+
+@dataclass(frozen=True)
+class Route:
+    category: str
+    tier: Tier
+    reason: str                         # matched signal, for the metrics log
+
+
+def classify(query: str) -> tuple[str, str]:
+    """(category, reason). Unmatched queries are treated as planning — the safe default."""
+    words = len(_WORD.findall(query))
+    if words >= PLANNING_MIN_WORDS:
+        return "planning", f"{words} words"
+    for category, signals in (("planning", PLANNING_SIGNALS), ("calculation", CALCULATION_SIGNALS),
+                              ("bookkeeping", BOOKKEEPING_SIGNALS)):
+        match = signals.search(query)
+        if match:
+            return category, match.group(0).lower()
+    match = LOOKUP_SIGNALS.search(query)
+    if match and words <= LOOKUP_MAX_WORDS:
+        return "lookup", match.group(0).lower()
+    return "planning", "no lookup signal" if not match else f"lookup over {LOOKUP_MAX_WORDS} words"
+
+
+def route(query: str, tiers: dict[str, Tier]) -> Route:
+    """Tier for a query; categories whose tier is not configured fall back to the large tier."""
+    category, reason = classify(query)
+    tier = tiers.get(CATEGORY_TIERS[category]) or tiers["large"]
+    return Route(category, tier, reason)
@@ -0,0 +1,306 @@
+"""
+Persistent session store
+SQLite (WAL mode) record of each planning session. Chat turns are appended
+one row per message and state keys are upserted only when their content
+changes, so saves stay incremental. Ledger changes and salvo runs go to an
+append-only event log. History and events are read back in pages. Each
+session belongs to one browser's owner token and carries a scope (classroom
+code and team); it is only listed, or resumed, for that owner.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / ".sessions" / "fires_sessions.db"
+
+# Session-state keys that survive refresh/restart (messages are stored separately)
+PERSISTED_KEYS = (
+    "ammo_status",
+    "red_ledger",
+    "current_loadout",
+    "adversary",
+    "map_units",
+    "coalition_ships",
+    "uploaded_docs",
+    "target_list",
+    "target_state",
+    "classroom",
+)
+
+HISTORY_PAGE_SIZE = 40
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    label      TEXT NOT NULL DEFAULT '',
+    scope      TEXT NOT NULL DEFAULT '',
+    owner      TEXT NOT NULL DEFAULT '',
+    created    REAL NOT NULL,
+    updated    REAL NOT NULL,
+    n_messages INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq        INTEGER NOT NULL,
+    role       TEXT NOT NULL,
+    content    TEXT NOT NULL,
+    created    REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS state (
+    session_id TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    digest     TEXT NOT NULL,
+    updated    REAL NOT NULL,
+    PRIMARY KEY (session_id, key)
+);
+CREATE TABLE IF NOT EXISTS events (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    created    REAL NOT NULL,
+    payload    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_kind ON events (session_id, kind, id);
+"""
+# Columns added after the first release; ALTERed into older databases on open
+MIGRATIONS = {
+    ("sessions", "scope"): "ALTER TABLE sessions ADD COLUMN scope TEXT NOT NULL DEFAULT ''",
+    ("sessions", "owner"): "ALTER TABLE sessions ADD COLUMN owner TEXT NOT NULL DEFAULT ''",
+}
+
+
+def _digest(payload: str) -> str:
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SessionStore:
+    """Process-wide SQLite session store. Safe to share across Streamlit sessions."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path or os.environ.get("FIRES_SESSION_DB", DEFAULT_DB_PATH))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        for (table, column), statement in MIGRATIONS.items():
+            columns = {r[1] for r in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                self._conn.execute(statement)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_by_owner ON sessions (owner, scope, updated)")
+
+    # ---- sessions ----
+    def create_session(self, label: str = "", scope: str = "", owner: str = "") -> str:
+        session_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (session_id, label, scope, owner, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, label, scope, owner, now, now),
+            )
+        return session_id
+
+    def session_exists(self, session_id: str, owner: str | None = None) -> bool:
+        """True if the session exists (and, when owner is given, belongs to that owner token)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT owner FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return False
+        return owner is None or (bool(row[0]) and secrets.compare_digest(row[0], owner))
+
+    def list_sessions(self, owner: str, scope: str = "", limit: int = 20) -> list[dict]:
+        """One owner's most recently updated sessions in one scope first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, label, created, updated, n_messages FROM sessions "
+                "WHERE owner = ? AND owner != '' AND scope = ? ORDER BY updated DESC LIMIT ?",
+                (owner, scope, limit),
+            ).fetchall()
+        return [
+            {"session_id": r[0], "label": r[1], "created": r[2], "updated": r[3], "n_messages": r[4]}
+            for r in rows
+        ]
+
+    def delete_session(self, session_id: str):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for table in ("messages", "state", "events", "sessions"):
+                self._conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            self._conn.execute("COMMIT")
+
+    # ---- messages ----
+    def append_messages(self, session_id: str, messages: list[dict], start_seq: int):
+        """Append messages with consecutive sequence numbers starting at start_seq."""
+        if not messages:
+            return
+        now = time.time()
+        rows = [
+            (session_id, start_seq + i, m["role"], m["content"], now)
+            for i, m in enumerate(messages)
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages (session_id, seq, role, content, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute(
+                "UPDATE sessions SET n_messages = MAX(n_messages, ?), updated = ? WHERE session_id = ?",
+                (start_seq + len(messages), now, session_id),
+            )
+            self._conn.execute("COMMIT")
+
+    def message_count(self, session_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT n_messages FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def load_messages(self, session_id: str, before_seq: int | None = None,
+                      limit: int = HISTORY_PAGE_SIZE) -> list[dict]:
+        """
+        Load one page of history ending just before before_seq (None = newest).
+        Returns messages in chronological order.
+        """
+        if before_seq is None:
+            before_seq = self.message_count(session_id)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? AND seq < ? "
+                "ORDER BY seq DESC LIMIT ?",
+                (session_id, before_seq, limit),
+            ).fetchall()
+        return [{"role": r[0], "content": r[1]} for r in reversed(rows)]
+
+    def iter_messages(self, session_id: str, page_size: int = 200):
+        """Yield every message in order, one page in memory at a time."""
+        seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT seq, role, content FROM messages WHERE session_id = ? AND seq >= ? "
+                    "ORDER BY seq LIMIT ?",
+                    (session_id, seq, page_size),
+                ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield {"seq": r[0], "role": r[1], "content": r[2]}
+            seq = rows[-1][0] + 1
+
+    # ---- events ----
+    def append_events(self, session_id: str, kind: str, payloads: list[dict]):
+        """Append event records of one kind (ledger change, salvo run, ...)."""
+        if not payloads:
+            return
+        now = time.time()
+        rows = [(session_id, kind, now, json.dumps(p, default=str)) for p in payloads]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO events (session_id, kind, created, payload) VALUES (?, ?, ?, ?)", rows,
+            )
+            self._conn.execute("UPDATE sessions SET updated = ? WHERE session_id = ?", (now, session_id))
+            self._conn.execute("COMMIT")
+
+    def event_count(self, session_id: str, kind: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM events WHERE session_id = ? AND kind = ?", (session_id, kind)
+            ).fetchone()
+        return row[0]
+
+    def iter_events(self, session_id: str, kind: str, page_size: int = 500):
+        """Yield (created, payload) for every event of one kind in order, one page in memory at a time."""
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, created, payload FROM events WHERE session_id = ? AND kind = ? AND id > ? "
+                    "ORDER BY id LIMIT ?",
+                    (session_id, kind, last, page_size),
+                ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield r[1], json.loads(r[2])
+            last = rows[-1][0]
+
+    def session_info(self, session_id: str) -> dict | None:
+        with self._lock:
+            r = self._conn.execute(
+                "SELECT session_id, label, created, updated, n_messages FROM sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        if r is None:
+            return None
+        return {"session_id": r[0], "label": r[1], "created": r[2], "updated": r[3], "n_messages": r[4]}
+
+    # ---- state ----
+    def save_state(self, session_id: str, state: dict, digests: dict[str, str]) -> list[str]:
+        """
+        Upsert only the keys whose serialized value changed. Returns the keys written.
+        digests (key -> digest of the last value written) belongs to the caller's
+        session and is updated in place, so the store holds no per-session memory.
+        """
+        now = time.time()
+        changed = []
+        for key, value in state.items():
+            payload = json.dumps(value, sort_keys=True, default=str)
+            digest = _digest(payload)
+            if digests.get(key) == digest:
+                continue
+            changed.append((session_id, key, payload, digest, now))
+
+        if not changed:
+            return []
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state (session_id, key, value, digest, updated) "
+                "VALUES (?, ?, ?, ?, ?)",
+                changed,
+            )
+            self._conn.execute(
+                "UPDATE sessions SET updated = ? WHERE session_id = ?", (now, session_id)
+            )
+            self._conn.execute("COMMIT")
+        for _, key, _, digest, _ in changed:
+            digests[key] = digest
+        return [c[1] for c in changed]
+
+    def load_state(self, session_id: str, digests: dict[str, str] | None = None) -> dict:
+        """Saved state keys; fills digests (if given) with the stored digest of each."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, digest FROM state WHERE session_id = ?", (session_id,)
+            ).fetchall()
+        if digests is not None:
+            digests.update({key: digest for key, _, digest in rows})
+        return {key: json.loads(value) for key, value, _ in rows}
+
+    def set_label(self, session_id: str, label: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sessions SET label = ? WHERE session_id = ?", (label, session_id)
+            )
+
+    def set_scope(self, session_id: str, scope: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sessions SET scope = ? WHERE session_id = ?", (scope, session_id)
+            )
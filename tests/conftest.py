@@ -0,0 +1,33 @@
+"""Shared fixtures: the compiled weapons catalog and Blue ledgers from the loadout presets."""
+
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fires.catalog import compile_catalog  # noqa: E402
+from fires.presets import LOADOUT_PRESETS  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def catalog():
+    return compile_catalog((ROOT / "data" / "weapons_reference_v3.md").read_text(encoding="utf-8"))
+
+
+def loadout(name: str = "Default (Planning)") -> dict:
+    """A fresh copy of a loadout preset's ledger."""
+    return copy.deepcopy(LOADOUT_PRESETS[name])
+
+
+@pytest.fixture
+def ledger():
+    return loadout()
+
+
+@pytest.fixture
+def desron():
+    return loadout("Pacific Guard — DESRON SAG")
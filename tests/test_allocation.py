@@ -0,0 +1,90 @@
+from fires import allocation
+from fires.weaponeering import TargetRow
+
+FDI = {"name": "Greek FDI Frigate Behlarra", "nation": "Greece"}
+
+
+def targets():
+    return [
+        TargetRow("T1", "HQ-9 radar", "sam_radar", range_km=60, priority=1),
+        TargetRow("T2", "Type 052D destroyer", "ship", range_km=150, priority=2),
+        TargetRow("T3", "C2 node", "structure", range_km=40, priority=3),
+        TargetRow("T4", "Depot", "structure", range_km=5000, priority=4),     # out of every range
+    ]
+
+
+def test_coalition_ledger_uses_reference_load(catalog):
+    ledger = allocation.coalition_ledger([FDI], catalog)
+    (asset, munitions), = ledger.items()
+    assert asset == "Greek FDI Frigate Behlarra (Greece)"
+    assert {"Aster 30B1", "Exocet MM40 Block 3", "Scalp Naval cruise missile"} <= set(munitions)
+
+
+def test_parse_missile_list():
+    assert allocation.parse_missile_list("Aster 30 x16, Exocet x8") == {"Aster 30": 16, "Exocet": 8}
+    assert allocation.parse_missile_list("16× Aster 30") == {"Aster 30": 16}
+
+
+def test_merge_keeps_unfired_coalition_munitions(catalog):
+    coalition = allocation.coalition_ledger([FDI], catalog)
+    asset = next(iter(coalition))
+    ammo_status = {asset: {"Exocet MM40 Block 3": {"initial": 8, "expended": 4}}}
+    merged = allocation.merge_ledgers(coalition, ammo_status)
+    assert merged[asset]["Exocet MM40 Block 3"]["expended"] == 4
+    assert "Aster 30B1" in merged[asset] and "Scalp Naval cruise missile" in merged[asset]
+    assert coalition[asset]["Exocet MM40 Block 3"]["expended"] == 0       # inputs untouched
+
+
+def test_apply_plan_tracks_whole_coalition_load(catalog):
+    coalition = allocation.coalition_ledger([FDI], catalog)
+    asset = next(iter(coalition))
+    plan = allocation.FirePlan(
+        missions=[allocation.FireMission("T2", "Type 052D", asset, "Exocet MM40 Block 3", 4, 0.55)],
+        targets=[], draw=[], expected_value=0, max_value=0, solve_ms=0,
+    )
+    updated = allocation.apply_plan({}, plan, coalition)
+    assert updated[asset]["Exocet MM40 Block 3"]["expended"] == 4
+    assert set(updated[asset]) == set(coalition[asset])
+    # the next plan still sees the munitions the ship has not fired
+    assert set(allocation.merge_ledgers(coalition, updated)[asset]) == set(coalition[asset])
+
+
+def test_allocate_respects_magazines_and_range(ledger, catalog):
+    plan = allocation.allocate(targets(), ledger, catalog)
+    assert plan.missions
+    fired: dict[tuple[str, str], int] = {}
+    for m in plan.missions:
+        fired[m.asset, m.munition] = fired.get((m.asset, m.munition), 0) + m.rounds
+    for (asset, munition), rounds in fired.items():
+        counts = ledger[asset][munition]
+        assert rounds <= counts["initial"] - counts["expended"]
+    assert all(m.target_id != "T4" for m in plan.missions)
+    assert 0 < plan.expected_value <= plan.max_value
+
+
+def test_asset_caps_limit_rounds(ledger, catalog):
+    plan = allocation.allocate(targets(), ledger, catalog, asset_caps={asset: 2 for asset in ledger})
+    per_asset: dict[str, int] = {}
+    for m in plan.missions:
+        per_asset[m.asset] = per_asset.get(m.asset, 0) + m.rounds
+    assert all(n <= 2 for n in per_asset.values())
+
+
+def test_apply_plan_debits_ledger(ledger, catalog):
+    plan = allocation.allocate(targets(), ledger, catalog)
+    updated = allocation.apply_plan(ledger, plan)
+    total = sum(m.rounds for m in plan.missions)
+    spent = sum(c["expended"] for ms in updated.values() for c in ms.values())
+    assert spent - sum(c["expended"] for ms in ledger.values() for c in ms.values()) == total
+
+
+def test_plain_tlam_needs_the_same_approval_as_pairing(ledger, catalog):
+    from fires import pairing
+    assert pairing.approval_required("TLAM") == "tlam block e"
+    assert pairing.approval_required("TLAM Block E") == "tlam block e"
+    assert pairing.approval_required("TLAM Maritime Strike (MST)") is None
+    held = allocation.allocate(targets(), ledger, catalog)
+    assert "DDG (NSFS) — TLAM: excluded pending approval" in held.notes
+    assert not any(m.munition == "TLAM" for m in held.missions)
+    released = allocation.allocate(targets(), ledger, catalog, approved=["TLAM Block E"])
+    assert not any("TLAM: excluded" in note for note in released.notes)
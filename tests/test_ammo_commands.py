@@ -0,0 +1,58 @@
+from fires import ammo_commands
+
+
+def test_expended_and_remaining(ledger, catalog):
+    command = ammo_commands.interpret("Update ammo: expended 18 GMLRS and 4 PrSM", ledger, catalog)
+    assert command.updates == [
+        {"asset": "HIMARS Battery (6x)", "munition": "GMLRS", "update_type": "EXPENDED", "value": 18},
+        {"asset": "HIMARS Battery (6x)", "munition": "PrSM", "update_type": "EXPENDED", "value": 4},
+    ]
+    command = ammo_commands.interpret("12 Excalibur remaining", ledger, catalog)
+    assert command.updates[0]["update_type"] == "REMAINING"
+    assert command.updates[0]["munition"] == "Excalibur"
+
+
+def test_resupply(ledger, catalog):
+    command = ammo_commands.interpret("resupplied 36 GMLRS to HIMARS", ledger, catalog)
+    assert command.updates == [
+        {"asset": "HIMARS Battery (6x)", "munition": "GMLRS", "update_type": "RESUPPLY", "value": 36}]
+
+
+def test_fire_orders_are_not_expenditure(ledger, catalog):
+    assert ammo_commands.interpret("Fire 4 ATACMS at the HQ-9 battery", ledger, catalog) is None
+    assert ammo_commands.interpret("Shoot 2 TLAM", ledger, catalog) is None
+    fired = ammo_commands.interpret("Fired 4 ATACMS at the HQ-9 battery", ledger, catalog)
+    assert fired.updates[0]["update_type"] == "EXPENDED"
+
+
+def test_ambiguous_holder_returns_no_command(desron, catalog):
+    assert ammo_commands.interpret("expended 4 Harpoon", desron, catalog) is None
+    command = ammo_commands.interpret("expended 4 Harpoon from Blue DDG-53", desron, catalog)
+    assert command.updates[0]["asset"] == "Blue DDG-53"
+
+
+def test_unmatched_munition_goes_to_the_model(ledger, catalog):
+    assert ammo_commands.interpret("expended 3 Unobtainium", ledger, catalog) is None
+    assert ammo_commands.interpret("expended 18 GMLRS and 3 Unobtainium", ledger, catalog) is None
+
+
+def test_overdraw_warns(ledger, catalog):
+    command = ammo_commands.interpret("expended 30 ATACMS", ledger, catalog)
+    assert command.updates and "only 12 were left" in command.warnings[0]
+
+
+def test_questions_are_not_commands(ledger, catalog):
+    assert ammo_commands.interpret("How many GMLRS remaining?", ledger, catalog) is None
+
+
+def test_on_target_is_a_target_clause(ledger, desron, catalog):
+    tlam = [{"asset": "DDG (NSFS)", "munition": "TLAM", "update_type": "EXPENDED", "value": 2}]
+    assert ammo_commands.interpret("fired 2 TLAM on TGT-0042", ledger, catalog).updates == tlam
+    assert ammo_commands.interpret("fired 2 TLAM on TGT-0042 from the DDG", ledger, catalog).updates == tlam
+    assert ammo_commands.interpret("expended 4 GMLRS on HIMARS", ledger, catalog).updates[0]["asset"] == \
+        "HIMARS Battery (6x)"
+    # The target clause does not resolve an ambiguous holder
+    assert ammo_commands.interpret("expended 4 Harpoon on TGT-0042", desron, catalog) is None
+    command = ammo_commands.interpret("expended 4 Harpoon from Blue DDG-53 on TGT-0042", desron, catalog)
+    assert command.updates[0]["asset"] == "Blue DDG-53"
+    assert ammo_commands.interpret("fired 2 TLAM from the carrier", ledger, catalog) is None
@@ -0,0 +1,20 @@
+from services import answer_cache
+
+
+def test_ledger_slice_names_only_what_the_query_mentions(ledger):
+    assert set(answer_cache.ledger_slice("range of PrSM", ledger)) == {"HIMARS Battery (6x)|PrSM"}
+
+
+def test_whole_ledger_separates_teams(ledger):
+    other = {asset: {m: dict(c) for m, c in munitions.items()} for asset, munitions in ledger.items()}
+    other["M777 Battery (6x)"]["Excalibur"]["expended"] = 30
+    query = "recommend a fires plan against the HQ-9 radar"
+    assert answer_cache.ledger_slice(query, ledger) == answer_cache.ledger_slice(query, other)
+    assert (answer_cache.context_fingerprint(ledger=answer_cache.ledger_slice(query, ledger, whole=True))
+            != answer_cache.context_fingerprint(ledger=answer_cache.ledger_slice(query, other, whole=True)))
+
+
+def test_stateful_queries_are_not_cacheable():
+    assert not answer_cache.is_cacheable("expended 4 GMLRS")
+    assert not answer_cache.is_cacheable("what about that target?")
+    assert answer_cache.is_cacheable("What is the range of PrSM?")
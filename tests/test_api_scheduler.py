@@ -0,0 +1,134 @@
+import threading
+import types
+
+import pytest
+
+from services import api_scheduler
+from services.api_scheduler import QueueTimeout, RequestScheduler, TokenBucket
+
+
+class FakeClock:
+    """Monotonic clock that only moves when the scheduler sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Busy(Exception):
+    def __init__(self, status_code: int, retry_after: str | None = None):
+        super().__init__(f"busy ({status_code})")
+        self.status_code = status_code
+        self.response = types.SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+def failing(status_code: int):
+    def call():
+        raise Busy(status_code)
+    return call
+
+
+def scheduler(clock: FakeClock, **kwargs) -> RequestScheduler:
+    kwargs = {"requests_per_min": 600, "input_tokens_per_min": 10 ** 6, **kwargs}
+    return RequestScheduler(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_token_bucket_refills_continuously():
+    bucket = TokenBucket(per_minute=60, now=0.0)
+    bucket.consume(60, now=0.0)
+    assert bucket.wait_time(1, now=0.0) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now=0.5) == pytest.approx(0.5)
+    assert bucket.wait_time(1, now=1.0) == 0.0
+    assert bucket.wait_time(60, now=3600.0) == 0.0 and bucket.tokens == 60     # capped at capacity
+    assert bucket.wait_time(500, now=3600.0) == 0.0                             # oversize asks wait for a full bucket
+
+
+def test_request_bucket_paces_calls_on_the_fake_clock():
+    clock = FakeClock()
+    sched = scheduler(clock, requests_per_min=2)        # capacity 2, then one every 30 s
+    for _ in range(3):
+        sched.submit("A", lambda: "ok")
+    assert 30.0 <= clock.now < 31.0
+
+
+def test_retry_backs_off_with_jitter_and_without_holding_a_slot(monkeypatch):
+    clock = FakeClock()
+    sched = scheduler(clock, base_backoff_s=1.0, max_backoff_s=30.0)
+    bounds, held = [], []
+    monkeypatch.setattr(api_scheduler.random, "uniform", lambda low, high: bounds.append((low, high)) or high / 2)
+
+    def sleep(seconds):
+        held.append(sched._active)
+        clock.sleep(seconds)
+
+    sched.sleep = sleep
+    failures = iter([Busy(529), Busy(429), Busy(429, retry_after="7")])
+
+    def call():
+        error = next(failures, None)
+        if error:
+            raise error
+        return "ok"
+
+    assert sched.submit("A", call) == "ok"
+    assert bounds == [(0, 1.0), (0, 2.0), (0, 4.0)]      # full jitter over a doubling cap
+    assert clock.sleeps[:3] == [0.5, 1.0, 7.0]           # retry-after wins over a shorter jitter
+    assert held[:3] == [0, 0, 0]                         # slot given back for every backoff
+    assert sched.stats["retries"] == 3 and sched.stats["completed"] == 1
+
+
+def test_non_retryable_and_exhausted_errors_are_raised():
+    clock = FakeClock()
+    sched = scheduler(clock, max_retries=2)
+    with pytest.raises(Busy):
+        sched.submit("A", failing(400))
+    assert clock.sleeps == []
+    with pytest.raises(Busy):
+        sched.submit("A", failing(529))
+    assert sched.stats["retries"] == 2 and sched.stats["failed"] == 2
+    assert sched._active == 0
+
+
+def test_queue_timeout_withdraws_the_ticket():
+    clock = FakeClock()
+    sched = scheduler(clock, requests_per_min=1, max_queue_wait_s=10)
+    sched.submit("A", lambda: "ok")                     # empties the request bucket for a minute
+    with pytest.raises(QueueTimeout):
+        sched.submit("B", lambda: "never sent")
+    assert 10.0 < clock.now < 12.0
+    assert sched.queue_length() == 0
+
+
+def test_sessions_are_served_round_robin():
+    sched = RequestScheduler(max_concurrency=1, requests_per_min=6000, input_tokens_per_min=10 ** 9)
+    gate, order = threading.Event(), []
+
+    def job(name, blocking=False):
+        def call():
+            if blocking:
+                gate.wait(5)
+            order.append(name)
+        return call
+
+    first = threading.Thread(target=sched.submit, args=("A", job("A1", blocking=True)))
+    first.start()
+    while sched._active == 0:
+        pass
+    threads = []
+    for session, name in [("A", "A2"), ("A", "A3"), ("B", "B1")]:
+        threads.append(threading.Thread(target=sched.submit, args=(session, job(name))))
+        threads[-1].start()
+        while sched.queue_length() < len(threads):
+            pass
+    gate.set()
+    for thread in [first] + threads:
+        thread.join(5)
+    # B's only request goes ahead of A's third, not behind A's whole backlog
+    assert order == ["A1", "A2", "B1", "A3"]
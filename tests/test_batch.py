@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pytest
+
+from fires import batch
+
+ROOT = Path(__file__).parent.parent
+REFERENCE = str(ROOT / "data" / "weapons_reference_v3.md")
+ANSWER_KEY = ROOT / "data" / "scenarios" / "pacific_guard_answer_key.json"
+
+
+def untimed(rows: list[dict]) -> list[dict]:
+    return [{k: v for k, v in row.items() if k != "alloc_solve_ms"} for row in rows]
+
+
+def test_grid_expands_over_every_explicit_variant():
+    scenario = batch.load_scenario(ANSWER_KEY)
+    assert len(scenario.variants) == 3 * 2 * 3
+    assert scenario.variants[0]["variant"] == "SAG only, desired_pk=0.8, red_ships=2"
+    assert {v["red_ship"] for v in scenario.variants} == {"Type 052D (Luyang III DDG)"}
+    with pytest.raises(ValueError, match="unknown parameter"):
+        batch.expand_variants(batch.DEFAULT_PARAMETERS, [{"name": "typo", "desird_pk": 0.9}], None)
+
+
+def test_one_bad_variant_is_reported_and_the_rest_complete():
+    scenario = batch.load_scenario(ANSWER_KEY)
+    scenario.variants = scenario.variants[:2] + [{**scenario.variants[2], "variant": "bad",
+                                                  "adversary": "Nowhere"}]
+    result = batch.run(scenario, workers=1, reference_path=REFERENCE)
+    good, bad = result.summary[:2], result.summary[2]
+    assert bad["variant"] == "bad" and bad["error"].startswith("KeyError")
+    assert all("error" not in row and row["alloc_missions"] > 0 for row in good)
+    assert {m["variant"] for m in result.missions} == {row["variant"] for row in good}
+
+
+def test_process_pool_matches_in_process():
+    scenario = batch.load_scenario(ANSWER_KEY)
+    scenario.variants = scenario.variants[:4]
+    serial = batch.run(scenario, workers=1, reference_path=REFERENCE)
+    pooled = batch.run(scenario, workers=2, reference_path=REFERENCE)
+    assert pooled.workers == 2
+    assert untimed(pooled.summary) == untimed(serial.summary)
+    assert pooled.missions == serial.missions
+
+
+def test_hughes_row_uses_the_preset_and_nmesis():
+    params = {**batch.DEFAULT_PARAMETERS, "variant": "x", "nmesis_missiles": 8, "blue_ships": 2}
+    row, missions = batch.evaluate(params, [], [], None, ("hughes",))
+    assert missions == [] and row["hughes_blue_missiles_fired"] == (4.0 + 8 / 2) * 2
+    assert row["red_ship"] and row["hughes_red_missiles_fired"] == row["red_beta"] * params["red_ships"]
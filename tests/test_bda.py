@@ -0,0 +1,56 @@
+import pytest
+
+from fires import bda
+from fires.weaponeering import TargetRow
+
+
+@pytest.fixture
+def state():
+    targets = [TargetRow("TGT-0001", "HQ-9 radar", "sam_radar", range_km=60, priority=1),
+               TargetRow("TGT-0002", "Type 052D destroyer", "ship", range_km=150, priority=5)]
+    return bda.sync_targets(bda.new_state(), [vars(t) for t in targets])
+
+
+def engage(state, catalog, rounds=1):
+    updates = [{"asset": "HIMARS Battery (6x)", "munition": "GMLRS", "update_type": "EXPENDED", "value": rounds}]
+    events = bda.target_engagements(f"expended {rounds} GMLRS at TGT-0001", updates, state, catalog)
+    return bda.apply_events(state, events)
+
+
+def test_find_target_by_number_only(state):
+    assert bda.find_target(state, "BDA on target 2") == "TGT-0002"
+    assert bda.find_target(state, "tgt-0001 destroyed") == "TGT-0001"
+    assert bda.find_target(state, "expended 2 GMLRS") is None         # bare numbers are round counts
+
+
+def test_engagement_updates_expected_pk_without_mutating_state(state, catalog):
+    engaged, changed = engage(state, catalog)
+    row = engaged["targets"]["TGT-0001"]
+    assert changed == ["TGT-0001"]
+    assert row["expected_pk"] == pytest.approx(0.75) and row["status"] == bda.STATUS_REATTACK
+    assert state["targets"]["TGT-0001"]["status"] == bda.STATUS_NOT_ENGAGED
+
+
+def test_bda_overrides_estimate_and_drives_reattack(state, catalog, ledger):
+    engaged, _ = engage(state, catalog)
+    command = bda.interpret("BDA: target 1 damaged phase 2", engaged)
+    assert command.events[0]["assessment"] == "damaged" and command.events[0]["phase"] == 2
+    assessed, _ = bda.apply_events(engaged, command.events)
+    assert assessed["targets"]["TGT-0001"]["current_pk"] == bda.BDA_ASSESSMENTS["damaged"]
+
+    (plan,) = bda.reattack_plan(assessed, ledger, catalog)
+    assert plan["hpt"] and plan["needed_pk"] == pytest.approx(0.8) and plan["achieved_pk"] >= 0.8
+
+    destroyed, _ = bda.apply_events(assessed, bda.interpret("BDA: TGT-0001 destroyed", assessed).events)
+    assert destroyed["targets"]["TGT-0001"]["status"] == bda.STATUS_ACHIEVED
+    assert bda.reattack_plan(destroyed, ledger, catalog) == []
+
+
+def test_interpret_leaves_other_chat_to_the_model(state):
+    assert bda.interpret("expended 4 GMLRS", state) is None
+    assert bda.interpret("Which HPTs need re-attack?", state).reattack_query
+
+
+def test_parse_model_bda_reports(state):
+    (event,) = bda.parse_bda_reports("BDA_REPORT:\nTARGET: TGT-0002\nASSESSMENT: destroyed\nCONFIRMED: yes", state)
+    assert (event["target_id"], event["assessment"], event["confirmed"]) == ("TGT-0002", "destroyed", True)
@@ -0,0 +1,56 @@
+from fires import catalog as catalog_module
+
+
+def test_resolves_names_and_aliases(catalog):
+    assert catalog.munition("GMLRS").name == "M31 GMLRS Unitary"
+    assert catalog.munition("YJ-83 ASM").name == "YJ-83"
+    assert catalog.munition("Z-9 Helo (HJ-8 ASM)").name == "HJ-8"
+    assert "TLAM" in catalog.munition("TLAM Block E").name
+    assert "TLAM" in catalog.munition("TLAM Maritime Strike (MST)").name
+    assert catalog.munition("Harpoon Block II").name.startswith("Harpoon")
+    assert catalog.munition('5" Rounds').name.startswith("Mk 45")
+
+
+def test_designator_is_matched_whole(catalog):
+    # "Mk" alone would be a token subset of the Mk 45 gun
+    assert catalog.munition("Mk 46/54 Torpedo") is None
+
+
+def test_unresolved_coalition_row_is_skipped(catalog):
+    # §10.2 "Greek FDI (Scalp Naval) | Land attack/anti-ship" names no catalog munition
+    assert catalog.munition("Land attack/anti-ship") is None
+    tlam = catalog.munition("TLAM")
+    assert "DDG/FFG class" not in tlam.pk and "DDG/CG class" not in tlam.pk
+    assert catalog.munition("Exocet MM40 Blk 3").pk["DDG/FFG class"] == [0.5, 0.6]
+
+
+def test_lookup_memo_is_bounded(catalog, monkeypatch):
+    monkeypatch.setattr(catalog_module, "LOOKUP_CACHE_SIZE", 8)
+    for i in range(50):
+        catalog.munition(f"Unknown Launcher {i}")
+    assert len(catalog._lookup) <= 8
+
+
+def test_round_trip_preserves_lookups(catalog):
+    restored = catalog_module.WeaponsCatalog.from_dict(catalog.to_dict())
+    assert restored.munition("GMLRS").name == catalog.munition("GMLRS").name
+    assert restored.munition("Mk 46/54 Torpedo") is None
+
+
+def test_every_pk_row_resolves_to_a_munition(catalog):
+    unresolved = [entry.weapon for entry in catalog.pk_table if entry.munition is None]
+    assert catalog.pk_table and unresolved == []
+
+
+def test_tables_without_a_range_column_are_compiled(catalog):
+    for name in ("GBU-12", "JDAM", "SDB II", "JAGM", "MK-54", "MK-48"):
+        munition = catalog.munition(name)
+        assert munition is not None, name
+        assert munition.max_range_km is None
+    assert catalog.pk("JDAM (2000 lb)", "Hardened bunker") == (0.75, 0.75)
+    assert "CG (Ticonderoga)" in catalog.munition("MK-54").platforms
+    # §5.2's LRASM row is the §1.8 missile, not a second range-less record
+    assert [m.name for m in catalog.munitions if "LRASM" in m.name] == ["Long Range Anti-Ship Missile (LRASM)"]
+    assert catalog.munition("LRASM").max_range_km > 300
+    # §7.5 Red ground forces are targets, not munitions
+    assert catalog.munition("ZTZ-99A") is None
@@ -0,0 +1,91 @@
+import threading
+
+from services.classroom import ClassroomHub, materialize
+
+
+def published(hub, ledger):
+    return hub.publish("Phase III", "Default (Planning)", "PLAN SAG", ledger,
+                       [{"name": "SAG", "lat": 20.0, "lon": 120.0}], {"opord.md": "base"})
+
+
+def member_edit(hub, scenario, overlay, edit):
+    """One member's rerun: materialize, edit the session copy, record."""
+    base = materialize(scenario, overlay)
+    view = materialize(scenario, overlay)
+    edit(view)
+    return hub.record(scenario, overlay, base, view["ammo_status"], view["map_units"],
+                      view["uploaded_docs"], view["current_loadout"])
+
+
+def test_teammates_editing_from_the_same_view_keep_both_edits(ledger):
+    hub = ClassroomHub()
+    scenario = published(hub, ledger)
+    overlay = hub.team(scenario.code, "CG 13")
+    base = materialize(scenario, overlay)
+    alice, bob = materialize(scenario, overlay), materialize(scenario, overlay)
+    alice["ammo_status"]["HIMARS Battery (6x)"]["GMLRS"]["expended"] = 18
+    alice["uploaded_docs"]["fragO.md"] = "alice"
+    bob["ammo_status"]["DDG (NSFS)"]["TLAM"]["expended"] = 4
+    bob["map_units"].append({"name": "HQ-9", "lat": 21.0, "lon": 121.0})
+
+    for view in (alice, bob):
+        assert hub.record(scenario, overlay, base, view["ammo_status"], view["map_units"],
+                          view["uploaded_docs"], view["current_loadout"])
+
+    team_view = materialize(scenario, overlay)
+    assert team_view["ammo_status"]["HIMARS Battery (6x)"]["GMLRS"]["expended"] == 18
+    assert team_view["ammo_status"]["DDG (NSFS)"]["TLAM"]["expended"] == 4
+    assert [u["name"] for u in team_view["map_units"]] == ["SAG", "HQ-9"]
+    assert team_view["uploaded_docs"] == {"fragO.md": "alice"}
+    assert overlay.rev == 2
+
+
+def test_concurrent_members_on_different_munitions(ledger):
+    hub = ClassroomHub()
+    scenario = published(hub, ledger)
+    overlay = hub.team(scenario.code, "CG 13")
+    munitions = [(asset, munition) for asset, ms in ledger.items() for munition in ms]
+    start = threading.Barrier(len(munitions))
+
+    def fire(asset, munition):
+        def edit(view):
+            view["ammo_status"][asset][munition]["expended"] += 1
+        start.wait()
+        member_edit(hub, scenario, overlay, edit)
+
+    threads = [threading.Thread(target=fire, args=key) for key in munitions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    team_view = materialize(scenario, overlay)
+    for asset, munition in munitions:
+        assert team_view["ammo_status"][asset][munition]["expended"] == ledger[asset][munition]["expended"] + 1
+
+
+def test_unchanged_rerun_and_revert_to_scenario(ledger):
+    hub = ClassroomHub()
+    scenario = published(hub, ledger)
+    overlay = hub.team(scenario.code, "CG 13")
+    assert not member_edit(hub, scenario, overlay, lambda view: None)
+    assert overlay.rev == 0
+
+    def expend(view):
+        view["ammo_status"]["HIMARS Battery (6x)"]["GMLRS"]["expended"] += 6
+
+    def restore(view):
+        view["ammo_status"]["HIMARS Battery (6x)"]["GMLRS"]["expended"] -= 6
+
+    member_edit(hub, scenario, overlay, expend)
+    member_edit(hub, scenario, overlay, restore)
+    assert overlay.ammo_changed == {} and overlay.rev == 2       # back to the shared scenario
+
+
+def test_withdraw_during_read_returns_no_overlay(ledger):
+    hub = ClassroomHub()
+    scenario = published(hub, ledger)
+    assert hub.team(scenario.code, "CG 13") is not None
+    hub.withdraw(scenario.code)
+    assert hub.get(scenario.code) is None
+    assert hub.team(scenario.code, "CG 13") is None
+    assert hub.team("", "CG 13") is None
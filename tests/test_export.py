@@ -0,0 +1,89 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from fires.salvo import hughes_salvo_calc
+from services import export
+from services.session_store import SessionStore
+
+HUGHES = {"alpha": 4.0, "A": 2, "beta": 6.0, "B": 3, "y": 2.0, "z": 6.0, "a": 2.0, "b": 1.5,
+          "nmesis_missiles": 0, "red_from_ledger": False}
+
+
+@pytest.fixture
+def session(tmp_path, ledger):
+    """A stored session: 450 chat turns (three pages), two ledger edits, a salvo run and saved state."""
+    store = SessionStore(tmp_path / "s.db")
+    sid = store.create_session("exercise")
+    store.append_messages(sid, [{"role": ("user", "assistant")[i % 2], "content": f"turn {i}\nline two"}
+                                for i in range(450)], 0)
+    after = json.loads(json.dumps(ledger))
+    after["HIMARS Battery (6x)"]["GMLRS"]["expended"] += 6
+    after["DDG (NSFS)"]["TLAM"]["expended"] += 2
+    store.append_events(sid, export.LEDGER_EVENT, export.ledger_diff(ledger, after, "blue", "chat"))
+    inputs = {k: v for k, v in HUGHES.items() if k not in ("nmesis_missiles", "red_from_ledger")}
+    store.append_events(sid, export.HUGHES_EVENT, [{"inputs": HUGHES, "result": hughes_salvo_calc(**inputs)}])
+    store.save_state(sid, {"ammo_status": after, "adversary": "Olvana (Chinese-type)",
+                           "map_units": [{"name": "SAG", "type": "DDG", "lat": 20.0, "lon": 120.0}],
+                           "uploaded_docs": {"opord.md": "line 1\nline 2"}}, {})
+    return store, sid, after
+
+
+def read_bundle(data: bytes) -> dict[str, list[dict]]:
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        tables = {name[:-len(".jsonl")]: [json.loads(line) for line in zf.read(name).splitlines()]
+                  for name in zf.namelist() if name.endswith(".jsonl")}
+        tables["manifest"] = json.loads(zf.read("manifest.json"))
+    return tables
+
+
+def test_ledger_diff_reports_only_changed_rows(ledger):
+    after = json.loads(json.dumps(ledger))
+    after["HIMARS Battery (6x)"]["GMLRS"]["expended"] += 6
+    (event,) = export.ledger_diff(ledger, after, "blue", "chat")
+    assert (event["asset"], event["munition"], event["delta"]) == ("HIMARS Battery (6x)", "GMLRS", -6)
+    assert export.ledger_diff(ledger, ledger, "blue", "chat") == []
+
+
+def test_jsonl_bundle_round_trips_the_session(session):
+    store, sid, after = session
+    tables = read_bundle(export.export_bytes(store, sid, "jsonl"))
+    transcript = tables["transcript"]
+    assert [m["seq"] for m in transcript] == list(range(450))
+    assert transcript[449] == {"seq": 449, "role": "assistant", "content": "turn 449\nline two", "chars": 17}
+    assert {(e["munition"], e["delta"]) for e in tables["ledger_events"]} == {("GMLRS", -6), ("TLAM", -2)}
+    final = {(r["asset"], r["munition"]): (r["initial"], r["expended"]) for r in tables["ledger_final"]
+             if r["side"] == "blue"}
+    assert final == {(asset, munition): (c["initial"], c["expended"])
+                     for asset, munitions in after.items() for munition, c in munitions.items()}
+    (run,) = tables["hughes_runs"]
+    assert run["B_remaining"] == hughes_salvo_calc(4.0, 2, 6.0, 3, 2.0, 6.0, 2.0, 1.5)["B_remaining"]
+    assert tables["documents"][0]["lines"] == 2 and tables["map_units"][0]["name"] == "SAG"
+    assert tables["manifest"]["rows: transcript"] == 450 and tables["manifest"]["label"] == "exercise"
+
+
+def test_parquet_and_workbook_hold_the_same_rows(session):
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    openpyxl = pytest.importorskip("openpyxl")
+    store, sid, _ = session
+    expected = read_bundle(export.export_bytes(store, sid, "jsonl"))
+
+    with zipfile.ZipFile(io.BytesIO(export.export_bytes(store, sid, "parquet"))) as zf:
+        for name in ("transcript", "ledger_final", "mixed_salvo_runs"):
+            df = pd.read_parquet(io.BytesIO(zf.read(f"{name}.parquet")))
+            assert df.to_dict("records") == expected[name]
+
+    wb = openpyxl.load_workbook(io.BytesIO(export.export_bytes(store, sid, "xlsx")), read_only=True)
+    assert wb.sheetnames[0] == "summary"
+    rows = list(wb["transcript"].iter_rows(values_only=True))
+    assert rows[0] == ("seq", "role", "content", "chars") and len(rows) == 451
+    assert dict(zip(rows[0], rows[-1])) == expected["transcript"][-1]
+
+
+def test_unknown_format_is_rejected(session):
+    store, sid, _ = session
+    with pytest.raises(ValueError, match="unknown export format"):
+        export.export_session(store, sid, io.BytesIO(), "csv")
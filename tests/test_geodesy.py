@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from fires import geodesy
+
+# Flinders Peak -> Buninyong, Vincenty (1975) worked example: 54 972.271 m on the ellipsoid
+FLINDERS = (-(37 + 57 / 60 + 3.72030 / 3600), 144 + 25 / 60 + 29.52440 / 3600)
+BUNINYONG = (-(37 + 39 / 60 + 10.15610 / 3600), 143 + 55 / 60 + 35.38390 / 3600)
+
+
+def test_vincenty_matches_the_published_example():
+    d = geodesy.vincenty_matrix([FLINDERS[0]], [FLINDERS[1]], [BUNINYONG[0]], [BUNINYONG[1]])
+    assert d[0, 0] == pytest.approx(54.972271, abs=1e-5)
+
+
+def test_vincenty_equator_degree_and_meridian_quadrant():
+    d = geodesy.vincenty_matrix([0.0, 0.0], [0.0, 1.0])
+    assert d[0, 1] == pytest.approx(111.319491, abs=1e-5)      # a * pi / 180
+    quadrant = geodesy.vincenty_matrix([0.0], [0.0], [90.0], [0.0])
+    assert quadrant[0, 0] == pytest.approx(10001.965729, abs=1e-4)
+
+
+def test_self_matrix_is_symmetric_and_close_to_haversine():
+    rng = np.random.default_rng(7)
+    lat, lon = rng.uniform(-60, 60, 40), rng.uniform(-180, 180, 40)
+    ell = geodesy.vincenty_matrix(lat, lon)
+    sph = geodesy.haversine_matrix(lat, lon)
+    assert np.allclose(ell, ell.T) and not ell.diagonal().any()
+    off = ~np.eye(40, dtype=bool)
+    assert np.all(np.abs(ell[off] / sph[off] - 1) < 0.006)
+
+
+def test_nearly_antipodal_pair_falls_back_to_haversine():
+    d = geodesy.vincenty_matrix([0.0], [0.0], [0.5], [179.7])
+    assert np.isfinite(d[0, 0])
+    assert d[0, 0] == pytest.approx(geodesy.haversine_matrix([0.0], [0.0], [0.5], [179.7])[0, 0], rel=0.01)
+
+
+def test_envelope_overlap_disjoint_contained_and_lens():
+    # Rings along the equator; 1 deg of longitude is ~111.2 km on the sphere
+    lats, lons = [0.0, 0.0, 0.0, 5.0], [0.0, 0.5, 1.0, 0.0]
+    area = geodesy.envelope_overlap_km2(lats, lons, [100.0, 20.0, 100.0, 50.0])
+    assert area[0, 0] == pytest.approx(np.pi * 100 ** 2)
+    assert area[0, 1] == pytest.approx(np.pi * 20 ** 2)         # small ring sits inside the big one
+    assert area[0, 3] == 0.0                                    # 556 km apart
+    d = geodesy.haversine_matrix(lats, lons)[0, 2]
+    lens = 2 * 100 ** 2 * np.arccos(d / 200) - d / 2 * np.sqrt(4 * 100 ** 2 - d ** 2)
+    assert area[0, 2] == pytest.approx(lens) and area[0, 2] == area[2, 0]
+
+
+def test_time_of_flight_uses_terminal_sprint():
+    assert geodesy.time_of_flight_s(494.3 * geodesy.KM_PER_NM, "TLAM") == pytest.approx(3600)
+    cruise_only = 100 / (0.8 * geodesy.MACH_KTS * geodesy.KM_PER_NM / 3600)
+    assert geodesy.time_of_flight_s(100, "YJ-18") < cruise_only
+    assert geodesy.time_of_flight_s(100, "Unobtainium") is None
@@ -0,0 +1,95 @@
+import json
+import types
+
+import pytest
+
+from prompts.system_prompt import get_reduced_system_prompt, get_system_prompt_with_context
+from services import metrics
+from services.metrics import MetricsLog, TurnMetrics, prompt_breakdown, prompt_template_sha, tier_summary
+
+
+def response(input_tokens=0, output_tokens=0, cache_read=0, stop_reason="end_turn"):
+    usage = types.SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens,
+                                  cache_creation_input_tokens=0, cache_read_input_tokens=cache_read)
+    return types.SimpleNamespace(usage=usage, stop_reason=stop_reason)
+
+
+def model_turn(tier, route, api_ms, ttft_ms=None, cost_usd=0.01, **extra):
+    return {"kind": "model", "tier": tier, "route": route, "api_ms": api_ms, "ttft_ms": ttft_ms,
+            "input_tokens": 1000, "output_tokens": 100, "cost_usd": cost_usd, **extra}
+
+
+def test_percentile_is_nearest_rank_from_below():
+    values = list(range(1, 21))                 # 1..20
+    assert metrics._percentile(values, 0.50) == 11
+    assert metrics._percentile(values, 0.95) == 20
+    assert metrics._percentile(list(reversed(values)), 0.50) == 11
+    assert metrics._percentile([7.0], 0.95) == 7.0
+    assert metrics._percentile([], 0.5) is None
+
+
+def test_tier_summary_groups_by_tier_and_route():
+    records = [model_turn("fast", "lookup", ms, ttft_ms=100.0) for ms in (100, 200, 300, 400)]
+    records += [model_turn("large", "planning", 5000, cost_usd=None, truncated=True),
+                model_turn("large", "planning", 7000, ttft_ms=900.0, cost_usd=0.2),
+                {"kind": "cached", "tier": "fast", "route": "lookup"}]
+    fast, large = tier_summary(records)
+    assert (fast["tier"], fast["route"], fast["turns"]) == ("fast", "lookup", 4)
+    assert fast["p50_api_ms"] == 300 and fast["p95_api_ms"] == 400
+    assert fast["mean_ttft_ms"] == 100.0 and fast["cost_usd"] == 0.04
+    assert (large["turns"], large["truncated"], large["mean_ttft_ms"]) == (2, 1, 900.0)
+    assert large["cost_usd"] == 0.2 and large["mean_cost_usd"] == 0.2      # unpriced turn left out
+
+
+def test_turn_sums_usage_over_tool_rounds():
+    turn = TurnMetrics(session_id="s", model="claude-sonnet-4-20250514")
+    turn.record_call(response(1000, 50), ttft_s=0.4, api_s=2.0, wall_s=2.5)
+    turn.record_call(response(1200, 80, stop_reason="max_tokens"), ttft_s=0.3, api_s=1.0, wall_s=1.0)
+    assert (turn.rounds, turn.input_tokens, turn.output_tokens) == (2, 2200, 130)
+    assert turn.ttft_ms == 400.0 and turn.truncated
+    assert turn.api_ms == pytest.approx(3000) and turn.queue_ms == pytest.approx(500)
+    assert turn.cost_usd == pytest.approx((2200 * 3.00 + 130 * 15.00) / 1e6)
+    assert TurnMetrics(session_id="s", model="unpriced").cost_usd is None
+
+
+def test_prompt_tokens_split_by_block_size():
+    turn = TurnMetrics(session_id="s", rounds=1, input_tokens=900, cache_read_input_tokens=100)
+    turn.prompt_chars = prompt_breakdown("P" * 300 + "A" * 100, {"ammo": "A" * 100},
+                                         [{"role": "user", "content": "H" * 100}])
+    assert turn.prompt_chars == {"ammo": 100, "protocol": 300, "history": 100}
+    assert turn.prompt_tokens == {"ammo": 200, "protocol": 600, "history": 200}
+
+
+def test_prompt_sha_changes_with_the_template_not_the_data(ledger):
+    full = prompt_template_sha(get_system_prompt_with_context())
+    reduced = prompt_template_sha(get_reduced_system_prompt())
+    assert full != reduced and len(full) == 12
+    assert full == prompt_template_sha(get_system_prompt_with_context())
+    # a turn's data would change the hash too, which is why the app hashes an empty render
+    assert prompt_template_sha(get_system_prompt_with_context(ammo_status=ledger)) != full
+
+
+def test_log_summary_and_jsonl_file(tmp_path):
+    log = MetricsLog(tmp_path / "turns.jsonl")
+    for ms in (100.0, 300.0):
+        turn = TurnMetrics(session_id="s", model="claude-3-5-haiku-20241022", tier="fast", route="lookup",
+                           prompt_sha="abc123")
+        turn.record_call(response(400, 40), ttft_s=0.1, api_s=ms / 1000, wall_s=ms / 1000)
+        log.record(turn)
+    log.record(TurnMetrics(session_id="s", kind="local_command"))
+    summary = log.summary()
+    assert (summary["turns"], summary["served_locally"], summary["input_tokens"]) == (2, 1, 800)
+    assert summary["mean_api_ms"] == 200.0 and summary["mean_ttft_ms"] == 100.0
+    assert [row["turns"] for row in summary["tiers"]] == [2]
+    lines = (tmp_path / "turns.jsonl").read_text().splitlines()
+    assert len(lines) == 3 and json.loads(lines[0])["prompt_sha"] == "abc123"
+
+
+def test_cli_filters_by_prompt_version(tmp_path, capsys):
+    path = tmp_path / "turns.jsonl"
+    path.write_text("\n".join(json.dumps(model_turn("fast", "lookup", ms, prompt_sha=sha))
+                              for ms, sha in [(100, "old"), (200, "new"), (300, "new")]))
+    assert metrics.main([str(path), "--prompt", "new"]) == 0
+    row = capsys.readouterr().out.splitlines()[1].split()
+    assert row[:3] == ["fast", "lookup", "2"]
+    assert metrics.main([str(tmp_path / "missing.jsonl")]) == 1
@@ -0,0 +1,66 @@
+import anthropic
+import pytest
+
+from prompts.system_prompt import get_system_prompt_with_context
+from services.api_scheduler import RequestScheduler
+from services.mock_api import MockAnthropic, MockAPIError, MockConfig
+
+INSTANT = "ttft_s=0,tokens_per_s=0"
+
+
+def ask(client, query, ledger=None, **request):
+    request = {"model": "m", "max_tokens": 4096, **request}
+    return client.messages.create(system=get_system_prompt_with_context(ammo_status=ledger),
+                                  messages=[{"role": "user", "content": query}], **request)
+
+
+def test_config_from_spec():
+    config = MockConfig.from_spec("ttft_s=0.2, tokens_per_s=0,error_rate=0.05,chunk_tokens=4,bogus=1,1")
+    assert (config.ttft_s, config.tokens_per_s, config.error_rate, config.chunk_tokens) == (0.2, 0.0, 0.05, 4)
+    assert isinstance(config.chunk_tokens, int)
+    assert MockConfig.from_spec("1") == MockConfig.from_spec("") == MockConfig()
+
+
+def test_fire_intent_answers_carry_an_ammo_update_for_a_ledger_row(ledger):
+    client = MockAnthropic(MockConfig.from_spec(INSTANT))
+    text = ask(client, "Fire a mission on TGT-0042", ledger).content[0].text
+    update = text.split("AMMO_UPDATE:\n", 1)[1].splitlines()
+    asset, munition = update[0].removeprefix("ASSET: "), update[1].removeprefix("MUNITION: ")
+    assert munition in ledger[asset] and update[2] == "EXPENDED: 4"
+    assert "AMMO_UPDATE" not in ask(client, "What is the range of PrSM?", ledger).content[0].text
+
+
+def test_max_tokens_cuts_the_answer():
+    client = MockAnthropic(MockConfig.from_spec(INSTANT))
+    message = ask(client, "Recommend a fires plan", max_tokens=20)
+    assert message.stop_reason == "max_tokens" and len(message.content[0].text) == 80
+    assert message.usage.input_tokens > 1000 and message.usage.output_tokens <= 21
+
+
+def test_stream_reassembles_the_final_message():
+    client = MockAnthropic(MockConfig.from_spec(INSTANT + ",chunk_tokens=3"))
+    with client.messages.stream(model="m", max_tokens=4096, system="",
+                                messages=[{"role": "user", "content": "status?"}]) as stream:
+        events = list(stream)
+        final = stream.get_final_message()
+    deltas = [e.delta.text for e in events if e.type == "content_block_delta"]
+    assert "".join(deltas) == final.content[0].text and all(len(d) <= 12 for d in deltas)
+    assert [events[0].type, events[-1].type] == ["message_start", "message_stop"]
+
+
+def test_injected_errors_are_sdk_status_errors_the_scheduler_retries():
+    client = MockAnthropic(MockConfig.from_spec(INSTANT + ",error_rate=1"))
+    statuses = set()
+    for _ in range(20):
+        with pytest.raises(anthropic.APIStatusError) as raised:
+            ask(client, "status?")
+        assert isinstance(raised.value, MockAPIError)
+        statuses.add(raised.value.status_code)
+    assert statuses == {429, 529}
+
+    sleeps = []
+    scheduler = RequestScheduler(requests_per_min=6000, input_tokens_per_min=10 ** 9, max_retries=3,
+                                 sleep=sleeps.append)
+    with pytest.raises(MockAPIError):
+        scheduler.submit("s", lambda: ask(client, "status?"))
+    assert len(sleeps) == 3 and scheduler.stats["retries"] == 3
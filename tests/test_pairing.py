@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from fires import pairing
+
+
+def tool(params, ledger, catalog):
+    return json.loads(pairing.run_pairing_tool(params, ledger, catalog))
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 0.9), (0.8, 0.8), (90, 0.9), ("85%", 0.85), (1.0, 0.99), (100, 0.99), (0.001, 0.01),
+])
+def test_desired_pk_accepts_fractions_and_percentages(value, expected):
+    assert pairing.desired_pk_from(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", ["abc", -0.5, 0, 150, float("nan")])
+def test_desired_pk_rejects_bad_values(value):
+    with pytest.raises(ValueError):
+        pairing.desired_pk_from(value)
+
+
+def test_rounds_required_matches_formula():
+    assert pairing.rounds_required(0.5, 0.9) == 4        # 1 - 0.5^4 = 0.9375
+    assert pairing.rounds_required(0.9, 0.9) == 1
+    assert pairing.rounds_required(1.0, 0.99) == 1
+
+
+@pytest.mark.parametrize("desired_pk", [90, 1, "90%"])
+def test_tool_normalizes_desired_pk(desired_pk, desron, catalog):
+    result = tool({"target": "HQ-9 battery", "range_km": 80, "desired_pk": desired_pk}, desron, catalog)
+    assert "error" not in result
+    assert 0 < result["desired_pk"] < 1
+
+
+@pytest.mark.parametrize("params", [
+    {"target": "HQ-9 battery", "range_km": 80, "desired_pk": "very high"},
+    {"target": "HQ-9 battery", "range_km": "far"},
+    {"target": "HQ-9 battery"},
+    {"target": "HQ-9 battery", "range_km": 80, "max_results": "all"},
+])
+def test_tool_returns_error_for_bad_input(params, desron, catalog):
+    assert "error" in tool(params, desron, catalog)
+
+
+def test_ship_target_ranking_uses_reference_pk_only(desron, catalog):
+    result = tool({"target": "Type 052D destroyer", "range_km": 150}, desron, catalog)
+    assert result["target"]["target_class"] == "ship"
+    best = result["options"][0]
+    assert "NSM" in best["munition"]
+    for option in result["options"]:
+        # TLAM has no §8.1/§10.2 ship Pk; it must not be ranked on an invented one
+        if "TLAM" in option["munition"]:
+            assert option["pk"] is None
+
+
+def test_himars_excluded_against_mobile_target(ledger, catalog):
+    result = tool({"target": "moving armor column", "range_km": 40}, ledger, catalog)
+    assert all("HIMARS" not in o["asset"] for o in result["options"])
+    assert any("HIMARS" in e["asset"] for e in result["excluded"])
+
+
+def test_empty_magazine_is_excluded(ledger, catalog):
+    ledger["HIMARS Battery (6x)"]["GMLRS"]["expended"] = ledger["HIMARS Battery (6x)"]["GMLRS"]["initial"]
+    usable, excluded = pairing.recommend(ledger, pairing.Target("HQ-9 radar", 60, "sam_radar"), catalog)
+    assert not any(o.munition == "GMLRS" for o in usable)
+    assert any(o.munition == "GMLRS" and o.excluded == "magazine empty" for o in excluded)
+
+
+def test_classify_target_matches_whole_words():
+    assert pairing.classify_target("light armor company") == "light_armor"
+    assert pairing.classify_target("fuel tanker convoy") == "soft_vehicle"
+    assert pairing.classify_target("same-day logistics depot") == "structure"
+    assert pairing.classify_target("passage control point") == "soft_vehicle"
+    assert pairing.classify_target("Canadian supply convoy") == "soft_vehicle"
+    assert pairing.classify_target("Canadian radar") == "sam_radar"            # by "radar", not "ada"
+
+
+def test_classify_target_keeps_designators_and_plurals():
+    assert pairing.classify_target("Type 052D destroyer") == "ship"
+    assert pairing.classify_target("CG-47") == "ship"
+    assert pairing.classify_target("HQ-9B battery") == "sam_radar"
+    assert pairing.classify_target("2x T-90 tanks") == "armor"
+    assert pairing.classify_target("PHL-16 launchers") == "artillery"
@@ -0,0 +1,57 @@
+from fires import red_ledger
+from fires.presets import ADVERSARY_PRESETS
+
+
+def test_red_keywords_match_whole_words_only():
+    for name in ("USS Fredericksburg", "Reduced-charge M777", "Covered Position", "Shredder Team"):
+        assert not red_ledger.is_red(name), name
+    for name in ("Red DDG", "OPFOR Battalion", "Type 052D Luyang III", "Type 054A Jiangkai II",
+                 "HQ-9B battery", "YJ-12 regiment", "Z-9 Helo (HJ-8 ASM)", "Olvana SAG 12"):
+        assert red_ledger.is_red(name), name
+
+
+def test_friendly_assets_drops_red_rows_only():
+    ledger = {"DDG-89 Fredericksburg": {"TLAM": {"initial": 8, "expended": 0}},
+              "Red CG-102 Lhasa": {"YJ-18": {"initial": 16, "expended": 0}}}
+    assert list(red_ledger.friendly_assets(ledger)) == ["DDG-89 Fredericksburg"]
+
+
+NAVAL = ADVERSARY_PRESETS["Olvana (Chinese-type)"]["naval"]
+LHASA = "CG-102 Lhasa (Type 055 Renhai-class Cruiser)"
+HENGYANG = "FFG Hengyang (Type 054A Jiangkai II-class Frigate)"
+
+
+def test_seed_has_one_entry_per_hull_with_missile_rows(catalog):
+    seeded = red_ledger.seed(catalog)
+    assert len(seeded) == 7 and all(red_ledger.is_red(hull) for hull in seeded)
+    assert sum(1 for hull in seeded if "Type 054A" in hull) == 4        # per-ship table expanded by hull name
+    assert seeded[LHASA]["YJ-18 ASM"] == {"initial": 16, "expended": 0}
+    assert all(red_ledger.MAGAZINE_ROW.match(m) for munitions in seeded.values() for m in munitions)
+    assert {red_ledger.hull_class(hull, NAVAL) for hull in seeded} == {
+        "Type 055 (Renhai CG)", "Type 052D (Luyang III DDG)", "Type 054A (Jiangkai II FFG)"}
+
+
+def test_alpha_falls_as_the_ascms_run_out(catalog):
+    seeded = red_ledger.seed(catalog)
+    full = red_ledger.projected_alpha(seeded, NAVAL)
+    assert full[LHASA] == 6.0 and full[HENGYANG] == 3.0
+    seeded[HENGYANG]["YJ-83 ASM"]["expended"] = 12                      # 4 left = half a salvo
+    seeded[LHASA]["YJ-83 ASM"]["expended"] = 16
+    seeded[LHASA]["YJ-18 ASM"]["expended"] = 16                         # LACMs and SAMs don't count
+    alpha = red_ledger.projected_alpha(seeded, NAVAL)
+    assert alpha[HENGYANG] == 1.5 and alpha[LHASA] == 0.0
+    ships, beta = red_ledger.hughes_inputs(seeded, NAVAL)
+    assert ships == 7 and beta == sum(alpha.values()) / 7
+    magazines = {c.name: c.magazine for c in red_ledger.red_classes(seeded, NAVAL)}
+    assert magazines[HENGYANG] == 4 and magazines[LHASA] == 0
+
+
+def test_salvo_expenditure_draws_from_the_fullest_hulls_in_row_order(catalog):
+    seeded = red_ledger.seed(catalog)
+    seeded[LHASA]["YJ-83 ASM"]["expended"] = 14
+    fired = red_ledger.salvo_shooters(seeded, ships=2.5)
+    assert sorted(fired.values()) == [8, 8, 8] and LHASA in fired    # both 052Ds (24 left), then the Lhasa (18)
+    assert red_ledger.expenditure_updates(seeded, {LHASA: 8}) == [
+        {"asset": LHASA, "munition": "YJ-83 ASM", "update_type": "EXPENDED", "value": 2},
+        {"asset": LHASA, "munition": "YJ-18 ASM", "update_type": "EXPENDED", "value": 6},
+    ]
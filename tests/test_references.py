@@ -0,0 +1,53 @@
+from services.references import ReferenceRegistry, split_sections
+
+
+def test_split_sections_starts_at_each_heading():
+    text = "preamble\n# Title\nintro\n## 1. Guns\n### 1.1 Mk 45\nrange 24 km\n### 1.2 TLAM\nrange 1600 km\n"
+    assert [h for h, _ in split_sections(text)] == ["Title", "1. Guns", "1.1 Mk 45", "1.2 TLAM"]
+    assert split_sections(text)[2][1] == "### 1.1 Mk 45\nrange 24 km"
+
+
+def test_matching_sections_lead_with_the_asked_about_system():
+    references = ReferenceRegistry()
+    excerpt = references.matching_sections("What is the range of PrSM?", max_chars=8000)
+    assert excerpt.startswith("### 2.5 PrSM")
+    assert len(excerpt) <= 8000
+
+
+def test_matching_sections_reach_the_hughes_reference():
+    references = ReferenceRegistry()
+    excerpt = references.matching_sections("Type 055 α/y/b", ("weapons", "hughes"), max_chars=8000)
+    assert "### 3.1 Offensive Power Estimates" in excerpt
+    assert "Type 055" in excerpt
+    # Nothing matches: the start of the weapons reference, as before
+    assert references.matching_sections("zzz", max_chars=500) == references.text("weapons")[:500]
+
+
+def test_missing_reference_is_reported(tmp_path):
+    (tmp_path / "weapons_reference_v3.md").write_text("# Weapons\n## NAVAL SURFACE FIRE SUPPORT\n")
+    references = ReferenceRegistry([tmp_path])
+    assert not references.ok
+    assert any("missing expected section(s)" in p and "ADVERSARY SYSTEMS" in p for p in references.problems)
+    assert any(p.startswith("Hughes salvo model: not found") for p in references.problems)
+    assert references.matching_sections("range", ("hughes",)) == ""
+
+
+def test_shipped_references_load_clean():
+    references = ReferenceRegistry()
+    assert references.ok, references.problems
+    assert references.path("hughes").name == "hughes_salvo_model.md.md"      # accepted alternate file name
+
+
+def test_data_dir_override_wins_and_changes_the_content_hash(tmp_path, monkeypatch):
+    shipped = ReferenceRegistry()
+    (tmp_path / "fires_doctrine_reference.md").write_bytes(
+        shipped.text("doctrine").encode("utf-8") + b"\n## Local annex\n\xff\n")
+    monkeypatch.setenv("FIRES_DATA_DIR", str(tmp_path))
+    references = ReferenceRegistry()
+    assert references.path("doctrine") == tmp_path / "fires_doctrine_reference.md"
+    assert references.path("weapons") == shipped.path("weapons")             # falls through to data/
+    assert references.problems == ["Fires doctrine reference: not valid UTF-8 — undecodable bytes replaced"]
+    assert references.text("doctrine").endswith("## Local annex\n�\n")
+    assert references.content_hash != shipped.content_hash
+    (tmp_path / "fires_doctrine_reference.md").write_text("  \n")
+    assert ReferenceRegistry().problems == ["Fires doctrine reference: file is empty"]
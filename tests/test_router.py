@@ -0,0 +1,43 @@
+import pytest
+
+from services import router
+
+TIERS = {
+    "fast": router.Tier("fast", "fast-model", 1024, reduced_prompt=True),
+    "large": router.Tier("large", "large-model", 4096),
+}
+
+
+@pytest.mark.parametrize("query, category", [
+    ("What is the range of PrSM?", "lookup"),
+    ("Type 055 α/y/b", "lookup"),                               # parameter names, no values
+    ("what is the staying power of a DDG", "lookup"),
+    ("expended 4 GMLRS", "bookkeeping"),
+    ("resupplied 36 GMLRS to HIMARS", "bookkeeping"),
+    ("how many rounds of GMLRS for 90% Pk on a radar", "calculation"),
+    ("α=8, y=6, b=3 for the SAG", "calculation"),
+    ("time of flight for TLAM at 900 km", "calculation"),
+    ("recommend a fires plan against the HQ-9 radar", "planning"),
+    ("what is the range of NSM versus YJ-18", "planning"),      # planning outranks lookup
+    ("tell me about the island", "planning"),                   # unmatched is the safe default
+])
+def test_categories(query, category):
+    assert router.classify(query)[0] == category
+
+
+def test_tiers_follow_category():
+    assert router.route("What is the range of PrSM?", TIERS).tier.name == "fast"
+    assert router.route("expended 4 GMLRS", TIERS).tier.name == "fast"
+    assert router.route("calculate rounds for 0.9 desired pk", TIERS).tier.name == "large"
+    assert router.route("develop a scheme of fires", TIERS).tier.name == "large"
+    # No fast tier configured: everything goes large
+    assert router.route("What is the range of PrSM?", {"large": TIERS["large"]}).tier.name == "large"
+
+
+def test_word_count_boundaries():
+    filler = " PrSM"
+    at_limit = "what is the range of" + filler * (router.LOOKUP_MAX_WORDS - 5)
+    assert router.classify(at_limit)[0] == "lookup"
+    assert router.classify(at_limit + filler) == ("planning", f"lookup over {router.LOOKUP_MAX_WORDS} words")
+    long_bookkeeping = "expended" + " 1 GMLRS" * router.PLANNING_MIN_WORDS
+    assert router.classify(long_bookkeeping)[0] == "planning"
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from fires.salvo import Force, ShipClass, engage, hughes_salvo_calc, ledger_classes
+
+
+@pytest.mark.parametrize("alpha, A, beta, B, y, z, a, b", [
+    (4.0, 2, 6.0, 3, 2.0, 6.0, 2.0, 1.5),      # both sides leak
+    (8.0, 4, 4.0, 2, 3.0, 5.0, 1.5, 2.0),      # red fully defended against, blue takes no losses
+    (16.0, 3, 8.0, 2, 1.0, 1.0, 1.0, 1.0),     # red wiped out, losses clipped at the force size
+])
+def test_one_class_each_matches_the_hughes_equations(alpha, A, beta, B, y, z, a, b):
+    blue = Force("Blue", [ShipClass("Blue", A, alpha=alpha, y=z, b=a)])
+    red = Force("Red", [ShipClass("Red", B, alpha=beta, y=y, b=b)])
+    expected = hughes_salvo_calc(alpha, A, beta, B, y, z, a, b)
+    for policy in ("uniform", "priority", "focus"):
+        result = engage(blue, red, max_salvos=1, blue_policy=policy, red_policy=policy)
+        assert result.blue_fired[0] == pytest.approx(expected["blue_missiles_fired"])
+        assert result.red_fired[0] == pytest.approx(expected["red_missiles_fired"])
+        assert result.blue_hits[0] == pytest.approx(expected["blue_missiles_through_defense"])
+        assert result.red_hits[0] == pytest.approx(expected["red_missiles_through_defense"])
+        assert result.red_ships[1, 0] == pytest.approx(expected["B_remaining"])
+        assert result.blue_ships[1, 0] == pytest.approx(expected["A_remaining"])
+
+
+def test_local_defense_only_covers_the_class_under_fire():
+    blue = Force("Blue", [ShipClass("DDG", 2, alpha=10.0, y=0.0, b=10.0)])
+    red = Force("Red", [ShipClass("Shield", 1, alpha=0.0, y=20.0, b=1.0, priority=0.0),
+                        ShipClass("Target", 1, alpha=0.0, y=0.0, b=1.0, priority=1.0)])
+    pooled = engage(blue, red, max_salvos=1, defense="pooled")
+    local = engage(blue, red, max_salvos=1, defense="local")
+    assert pooled.red_ships[1].tolist() == [1.0, 1.0]           # the shield's intercepts cover the target
+    assert local.red_ships[1].tolist() == [1.0, 0.0]            # ... but not with point defense
+    assert local.outcome == "Red force eliminated"
+
+
+def test_focus_fire_kills_in_priority_order():
+    blue = Force("Blue", [ShipClass("DDG", 1, alpha=3.0, y=0.0, b=10.0)])
+    red = Force("Red", [ShipClass("CG", 1, alpha=0.0, y=0.0, b=2.0, priority=2.0),
+                        ShipClass("FFG", 2, alpha=0.0, y=0.0, b=1.0, priority=1.0)])
+    result = engage(blue, red, max_salvos=1, blue_policy="focus", defense="local")
+    assert result.red_ships[1].tolist() == pytest.approx([0.0, 1.0])
+
+
+def test_magazines_run_dry(ledger):
+    blue = Force("Blue", [ShipClass("DDG", 1, alpha=4.0, y=0.0, b=100.0, magazine=10.0)])
+    red = Force("Red", [ShipClass("Hulk", 1, alpha=0.0, y=0.0, b=100.0)])
+    result = engage(blue, red, max_salvos=10)
+    assert result.blue_fired.tolist() == [4.0, 4.0, 2.0]
+    assert result.blue_launched.tolist() == [10.0] and result.outcome == "both sides out of missiles"
+    assert all(c.magazine >= 0 for c in ledger_classes(ledger))
+
+
+def test_nmesis_is_never_targeted():
+    blue = Force("Blue", [ShipClass("NMESIS", 1, alpha=2.0, y=0.0, b=1.0, priority=0.0),
+                          ShipClass("DDG", 1, alpha=1.0, y=0.0, b=1.0)])
+    red = Force("Red", [ShipClass("Type 052D", 1, alpha=4.0, y=0.0, b=6.0)])
+    result = engage(blue, red, max_salvos=1)
+    assert result.blue_ships[1].tolist() == [1.0, 0.0]
+    assert result.outcome == "Blue force eliminated"
+    assert np.isclose(result.red_ships[1, 0], 1 - 3.0 / 6.0)       # NMESIS still shoots
@@ -0,0 +1,60 @@
+import sqlite3
+
+from services.session_store import SessionStore
+
+
+def test_list_sessions_is_scoped_to_owner_and_team(tmp_path):
+    store = SessionStore(tmp_path / "s.db")
+    alpha = store.create_session("alpha", scope="PG01/Alpha", owner="me")
+    store.create_session("bravo", scope="PG01/Bravo", owner="me")
+    solo = store.create_session("solo", owner="me")
+    store.create_session("stranger", owner="them")
+    assert [s["session_id"] for s in store.list_sessions("me", "PG01/Alpha")] == [alpha]
+    assert [s["session_id"] for s in store.list_sessions("me")] == [solo]
+    assert store.list_sessions("") == []
+    store.set_scope(solo, "PG01/Alpha")
+    assert {s["session_id"] for s in store.list_sessions("me", "PG01/Alpha")} == {alpha, solo}
+
+
+def test_resume_requires_the_owner_token(tmp_path):
+    store = SessionStore(tmp_path / "s.db")
+    sid = store.create_session(owner="me")
+    assert store.session_exists(sid)
+    assert store.session_exists(sid, "me")
+    assert not store.session_exists(sid, "them")
+    assert not store.session_exists(sid, "")
+
+
+def test_save_state_skips_unchanged_keys(tmp_path):
+    store = SessionStore(tmp_path / "s.db")
+    sid = store.create_session()
+    digests = {}
+    assert sorted(store.save_state(sid, {"adversary": "PLAN SAG", "map_units": []}, digests)) == \
+        ["adversary", "map_units"]
+    assert store.save_state(sid, {"adversary": "PLAN SAG", "map_units": []}, digests) == []
+    assert store.save_state(sid, {"adversary": "Other", "map_units": []}, digests) == ["adversary"]
+    restored = {}
+    assert store.load_state(sid, restored) == {"adversary": "Other", "map_units": []}
+    assert restored == digests                                  # a resumed session starts clean
+
+
+def test_messages_page_in_order(tmp_path):
+    store = SessionStore(tmp_path / "s.db")
+    sid = store.create_session()
+    store.append_messages(sid, [{"role": "user", "content": str(i)} for i in range(5)], 0)
+    assert store.message_count(sid) == 5
+    assert [m["content"] for m in store.load_messages(sid, limit=2)] == ["3", "4"]
+    assert [m["content"] for m in store.load_messages(sid, before_seq=3, limit=2)] == ["1", "2"]
+
+
+def test_older_database_gains_scope_column(tmp_path):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, label TEXT NOT NULL DEFAULT '', "
+                 "created REAL NOT NULL, updated REAL NOT NULL, n_messages INTEGER NOT NULL DEFAULT 0)")
+    conn.execute("INSERT INTO sessions VALUES ('old', '', 0, 0, 0)")
+    conn.commit()
+    conn.close()
+    store = SessionStore(path)
+    assert store.session_exists("old") and not store.session_exists("old", "anyone")
+    assert store.list_sessions("anyone") == []
@@ -0,0 +1,50 @@
+from fires import timeline as tl
+
+
+def test_launcher_count_reads_multiplier_anywhere_in_parenthesis():
+    assert tl.launcher_count("HIMARS Battery (6x)") == 6
+    assert tl.launcher_count("HIMARS (2x Launchers)") == 2
+    assert tl.launcher_count("OPF-M (7x JLTVs)") == 7
+    assert tl.launcher_count("DDG (NSFS)") == 1
+
+
+def test_rate_resolves_munition_before_asset():
+    assert tl.rate_of_fire("DDG (NSFS)", "TLAM") is not tl.RATES_OF_FIRE["Mk 45"]
+    assert tl.rate_of_fire("DDG (NSFS)", '5" Rounds') is tl.RATES_OF_FIRE["Mk 45"]
+    assert tl.rate_of_fire("HIMARS Battery (6x)", "ATACMS")["pod_rounds"] == 1
+    assert tl.rate_of_fire("M777 Battery (6x)", "ILLUM") is tl.RATES_OF_FIRE["M777"]
+
+
+def test_himars_reloads_between_pods():
+    # One launcher, 36 GMLRS = 6 pods: 5 reloads on top of the 6-round/25 s cadence
+    (s,) = tl.schedule([tl.Mission("A", "HIMARS (1x)", "GMLRS", 36, range_km=60)]).missions
+    assert s.launch_end_s >= 5 * tl.HIMARS_RELOAD_S
+    assert "5 reload(s) of 6-round pods" in s.notes
+
+    (s,) = tl.schedule([tl.Mission("A", "HIMARS (2x Launchers)", "GMLRS", 12, range_km=60)]).missions
+    assert s.launch_end_s < 30                                  # one pod per launcher, no reload
+
+
+def test_munition_change_needs_a_pod_change():
+    line = tl.schedule([
+        tl.Mission("A", "HIMARS (2x Launchers)", "GMLRS", 2, range_km=60, priority=1),
+        tl.Mission("B", "HIMARS (2x Launchers)", "ATACMS", 2, range_km=200, priority=2),
+    ])
+    a, b = sorted(line.missions, key=lambda s: s.mission_id)
+    assert b.launch_start_s >= a.launch_end_s + tl.HIMARS_RELOAD_S
+
+
+def test_burst_starts_from_the_fired_munition():
+    # Mk 45 bursts at 20 rds/min: 20 rounds inside a minute, not at the default missile cycle
+    (s,) = tl.schedule([tl.Mission("A", "DDG (NSFS)", '5" Rounds', 20, range_km=20)]).missions
+    assert s.launch_end_s < 60
+
+
+def test_tot_group_impacts_together():
+    line = tl.schedule([
+        tl.Mission("A", "HIMARS Battery (6x)", "GMLRS", 6, range_km=70, tot_group="G"),
+        tl.Mission("B", "M777 Battery (6x)", "HE", 6, range_km=20, tot_group="G"),
+    ])
+    impacts = {s.first_impact_s for s in line.missions}
+    assert max(impacts) - min(impacts) <= 0.5
+    assert line.tot_groups["G"] == max(impacts)
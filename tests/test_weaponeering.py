@@ -0,0 +1,52 @@
+from fires import weaponeering
+
+
+def worksheet():
+    return [
+        {"Target Number": "AA0001", "Description": "HQ-9 battery radar", "Target Type": "SAM radar",
+         "Range (km)": "60", "Desired Pk": "90%", "Priority": 1},
+        {"Target Number": "AA0002", "Description": "Type 052D destroyer", "Target Type": "ship",
+         "Range (km)": 150, "Desired Pk": None, "Priority": 2},
+        {"Target Number": "AA0003", "Description": "Depot", "Target Type": "structure",
+         "Range (km)": 5000, "Desired Pk": None, "Priority": 3},
+    ]
+
+
+def test_parse_target_list_maps_worksheet_columns():
+    t1, t2, _ = weaponeering.parse_target_list(worksheet())
+    assert (t1.target_id, t1.target_class, t1.range_km, t1.desired_pk, t1.priority) == \
+        ("AA0001", "sam_radar", 60.0, 0.9, 1)
+    assert t2.target_class == "ship" and t2.desired_pk is None
+
+
+def test_range_in_nautical_miles_is_converted():
+    (t,) = weaponeering.parse_target_list([{"Tgt No": 1, "Target": "Radar", "Range (NM)": 10}])
+    assert t.range_km == 18.52
+
+
+def test_solve_meets_desired_pk_and_sums_draw(ledger, catalog):
+    result = weaponeering.solve(weaponeering.parse_target_list(worksheet()), ledger, catalog)
+    radar, ship, depot = result.plan
+    assert radar["munition"] and radar["achieved_pk"] >= 0.9
+    assert ship["munition"] and ship["achieved_pk"] >= ship["desired_pk"]
+    assert depot["munition"] == "" and depot["note"] == "no suitable munition in range"
+    drawn = {(d["asset"], d["munition"]): d["required"] for d in result.draw}
+    assert drawn[(radar["asset"], radar["munition"])] >= radar["rounds"]
+    assert sum(drawn.values()) == radar["rounds"] + ship["rounds"]
+
+
+def test_directed_munition_is_honoured_when_feasible(ledger, catalog):
+    def plan(munition):
+        (row,) = weaponeering.solve([weaponeering.TargetRow("T1", "HQ-9 radar", "sam_radar", range_km=30,
+                                                            munition=munition)], ledger, catalog).plan
+        return row
+
+    assert plan("")["munition"] == "Excalibur"                 # best Pk when nothing is directed
+    assert plan("GMLRS")["munition"] == "GMLRS" and plan("GMLRS")["note"] == ""
+    assert plan("TLAM")["note"] == "directed TLAM not feasible — best alternative shown"
+
+
+def test_worksheet_classes_use_whole_words():
+    rows = [{"Target Number": 1, "Description": "Light armor company", "Target Type": ""},
+            {"Target Number": 2, "Description": "Fuel tanker convoy", "Target Type": ""}]
+    assert [t.target_class for t in weaponeering.parse_target_list(rows)] == ["light_armor", "soft_vehicle"]